@@ -66,6 +66,16 @@ void array::eval(bool retain_graph /* = false */) {
   mlx::core::eval({*this}, retain_graph);
 }
 
+bool array::is_donatable() const {
+  using free_t = void (*)(allocator::Buffer);
+  if (array_desc_.use_count() != 1 || array_desc_->data == nullptr ||
+      array_desc_->data.use_count() != 1 || has_primitive() || is_tracer()) {
+    return false;
+  }
+  auto d = array_desc_->data->d.target<free_t>();
+  return d != nullptr && *d == allocator::free;
+}
+
 void array::set_data(allocator::Buffer buffer, deleter_t d) {
   array_desc_->data = std::make_shared<Data>(buffer, d);
   array_desc_->data_ptr = buffer.raw_ptr();
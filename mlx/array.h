@@ -269,6 +269,12 @@ class array {
     return array_desc_->is_tracer;
   }
 
+  // Check if the buffer of the array can be reused for the output of an
+  // operation. This is only the case if nothing else refers to the array or
+  // to its buffer, the array is detached from the graph and the buffer was
+  // allocated by the allocator.
+  bool is_donatable() const;
+
   void set_data(allocator::Buffer buffer, deleter_t d = allocator::free);
 
   void set_data(
@@ -426,6 +432,9 @@ void array::init(It src) {
     case float32:
       std::copy(src, src + size(), data<float>());
       break;
+    case float64:
+      std::copy(src, src + size(), data<double>());
+      break;
     case bfloat16:
       std::copy(src, src + size(), data<bfloat16_t>());
       break;
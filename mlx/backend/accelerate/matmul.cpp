@@ -29,11 +29,66 @@ std::tuple<bool, size_t, array> check_transpose(const array& arr) {
   }
 }
 
-inline void matmul_cblas(const array& a_pre, const array& b_pre, array& out) {
-  if (out.dtype() != float32) {
-    throw std::runtime_error(
-        "[matmul_cblas] on CPU currently only supports float32");
-  }
+inline void gemm(
+    bool a_transposed,
+    bool b_transposed,
+    size_t M,
+    size_t N,
+    size_t K,
+    const float* a,
+    size_t lda,
+    const float* b,
+    size_t ldb,
+    float* c,
+    size_t ldc) {
+  cblas_sgemm(
+      CblasRowMajor,
+      a_transposed ? CblasTrans : CblasNoTrans, // transA
+      b_transposed ? CblasTrans : CblasNoTrans, // transB
+      M,
+      N,
+      K,
+      1.0f, // alpha
+      a,
+      lda,
+      b,
+      ldb,
+      0.0f, // beta
+      c,
+      ldc);
+}
+
+inline void gemm(
+    bool a_transposed,
+    bool b_transposed,
+    size_t M,
+    size_t N,
+    size_t K,
+    const double* a,
+    size_t lda,
+    const double* b,
+    size_t ldb,
+    double* c,
+    size_t ldc) {
+  cblas_dgemm(
+      CblasRowMajor,
+      a_transposed ? CblasTrans : CblasNoTrans, // transA
+      b_transposed ? CblasTrans : CblasNoTrans, // transB
+      M,
+      N,
+      K,
+      1.0, // alpha
+      a,
+      lda,
+      b,
+      ldb,
+      0.0, // beta
+      c,
+      ldc);
+}
+
+template <typename T>
+void matmul_cblas(const array& a_pre, const array& b_pre, array& out) {
   out.set_data(allocator::malloc_or_wait(out.nbytes()));
 
   auto [a_transposed, lda, a] = check_transpose(a_pre);
@@ -43,20 +98,17 @@ inline void matmul_cblas(const array& a_pre, const array& b_pre, array& out) {
   size_t K = a.shape(-1);
 
   for (int i = 0; i < (a.size() / (M * K)); ++i) {
-    cblas_sgemm(
-        CblasRowMajor,
-        a_transposed ? CblasTrans : CblasNoTrans, // transA
-        b_transposed ? CblasTrans : CblasNoTrans, // transB
+    gemm(
+        a_transposed,
+        b_transposed,
         M,
         N,
         K,
-        1.0f, // alpha
-        a.data<float>() + elem_to_loc(M * K * i, a.shape(), a.strides()),
+        a.template data<T>() + elem_to_loc(M * K * i, a.shape(), a.strides()),
         lda,
-        b.data<float>() + elem_to_loc(K * N * i, b.shape(), b.strides()),
+        b.template data<T>() + elem_to_loc(K * N * i, b.shape(), b.strides()),
         ldb,
-        0.0f, // beta
-        out.data<float>() + M * N * i,
+        out.data<T>() + M * N * i,
         out.shape(-1) // ldc
     );
   }
@@ -161,7 +213,9 @@ inline void matmul_bnns(const array& a_pre, const array& b_pre, array& out) {
 
 void Matmul::eval_cpu(const std::vector<array>& inputs, array& out) {
   if (out.dtype() == float32) {
-    return matmul_cblas(inputs[0], inputs[1], out);
+    return matmul_cblas<float>(inputs[0], inputs[1], out);
+  } else if (out.dtype() == float64) {
+    return matmul_cblas<double>(inputs[0], inputs[1], out);
   }
   return matmul_bnns(inputs[0], inputs[1], out);
 }
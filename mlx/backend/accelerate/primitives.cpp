@@ -20,19 +20,24 @@
 namespace mlx::core {
 
 // Use the default implementation for the following primitives
+DEFAULT(AdafactorStep)
 DEFAULT(Arange)
 DEFAULT(ArgPartition)
 DEFAULT(ArgReduce)
 DEFAULT(ArgSort)
+DEFAULT(ArgTopK)
 DEFAULT(AsStrided)
 DEFAULT(Broadcast)
+DEFAULT(Checkpoint)
 DEFAULT(Concatenate)
 DEFAULT(Copy)
+DEFAULT(Depends)
 DEFAULT(Equal)
 DEFAULT(Erf)
 DEFAULT(ErfInv)
 DEFAULT(FFT)
 DEFAULT(Gather)
+DEFAULT(GlobalNorm)
 DEFAULT(Greater)
 DEFAULT(GreaterEqual)
 DEFAULT(Less)
@@ -41,11 +46,15 @@ DEFAULT(Load)
 DEFAULT(LogicalNot)
 DEFAULT(LogAddExp)
 DEFAULT(NotEqual)
+DEFAULT(OptimizerStep)
 DEFAULT(Pad)
 DEFAULT(Partition)
+DEFAULT(QuantizedAdamStep)
 DEFAULT(RandomBits)
+DEFAULT(RandomSample)
 DEFAULT(Reshape)
 DEFAULT(Scatter)
+DEFAULT(Select)
 DEFAULT(Sigmoid)
 DEFAULT(Sign)
 DEFAULT(Slice)
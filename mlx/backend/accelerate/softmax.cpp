@@ -313,6 +313,7 @@ void Softmax::eval_cpu(const std::vector<array>& inputs, array& out) {
           NeonFp16SimdOps<float16_t, float16x8_t>,
           8>(in, out);
       break;
+    case float64:
     case bfloat16:
       eval(inputs, out);
       break;
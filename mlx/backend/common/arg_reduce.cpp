@@ -1,32 +1,189 @@
 // Copyright © 2023 Apple Inc.
 
 #include <cassert>
+#include <optional>
+#include <type_traits>
+#include <vector>
 
+#include "mlx/allocator.h"
+#include "mlx/backend/common/copy.h"
+#include "mlx/backend/common/threading.h"
+#include "mlx/backend/common/utils.h"
 #include "mlx/primitives.h"
-#include "utils.h"
 
 namespace mlx::core {
 
 namespace {
 
-template <typename InT, typename OpT>
-void arg_reduce(const array& in, array& out, const OpT& op, int axis) {
-  auto axis_size = in.shape()[axis];
-  auto axis_stride = in.strides()[axis];
-  std::vector<size_t> strides = in.strides();
-  std::vector<int> shape = in.shape();
-  strides.erase(strides.begin() + axis);
-  shape.erase(shape.begin() + axis);
-  for (uint32_t i = 0; i < out.size(); ++i) {
-    auto loc = elem_to_loc(i, shape, strides);
-    auto in_ptr = in.data<InT>() + loc;
-    uint32_t ind_v = 0;
-    InT v = (*in_ptr);
-    for (uint32_t j = 0; j < axis_size; ++j, in_ptr += axis_stride) {
-      op(j, (*in_ptr), &ind_v, &v);
+// Half precision values are compared as floats so that they are only
+// converted once
+template <typename T>
+using compare_t = std::conditional_t<
+    std::is_same_v<T, float16_t> || std::is_same_v<T, bfloat16_t>,
+    float,
+    T>;
+
+template <typename T>
+bool is_nan(T x) {
+  if constexpr (std::is_floating_point_v<T>) {
+    return x != x;
+  } else {
+    return false;
+  }
+}
+
+// better(x, y) is true if x should replace y as the result. NaNs win over
+// any other value like in numpy and ties keep the first index. The bitwise
+// operators avoid branches which would keep the loops below from being
+// vectorized.
+struct ArgMinOp {
+  template <typename T>
+  static bool better(T x, T y) {
+    return (x < y) | (is_nan(x) & !is_nan(y));
+  }
+};
+
+struct ArgMaxOp {
+  template <typename T>
+  static bool better(T x, T y) {
+    return (x > y) | (is_nan(x) & !is_nan(y));
+  }
+};
+
+template <typename T>
+struct ArgResult {
+  T val;
+  uint32_t ind;
+};
+
+template <typename Op, typename T>
+void update(ArgResult<T>& r, T val, uint32_t ind) {
+  if (Op::better(val, r.val) || (!Op::better(r.val, val) && ind < r.ind)) {
+    r = {val, ind};
+  }
+}
+
+// Updates the results vals and inds of width columns with the rows 1 to
+// count of x which are stride elements apart. Row 0 is the initial result
+// and inds are the rows the results come from.
+template <typename Op, typename T, typename A>
+void arg_reduce_columns(
+    const T* x,
+    A* vals,
+    uint32_t* inds,
+    uint32_t count,
+    size_t stride,
+    int width) {
+  for (uint32_t i = 1; i < count; i++) {
+    x += stride;
+    for (int k = 0; k < width; k++) {
+      A xk = static_cast<A>(x[k]);
+      A v = vals[k];
+      bool b = Op::better(xk, v);
+      vals[k] = b ? xk : v;
+      inds[k] = b ? i : inds[k];
+    }
+  }
+}
+
+// Reduces x[start, end) of a contiguous row. Long rows are reduced as
+// columns of a matrix with lanes columns so that the loop over the lanes
+// vectorizes and the lanes are combined at the end.
+template <typename Op, typename T, typename A = compare_t<T>>
+ArgResult<A> arg_reduce_row(const T* x, uint32_t start, uint32_t end) {
+  constexpr uint32_t lanes = 256;
+  ArgResult<A> r{static_cast<A>(x[start]), start};
+  uint32_t i = start + 1;
+  if (end - start >= 2 * lanes) {
+    std::vector<A> vals(x + start, x + start + lanes);
+    uint32_t rows[lanes] = {};
+    uint32_t count = (end - start) / lanes;
+    arg_reduce_columns<Op>(x + start, vals.data(), rows, count, lanes, lanes);
+    r = {vals[0], start + rows[0] * lanes};
+    for (uint32_t j = 1; j < lanes; j++) {
+      update<Op>(r, vals[j], start + rows[j] * lanes + j);
+    }
+    i = start + count * lanes;
+  }
+  for (; i < end; i++) {
+    A xi = static_cast<A>(x[i]);
+    if (Op::better(xi, r.val)) {
+      r = {xi, i};
     }
-    out.data<uint32_t>()[i] = ind_v;
   }
+  return r;
+}
+
+template <typename InT, typename Op>
+void arg_reduce(const array& in_, array& out, int axis) {
+  int axis_size = in_.shape(axis);
+  uint32_t* out_ptr = out.data<uint32_t>();
+  size_t n_rows = out.size();
+  int n_threads = num_threads(in_.size());
+
+  if (in_.strides()[axis] == 1) {
+    std::vector<int> shape = in_.shape();
+    std::vector<size_t> strides = in_.strides();
+    shape.erase(shape.begin() + axis);
+    strides.erase(strides.begin() + axis);
+    const InT* in_ptr = in_.data<InT>();
+
+    // A few long rows are split across threads and the results combined
+    if (n_rows < static_cast<size_t>(n_threads)) {
+      for (size_t r = 0; r < n_rows; r++) {
+        const InT* row = in_ptr + elem_to_loc(r, shape, strides);
+        size_t chunk = (axis_size + n_threads - 1) / n_threads;
+        std::vector<std::optional<ArgResult<compare_t<InT>>>> results(
+            n_threads);
+        parallel_for(n_threads, n_threads, [&](size_t t0, size_t t1) {
+          for (size_t t = t0; t < t1; t++) {
+            size_t start = t * chunk;
+            size_t end = std::min<size_t>(axis_size, start + chunk);
+            if (start < end) {
+              results[t] = arg_reduce_row<Op>(row, start, end);
+            }
+          }
+        });
+        auto result = *results[0];
+        for (int t = 1; t < n_threads && results[t]; t++) {
+          update<Op>(result, results[t]->val, results[t]->ind);
+        }
+        out_ptr[r] = result.ind;
+      }
+      return;
+    }
+
+    parallel_for(n_rows, n_threads, [&](size_t start, size_t end) {
+      StridedIterator it(shape, strides, start);
+      for (size_t r = start; r < end; r++, it.step()) {
+        out_ptr[r] = arg_reduce_row<Op>(in_ptr + it.loc, 0, axis_size).ind;
+      }
+    });
+    return;
+  }
+
+  // Otherwise reduce the rows of contiguous columns after the axis
+  array in = in_;
+  if (!in.flags().row_contiguous) {
+    in = array(in_.shape(), in_.dtype(), nullptr, {});
+    copy(in_, in, CopyType::General);
+  }
+  const InT* in_ptr = in.data<InT>();
+  size_t inner = in.strides()[axis];
+  constexpr size_t tile = 1024;
+  parallel_for(n_rows, n_threads, [&](size_t start, size_t end) {
+    while (start < end) {
+      size_t outer = start / inner;
+      size_t k = start % inner;
+      size_t width = std::min({end - start, inner - k, tile});
+      const InT* x = in_ptr + outer * axis_size * inner + k;
+      std::vector<compare_t<InT>> vals(x, x + width);
+      std::fill(out_ptr + start, out_ptr + start + width, 0);
+      arg_reduce_columns<Op>(
+          x, vals.data(), out_ptr + start, axis_size, inner, width);
+      start += width;
+    }
+  });
 }
 
 template <typename InT>
@@ -36,26 +193,12 @@ void arg_reduce_dispatch(
     ArgReduce::ReduceType rtype,
     int axis) {
   switch (rtype) {
-    case ArgReduce::ArgMin: {
-      auto op = [](auto ind_x, auto x, auto ind_y, auto y) {
-        if (x < (*y)) {
-          (*y) = x;
-          (*ind_y) = ind_x;
-        }
-      };
-      arg_reduce<InT>(in, out, op, axis);
+    case ArgReduce::ArgMin:
+      arg_reduce<InT, ArgMinOp>(in, out, axis);
       break;
-    }
-    case ArgReduce::ArgMax: {
-      auto op = [](auto ind_x, auto x, auto ind_y, auto y) {
-        if (x > (*y)) {
-          (*y) = x;
-          (*ind_y) = ind_x;
-        }
-      };
-      arg_reduce<InT>(in, out, op, axis);
+    case ArgReduce::ArgMax:
+      arg_reduce<InT, ArgMaxOp>(in, out, axis);
       break;
-    }
   }
 }
 
@@ -65,10 +208,14 @@ void ArgReduce::eval(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   auto& in = inputs[0];
   out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
 
   switch (in.dtype()) {
     case bool_:
-      arg_reduce_dispatch<bool>(in, out, reduce_type_, axis_);
+      // Booleans compare like their bytes
+      arg_reduce_dispatch<uint8_t>(in, out, reduce_type_, axis_);
       break;
     case uint8:
       arg_reduce_dispatch<uint8_t>(in, out, reduce_type_, axis_);
@@ -100,6 +247,9 @@ void ArgReduce::eval(const std::vector<array>& inputs, array& out) {
     case float32:
       arg_reduce_dispatch<float>(in, out, reduce_type_, axis_);
       break;
+    case float64:
+      arg_reduce_dispatch<double>(in, out, reduce_type_, axis_);
+      break;
     case bfloat16:
       arg_reduce_dispatch<bfloat16_t>(in, out, reduce_type_, axis_);
       break;
@@ -57,6 +57,9 @@ void comparison_op(const array& a, const array& b, array& out, Op op) {
     case float32:
       comparison_op<float, bool>(a, b, out, op);
       break;
+    case float64:
+      comparison_op<double, bool>(a, b, out, op);
+      break;
     case bfloat16:
       comparison_op<bfloat16_t, bool>(a, b, out, op);
       break;
@@ -4,6 +4,7 @@
 
 #include "mlx/allocator.h"
 #include "mlx/array.h"
+#include "mlx/backend/common/threading.h"
 #include "mlx/backend/common/utils.h"
 
 namespace mlx::core {
@@ -36,6 +37,18 @@ BinaryOpType get_binary_op_type(const array& a, const array& b) {
   return bopt;
 }
 
+// Donate the buffer of in to out if it is not needed elsewhere and has the
+// layout the output would be given. Elementwise operations read every input
+// element before writing the output element at the same position so the
+// buffer can be updated in place.
+bool donate_buffer(const array& in, array& out) {
+  if (in.dtype() != out.dtype() || !in.is_donatable()) {
+    return false;
+  }
+  out.copy_shared_buffer(in);
+  return true;
+}
+
 void set_binary_op_output_data(
     const array& a,
     const array& b,
@@ -47,19 +60,24 @@ void set_binary_op_output_data(
           allocator::malloc_or_wait(out.itemsize()), 1, a.strides(), a.flags());
       break;
     case ScalarVector:
-      out.set_data(
-          allocator::malloc_or_wait(b.data_size() * out.itemsize()),
-          b.data_size(),
-          b.strides(),
-          b.flags());
+      if (!donate_buffer(b, out)) {
+        out.set_data(
+            allocator::malloc_or_wait(b.data_size() * out.itemsize()),
+            b.data_size(),
+            b.strides(),
+            b.flags());
+      }
       break;
     case VectorScalar:
     case VectorVector:
-      out.set_data(
-          allocator::malloc_or_wait(a.data_size() * out.itemsize()),
-          a.data_size(),
-          a.strides(),
-          a.flags());
+      if (!donate_buffer(a, out) &&
+          !(bopt == VectorVector && donate_buffer(b, out))) {
+        out.set_data(
+            allocator::malloc_or_wait(a.data_size() * out.itemsize()),
+            a.data_size(),
+            a.strides(),
+            a.flags());
+      }
       break;
     case General:
       out.set_data(allocator::malloc_or_wait(out.nbytes()));
@@ -123,191 +141,90 @@ struct DefaultVectorVector {
   }
 };
 
+// Apply op to every element of the collapsed strided arrays a and b writing
+// the result to the row contiguous dst. The innermost dimension is a single
+// strided loop and the outer dimensions are walked with strided iterators so
+// the cost per element does not grow with the number of dimensions.
 template <typename T, typename U, typename Op>
-void binary_op_dims1(const array& a, const array& b, array& out, Op op) {
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  size_t a_idx = 0;
-  size_t b_idx = 0;
-  for (size_t i = 0; i < out.size(); ++i) {
-    dst[i] = op(a_ptr[a_idx], b_ptr[b_idx]);
-    a_idx += a.strides()[0];
-    b_idx += b.strides()[0];
-  }
-}
-
-template <typename T, typename U, typename Op>
-void binary_op_dims1(
-    const array& a,
-    const array& b,
-    array& out,
+void binary_op_dims(
+    const T* a_ptr,
+    const T* b_ptr,
+    U* dst,
     Op op,
-    int stride) {
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  size_t a_idx = 0;
-  size_t b_idx = 0;
-  for (size_t i = 0; i < a.shape()[0]; i++) {
-    op(a_ptr + a_idx, b_ptr + b_idx, dst, stride);
-    a_idx += a.strides()[0];
-    b_idx += b.strides()[0];
-    dst += stride;
-  }
-}
-
-template <typename T, typename U, typename Op>
-void binary_op_dims2(const array& a, const array& b, array& out, Op op) {
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  size_t a_idx = 0;
-  size_t b_idx = 0;
-  size_t out_idx = 0;
-  for (size_t i = 0; i < a.shape()[0]; ++i) {
-    for (size_t j = 0; j < a.shape()[1]; ++j) {
-      dst[out_idx++] = op(a_ptr[a_idx], b_ptr[b_idx]);
-      a_idx += a.strides()[1];
-      b_idx += b.strides()[1];
-    }
-    a_idx += a.strides()[0] - a.strides()[1] * a.shape()[1];
-    b_idx += b.strides()[0] - b.strides()[1] * b.shape()[1];
+    const std::vector<int>& shape,
+    const std::vector<size_t>& a_strides,
+    const std::vector<size_t>& b_strides) {
+  if (shape.empty()) {
+    *dst = op(*a_ptr, *b_ptr);
+    return;
   }
-}
-
-template <typename T, typename U, typename Op>
-void binary_op_dims2(
-    const array& a,
-    const array& b,
-    array& out,
-    Op op,
-    int stride) {
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  size_t a_idx = 0;
-  size_t b_idx = 0;
-  for (size_t i = 0; i < a.shape()[0]; ++i) {
-    for (size_t j = 0; j < a.shape()[1]; ++j) {
-      op(a_ptr + a_idx, b_ptr + b_idx, dst, stride);
-      a_idx += a.strides()[1];
-      b_idx += b.strides()[1];
-      dst += stride;
-    }
-    a_idx += a.strides()[0] - a.strides()[1] * a.shape()[1];
-    b_idx += b.strides()[0] - b.strides()[1] * b.shape()[1];
+  size_t size = 1;
+  for (auto s : shape) {
+    size *= s;
   }
-}
-
-template <typename T, typename U, typename Op>
-void binary_op_dims3(const array& a, const array& b, array& out, Op op) {
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  size_t a_idx = 0;
-  size_t b_idx = 0;
-  size_t out_idx = 0;
-  for (size_t i = 0; i < a.shape()[0]; ++i) {
-    for (size_t j = 0; j < a.shape()[1]; ++j) {
-      for (size_t k = 0; k < a.shape()[2]; ++k) {
-        dst[out_idx++] = op(a_ptr[a_idx], b_ptr[b_idx]);
-        a_idx += a.strides()[2];
-        b_idx += b.strides()[2];
-      }
-      a_idx += a.strides()[1] - a.strides()[2] * a.shape()[2];
-      b_idx += b.strides()[1] - b.strides()[2] * b.shape()[2];
-    }
-    a_idx += a.strides()[0] - a.strides()[1] * a.shape()[1];
-    b_idx += b.strides()[0] - b.strides()[1] * b.shape()[1];
+  if (size == 0) {
+    return;
   }
-}
 
-template <typename T, typename U, typename Op>
-void binary_op_dims4(const array& a, const array& b, array& out, Op op) {
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  size_t a_idx = 0;
-  size_t b_idx = 0;
-  size_t out_idx = 0;
-  for (size_t i = 0; i < a.shape()[0]; ++i) {
-    for (size_t j = 0; j < a.shape()[1]; ++j) {
-      for (size_t k = 0; k < a.shape()[2]; ++k) {
-        for (size_t ii = 0; ii < a.shape()[3]; ++ii) {
-          dst[out_idx++] = op(a_ptr[a_idx], b_ptr[b_idx]);
-          a_idx += a.strides()[3];
-          b_idx += b.strides()[3];
-        }
-        a_idx += a.strides()[2] - a.strides()[3] * a.shape()[3];
-        b_idx += b.strides()[2] - b.strides()[3] * b.shape()[3];
+  int n = shape.back();
+  size_t a_inner = a_strides.back();
+  size_t b_inner = b_strides.back();
+  std::vector<int> outer_shape(shape.begin(), shape.end() - 1);
+  std::vector<size_t> a_outer(a_strides.begin(), a_strides.end() - 1);
+  std::vector<size_t> b_outer(b_strides.begin(), b_strides.end() - 1);
+
+  parallel_for(size / n, num_threads(size), [&](size_t start, size_t end) {
+    StridedIterator a_it(outer_shape, a_outer, start);
+    StridedIterator b_it(outer_shape, b_outer, start);
+    U* out = dst + start * n;
+    for (size_t i = start; i < end; ++i) {
+      const T* a = a_ptr + a_it.loc;
+      const T* b = b_ptr + b_it.loc;
+      for (int j = 0; j < n; ++j) {
+        out[j] = op(*a, *b);
+        a += a_inner;
+        b += b_inner;
       }
-      a_idx += a.strides()[1] - a.strides()[2] * a.shape()[2];
-      b_idx += b.strides()[1] - b.strides()[2] * b.shape()[2];
+      out += n;
+      a_it.step();
+      b_it.step();
     }
-    a_idx += a.strides()[0] - a.strides()[1] * a.shape()[1];
-    b_idx += b.strides()[0] - b.strides()[1] * b.shape()[1];
-  }
+  });
 }
 
+// Same as above but op is applied to contiguous blocks of `stride` elements
+// and only the first `dim` dimensions are looped over.
 template <typename T, typename U, typename Op>
-void binary_op_dispatch_dims(
-    const array& a,
-    const array& b,
-    array& out,
-    Op op) {
-  switch (out.ndim()) {
-    case 1:
-      binary_op_dims1<T, U, Op>(a, b, out, op);
-      return;
-    case 2:
-      binary_op_dims2<T, U, Op>(a, b, out, op);
-      return;
-    case 3:
-      binary_op_dims3<T, U, Op>(a, b, out, op);
-      return;
-    case 4:
-      binary_op_dims4<T, U, Op>(a, b, out, op);
-      return;
-  }
-
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  for (size_t i = 0; i < out.size(); i++) {
-    int a_idx = elem_to_loc(i, a.shape(), a.strides());
-    int b_idx = elem_to_loc(i, b.shape(), b.strides());
-    dst[i] = op(a_ptr[a_idx], b_ptr[b_idx]);
-  }
-}
-
-template <typename T, typename U, typename Op>
-void binary_op_dispatch_dims(
-    const array& a,
-    const array& b,
-    array& out,
+void binary_op_dims(
+    const T* a_ptr,
+    const T* b_ptr,
+    U* dst,
     Op op,
+    const std::vector<int>& shape,
+    const std::vector<size_t>& a_strides,
+    const std::vector<size_t>& b_strides,
     int dim,
-    int stride) {
-  // Number of dimensions to loop over for vectorized ops
-  switch (dim) {
-    case 1:
-      binary_op_dims1<T, U, Op>(a, b, out, op, stride);
-      return;
-    case 2:
-      binary_op_dims2<T, U, Op>(a, b, out, op, stride);
-      return;
-  }
-
-  const T* a_ptr = a.data<T>();
-  const T* b_ptr = b.data<T>();
-  U* dst = out.data<U>();
-  for (size_t i = 0; i < out.size(); i += stride) {
-    int a_idx = elem_to_loc(i, a.shape(), a.strides());
-    int b_idx = elem_to_loc(i, b.shape(), b.strides());
-    op(a_ptr + a_idx, b_ptr + b_idx, dst, stride);
-    dst += stride;
+    size_t stride) {
+  size_t n_blocks = 1;
+  for (int i = 0; i < dim; ++i) {
+    n_blocks *= shape[i];
   }
+  std::vector<int> outer_shape(shape.begin(), shape.begin() + dim);
+  std::vector<size_t> a_outer(a_strides.begin(), a_strides.begin() + dim);
+  std::vector<size_t> b_outer(b_strides.begin(), b_strides.begin() + dim);
+
+  parallel_for(
+      n_blocks, num_threads(n_blocks * stride), [&](size_t start, size_t end) {
+        StridedIterator a_it(outer_shape, a_outer, start);
+        StridedIterator b_it(outer_shape, b_outer, start);
+        U* out = dst + start * stride;
+        for (size_t i = start; i < end; ++i) {
+          op(a_ptr + a_it.loc, b_ptr + b_it.loc, out, stride);
+          out += stride;
+          a_it.step();
+          b_it.step();
+        }
+      });
 }
 
 template <
@@ -354,28 +271,34 @@ void binary_op(
 
   // General computation so let's try to optimize
 
+  // Merge the dimensions that are contiguous in a, b and out so that the
+  // loops below run over as few dimensions as possible
+  auto [shape, all_strides] = collapse_contiguous_dims(
+      a.shape(), {a.strides(), b.strides(), out.strides()});
+  auto& a_strides = all_strides[0];
+  auto& b_strides = all_strides[1];
+  auto& strides = all_strides[2];
+  int ndim = shape.size();
+
   // Get the left-most dim such that the array is row contiguous after
-  auto& strides = out.strides();
-  auto leftmost_rc_dim = [&strides](const array& arr) {
-    int d = arr.ndim() - 1;
-    for (; d >= 0 && arr.strides()[d] == strides[d]; d--) {
+  auto leftmost_rc_dim = [&strides, ndim](const std::vector<size_t>& arr) {
+    int d = ndim - 1;
+    for (; d >= 0 && arr[d] == strides[d]; d--) {
     }
     return d + 1;
   };
-  auto a_rc_dim = leftmost_rc_dim(a);
-  auto b_rc_dim = leftmost_rc_dim(b);
+  auto a_rc_dim = leftmost_rc_dim(a_strides);
+  auto b_rc_dim = leftmost_rc_dim(b_strides);
 
   // Get the left-most dim such that the array is a broadcasted "scalar" after
-  auto leftmost_s_dim = [](const array& arr) {
-    int d = arr.ndim() - 1;
-    for (; d >= 0 && arr.strides()[d] == 0; d--) {
+  auto leftmost_s_dim = [ndim](const std::vector<size_t>& arr) {
+    int d = ndim - 1;
+    for (; d >= 0 && arr[d] == 0; d--) {
     }
     return d + 1;
   };
-  auto a_s_dim = leftmost_s_dim(a);
-  auto b_s_dim = leftmost_s_dim(b);
-
-  auto ndim = out.ndim();
+  auto a_s_dim = leftmost_s_dim(a_strides);
+  auto b_s_dim = leftmost_s_dim(b_strides);
 
   // Case 1: LxM and FxM where L and F are broadcastable and M is row contiguous
   int dim = ndim;
@@ -406,18 +329,24 @@ void binary_op(
     stride = strides[dim - 1];
   }
 
+  const T* a_ptr = a.data<T>();
+  const T* b_ptr = b.data<T>();
+  U* dst = out.data<U>();
   switch (bopt) {
     case VectorVector:
-      binary_op_dispatch_dims<T, U>(a, b, out, opvv, dim, stride);
+      binary_op_dims<T, U>(
+          a_ptr, b_ptr, dst, opvv, shape, a_strides, b_strides, dim, stride);
       break;
     case VectorScalar:
-      binary_op_dispatch_dims<T, U>(a, b, out, opvs, dim, stride);
+      binary_op_dims<T, U>(
+          a_ptr, b_ptr, dst, opvs, shape, a_strides, b_strides, dim, stride);
       break;
     case ScalarVector:
-      binary_op_dispatch_dims<T, U>(a, b, out, opsv, dim, stride);
+      binary_op_dims<T, U>(
+          a_ptr, b_ptr, dst, opsv, shape, a_strides, b_strides, dim, stride);
       break;
     default:
-      binary_op_dispatch_dims<T, U>(a, b, out, op);
+      binary_op_dims<T, U>(a_ptr, b_ptr, dst, op, shape, a_strides, b_strides);
       break;
   }
 }
@@ -542,6 +471,9 @@ void binary(const array& a, const array& b, array& out, Ops... ops) {
     case float32:
       binary_op<float>(a, b, out, ops...);
       break;
+    case float64:
+      binary_op<double>(a, b, out, ops...);
+      break;
     case bfloat16:
       binary_op<bfloat16_t>(a, b, out, ops...);
       break;
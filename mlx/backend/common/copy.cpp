@@ -1,9 +1,11 @@
 // Copyright © 2023 Apple Inc.
 
+#include <algorithm>
 #include <numeric>
 
 #include "mlx/allocator.h"
 #include "mlx/backend/common/copy.h"
+#include "mlx/backend/common/threading.h"
 
 namespace mlx::core {
 
@@ -13,168 +15,156 @@ template <typename SrcT, typename DstT>
 void copy_single(const array& src, array& dst) {
   auto val = static_cast<DstT>(src.data<SrcT>()[0]);
   auto dst_ptr = dst.data<DstT>();
-  for (int i = 0; i < dst.size(); ++i) {
-    dst_ptr[i] = val;
-  }
+  parallel_for(
+      dst.size(), num_threads(dst.size()), [&](size_t start, size_t end) {
+        std::fill(dst_ptr + start, dst_ptr + end, val);
+      });
 }
 
 template <typename SrcT, typename DstT>
 void copy_vector(const array& src, array& dst) {
   auto src_ptr = src.data<SrcT>();
   auto dst_ptr = dst.data<DstT>();
-  std::copy(src_ptr, src_ptr + src.data_size(), dst_ptr);
-}
-
-template <typename SrcT, typename DstT>
-void copy_general_dim1(const array& src, array& dst) {
-  const SrcT* src_ptr = src.data<SrcT>();
-  DstT* dst_ptr = dst.data<DstT>();
-  size_t src_idx = 0;
-  size_t dst_idx = 0;
-  for (size_t i = 0; i < src.shape()[0]; ++i) {
-    dst_ptr[dst_idx++] = static_cast<DstT>(src_ptr[src_idx]);
-    src_idx += src.strides()[0];
-  }
+  size_t size = src.data_size();
+  parallel_for(size, num_threads(size), [&](size_t start, size_t end) {
+    std::transform(src_ptr + start, src_ptr + end, dst_ptr + start, [](SrcT x) {
+      return static_cast<DstT>(x);
+    });
+  });
 }
 
+// Copy rows of n elements that are src_stride apart in the source into a
+// contiguous destination.
 template <typename SrcT, typename DstT>
-void copy_general_dim2(const array& src, array& dst) {
-  const SrcT* src_ptr = src.data<SrcT>();
-  DstT* dst_ptr = dst.data<DstT>();
-  size_t src_idx = 0;
-  size_t dst_idx = 0;
-  for (size_t i = 0; i < src.shape()[0]; ++i) {
-    for (size_t j = 0; j < src.shape()[1]; ++j) {
-      dst_ptr[dst_idx++] = static_cast<DstT>(src_ptr[src_idx]);
-      src_idx += src.strides()[1];
+inline void copy_row(const SrcT* src, DstT* dst, size_t n, size_t src_stride) {
+  if (src_stride == 1) {
+    for (size_t i = 0; i < n; ++i) {
+      dst[i] = static_cast<DstT>(src[i]);
     }
-    src_idx += src.strides()[0] - src.strides()[1] * src.shape()[1];
-  }
-}
-
-template <typename SrcT, typename DstT>
-void copy_general_dim3(const array& src, array& dst) {
-  const SrcT* src_ptr = src.data<SrcT>();
-  DstT* dst_ptr = dst.data<DstT>();
-  size_t src_idx = 0;
-  size_t dst_idx = 0;
-  for (size_t i = 0; i < src.shape()[0]; ++i) {
-    for (size_t j = 0; j < src.shape()[1]; ++j) {
-      for (size_t k = 0; k < src.shape()[2]; ++k) {
-        dst_ptr[dst_idx++] = static_cast<DstT>(src_ptr[src_idx]);
-        src_idx += src.strides()[2];
-      }
-      src_idx += src.strides()[1] - src.strides()[2] * src.shape()[2];
+  } else if (src_stride == 0) {
+    std::fill(dst, dst + n, static_cast<DstT>(*src));
+  } else {
+    for (size_t i = 0; i < n; ++i) {
+      dst[i] = static_cast<DstT>(src[i * src_stride]);
     }
-    src_idx += src.strides()[0] - src.strides()[1] * src.shape()[1];
   }
 }
 
+// Copy the last two dimensions of the source, which are read column by
+// column, in square tiles so that the cache lines of the source are reused
+// across the rows of the destination.
 template <typename SrcT, typename DstT>
-void copy_general_dim4(const array& src, array& dst) {
-  const SrcT* src_ptr = src.data<SrcT>();
-  DstT* dst_ptr = dst.data<DstT>();
-  size_t src_idx = 0;
-  size_t dst_idx = 0;
-  for (size_t i = 0; i < src.shape()[0]; ++i) {
-    for (size_t j = 0; j < src.shape()[1]; ++j) {
-      for (size_t k = 0; k < src.shape()[2]; ++k) {
-        for (size_t ii = 0; ii < src.shape()[3]; ++ii) {
-          dst_ptr[dst_idx++] = static_cast<DstT>(src_ptr[src_idx]);
-          src_idx += src.strides()[3];
+void copy_general_transpose(
+    const SrcT* src_ptr,
+    DstT* dst_ptr,
+    const std::vector<int>& shape,
+    const std::vector<size_t>& strides,
+    size_t size) {
+  constexpr int block = 32;
+  int ndim = shape.size();
+  size_t rows = shape[ndim - 2];
+  size_t cols = shape[ndim - 1];
+  size_t row_stride = strides[ndim - 2];
+  size_t col_stride = strides[ndim - 1];
+  std::vector<int> outer_shape(shape.begin(), shape.end() - 2);
+  std::vector<size_t> outer_strides(strides.begin(), strides.end() - 2);
+
+  size_t row_blocks = (rows + block - 1) / block;
+  size_t n_tasks = (size / (rows * cols)) * row_blocks;
+  parallel_for(n_tasks, num_threads(size), [&](size_t start, size_t end) {
+    for (size_t t = start; t < end; ++t) {
+      size_t outer = t / row_blocks;
+      size_t r0 = (t % row_blocks) * block;
+      size_t r1 = std::min(r0 + block, rows);
+      const SrcT* src =
+          src_ptr + StridedIterator(outer_shape, outer_strides, outer).loc;
+      DstT* dst = dst_ptr + outer * rows * cols;
+      for (size_t c0 = 0; c0 < cols; c0 += block) {
+        size_t c1 = std::min(c0 + block, cols);
+        for (size_t r = r0; r < r1; ++r) {
+          for (size_t c = c0; c < c1; ++c) {
+            dst[r * cols + c] =
+                static_cast<DstT>(src[r * row_stride + c * col_stride]);
+          }
         }
-        src_idx += src.strides()[2] - src.strides()[3] * src.shape()[3];
       }
-      src_idx += src.strides()[1] - src.strides()[2] * src.shape()[2];
     }
-    src_idx += src.strides()[0] - src.strides()[1] * src.shape()[1];
-  }
+  });
 }
 
 template <typename SrcT, typename DstT>
 void copy_general(const array& src, array& dst) {
-  switch (src.ndim()) {
-    case 1:
-      copy_general_dim1<SrcT, DstT>(src, dst);
-      return;
-    case 2:
-      copy_general_dim2<SrcT, DstT>(src, dst);
-      return;
-    case 3:
-      copy_general_dim3<SrcT, DstT>(src, dst);
-      return;
-    case 4:
-      copy_general_dim4<SrcT, DstT>(src, dst);
-      return;
+  if (dst.size() == 0) {
+    return;
   }
-
-  auto src_ptr = src.data<SrcT>();
-  auto dst_ptr = dst.data<DstT>();
-  for (size_t i = 0; i < dst.size(); ++i) {
-    size_t src_elem = elem_to_loc(i, src.shape(), src.strides());
-    dst_ptr[i] = static_cast<DstT>(src_ptr[src_elem]);
+  auto [shape, strides] = collapse_contiguous_dims(src.shape(), src.strides());
+  const SrcT* src_ptr = src.data<SrcT>();
+  DstT* dst_ptr = dst.data<DstT>();
+  if (shape.empty()) {
+    copy_single<SrcT, DstT>(src, dst);
+    return;
   }
-}
 
-template <typename SrcT, typename DstT, int D>
-inline void copy_general_general_dims(
-    const array& src,
-    array& dst,
-    size_t offset_src,
-    size_t offset_dst) {
-  if constexpr (D > 1) {
-    int axis = src.ndim() - D;
-    auto stride_src = src.strides()[axis];
-    auto stride_dst = dst.strides()[axis];
-    auto N = src.shape(axis);
-    for (int i = 0; i < N; i++) {
-      copy_general_general_dims<SrcT, DstT, D - 1>(
-          src, dst, offset_src, offset_dst);
-      offset_src += stride_src;
-      offset_dst += stride_dst;
-    }
-  } else {
-    int axis = src.ndim() - 1;
-    auto stride_src = src.strides()[axis];
-    auto stride_dst = dst.strides()[axis];
-    auto N = src.shape(axis);
-    const SrcT* src_ptr = src.data<SrcT>() + offset_src;
-    DstT* dst_ptr = dst.data<DstT>() + offset_dst;
-    for (int i = 0; i < N; i++) {
-      *dst_ptr = static_cast<DstT>(*src_ptr);
-      src_ptr += stride_src;
-      dst_ptr += stride_dst;
-    }
+  int ndim = shape.size();
+  if (ndim >= 2 && strides[ndim - 2] == 1 && strides[ndim - 1] > 1) {
+    copy_general_transpose(src_ptr, dst_ptr, shape, strides, dst.size());
+    return;
   }
+
+  // Iterate over the rows of the collapsed source, namely all but the last
+  // dimension, and copy each one contiguously into the destination
+  size_t n = shape.back();
+  size_t stride = strides.back();
+  shape.pop_back();
+  strides.pop_back();
+  parallel_for(
+      dst.size() / n,
+      num_threads(dst.size()),
+      [&, &shape = shape, &strides = strides](size_t start, size_t end) {
+        StridedIterator src_it(shape, strides, start);
+        for (size_t i = start; i < end; ++i) {
+          copy_row(src_ptr + src_it.loc, dst_ptr + i * n, n, stride);
+          src_it.step();
+        }
+      });
 }
 
 template <typename SrcT, typename DstT>
 void copy_general_general(const array& src, array& dst) {
-  switch (src.ndim()) {
-    case 1:
-      copy_general_general_dims<SrcT, DstT, 1>(src, dst, 0, 0);
-      return;
-    case 2:
-      copy_general_general_dims<SrcT, DstT, 2>(src, dst, 0, 0);
-      return;
-    case 3:
-      copy_general_general_dims<SrcT, DstT, 3>(src, dst, 0, 0);
-      return;
-    case 4:
-      copy_general_general_dims<SrcT, DstT, 4>(src, dst, 0, 0);
-      return;
-    case 5:
-      copy_general_general_dims<SrcT, DstT, 5>(src, dst, 0, 0);
-      return;
+  if (src.size() == 0) {
+    return;
   }
-
-  int size = std::accumulate(
-      src.shape().begin() - 5, src.shape().end(), 1, std::multiplies<int>());
-  for (int i = 0; i < src.size(); i += size) {
-    size_t offset_src = elem_to_loc(i, src.shape(), src.strides());
-    size_t offset_dst = elem_to_loc(i, dst.shape(), dst.strides());
-    copy_general_general_dims<SrcT, DstT, 5>(src, dst, offset_src, offset_dst);
+  std::vector<std::vector<size_t>> all_strides = {src.strides(), dst.strides()};
+  auto [shape, strides] = collapse_contiguous_dims(src.shape(), all_strides);
+  const SrcT* src_ptr = src.data<SrcT>();
+  DstT* dst_ptr = dst.data<DstT>();
+  if (shape.empty()) {
+    *dst_ptr = static_cast<DstT>(*src_ptr);
+    return;
   }
+
+  size_t n = shape.back();
+  size_t src_stride = strides[0].back();
+  size_t dst_stride = strides[1].back();
+  shape.pop_back();
+  strides[0].pop_back();
+  strides[1].pop_back();
+  parallel_for(
+      src.size() / n,
+      num_threads(src.size()),
+      [&, &shape = shape, &strides = strides](size_t start, size_t end) {
+        StridedIterator src_it(shape, strides[0], start);
+        StridedIterator dst_it(shape, strides[1], start);
+        for (size_t i = start; i < end; ++i) {
+          const SrcT* src = src_ptr + src_it.loc;
+          DstT* dst = dst_ptr + dst_it.loc;
+          for (size_t j = 0; j < n; ++j) {
+            dst[j * dst_stride] = static_cast<DstT>(src[j * src_stride]);
+          }
+          src_it.step();
+          dst_it.step();
+        }
+      });
 }
 
 template <typename SrcT, typename DstT>
@@ -230,6 +220,9 @@ void copy(const array& src, array& dst, CopyType ctype) {
     case float32:
       copy<SrcT, float>(src, dst, ctype);
       break;
+    case float64:
+      copy<SrcT, double>(src, dst, ctype);
+      break;
     case bfloat16:
       copy<SrcT, bfloat16_t>(src, dst, ctype);
       break;
@@ -276,6 +269,9 @@ void copy_inplace(const array& src, array& dst, CopyType ctype) {
     case float32:
       copy<float>(src, dst, ctype);
       break;
+    case float64:
+      copy<double>(src, dst, ctype);
+      break;
     case bfloat16:
       copy<bfloat16_t>(src, dst, ctype);
       break;
@@ -15,6 +15,7 @@
 namespace mlx::core {
 
 DEFAULT(Abs)
+DEFAULT(AdafactorStep)
 DEFAULT(Add)
 DEFAULT(Arange)
 DEFAULT(ArcCos)
@@ -26,14 +27,17 @@ DEFAULT(ArcTanh)
 DEFAULT(ArgPartition)
 DEFAULT(ArgReduce)
 DEFAULT(ArgSort)
+DEFAULT(ArgTopK)
 DEFAULT(AsType)
 DEFAULT(AsStrided)
 DEFAULT(Broadcast)
+DEFAULT(Checkpoint)
 DEFAULT(Concatenate)
 DEFAULT(Convolution)
 DEFAULT(Copy)
 DEFAULT(Cos)
 DEFAULT(Cosh)
+DEFAULT(Depends)
 DEFAULT(Divide)
 DEFAULT(Remainder)
 DEFAULT(Equal)
@@ -43,6 +47,7 @@ DEFAULT(Exp)
 DEFAULT(FFT)
 DEFAULT(Full)
 DEFAULT(Gather)
+DEFAULT(GlobalNorm)
 DEFAULT(Greater)
 DEFAULT(GreaterEqual)
 DEFAULT(Less)
@@ -57,14 +62,18 @@ DEFAULT(Minimum)
 DEFAULT(Multiply)
 DEFAULT(Negative)
 DEFAULT(NotEqual)
+DEFAULT(OptimizerStep)
 DEFAULT(Pad)
 DEFAULT(Partition)
 DEFAULT(Power)
+DEFAULT(QuantizedAdamStep)
 DEFAULT(RandomBits)
+DEFAULT(RandomSample)
 DEFAULT(Reduce)
 DEFAULT(Reshape)
 DEFAULT(Scan)
 DEFAULT(Scatter)
+DEFAULT(Select)
 DEFAULT(Sigmoid)
 DEFAULT(Sign)
 DEFAULT(Sin)
@@ -80,15 +89,70 @@ DEFAULT(Tan)
 DEFAULT(Tanh)
 DEFAULT(Transpose)
 
-void Matmul::eval_cpu(const std::vector<array>& inputs, array& out) {
-  if (out.dtype() != float32) {
-    throw std::runtime_error(
-        "[Matmul::eval_cpu] Currently only supports float32.");
-  }
-  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+namespace {
 
-  auto& a_pre = inputs[0];
-  auto& b_pre = inputs[1];
+// Row major gemm with alpha = 1 and beta = 0 for the BLAS types
+inline void gemm(
+    bool a_transposed,
+    bool b_transposed,
+    int M,
+    int N,
+    int K,
+    const float* a,
+    size_t lda,
+    const float* b,
+    size_t ldb,
+    float* c,
+    size_t ldc) {
+  cblas_sgemm(
+      CblasRowMajor,
+      a_transposed ? CblasTrans : CblasNoTrans, // transA
+      b_transposed ? CblasTrans : CblasNoTrans, // transB
+      M,
+      N,
+      K,
+      1.0f, // alpha
+      a,
+      lda,
+      b,
+      ldb,
+      0.0f, // beta
+      c,
+      ldc);
+}
+
+inline void gemm(
+    bool a_transposed,
+    bool b_transposed,
+    int M,
+    int N,
+    int K,
+    const double* a,
+    size_t lda,
+    const double* b,
+    size_t ldb,
+    double* c,
+    size_t ldc) {
+  cblas_dgemm(
+      CblasRowMajor,
+      a_transposed ? CblasTrans : CblasNoTrans, // transA
+      b_transposed ? CblasTrans : CblasNoTrans, // transB
+      M,
+      N,
+      K,
+      1.0, // alpha
+      a,
+      lda,
+      b,
+      ldb,
+      0.0, // beta
+      c,
+      ldc);
+}
+
+template <typename T>
+void matmul(const array& a_pre, const array& b_pre, array& out) {
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
 
   auto check_transpose = [](const array& arr) {
     auto stx = arr.strides()[arr.ndim() - 2];
@@ -111,23 +175,34 @@ void Matmul::eval_cpu(const std::vector<array>& inputs, array& out) {
   int N = b.shape(-1);
   int K = a.shape(-1);
   for (int i = 0; i < (a.size() / (M * K)); ++i) {
-    cblas_sgemm(
-        CblasRowMajor,
-        a_transposed ? CblasTrans : CblasNoTrans, // transA
-        b_transposed ? CblasTrans : CblasNoTrans, // transB
+    gemm(
+        a_transposed,
+        b_transposed,
         M,
         N,
         K,
-        1.0f, // alpha
-        a.data<float>() + elem_to_loc(M * K * i, a.shape(), a.strides()),
+        a.template data<T>() + elem_to_loc(M * K * i, a.shape(), a.strides()),
         lda,
-        b.data<float>() + elem_to_loc(K * N * i, b.shape(), b.strides()),
+        b.template data<T>() + elem_to_loc(K * N * i, b.shape(), b.strides()),
         ldb,
-        0.0f, // beta
-        out.data<float>() + M * N * i,
+        out.data<T>() + M * N * i,
         out.shape(-1) // ldc
     );
   }
 }
 
+} // namespace
+
+void Matmul::eval_cpu(const std::vector<array>& inputs, array& out) {
+  switch (out.dtype()) {
+    case float32:
+      return matmul<float>(inputs[0], inputs[1], out);
+    case float64:
+      return matmul<double>(inputs[0], inputs[1], out);
+    default:
+      throw std::runtime_error(
+          "[Matmul::eval_cpu] Currently only supports float32 and float64.");
+  }
+}
+
 } // namespace mlx::core
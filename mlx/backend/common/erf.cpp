@@ -1,5 +1,6 @@
 // Copyright © 2023 Apple Inc.
 
+#include <algorithm>
 #include <cmath>
 
 namespace mlx::core {
@@ -37,4 +38,24 @@ float erfinv(float a) {
   return a * p;
 }
 
+double erfinv(double a) {
+  if (!(std::abs(a) < 1.0)) {
+    return erfinv(static_cast<float>(a));
+  }
+  // Refine the float approximation with Halley's method. The start is kept
+  // finite when a rounds to +-1 in float.
+  const float limit = std::nextafter(1.0f, 0.0f);
+  double y = erfinv(std::clamp(static_cast<float>(a), -limit, limit));
+  for (int i = 0; i < 64; ++i) {
+    double f = std::erf(y) - a;
+    double df = 1.1283791670955126 * std::exp(-y * y);
+    double step = f / (df + y * f);
+    y -= step;
+    if (std::abs(step) <= 1e-16 * std::abs(y)) {
+      break;
+    }
+  }
+  return y;
+}
+
 } // namespace mlx::core
@@ -8,4 +8,7 @@ namespace mlx::core {
  */
 float erfinv(float a);
 
+/* The float approximation refined to double precision. */
+double erfinv(double a);
+
 } // namespace mlx::core
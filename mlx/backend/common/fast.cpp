@@ -0,0 +1,682 @@
+// Copyright © 2023 Apple Inc.
+
+#include <algorithm>
+#include <cassert>
+#include <cmath>
+#include <cstring>
+#include <type_traits>
+
+#include "mlx/allocator.h"
+#include "mlx/backend/common/copy.h"
+#include "mlx/backend/common/threading.h"
+#include "mlx/primitives.h"
+
+namespace mlx::core {
+
+namespace {
+
+// Returns x or a row contiguous copy of x
+array row_contiguous(const array& x) {
+  if (x.flags().row_contiguous) {
+    return x;
+  }
+  array out(x.shape(), x.dtype(), nullptr, {});
+  copy(x, out, CopyType::General);
+  return out;
+}
+
+// Calls op(in, out, n, start, end) on chunks [start, end) of the n elements
+// of the inputs read in row major order. The k-th output is written at
+// out + k * n.
+template <typename T, typename Op>
+void elementwise_step(const std::vector<array>& inputs, array& out, Op op) {
+  std::vector<array> contiguous;
+  std::vector<const T*> in;
+  for (auto& x : inputs) {
+    contiguous.push_back(row_contiguous(x));
+    in.push_back(contiguous.back().template data<T>());
+  }
+
+  size_t n = inputs[0].size();
+  T* dst = out.data<T>();
+  parallel_for(n, num_threads(n), [&](size_t start, size_t end) {
+    op(in.data(), dst, n, start, end);
+  });
+}
+
+template <typename T>
+void optimizer_step(
+    OptimizerStep::Optimizer optimizer,
+    const std::vector<float>& hyperparameters,
+    const std::vector<array>& inputs,
+    double learning_rate,
+    array& out) {
+  // Half precision updates are computed in float32 and rounded once
+  using U = std::conditional_t<std::is_same_v<T, double>, double, float>;
+  U lr = learning_rate;
+
+  switch (optimizer) {
+    case OptimizerStep::SGD: {
+      U momentum = hyperparameters[0];
+      U weight_decay = hyperparameters[1];
+      U dampening = U(1) - static_cast<U>(hyperparameters[2]);
+      bool nesterov = hyperparameters[3] != 0;
+      bool has_momentum = inputs.size() == 3;
+      elementwise_step<T>(
+          inputs,
+          out,
+          [=](const T** in, T* dst, size_t n, size_t start, size_t end) {
+            for (size_t i = start; i < end; ++i) {
+              U w = in[0][i];
+              U g = static_cast<U>(in[1][i]) + weight_decay * w;
+              if (!has_momentum) {
+                dst[i] = static_cast<T>(w - lr * g);
+                continue;
+              }
+              U v = momentum * static_cast<U>(in[2][i]) + dampening * g;
+              U update = nesterov ? g + momentum * v : v;
+              dst[i] = static_cast<T>(w - lr * update);
+              dst[n + i] = static_cast<T>(v);
+            }
+          });
+      break;
+    }
+    case OptimizerStep::Adam: {
+      U beta1 = hyperparameters[0];
+      U beta2 = hyperparameters[1];
+      U eps = hyperparameters[2];
+      U decay = U(1) - lr * static_cast<U>(hyperparameters[3]);
+      elementwise_step<T>(
+          inputs,
+          out,
+          [=](const T** in, T* dst, size_t n, size_t start, size_t end) {
+            for (size_t i = start; i < end; ++i) {
+              U w = decay * static_cast<U>(in[0][i]);
+              U g = in[1][i];
+              U m = beta1 * static_cast<U>(in[2][i]) + (U(1) - beta1) * g;
+              U v = beta2 * static_cast<U>(in[3][i]) + (U(1) - beta2) * g * g;
+              dst[i] = static_cast<T>(w - lr * m / (std::sqrt(v) + eps));
+              dst[n + i] = static_cast<T>(m);
+              dst[2 * n + i] = static_cast<T>(v);
+            }
+          });
+      break;
+    }
+    case OptimizerStep::Adagrad: {
+      U eps = hyperparameters[0];
+      elementwise_step<T>(
+          inputs,
+          out,
+          [=](const T** in, T* dst, size_t n, size_t start, size_t end) {
+            for (size_t i = start; i < end; ++i) {
+              U w = in[0][i];
+              U g = in[1][i];
+              U v = static_cast<U>(in[2][i]) + g * g;
+              dst[i] = static_cast<T>(w - lr * g / (std::sqrt(v) + eps));
+              dst[n + i] = static_cast<T>(v);
+            }
+          });
+      break;
+    }
+  }
+}
+
+// Adds the squares of x[start:end] to acc. The squares are summed in blocks
+// of U before being added to the double accumulator.
+template <typename T, typename U>
+void sum_of_squares(const T* x, size_t start, size_t end, double& acc) {
+  constexpr size_t block = 4096;
+  for (size_t i = start; i < end; i += block) {
+    U sum = 0;
+    for (size_t j = i; j < std::min(i + block, end); ++j) {
+      U v = static_cast<U>(x[j]);
+      sum += v * v;
+    }
+    acc += sum;
+  }
+}
+
+void sum_of_squares(const array& x, size_t start, size_t end, double& acc) {
+  switch (x.dtype()) {
+    case float32:
+      sum_of_squares<float, float>(x.data<float>(), start, end, acc);
+      break;
+    case float16:
+      sum_of_squares<float16_t, float>(x.data<float16_t>(), start, end, acc);
+      break;
+    case bfloat16:
+      sum_of_squares<bfloat16_t, float>(x.data<bfloat16_t>(), start, end, acc);
+      break;
+    case float64:
+      sum_of_squares<double, double>(x.data<double>(), start, end, acc);
+      break;
+    default:
+      throw std::runtime_error("[GlobalNorm] Unsupported type.");
+  }
+}
+
+// Calls f(c, start, end) for the n_chunks contiguous chunks c of [0, n) in
+// parallel so that the results of each chunk can be combined in order.
+template <typename F>
+void for_each_chunk(size_t n, int n_chunks, F&& f) {
+  size_t chunk = (n + n_chunks - 1) / n_chunks;
+  parallel_for(n_chunks, n_chunks, [&](size_t c_start, size_t c_end) {
+    for (size_t c = c_start; c < c_end; ++c) {
+      f(c, std::min(n, c * chunk), std::min(n, (c + 1) * chunk));
+    }
+  });
+}
+
+// The running means of the squared gradient over the rows and the columns
+// of each matrix in the last two axes of the gradient. The rows are split
+// between the threads and the column sums of each chunk are added in order.
+template <typename T>
+void adafactor_second_moment(
+    const std::vector<array>& inputs,
+    float eps1,
+    array& out) {
+  auto g = row_contiguous(inputs[0]);
+  auto r_in = row_contiguous(inputs[1]);
+  auto c_in = row_contiguous(inputs[2]);
+  double beta2 = *inputs[3].data<float>();
+  size_t rows = g.shape(-2);
+  size_t cols = g.shape(-1);
+  size_t n_rows = g.size() / cols;
+  size_t n_matrices = n_rows / rows;
+
+  const T* gp = g.data<T>();
+  const float* r_old = r_in.data<float>();
+  const float* c_old = c_in.data<float>();
+  float* dst = out.data<float>();
+
+  int n_chunks = std::min<size_t>(num_threads(g.size()), n_rows);
+  std::vector<std::vector<double>> col_sums(n_chunks);
+  for_each_chunk(n_rows, n_chunks, [&](size_t c, size_t start, size_t end) {
+    auto& col_sum = col_sums[c];
+    col_sum.assign(n_matrices * cols, 0);
+    for (size_t i = start; i < end; ++i) {
+      size_t b = i / rows;
+      double row_sum = 0;
+      for (size_t j = 0; j < cols; ++j) {
+        double v = static_cast<float>(gp[i * cols + j]);
+        v = v * v + eps1;
+        row_sum += v;
+        col_sum[b * cols + j] += v;
+      }
+      dst[b * (rows + cols) + i % rows] =
+          static_cast<float>(beta2 * r_old[i] + (1 - beta2) * row_sum / cols);
+    }
+  });
+
+  for (size_t k = 0; k < n_matrices * cols; ++k) {
+    double sum = 0;
+    for (auto& col_sum : col_sums) {
+      sum += col_sum[k];
+    }
+    size_t b = k / cols;
+    dst[b * (rows + cols) + rows + k % cols] =
+        static_cast<float>(beta2 * c_old[k] + (1 - beta2) * sum / rows);
+  }
+}
+
+// The parameter update of Adafactor given the updated row and column means
+// R and C. The update u = g / sqrt(R C / mean(R)) is computed twice, once
+// to find its RMS and once to update the parameter, instead of being stored.
+template <typename T>
+void adafactor_parameter(
+    const std::vector<float>& hyperparameters,
+    const std::vector<array>& inputs,
+    double learning_rate,
+    array& out) {
+  using U = std::conditional_t<std::is_same_v<T, double>, double, float>;
+  double eps2 = hyperparameters[0];
+  double clip_threshold = hyperparameters[1];
+  double weight_decay = hyperparameters[2];
+  bool scale_parameter = hyperparameters[3] != 0;
+
+  auto w = row_contiguous(inputs[0]);
+  auto g = row_contiguous(inputs[1]);
+  auto moments = row_contiguous(inputs[2]);
+  size_t rows = w.shape(-2);
+  size_t cols = w.shape(-1);
+  size_t n_rows = w.size() / cols;
+  size_t n_matrices = n_rows / rows;
+
+  // u_ij = g_ij * row_scale_i * col_scale_j
+  const float* mp = moments.data<float>();
+  std::vector<U> row_scale(n_rows);
+  std::vector<U> col_scale(n_matrices * cols);
+  for (size_t b = 0; b < n_matrices; ++b) {
+    const float* r = mp + b * (rows + cols);
+    const float* c = r + rows;
+    double mean_r = 0;
+    for (size_t i = 0; i < rows; ++i) {
+      mean_r += r[i];
+    }
+    mean_r /= rows;
+    for (size_t i = 0; i < rows; ++i) {
+      row_scale[b * rows + i] = std::sqrt(mean_r / r[i]);
+    }
+    for (size_t j = 0; j < cols; ++j) {
+      col_scale[b * cols + j] = 1 / std::sqrt(static_cast<double>(c[j]));
+    }
+  }
+
+  const T* wp = w.data<T>();
+  const T* gp = g.data<T>();
+  int n_chunks = std::min<size_t>(num_threads(w.size()), n_rows);
+  std::vector<double> u_sums(n_chunks, 0);
+  std::vector<double> w_sums(n_chunks, 0);
+  for_each_chunk(n_rows, n_chunks, [&](size_t c, size_t start, size_t end) {
+    for (size_t i = start; i < end; ++i) {
+      const U* cs = col_scale.data() + (i / rows) * cols;
+      U u_sum = 0;
+      U w_sum = 0;
+      for (size_t j = 0; j < cols; ++j) {
+        U u = static_cast<U>(gp[i * cols + j]) * row_scale[i] * cs[j];
+        U wi = wp[i * cols + j];
+        u_sum += u * u;
+        w_sum += wi * wi;
+      }
+      u_sums[c] += u_sum;
+      w_sums[c] += w_sum;
+    }
+  });
+
+  double u_sum = 0;
+  double w_sum = 0;
+  for (int c = 0; c < n_chunks; ++c) {
+    u_sum += u_sums[c];
+    w_sum += w_sums[c];
+  }
+  double lr = learning_rate;
+  if (scale_parameter) {
+    lr *= std::max(eps2, std::sqrt(w_sum / w.size()));
+  }
+  double clip = std::max(1.0, std::sqrt(u_sum / w.size()) / clip_threshold);
+  U step = lr / clip;
+  U decay = 1 - lr * weight_decay;
+
+  T* dst = out.data<T>();
+  for_each_chunk(n_rows, n_chunks, [&](size_t c, size_t start, size_t end) {
+    for (size_t i = start; i < end; ++i) {
+      const U* cs = col_scale.data() + (i / rows) * cols;
+      for (size_t j = 0; j < cols; ++j) {
+        size_t k = i * cols + j;
+        U u = static_cast<U>(gp[k]) * row_scale[i] * cs[j];
+        dst[k] = static_cast<T>(decay * static_cast<U>(wp[k]) - step * u);
+      }
+    }
+  });
+}
+
+// The 8-bit codes of the quantized Adam state are logarithmic so that the
+// small values of a block keep their relative precision. A magnitude r in
+// (0, 1], relative to the maximum of the block, is coded as the nearest
+// level k in [1, levels] of r = 2^(octaves * (k - levels) / (levels - 1))
+// and the magnitudes below the first level are coded as 0. The first moment
+// uses the top bit for the sign.
+//
+// The two moments are coded against the maxima of their own blocks so a
+// first moment can survive the coding while the square root of the second
+// moment of the same element falls below the first level. The latter is then
+// rounded up to the first level instead, which only makes the update
+// smaller, and the first moment is dropped where the second one is 0.
+constexpr int m_levels = 127;
+constexpr float m_octaves = 12.0f;
+constexpr int s_levels = 255;
+constexpr float s_octaves = 16.0f;
+
+inline uint8_t encode(float r, int levels, float octaves) {
+  if (!(r > 0)) {
+    return 0;
+  }
+  float k = std::round(levels + (levels - 1) * std::log2(r) / octaves);
+  return k < 1 ? 0 : static_cast<uint8_t>(std::min<float>(k, levels));
+}
+
+inline uint8_t encode_m(float m, float max) {
+  uint8_t k = encode(std::abs(m) / max, m_levels, m_octaves);
+  return (m < 0 && k > 0) ? (k | 0x80) : k;
+}
+
+// Tables of the decoded magnitudes relative to the block maximum
+struct Codebook {
+  float m[256];
+  float s[256];
+
+  Codebook() {
+    for (int k = 0; k < 256; ++k) {
+      int mag = k & 0x7f;
+      m[k] = mag == 0
+          ? 0.0f
+          : std::exp2(m_octaves * (mag - m_levels) / (m_levels - 1));
+      m[k] = (k & 0x80) ? -m[k] : m[k];
+      s[k] = k == 0 ? 0.0f
+                    : std::exp2(s_octaves * (k - s_levels) / (s_levels - 1));
+    }
+  }
+};
+
+const Codebook& codebook() {
+  static Codebook codebook;
+  return codebook;
+}
+
+// A block of the state is the float32 maxima of |m| and sqrt(v) followed
+// by the codes of m and of sqrt(v)
+struct QuantizedBlock {
+  uint8_t* data;
+  size_t block_size;
+
+  float m_max() const {
+    float x;
+    std::memcpy(&x, data, sizeof(float));
+    return x;
+  }
+  float s_max() const {
+    float x;
+    std::memcpy(&x, data + sizeof(float), sizeof(float));
+    return x;
+  }
+  void set_max(float m_max, float s_max) {
+    std::memcpy(data, &m_max, sizeof(float));
+    std::memcpy(data + sizeof(float), &s_max, sizeof(float));
+  }
+  uint8_t* m_codes() const {
+    return data + 2 * sizeof(float);
+  }
+  uint8_t* s_codes() const {
+    return m_codes() + block_size;
+  }
+};
+
+template <typename T>
+void quantized_adam_state(
+    const std::vector<float>& hyperparameters,
+    const std::vector<array>& inputs,
+    size_t block_size,
+    array& out) {
+  float beta1 = hyperparameters[0];
+  float beta2 = hyperparameters[1];
+  auto g = row_contiguous(inputs[0]);
+  bool has_state = inputs.size() > 1;
+  auto state = has_state ? row_contiguous(inputs[1]) : g;
+
+  size_t n = g.size();
+  size_t n_blocks = out.shape(0);
+  size_t stride = out.shape(1);
+  const T* gp = g.data<T>();
+  auto& book = codebook();
+  parallel_for(n_blocks, num_threads(n), [&](size_t start, size_t end) {
+    std::vector<float> m(block_size);
+    std::vector<float> s(block_size);
+    for (size_t b = start; b < end; ++b) {
+      size_t offset = b * block_size;
+      size_t len = std::min(block_size, n - offset);
+      QuantizedBlock block{out.data<uint8_t>() + b * stride, block_size};
+
+      // Without a state the moments start from m = g and v = g^2
+      float m_old_max = 0;
+      float s_old_max = 0;
+      const uint8_t* m_old = nullptr;
+      const uint8_t* s_old = nullptr;
+      if (has_state) {
+        QuantizedBlock old{state.data<uint8_t>() + b * stride, block_size};
+        m_old_max = old.m_max();
+        s_old_max = old.s_max();
+        m_old = old.m_codes();
+        s_old = old.s_codes();
+      }
+
+      float m_max = 0;
+      float s_max = 0;
+      for (size_t i = 0; i < len; ++i) {
+        float gi = static_cast<float>(gp[offset + i]);
+        float mi = gi;
+        float vi = gi * gi;
+        if (has_state) {
+          mi = book.m[m_old[i]] * m_old_max;
+          float si = book.s[s_old[i]] * s_old_max;
+          vi = si * si;
+        }
+        m[i] = beta1 * mi + (1 - beta1) * gi;
+        s[i] = std::sqrt(beta2 * vi + (1 - beta2) * gi * gi);
+        m_max = std::max(m_max, std::abs(m[i]));
+        s_max = std::max(s_max, s[i]);
+      }
+
+      block.set_max(m_max, s_max);
+      uint8_t* m_codes = block.m_codes();
+      uint8_t* s_codes = block.s_codes();
+      for (size_t i = 0; i < len; ++i) {
+        s_codes[i] = encode(s[i] / s_max, s_levels, s_octaves);
+        if (s_codes[i] == 0 && s[i] > 0) {
+          s_codes[i] = 1;
+        }
+        m_codes[i] = s_codes[i] == 0 ? 0 : encode_m(m[i], m_max);
+      }
+      std::fill(m_codes + len, m_codes + block_size, 0);
+      std::fill(s_codes + len, s_codes + block_size, 0);
+    }
+  });
+}
+
+template <typename T>
+void quantized_adam_parameter(
+    const std::vector<float>& hyperparameters,
+    const std::vector<array>& inputs,
+    size_t block_size,
+    double learning_rate,
+    array& out) {
+  using U = std::conditional_t<std::is_same_v<T, double>, double, float>;
+  U eps = hyperparameters[0];
+  U lr = learning_rate;
+  U decay = U(1) - lr * static_cast<U>(hyperparameters[1]);
+  auto w = row_contiguous(inputs[0]);
+  auto state = row_contiguous(inputs[1]);
+
+  size_t n = w.size();
+  size_t n_blocks = state.shape(0);
+  size_t stride = state.shape(1);
+  const T* wp = w.data<T>();
+  T* dst = out.data<T>();
+  auto& book = codebook();
+  parallel_for(n_blocks, num_threads(n), [&](size_t start, size_t end) {
+    for (size_t b = start; b < end; ++b) {
+      size_t offset = b * block_size;
+      size_t len = std::min(block_size, n - offset);
+      QuantizedBlock block{state.data<uint8_t>() + b * stride, block_size};
+      U m_max = block.m_max();
+      U s_max = block.s_max();
+      const uint8_t* m_codes = block.m_codes();
+      const uint8_t* s_codes = block.s_codes();
+      for (size_t i = 0; i < len; ++i) {
+        U m = book.m[m_codes[i]] * m_max;
+        U s = book.s[s_codes[i]] * s_max;
+        U wi = static_cast<U>(wp[offset + i]);
+        dst[offset + i] = static_cast<T>(decay * wi - lr * m / (s + eps));
+      }
+    }
+  });
+}
+
+} // namespace
+
+void GlobalNorm::eval(const std::vector<array>& inputs, array& out) {
+  // The inputs are read as one sequence of elements which is split in one
+  // chunk per thread. The partial sums are added in order so the result
+  // does not depend on the scheduling of the threads.
+  std::vector<array> contiguous;
+  std::vector<size_t> offsets = {0};
+  for (auto& x : inputs) {
+    contiguous.push_back(row_contiguous(x));
+    offsets.push_back(offsets.back() + x.size());
+  }
+
+  size_t n = offsets.back();
+  int n_chunks = num_threads(n);
+  size_t chunk = (n + n_chunks - 1) / n_chunks;
+  std::vector<double> partials(n_chunks, 0);
+  parallel_for(n_chunks, n_chunks, [&](size_t c_start, size_t c_end) {
+    for (size_t c = c_start; c < c_end; ++c) {
+      size_t start = c * chunk;
+      size_t end = std::min(n, start + chunk);
+      // The first input overlapping the chunk
+      size_t i = std::upper_bound(offsets.begin(), offsets.end(), start) -
+          offsets.begin() - 1;
+      for (; i < contiguous.size() && offsets[i] < end; ++i) {
+        size_t x_start = std::max(start, offsets[i]) - offsets[i];
+        size_t x_end = std::min(end, offsets[i + 1]) - offsets[i];
+        sum_of_squares(contiguous[i], x_start, x_end, partials[c]);
+      }
+    }
+  });
+
+  double sum = 0;
+  for (auto p : partials) {
+    sum += p;
+  }
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.dtype() == float64) {
+    *out.data<double>() = std::sqrt(sum);
+  } else {
+    *out.data<float>() = static_cast<float>(std::sqrt(sum));
+  }
+}
+
+void OptimizerStep::eval(const std::vector<array>& inputs, array& out) {
+  // The inputs are the parameter, the gradient and the state which all have
+  // the same shape followed by the scalar learning rate. The output stacks
+  // the updated parameter and state.
+  assert(inputs.size() >= 3);
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
+
+  auto& lr = inputs.back();
+  double learning_rate =
+      lr.dtype() == float64 ? *lr.data<double>() : *lr.data<float>();
+  std::vector<array> arrays(inputs.begin(), inputs.end() - 1);
+  auto& hp = hyperparameters_;
+  switch (out.dtype()) {
+    case float32:
+      optimizer_step<float>(optimizer_, hp, arrays, learning_rate, out);
+      break;
+    case float16:
+      optimizer_step<float16_t>(optimizer_, hp, arrays, learning_rate, out);
+      break;
+    case bfloat16:
+      optimizer_step<bfloat16_t>(optimizer_, hp, arrays, learning_rate, out);
+      break;
+    case float64:
+      optimizer_step<double>(optimizer_, hp, arrays, learning_rate, out);
+      break;
+    default:
+      throw std::runtime_error("[OptimizerStep] Unsupported type.");
+  }
+}
+
+void AdafactorStep::eval(const std::vector<array>& inputs, array& out) {
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
+
+  auto& hp = hyperparameters_;
+  if (output_ == SecondMoment) {
+    switch (inputs[0].dtype()) {
+      case float32:
+        adafactor_second_moment<float>(inputs, hp[0], out);
+        break;
+      case float16:
+        adafactor_second_moment<float16_t>(inputs, hp[0], out);
+        break;
+      case bfloat16:
+        adafactor_second_moment<bfloat16_t>(inputs, hp[0], out);
+        break;
+      case float64:
+        adafactor_second_moment<double>(inputs, hp[0], out);
+        break;
+      default:
+        throw std::runtime_error("[AdafactorStep] Unsupported type.");
+    }
+    return;
+  }
+
+  auto& lr = inputs.back();
+  double learning_rate =
+      lr.dtype() == float64 ? *lr.data<double>() : *lr.data<float>();
+  switch (out.dtype()) {
+    case float32:
+      adafactor_parameter<float>(hp, inputs, learning_rate, out);
+      break;
+    case float16:
+      adafactor_parameter<float16_t>(hp, inputs, learning_rate, out);
+      break;
+    case bfloat16:
+      adafactor_parameter<bfloat16_t>(hp, inputs, learning_rate, out);
+      break;
+    case float64:
+      adafactor_parameter<double>(hp, inputs, learning_rate, out);
+      break;
+    default:
+      throw std::runtime_error("[AdafactorStep] Unsupported type.");
+  }
+}
+
+void QuantizedAdamStep::eval(const std::vector<array>& inputs, array& out) {
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
+
+  auto& hp = hyperparameters_;
+  size_t block_size = block_size_;
+  if (output_ == State) {
+    switch (inputs[0].dtype()) {
+      case float32:
+        quantized_adam_state<float>(hp, inputs, block_size, out);
+        break;
+      case float16:
+        quantized_adam_state<float16_t>(hp, inputs, block_size, out);
+        break;
+      case bfloat16:
+        quantized_adam_state<bfloat16_t>(hp, inputs, block_size, out);
+        break;
+      case float64:
+        quantized_adam_state<double>(hp, inputs, block_size, out);
+        break;
+      default:
+        throw std::runtime_error("[QuantizedAdamStep] Unsupported type.");
+    }
+    return;
+  }
+
+  auto& lr = inputs.back();
+  double learning_rate =
+      lr.dtype() == float64 ? *lr.data<double>() : *lr.data<float>();
+  switch (out.dtype()) {
+    case float32:
+      quantized_adam_parameter<float>(
+          hp, inputs, block_size, learning_rate, out);
+      break;
+    case float16:
+      quantized_adam_parameter<float16_t>(
+          hp, inputs, block_size, learning_rate, out);
+      break;
+    case bfloat16:
+      quantized_adam_parameter<bfloat16_t>(
+          hp, inputs, block_size, learning_rate, out);
+      break;
+    case float64:
+      quantized_adam_parameter<double>(
+          hp, inputs, block_size, learning_rate, out);
+      break;
+    default:
+      throw std::runtime_error("[QuantizedAdamStep] Unsupported type.");
+  }
+}
+
+} // namespace mlx::core
@@ -2,8 +2,15 @@
 
 #include <numeric>
 
+// Keep the plans of the most recent transform lengths so that repeated
+// transforms of the same size skip computing the twiddle factors. The cache
+// is kept per plan type so it is keyed by length, kind and precision.
+#define POCKETFFT_CACHE_SIZE 16
 #include "mlx/3rdparty/pocketfft.h"
+
 #include "mlx/allocator.h"
+#include "mlx/backend/common/threading.h"
+#include "mlx/fft.h"
 #include "mlx/primitives.h"
 
 namespace mlx::core {
@@ -38,6 +45,14 @@ void FFT::eval(const std::vector<array>& inputs, array& out) {
         });
     scale /= nelem;
   }
+
+  // pocketfft only splits the batch of 1D transforms along each axis
+  // across threads when there is enough of them
+  size_t n_threads = fft::num_threads();
+  if (n_threads == 0) {
+    n_threads = max_threads();
+  }
+
   if (in.dtype() == complex64 && out.dtype() == complex64) {
     auto in_ptr =
         reinterpret_cast<const std::complex<float>*>(in.data<complex64_t>());
@@ -51,7 +66,8 @@ void FFT::eval(const std::vector<array>& inputs, array& out) {
         !inverse_,
         in_ptr,
         out_ptr,
-        scale);
+        scale,
+        n_threads);
   } else if (in.dtype() == float32 && out.dtype() == complex64) {
     auto in_ptr = in.data<float>();
     auto out_ptr =
@@ -64,7 +80,30 @@ void FFT::eval(const std::vector<array>& inputs, array& out) {
         !inverse_,
         in_ptr,
         out_ptr,
-        scale);
+        scale,
+        n_threads);
+  } else if (in.dtype() == float64 && out.dtype() == complex64) {
+    // There is no double precision complex type so the transform is
+    // computed in double precision and only the result is rounded
+    std::vector<std::complex<double>> tmp(out.size());
+    for (auto& s : strides_out) {
+      s *= 2;
+    }
+    pocketfft::r2c(
+        shape,
+        strides_in,
+        strides_out,
+        axes_,
+        !inverse_,
+        in.data<double>(),
+        tmp.data(),
+        static_cast<double>(scale),
+        n_threads);
+    auto out_ptr = out.data<complex64_t>();
+    for (size_t i = 0; i < tmp.size(); ++i) {
+      out_ptr[i] = complex64_t(
+          static_cast<float>(tmp[i].real()), static_cast<float>(tmp[i].imag()));
+    }
   } else if (in.dtype() == complex64 && out.dtype() == float32) {
     auto in_ptr =
         reinterpret_cast<const std::complex<float>*>(in.data<complex64_t>());
@@ -77,7 +116,8 @@ void FFT::eval(const std::vector<array>& inputs, array& out) {
         !inverse_,
         in_ptr,
         out_ptr,
-        scale);
+        scale,
+        n_threads);
   } else {
     throw std::runtime_error(
         "[FFT] Received unexpected input and output type combination.");
@@ -8,6 +8,7 @@
 #include "mlx/primitives.h"
 
 #include "mlx/backend/common/copy.h"
+#include "mlx/backend/common/threading.h"
 #include "mlx/backend/common/utils.h"
 
 namespace mlx::core {
@@ -79,31 +80,48 @@ void gather(
   size_t ind_size = slice_size == 0 ? 0 : out.size() / slice_size;
   const T* src_ptr = src.data<T>();
   T* dst_ptr = out.data<T>();
-  size_t out_idx = 0;
-
-  for (int idx = 0; idx < ind_size; idx++) {
-    size_t src_idx = 0;
-    for (int ii = 0; ii < inds.size(); ++ii) {
-      auto ax = axes[ii];
-      auto idx_loc = elem_to_loc(idx, inds[ii]);
-      auto idx_val =
-          offset_neg_idx(inds[ii].data<IdxT>()[idx_loc], src.shape(ax));
-      src_idx += (idx_val * src.strides()[ax]);
+
+  // The offset of each slice element relative to the start of the slice is
+  // the same for every index so compute it once up front
+  std::vector<size_t> slice_offsets;
+  if (slice_size > 1 && !can_copy && ind_size > 1) {
+    slice_offsets.resize(slice_size);
+    for (size_t jj = 0; jj < slice_size; jj++) {
+      slice_offsets[jj] = elem_to_loc(jj, slice_sizes, src.strides());
     }
+  }
 
-    if (slice_size == 1) {
-      dst_ptr[out_idx++] = src_ptr[src_idx];
-    } else if (can_copy) {
-      std::copy(
-          src_ptr + src_idx, src_ptr + src_idx + slice_size, dst_ptr + out_idx);
-      out_idx += slice_size;
-    } else {
-      for (int jj = 0; jj < slice_size; jj++) {
-        auto src_offset = elem_to_loc(jj, slice_sizes, src.strides());
-        dst_ptr[out_idx++] = src_ptr[src_idx + src_offset];
+  // Each index writes its own slice of the output so the indices can be
+  // split across threads freely
+  auto gather_range = [&](size_t start, size_t end) {
+    for (size_t idx = start; idx < end; idx++) {
+      size_t src_idx = 0;
+      for (int ii = 0; ii < inds.size(); ++ii) {
+        auto ax = axes[ii];
+        auto idx_loc = elem_to_loc(idx, inds[ii]);
+        auto idx_val =
+            offset_neg_idx(inds[ii].data<IdxT>()[idx_loc], src.shape(ax));
+        src_idx += (idx_val * src.strides()[ax]);
+      }
+
+      T* dst = dst_ptr + idx * slice_size;
+      if (slice_size == 1) {
+        *dst = src_ptr[src_idx];
+      } else if (can_copy) {
+        std::copy(src_ptr + src_idx, src_ptr + src_idx + slice_size, dst);
+      } else if (!slice_offsets.empty()) {
+        for (size_t jj = 0; jj < slice_size; jj++) {
+          dst[jj] = src_ptr[src_idx + slice_offsets[jj]];
+        }
+      } else {
+        for (size_t jj = 0; jj < slice_size; jj++) {
+          auto src_offset = elem_to_loc(jj, slice_sizes, src.strides());
+          dst[jj] = src_ptr[src_idx + src_offset];
+        }
       }
     }
-  }
+  };
+  parallel_for(ind_size, num_threads(out.size()), gather_range);
 }
 
 template <typename IdxT>
@@ -147,6 +165,9 @@ void dispatch_gather(
     case float32:
       gather<float, IdxT>(src, inds, out, axes, size);
       break;
+    case float64:
+      gather<double, IdxT>(src, inds, out, axes, size);
+      break;
     case bfloat16:
       gather<bfloat16_t, IdxT>(src, inds, out, axes, size);
       break;
@@ -197,6 +218,7 @@ void Gather::eval(const std::vector<array>& inputs, array& out) {
       break;
     case float16:
     case float32:
+    case float64:
     case bfloat16:
     case complex64:
       throw std::runtime_error(
@@ -223,22 +245,97 @@ void scatter(
     update_size *= us;
   }
 
-  for (int i = 0; i < n_updates; ++i) {
+  // The output is row contiguous so each update slice lands in a contiguous
+  // block of it when, ignoring leading 1s and the first non-singleton
+  // dimension, the update shape matches the output shape
+  bool out_contiguous = true;
+  {
+    int i = 0;
+    for (; i < update_shape.size() && update_shape[i] == 1; ++i)
+      ;
+    i++;
+    for (; i < update_shape.size() && out_contiguous; ++i) {
+      out_contiguous = (update_shape[i] == out.shape(i));
+    }
+  }
+
+  // Otherwise precompute the offset of each update element in the output
+  std::vector<size_t> out_offsets;
+  if (!out_contiguous && update_size > 1 && n_updates > 1) {
+    out_offsets.resize(update_size);
+    for (size_t j = 0; j < update_size; ++j) {
+      out_offsets[j] = elem_to_loc(j, update_shape, out.strides());
+    }
+  }
+
+  auto get_index = [&](int j, size_t i) {
+    auto idx_loc = elem_to_loc(i, inds[j]);
+    return offset_neg_idx(inds[j].data<IdxT>()[idx_loc], out.shape(axes[j]));
+  };
+
+  const InT* upd_ptr = updates.data<InT>();
+  InT* out_ptr = out.data<InT>();
+
+  auto apply_update = [&](size_t i) {
     size_t out_offset = 0;
     for (int j = 0; j < nind; ++j) {
-      auto ax = axes[j];
-      auto idx_loc = elem_to_loc(i, inds[j]);
-      auto idx_val =
-          offset_neg_idx(inds[j].data<IdxT>()[idx_loc], out.shape(ax));
-      out_offset += (idx_val * out.strides()[ax]);
+      out_offset += (get_index(j, i) * out.strides()[axes[j]]);
     }
-    for (int j = 0; j < update_size; ++j) {
-      auto update_loc = elem_to_loc(i * update_size + j, updates);
-      auto out_loc = elem_to_loc(j, update_shape, out.strides());
-      op(updates.data<InT>()[update_loc],
-         out.data<InT>() + out_offset + out_loc);
+    InT* dst = out_ptr + out_offset;
+    if (updates.flags().row_contiguous) {
+      const InT* src = upd_ptr + i * update_size;
+      if (out_contiguous) {
+        for (size_t j = 0; j < update_size; ++j) {
+          op(src[j], dst + j);
+        }
+      } else if (!out_offsets.empty()) {
+        for (size_t j = 0; j < update_size; ++j) {
+          op(src[j], dst + out_offsets[j]);
+        }
+      } else {
+        for (size_t j = 0; j < update_size; ++j) {
+          op(src[j], dst + elem_to_loc(j, update_shape, out.strides()));
+        }
+      }
+    } else {
+      for (size_t j = 0; j < update_size; ++j) {
+        auto update_loc = elem_to_loc(i * update_size + j, updates);
+        auto out_loc =
+            out_contiguous ? j : elem_to_loc(j, update_shape, out.strides());
+        op(upd_ptr[update_loc], dst + out_loc);
+      }
     }
+  };
+
+  // Different updates may write the same output element so the updates
+  // cannot simply be split across threads. Instead each thread owns a range
+  // of positions along the first indexed axis and applies only the updates
+  // that land there. When the updates span a single position along that
+  // axis no two threads touch the same output element, no atomics are
+  // needed and updates to a given element are applied in their original
+  // order.
+  int n_threads = 1;
+  if (nind > 0 && update_shape[axes[0]] == 1) {
+    n_threads = std::min(
+        num_threads(n_updates * update_size),
+        static_cast<int>(out.shape(axes[0])));
   }
+
+  if (n_threads <= 1) {
+    for (size_t i = 0; i < n_updates; ++i) {
+      apply_update(i);
+    }
+    return;
+  }
+
+  parallel_for(out.shape(axes[0]), n_threads, [&](size_t start, size_t end) {
+    for (size_t i = 0; i < n_updates; ++i) {
+      size_t idx = get_index(0, i);
+      if (idx >= start && idx < end) {
+        apply_update(i);
+      }
+    }
+  });
 }
 
 template <typename InT, typename IdxT>
@@ -316,6 +413,7 @@ void dispatch_scatter(
       break;
     case float16:
     case float32:
+    case float64:
     case bfloat16:
     case complex64:
       throw std::runtime_error(
@@ -367,6 +465,9 @@ void Scatter::eval(const std::vector<array>& inputs, array& out) {
     case float32:
       dispatch_scatter<float>(out, inds, updates, axes_, reduce_type_);
       break;
+    case float64:
+      dispatch_scatter<double>(out, inds, updates, axes_, reduce_type_);
+      break;
     case bfloat16:
       dispatch_scatter<bfloat16_t>(out, inds, updates, axes_, reduce_type_);
       break;
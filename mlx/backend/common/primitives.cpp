@@ -10,7 +10,6 @@
 #include "mlx/backend/common/arange.h"
 #include "mlx/backend/common/copy.h"
 #include "mlx/backend/common/erf.h"
-#include "mlx/backend/common/threefry.h"
 #include "mlx/backend/common/unary.h"
 #include "mlx/backend/common/utils.h"
 #include "mlx/primitives.h"
@@ -18,6 +17,45 @@
 
 namespace mlx::core {
 
+namespace {
+
+// Copies the selected elements as T which only needs to be as wide as the
+// type of the output
+template <typename T>
+void select_op(
+    const array& condition,
+    const array& x,
+    const array& y,
+    array& out) {
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  auto c_ptr = condition.data<bool>();
+  auto x_ptr = x.data<T>();
+  auto y_ptr = y.data<T>();
+  auto out_ptr = out.data<T>();
+  if (condition.flags().row_contiguous && x.flags().row_contiguous &&
+      y.flags().row_contiguous) {
+    for (size_t i = 0; i < out.size(); ++i) {
+      out_ptr[i] = c_ptr[i] ? x_ptr[i] : y_ptr[i];
+    }
+    return;
+  }
+  auto [shape, strides] = collapse_contiguous_dims(
+      out.shape(),
+      std::vector<std::vector<size_t>>{
+          condition.strides(), x.strides(), y.strides()});
+  StridedIterator c_it(shape, strides[0]);
+  StridedIterator x_it(shape, strides[1]);
+  StridedIterator y_it(shape, strides[2]);
+  for (size_t i = 0; i < out.size(); ++i) {
+    out_ptr[i] = c_ptr[c_it.loc] ? x_ptr[x_it.loc] : y_ptr[y_it.loc];
+    c_it.step();
+    x_it.step();
+    y_it.step();
+  }
+}
+
+} // namespace
+
 void Abs::eval(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   auto& in = inputs[0];
@@ -167,6 +205,10 @@ void Broadcast::eval(const std::vector<array>& inputs, array& out) {
   out.copy_shared_buffer(in, strides, flags, in.data_size());
 }
 
+void Checkpoint::eval(const std::vector<array>& inputs, array& out) {
+  out.copy_shared_buffer(inputs.back());
+}
+
 void Concatenate::eval(const std::vector<array>& inputs, array& out) {
   std::vector<int> sizes;
   sizes.push_back(0);
@@ -220,25 +262,25 @@ void Cosh::eval(const std::vector<array>& inputs, array& out) {
   }
 }
 
+void Depends::eval(const std::vector<array>& inputs, array& out) {
+  out.copy_shared_buffer(inputs[0]);
+}
+
 void Erf::eval(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   const auto& in = inputs[0];
   switch (out.dtype()) {
     case float32:
-      out.set_data(allocator::malloc_or_wait(out.nbytes()));
-      unary_op<float>(in, out, [](auto x) { return std::erf(x); });
+      unary_op_simd<float>(in, out, ErfOp());
       break;
     case float16:
-      out.set_data(allocator::malloc_or_wait(out.nbytes()));
-      unary_op<float16_t>(in, out, [](auto x) {
-        return static_cast<float16_t>(std::erf(static_cast<float>(x)));
-      });
+      unary_op_simd<float16_t>(in, out, ErfOp());
       break;
     case bfloat16:
-      out.set_data(allocator::malloc_or_wait(out.nbytes()));
-      unary_op<bfloat16_t>(in, out, [](auto x) {
-        return static_cast<bfloat16_t>(std::erf(static_cast<float>(x)));
-      });
+      unary_op_simd<bfloat16_t>(in, out, ErfOp());
+      break;
+    case float64:
+      unary_op<double>(in, out, [](auto x) { return std::erf(x); });
       break;
     default:
       throw std::invalid_argument(
@@ -267,6 +309,10 @@ void ErfInv::eval(const std::vector<array>& inputs, array& out) {
         return static_cast<bfloat16_t>(erfinv(static_cast<float>(x)));
       });
       break;
+    case float64:
+      out.set_data(allocator::malloc_or_wait(out.nbytes()));
+      unary_op<double>(in, out, [](auto x) { return erfinv(x); });
+      break;
     default:
       throw std::invalid_argument(
           "[erf_inv] Inverse error function only defined for arrays"
@@ -279,7 +325,7 @@ void Exp::eval(const std::vector<array>& inputs, array& out) {
   const auto& in = inputs[0];
 
   if (is_floating_point(out.dtype())) {
-    unary_fp(in, out, [](auto x) { return std::exp(x); });
+    unary_fp_simd(in, out, ExpOp());
   } else {
     throw std::invalid_argument(
         "[exp] Cannot exponentiate elements in array"
@@ -308,7 +354,7 @@ void Log::eval(const std::vector<array>& inputs, array& out) {
   if (is_floating_point(out.dtype())) {
     switch (base_) {
       case Base::e:
-        unary_fp(in, out, [](auto x) { return std::log(x); });
+        unary_fp_simd(in, out, LogOp());
         break;
       case Base::two:
         unary_fp(in, out, [](auto x) { return std::log2(x); });
@@ -379,54 +425,6 @@ void Pad::eval(const std::vector<array>& inputs, array& out) {
   copy_inplace(in, out_slice, CopyType::GeneralGeneral);
 }
 
-void RandomBits::eval(const std::vector<array>& inputs, array& out) {
-  assert(inputs.size() == 1);
-  // keys has shape (N1, ..., NK, 2)
-  // out has shape (N1, ..., NK, M1, M2, ...)
-  auto& keys = inputs[0];
-  size_t num_keys = keys.size() / 2;
-
-  size_t elems_per_key = out.size() / num_keys;
-  size_t bytes_per_key = out.itemsize() * elems_per_key;
-  out.set_data(allocator::malloc_or_wait(out.nbytes()));
-
-  auto kptr = inputs[0].data<uint32_t>();
-  auto cptr = out.data<char>();
-  size_t out_skip = (bytes_per_key + 4 - 1) / 4;
-  auto half_size = out_skip / 2;
-  bool even = out_skip % 2 == 0;
-  for (int i = 0; i < num_keys; ++i, cptr += bytes_per_key) {
-    auto ptr = reinterpret_cast<uint32_t*>(cptr);
-    // Get ith key
-    auto kidx = 2 * i;
-    auto k1_elem = elem_to_loc(kidx, keys.shape(), keys.strides());
-    auto k2_elem = elem_to_loc(kidx + 1, keys.shape(), keys.strides());
-    auto key = std::make_pair(kptr[k1_elem], kptr[k2_elem]);
-
-    std::pair<uintptr_t, uintptr_t> count{0, half_size + !even};
-    for (; count.first + 1 < half_size; count.first++, count.second++) {
-      std::tie(ptr[count.first], ptr[count.second]) =
-          random::threefry2x32_hash(key, count);
-    }
-    if (count.first < half_size) {
-      auto rb = random::threefry2x32_hash(key, count);
-      ptr[count.first++] = rb.first;
-      if (bytes_per_key % 4 > 0) {
-        std::copy(
-            reinterpret_cast<char*>(&rb.second),
-            reinterpret_cast<char*>(&rb.second) + bytes_per_key % 4,
-            cptr + 4 * count.second);
-      } else {
-        ptr[count.second] = rb.second;
-      }
-    }
-    if (!even) {
-      count.second = 0;
-      ptr[half_size] = random::threefry2x32_hash(key, count).first;
-    }
-  }
-}
-
 void Reshape::eval(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   const auto& in = inputs[0];
@@ -444,15 +442,34 @@ void Reshape::eval(const std::vector<array>& inputs, array& out) {
   }
 }
 
+void Select::eval(const std::vector<array>& inputs, array& out) {
+  assert(inputs.size() == 3);
+  auto& condition = inputs[0];
+  auto& x = inputs[1];
+  auto& y = inputs[2];
+  switch (out.itemsize()) {
+    case 1:
+      select_op<uint8_t>(condition, x, y, out);
+      break;
+    case 2:
+      select_op<uint16_t>(condition, x, y, out);
+      break;
+    case 4:
+      select_op<uint32_t>(condition, x, y, out);
+      break;
+    case 8:
+      select_op<uint64_t>(condition, x, y, out);
+      break;
+    default:
+      throw std::runtime_error("[Select] Unsupported type.");
+  }
+}
+
 void Sigmoid::eval(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   const auto& in = inputs[0];
   if (is_floating_point(out.dtype())) {
-    auto sigmoid_op = [](auto x) {
-      auto one = static_cast<decltype(x)>(1.0);
-      return one / (one + std::exp(-x));
-    };
-    unary_fp(in, out, sigmoid_op);
+    unary_fp_simd(in, out, SigmoidOp());
   } else {
     throw std::invalid_argument(
         "[sigmoid] Cannot sigmoid of elements in array with"
@@ -579,7 +596,7 @@ void Tanh::eval(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   const auto& in = inputs[0];
   if (is_floating_point(out.dtype())) {
-    unary_fp(in, out, [](auto x) { return std::tanh(x); });
+    unary_fp_simd(in, out, TanhOp());
   } else {
     throw std::invalid_argument(
         "[tanh] Cannot compute hyperbolic tangent of elements in array"
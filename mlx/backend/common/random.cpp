@@ -0,0 +1,243 @@
+// Copyright © 2023 Apple Inc.
+
+#include <algorithm>
+#include <cassert>
+#include <cmath>
+#include <cstring>
+#include <limits>
+
+#include "mlx/allocator.h"
+#include "mlx/backend/common/copy.h"
+#include "mlx/backend/common/erf.h"
+#include "mlx/backend/common/threading.h"
+#include "mlx/backend/common/threefry.h"
+#include "mlx/backend/common/utils.h"
+#include "mlx/primitives.h"
+
+namespace mlx::core {
+
+namespace {
+
+constexpr size_t threefry_block = 256;
+
+// Generates the random bits of every key in keys (N1, ..., NK, 2) in
+// parallel and calls f(i, w, words, n) with the n words starting at word w
+// of the bits of key i.
+//
+// The bits of a key are ceil(bytes_per_key / 4) words where the counter
+// (c, c + half + odd) fills the words c and c + half + odd. An odd number of
+// words is completed by the first word of the counter (half, 0).
+template <typename F>
+void threefry_words(const array& keys, size_t bytes_per_key, F&& f) {
+  size_t num_keys = keys.size() / 2;
+  size_t out_skip = (bytes_per_key + 4 - 1) / 4;
+  size_t half_size = out_skip / 2;
+  size_t odd = out_skip % 2;
+  size_t counters_per_key = half_size + odd;
+
+  auto kptr = keys.data<uint32_t>();
+  auto get_key = [&](size_t i) {
+    if (keys.flags().row_contiguous) {
+      return std::make_pair(kptr[2 * i], kptr[2 * i + 1]);
+    }
+    auto k1_elem = elem_to_loc(2 * i, keys.shape(), keys.strides());
+    auto k2_elem = elem_to_loc(2 * i + 1, keys.shape(), keys.strides());
+    return std::make_pair(kptr[k1_elem], kptr[k2_elem]);
+  };
+
+  // Split the counters of all the keys across threads
+  size_t total = num_keys * counters_per_key;
+  int n_threads = num_threads(total, 1 << 12);
+  parallel_for(total, n_threads, [&](size_t start, size_t end) {
+    uint32_t x0[threefry_block];
+    uint32_t x1[threefry_block];
+    while (start < end) {
+      size_t i = start / counters_per_key;
+      size_t c = start % counters_per_key;
+      size_t n = std::min({threefry_block, end - start, counters_per_key - c});
+      for (size_t j = 0; j < n; ++j) {
+        x0[j] = c + j;
+        x1[j] = (c + j < half_size) ? c + j + half_size + odd : 0;
+      }
+      random::threefry2x32_hash(get_key(i), x0, x1, n);
+
+      f(i, c, x0, n);
+      if (c < half_size) {
+        f(i, c + half_size + odd, x1, std::min(n, half_size - c));
+      }
+      start += n;
+    }
+  });
+}
+
+// Calls out[i] = op(i, bits) for every element of out with the bits that
+// RandomBits generates for an output of type B and the same shape
+template <typename B, typename T, typename Op>
+void random_sample(const array& keys, array& out, Op op) {
+  constexpr size_t per_word = 4 / sizeof(B);
+  size_t num_keys = keys.size() / 2;
+  size_t elems_per_key = out.size() / num_keys;
+  auto dst = out.data<T>();
+  threefry_words(
+      keys,
+      elems_per_key * sizeof(B),
+      [&](size_t i, size_t w, const uint32_t* words, size_t n) {
+        B bits[threefry_block * per_word];
+        std::memcpy(bits, words, 4 * n);
+        size_t start = w * per_word;
+        size_t end = std::min(start + n * per_word, elems_per_key);
+        size_t offset = i * elems_per_key;
+        for (size_t e = start; e < end; ++e) {
+          dst[offset + e] = op(offset + e, bits[e - start]);
+        }
+      });
+}
+
+// Returns the largest value of T below one
+template <typename T, typename B>
+T below_one() {
+  T f = T(1.0f);
+  B m;
+  std::memcpy(&m, &f, sizeof(T));
+  m -= 1;
+  std::memcpy(&f, &m, sizeof(T));
+  return f;
+}
+
+// A parameter of the distribution broadcast to the output shape which is
+// either a scalar or read in row major order
+template <typename T>
+struct Param {
+  array x;
+  const T* ptr;
+  size_t stride;
+
+  explicit Param(const array& in) : x(in) {
+    if (x.data_size() != 1 && !x.flags().row_contiguous) {
+      x = array(in.shape(), in.dtype(), nullptr, {});
+      copy(in, x, CopyType::General);
+    }
+    ptr = x.data<T>();
+    stride = x.data_size() == 1 ? 0 : 1;
+  }
+
+  T operator[](size_t i) const {
+    return ptr[i * stride];
+  }
+};
+
+template <typename T, typename B>
+void sample(
+    RandomSample::Distribution distribution,
+    const std::vector<array>& inputs,
+    array& out) {
+  // Each sample is computed exactly as the ops that random::uniform,
+  // random::normal and random::bernoulli are otherwise composed of so that
+  // both give the same values. The unit sample below is uniform(0, 1, T).
+  const T upper = below_one<T, B>();
+  auto unit = [upper](B bits) {
+    constexpr float maxval = std::numeric_limits<B>::max();
+    T u = static_cast<T>(static_cast<float>(bits) / maxval);
+    return (u < upper) ? u : upper;
+  };
+
+  auto& keys = inputs[0];
+  switch (distribution) {
+    case RandomSample::Uniform: {
+      // low + range * u computed in the output type
+      auto uniform = [&](auto out_type) {
+        using U = decltype(out_type);
+        Param<U> low(inputs[1]);
+        Param<U> range(inputs[2]);
+        random_sample<B, U>(keys, out, [&](size_t i, B bits) {
+          U u = static_cast<U>(unit(bits));
+          U r = static_cast<U>(range[i] * u);
+          return static_cast<U>(r + low[i]);
+        });
+      };
+      switch (out.dtype()) {
+        case float32:
+          uniform(float());
+          break;
+        case float16:
+          uniform(float16_t());
+          break;
+        case bfloat16:
+          uniform(bfloat16_t());
+          break;
+        default:
+          throw std::runtime_error("[RandomSample] Unsupported type.");
+      }
+      break;
+    }
+    case RandomSample::Normal: {
+      // sqrt(2) erfinv(u) for u uniform in [nextafter(-1, 0), 1)
+      const T low = static_cast<T>(std::nextafter(-1.0f, 0.0f));
+      const T range = static_cast<T>(T(1.0f) - low);
+      const T scale = static_cast<T>(std::sqrt(2.0));
+      random_sample<B, T>(keys, out, [&](size_t, B bits) {
+        T u = static_cast<T>(static_cast<T>(range * unit(bits)) + low);
+        T y = static_cast<T>(erfinv(static_cast<float>(u)));
+        return static_cast<T>(scale * y);
+      });
+      break;
+    }
+    case RandomSample::Bernoulli: {
+      Param<T> p(inputs[1]);
+      random_sample<B, bool>(
+          keys, out, [&](size_t i, B bits) { return unit(bits) < p[i]; });
+      break;
+    }
+  }
+}
+
+} // namespace
+
+void RandomBits::eval(const std::vector<array>& inputs, array& out) {
+  assert(inputs.size() == 1);
+  // keys has shape (N1, ..., NK, 2)
+  // out has shape (N1, ..., NK, M1, M2, ...)
+  auto& keys = inputs[0];
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
+
+  size_t num_keys = keys.size() / 2;
+  size_t bytes_per_key = out.nbytes() / num_keys;
+  auto cptr = out.data<char>();
+  threefry_words(
+      keys,
+      bytes_per_key,
+      [&](size_t i, size_t w, const uint32_t* words, size_t n) {
+        // The last word of a key may be partial
+        size_t nbytes = std::min(4 * n, bytes_per_key - 4 * w);
+        std::memcpy(cptr + i * bytes_per_key + 4 * w, words, nbytes);
+      });
+}
+
+void RandomSample::eval(const std::vector<array>& inputs, array& out) {
+  // keys has shape (N1, ..., NK, 2) and out and the remaining inputs have
+  // shape (N1, ..., NK, M1, M2, ...)
+  assert(inputs.size() >= 1);
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
+
+  switch (dtype_) {
+    case float32:
+      sample<float, uint32_t>(distribution_, inputs, out);
+      break;
+    case float16:
+      sample<float16_t, uint16_t>(distribution_, inputs, out);
+      break;
+    case bfloat16:
+      sample<bfloat16_t, uint16_t>(distribution_, inputs, out);
+      break;
+    default:
+      throw std::runtime_error("[RandomSample] Unsupported type.");
+  }
+}
+
+} // namespace mlx::core
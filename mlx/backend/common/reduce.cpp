@@ -43,6 +43,7 @@ instantiate_default_limit(int64_t);
 instantiate_float_limit(float16_t);
 instantiate_float_limit(bfloat16_t);
 instantiate_float_limit(float);
+instantiate_float_limit(double);
 instantiate_float_limit(complex64_t);
 
 template <>
@@ -53,6 +54,8 @@ struct Limits<bool> {
 
 const float Limits<float>::max = std::numeric_limits<float>::infinity();
 const float Limits<float>::min = -std::numeric_limits<float>::infinity();
+const double Limits<double>::max = std::numeric_limits<double>::infinity();
+const double Limits<double>::min = -std::numeric_limits<double>::infinity();
 const bfloat16_t Limits<bfloat16_t>::max =
     std::numeric_limits<float>::infinity();
 const bfloat16_t Limits<bfloat16_t>::min =
@@ -138,11 +141,21 @@ void reduce_dispatch_out(
         case float32:
           reduction_op<InT, float>(in, out, axes, 0.0f, op);
           break;
+        case float64:
+          // Sums keep the complex type so there is no complex64 and float64
+          // pair to instantiate
+          if constexpr (!std::is_same_v<InT, complex64_t>) {
+            reduction_op<InT, double>(in, out, axes, 0.0, op);
+          }
+          break;
         case bfloat16:
           reduction_op<InT, bfloat16_t>(in, out, axes, 0.0f, op);
           break;
         case complex64:
-          reduction_op<InT, complex64_t>(in, out, axes, complex64_t{0.0f}, op);
+          if constexpr (!std::is_same_v<InT, double>) {
+            reduction_op<InT, complex64_t>(
+                in, out, axes, complex64_t{0.0f}, op);
+          }
           break;
       }
     } break;
@@ -152,13 +165,21 @@ void reduce_dispatch_out(
       break;
     }
     case Reduce::Max: {
-      auto op = [](auto y, auto x) { (*y) = (*y > x) ? *y : x; };
+      auto op = [](auto y, auto x) {
+        if (!(*y > x)) {
+          (*y) = x;
+        }
+      };
       auto init = Limits<InT>::min;
       reduction_op<InT, InT>(in, out, axes, init, op);
       break;
     }
     case Reduce::Min: {
-      auto op = [](auto y, auto x) { (*y) = (*y < x) ? *y : x; };
+      auto op = [](auto y, auto x) {
+        if (!(*y < x)) {
+          (*y) = x;
+        }
+      };
       auto init = Limits<InT>::max;
       reduction_op<InT, InT>(in, out, axes, init, op);
       break;
@@ -205,6 +226,9 @@ void Reduce::eval(const std::vector<array>& inputs, array& out) {
     case float32:
       reduce_dispatch_out<float>(in, out, reduce_type_, axes_);
       break;
+    case float64:
+      reduce_dispatch_out<double>(in, out, reduce_type_, axes_);
+      break;
     case bfloat16:
       reduce_dispatch_out<bfloat16_t>(in, out, reduce_type_, axes_);
       break;
@@ -2,6 +2,11 @@
 
 #pragma once
 
+#include <functional>
+#include <memory>
+#include <numeric>
+
+#include "mlx/backend/common/threading.h"
 #include "mlx/backend/common/utils.h"
 
 namespace mlx::core {
@@ -38,30 +43,21 @@ enum ReductionOpType {
   GeneralReduce
 };
 
-// Helper for the ndimensional strided loop
-// Should this be in utils?
-inline void nd_loop(
-    std::function<void(int)> callback,
-    const std::vector<int>& shape,
-    const std::vector<size_t>& strides) {
-  std::function<void(int, int)> loop_inner;
-  loop_inner = [&](int dim, int offset) {
-    if (dim < shape.size() - 1) {
-      int size = shape[dim];
-      size_t stride = strides[dim];
-      for (int i = 0; i < size; i++) {
-        loop_inner(dim + 1, offset + i * stride);
-      }
-    } else {
-      int size = shape[dim];
-      size_t stride = strides[dim];
-      for (int i = 0; i < size; i++) {
-        callback(offset + i * stride);
-      }
-    }
-  };
-  loop_inner(0, 0);
-}
+// Half precision values are accumulated in float32
+template <typename U>
+struct ReductionAccumulator {
+  using type = U;
+};
+
+template <>
+struct ReductionAccumulator<float16_t> {
+  using type = float;
+};
+
+template <>
+struct ReductionAccumulator<bfloat16_t> {
+  using type = float;
+};
 
 std::pair<std::vector<int>, std::vector<size_t>> shapes_without_reduction_axes(
     const array& x,
@@ -80,13 +76,24 @@ std::pair<std::vector<int>, std::vector<size_t>> shapes_without_reduction_axes(
 
 template <typename T, typename U, typename Op>
 struct DefaultStridedReduce {
+  using A = typename ReductionAccumulator<U>::type;
   Op op;
 
   DefaultStridedReduce(Op op_) : op(op_) {}
 
   void operator()(const T* x, U* accumulator, int size, size_t stride) {
+    if constexpr (std::is_same_v<A, U>) {
+      reduce(x, accumulator, size, stride);
+    } else {
+      std::vector<A> acc(accumulator, accumulator + stride);
+      reduce(x, acc.data(), size, stride);
+      std::copy(acc.begin(), acc.end(), accumulator);
+    }
+  }
+
+  void reduce(const T* x, A* accumulator, int size, size_t stride) {
     for (int i = 0; i < size; i++) {
-      U* moving_accumulator = accumulator;
+      A* moving_accumulator = accumulator;
       for (int j = 0; j < stride; j++) {
         op(moving_accumulator, *x);
         moving_accumulator++;
@@ -98,15 +105,46 @@ struct DefaultStridedReduce {
 
 template <typename T, typename U, typename Op>
 struct DefaultContiguousReduce {
+  using A = typename ReductionAccumulator<U>::type;
   Op op;
+  A init;
+
+  // Below this size the elements are reduced in a single pass with
+  // independent accumulators which the compiler can vectorize
+  static constexpr int block_size = 128;
+  static constexpr int lanes = 8;
+  static_assert(lanes == 8, "The accumulators below are initialized for 8");
 
-  DefaultContiguousReduce(Op op_) : op(op_) {}
+  DefaultContiguousReduce(Op op_, U init_) : op(op_), init(init_) {}
 
   void operator()(const T* x, U* accumulator, int size) {
-    while (size-- > 0) {
-      op(accumulator, *x);
-      x++;
+    A acc = *accumulator;
+    op(&acc, reduce(x, size));
+    *accumulator = acc;
+  }
+
+  // Pairwise reduction so that the rounding error of sums grows with the
+  // log of the size instead of the size
+  A reduce(const T* x, int size) {
+    if (size > block_size) {
+      int half = (size / 2 + lanes - 1) / lanes * lanes;
+      A acc = reduce(x, half);
+      op(&acc, reduce(x + half, size - half));
+      return acc;
     }
+    A acc[lanes] = {init, init, init, init, init, init, init, init};
+    for (; size >= lanes; size -= lanes, x += lanes) {
+      for (int j = 0; j < lanes; j++) {
+        op(&acc[j], x[j]);
+      }
+    }
+    for (int j = 0; j < size; j++) {
+      op(&acc[j], x[j]);
+    }
+    for (int j = 1; j < lanes; j++) {
+      op(&acc[0], acc[j]);
+    }
+    return acc[0];
   }
 };
 
@@ -219,6 +257,85 @@ ReductionPlan get_reduction_plan(const array& x, const std::vector<int> axes) {
   return ReductionPlan(GeneralReduce, shape, strides);
 }
 
+// Scratch space for partial results. Unlike std::vector it works for bool
+// and for types that are not default constructible.
+template <typename U>
+struct PartialResults {
+  PartialResults(size_t size, U init)
+      : data(std::allocator<U>().allocate(size)), size(size) {
+    std::uninitialized_fill_n(data, size, init);
+  }
+  ~PartialResults() {
+    std::allocator<U>().deallocate(data, size);
+  }
+
+  U* data;
+  size_t size;
+};
+
+// Reduce size contiguous elements into *out splitting them across
+// n_threads and combining the partial results with op.
+template <typename T, typename U, typename OpC, typename Op>
+void split_contiguous_reduce(
+    const T* x,
+    U* out,
+    size_t size,
+    U init,
+    OpC& opc,
+    Op& op,
+    int n_threads) {
+  if (n_threads <= 1) {
+    opc(x, out, size);
+    return;
+  }
+  PartialResults<U> partials(n_threads, init);
+  size_t chunk = (size + n_threads - 1) / n_threads;
+  parallel_for(n_threads, n_threads, [&](size_t start, size_t end) {
+    for (size_t t = start; t < end; t++) {
+      size_t offset = std::min(size, t * chunk);
+      opc(x + offset, partials.data + t, std::min(chunk, size - offset));
+    }
+  });
+  for (int t = 0; t < n_threads; t++) {
+    op(out, partials.data[t]);
+  }
+}
+
+// Reduce size rows of stride contiguous elements into out splitting the
+// rows across n_threads and combining the partial results with op.
+template <typename T, typename U, typename OpS, typename Op>
+void split_strided_reduce(
+    const T* x,
+    U* out,
+    int size,
+    size_t stride,
+    U init,
+    OpS& ops,
+    Op& op,
+    int n_threads) {
+  n_threads = std::min(n_threads, size);
+  if (n_threads <= 1) {
+    ops(x, out, size, stride);
+    return;
+  }
+  // The first chunk is accumulated directly in out
+  PartialResults<U> partials((n_threads - 1) * stride, init);
+  int chunk = (size + n_threads - 1) / n_threads;
+  parallel_for(n_threads, n_threads, [&](size_t start, size_t end) {
+    for (size_t t = start; t < end; t++) {
+      int row = std::min<int>(size, t * chunk);
+      U* acc = (t == 0) ? out : partials.data + (t - 1) * stride;
+      ops(x + row * stride, acc, std::min(chunk, size - row), stride);
+    }
+  });
+  for (int t = 1; t < n_threads; t++) {
+    U* partial = partials.data + (t - 1) * stride;
+    for (size_t j = 0; j < stride; j++) {
+      op(out + j, partial[j]);
+    }
+  }
+}
+
 template <typename T, typename U, typename OpS, typename OpC, typename Op>
 void reduction_op(
     const array& x,
@@ -230,71 +347,61 @@ void reduction_op(
     Op op) {
   out.set_data(allocator::malloc_or_wait(out.nbytes()));
   ReductionPlan plan = get_reduction_plan(x, axes);
+  int n_threads = num_threads(x.size());
 
+  // Every output is reduced by a single thread when there are enough of them
+  // otherwise the reduction of each output is split across the threads.
   if (plan.type == ContiguousAllReduce) {
     U* out_ptr = out.data<U>();
     *out_ptr = init;
-    opc(x.data<T>(), out_ptr, x.size());
+    split_contiguous_reduce(
+        x.data<T>(), out_ptr, x.size(), init, opc, op, n_threads);
     return;
   }
 
+  const T* x_ptr = x.data<T>();
+  U* out_ptr = out.data<U>();
   std::vector<int> shape;
   std::vector<size_t> strides;
-
-  if (plan.type == ContiguousReduce && plan.shape.size() == 1) {
-    int reduction_size = plan.shape[0];
-    const T* x_ptr = x.data<T>();
-    U* out_ptr = out.data<U>();
-    for (int i = 0; i < out.size(); i++, out_ptr++, x_ptr += reduction_size) {
-      *out_ptr = init;
-      opc(x_ptr, out_ptr, reduction_size);
-    }
-    return;
-  }
+  std::tie(shape, strides) = shapes_without_reduction_axes(x, axes);
 
   if (plan.type == GeneralContiguousReduce || plan.type == ContiguousReduce) {
     int reduction_size = plan.shape.back();
     plan.shape.pop_back();
     plan.strides.pop_back();
-    const T* x_ptr = x.data<T>();
-    U* out_ptr = out.data<U>();
-    // Unrolling the following loop (and implementing it in order for
-    // ContiguousReduce) should hold extra performance boost.
-    std::tie(shape, strides) = shapes_without_reduction_axes(x, axes);
-    if (plan.shape.size() == 0) {
-      for (int i = 0; i < out.size(); i++, out_ptr++) {
-        int offset = elem_to_loc(i, shape, strides);
-        *out_ptr = init;
-        opc(x_ptr + offset, out_ptr, reduction_size);
-      }
-    } else {
-      for (int i = 0; i < out.size(); i++, out_ptr++) {
-        int offset = elem_to_loc(i, shape, strides);
-        *out_ptr = init;
-        nd_loop(
-            [&](int extra_offset) {
-              opc(x_ptr + offset + extra_offset, out_ptr, reduction_size);
-            },
-            plan.shape,
-            plan.strides);
+    size_t n_inner = std::accumulate(
+        plan.shape.begin(), plan.shape.end(), 1, std::multiplies<size_t>());
+    std::tie(shape, strides) = collapse_contiguous_dims(shape, strides);
+
+    if (out.size() < n_threads) {
+      StridedIterator it(plan.shape, plan.strides);
+      for (int i = 0; i < out.size(); i++) {
+        size_t offset = elem_to_loc(i, shape, strides);
+        out_ptr[i] = init;
+        for (size_t j = 0; j < n_inner; j++, it.step()) {
+          split_contiguous_reduce(
+              x_ptr + offset + it.loc,
+              out_ptr + i,
+              reduction_size,
+              init,
+              opc,
+              op,
+              num_threads(reduction_size));
+        }
       }
+      return;
     }
-    return;
-  }
 
-  if (plan.type == ContiguousStridedReduce && plan.shape.size() == 1) {
-    int reduction_size = plan.shape.back();
-    size_t reduction_stride = plan.strides.back();
-    plan.shape.pop_back();
-    plan.strides.pop_back();
-    const T* x_ptr = x.data<T>();
-    U* out_ptr = out.data<U>();
-    for (int i = 0; i < out.size(); i += reduction_stride) {
-      std::fill_n(out_ptr, reduction_stride, init);
-      ops(x_ptr, out_ptr, reduction_size, reduction_stride);
-      x_ptr += reduction_stride * reduction_size;
-      out_ptr += reduction_stride;
-    }
+    parallel_for(out.size(), n_threads, [&](size_t start, size_t end) {
+      StridedIterator out_it(shape, strides, start);
+      StridedIterator it(plan.shape, plan.strides);
+      for (size_t i = start; i < end; i++, out_it.step()) {
+        out_ptr[i] = init;
+        for (size_t j = 0; j < n_inner; j++, it.step()) {
+          opc(x_ptr + out_it.loc + it.loc, out_ptr + i, reduction_size);
+        }
+      }
+    });
     return;
   }
 
@@ -304,48 +411,64 @@ void reduction_op(
     size_t reduction_stride = plan.strides.back();
     plan.shape.pop_back();
     plan.strides.pop_back();
-    const T* x_ptr = x.data<T>();
-    U* out_ptr = out.data<U>();
-    std::tie(shape, strides) = shapes_without_reduction_axes(x, axes);
-    if (plan.shape.size() == 0) {
-      for (int i = 0; i < out.size(); i += reduction_stride) {
-        int offset = elem_to_loc(i, shape, strides);
-        std::fill_n(out_ptr, reduction_stride, init);
-        ops(x_ptr + offset, out_ptr, reduction_size, reduction_stride);
-        out_ptr += reduction_stride;
-      }
-    } else {
-      for (int i = 0; i < out.size(); i += reduction_stride) {
-        int offset = elem_to_loc(i, shape, strides);
-        std::fill_n(out_ptr, reduction_stride, init);
-        nd_loop(
-            [&](int extra_offset) {
-              ops(x_ptr + offset + extra_offset,
-                  out_ptr,
-                  reduction_size,
-                  reduction_stride);
-            },
-            plan.shape,
-            plan.strides);
-        out_ptr += reduction_stride;
+    size_t n_blocks = out.size() / reduction_stride;
+    size_t n_inner = std::accumulate(
+        plan.shape.begin(), plan.shape.end(), 1, std::multiplies<size_t>());
+
+    if (n_blocks < n_threads) {
+      StridedIterator it(plan.shape, plan.strides);
+      for (size_t i = 0; i < n_blocks; i++) {
+        size_t offset = elem_to_loc(i * reduction_stride, shape, strides);
+        U* block_out = out_ptr + i * reduction_stride;
+        std::fill_n(block_out, reduction_stride, init);
+        for (size_t j = 0; j < n_inner; j++, it.step()) {
+          split_strided_reduce(
+              x_ptr + offset + it.loc,
+              block_out,
+              reduction_size,
+              reduction_stride,
+              init,
+              ops,
+              op,
+              num_threads(reduction_size * reduction_stride));
+        }
       }
+      return;
     }
+
+    parallel_for(n_blocks, n_threads, [&](size_t start, size_t end) {
+      StridedIterator it(plan.shape, plan.strides);
+      for (size_t i = start; i < end; i++) {
+        size_t offset = elem_to_loc(i * reduction_stride, shape, strides);
+        U* block_out = out_ptr + i * reduction_stride;
+        std::fill_n(block_out, reduction_stride, init);
+        for (size_t j = 0; j < n_inner; j++, it.step()) {
+          ops(x_ptr + offset + it.loc,
+              block_out,
+              reduction_size,
+              reduction_stride);
+        }
+      }
+    });
     return;
   }
 
   if (plan.type == GeneralReduce) {
-    const T* x_ptr = x.data<T>();
-    U* out_ptr = out.data<U>();
-    std::tie(shape, strides) = shapes_without_reduction_axes(x, axes);
-    for (int i = 0; i < out.size(); i++, out_ptr++) {
-      int offset = elem_to_loc(i, shape, strides);
-      U val = init;
-      nd_loop(
-          [&](int extra_offset) { op(&val, *(x_ptr + offset + extra_offset)); },
-          plan.shape,
-          plan.strides);
-      *out_ptr = val;
-    }
+    using A = typename ReductionAccumulator<U>::type;
+    size_t n_inner = std::accumulate(
+        plan.shape.begin(), plan.shape.end(), 1, std::multiplies<size_t>());
+    std::tie(shape, strides) = collapse_contiguous_dims(shape, strides);
+    parallel_for(out.size(), n_threads, [&](size_t start, size_t end) {
+      StridedIterator out_it(shape, strides, start);
+      StridedIterator it(plan.shape, plan.strides);
+      for (size_t i = start; i < end; i++, out_it.step()) {
+        A val = init;
+        for (size_t j = 0; j < n_inner; j++, it.step()) {
+          op(&val, x_ptr[out_it.loc + it.loc]);
+        }
+        out_ptr[i] = val;
+      }
+    });
   }
 }
 
@@ -357,7 +480,7 @@ void reduction_op(
     U init,
     Op op) {
   DefaultStridedReduce<T, U, Op> ops(op);
-  DefaultContiguousReduce<T, U, Op> opc(op);
+  DefaultContiguousReduce<T, U, Op> opc(op, init);
   reduction_op<T, U>(x, out, axes, init, ops, opc, op);
 }
 
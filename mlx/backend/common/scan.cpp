@@ -1,8 +1,10 @@
 // Copyright © 2023 Apple Inc.
 
 #include <cassert>
+#include <memory>
 
 #include "mlx/backend/common/copy.h"
+#include "mlx/backend/common/threading.h"
 #include "mlx/backend/common/utils.h"
 #include "mlx/primitives.h"
 
@@ -87,79 +89,102 @@ struct DefaultStridedScan {
 
   DefaultStridedScan(Op op_, U init_) : op(op_), init(init_) {}
 
+  // Scans count blocks of size rows of which the first width elements are
+  // read, with stride elements between the rows
   void operator()(
       const T* input,
       U* output,
       int count,
       int size,
       int stride,
+      int width,
       bool reverse,
       bool inclusive) {
-    // TODO: Vectorize the following naive implementation
-    if (!reverse) {
-      if (inclusive) {
-        for (int i = 0; i < count; i++) {
-          std::copy(input, input + stride, output);
-          output += stride;
-          input += stride;
-          for (int j = 1; j < size; j++) {
-            for (int k = 0; k < stride; k++) {
-              op(output, output - stride, input);
-              output++;
-              input++;
-            }
-          }
-        }
-      } else {
-        for (int i = 0; i < count; i++) {
-          std::fill(output, output + stride, init);
-          output += stride;
-          input += stride;
-          for (int j = 1; j < size; j++) {
-            for (int k = 0; k < stride; k++) {
-              op(output, output - stride, input - stride);
-              output++;
-              input++;
-            }
-          }
-        }
-      }
-    } else {
-      if (inclusive) {
-        for (int i = 0; i < count; i++) {
-          output += (size - 1) * stride;
-          input += (size - 1) * stride;
-          std::copy(input, input + stride, output);
-          for (int j = 1; j < size; j++) {
-            for (int k = 0; k < stride; k++) {
-              output--;
-              input--;
-              op(output, output + stride, input);
-            }
+    for (int i = 0; i < count; i++) {
+      for (int j = 0; j < size; j++) {
+        // Row r is computed from the row p before it in scan order
+        int r = reverse ? size - 1 - j : j;
+        int p = reverse ? r + 1 : r - 1;
+        U* out = output + r * stride;
+        const U* prev = output + p * stride;
+        const T* in = input + (inclusive ? r : p) * stride;
+        if (j == 0) {
+          if (inclusive) {
+            std::copy(in, in + width, out);
+          } else {
+            std::fill(out, out + width, init);
           }
-          output += size * stride;
-          input += size * stride;
-        }
-      } else {
-        for (int i = 0; i < count; i++) {
-          output += (size - 1) * stride;
-          input += (size - 1) * stride;
-          std::fill(output, output + stride, init);
-          for (int j = 1; j < size; j++) {
-            for (int k = 0; k < stride; k++) {
-              output--;
-              input--;
-              op(output, output + stride, input + stride);
-            }
+        } else {
+          for (int k = 0; k < width; k++) {
+            op(out + k, prev + k, in + k);
           }
-          output += size * stride;
-          input += size * stride;
         }
       }
+      input += size * stride;
+      output += size * stride;
     }
   }
 };
 
+// Scans a single long contiguous row in n_blocks blocks in parallel. Each
+// block is first scanned on its own and then combined with the carry of
+// the blocks before it in scan order. The carries are computed from the
+// block totals in between.
+template <typename T, typename U, typename OpCS>
+void blocked_scan(
+    OpCS& opcs,
+    const T* input,
+    U* output,
+    int size,
+    int n_blocks,
+    bool reverse,
+    bool inclusive) {
+  int block = (size + n_blocks - 1) / n_blocks;
+  n_blocks = (size + block - 1) / block;
+  auto block_start = [&](int b) { return b * block; };
+  auto block_end = [&](int b) { return std::min(size, (b + 1) * block); };
+
+  parallel_for(n_blocks, n_blocks, [&](size_t b0, size_t b1) {
+    for (int b = b0; b < static_cast<int>(b1); b++) {
+      int start = block_start(b);
+      opcs(
+          input + start,
+          output + start,
+          1,
+          block_end(b) - start,
+          reverse,
+          inclusive);
+    }
+  });
+
+  // The op takes the carry as the previous element so that it can combine
+  // two values of the output type
+  auto carry = std::make_unique<U[]>(n_blocks);
+  U acc = opcs.init;
+  for (int i = 0; i < n_blocks; i++) {
+    int b = reverse ? n_blocks - 1 - i : i;
+    int last = reverse ? block_start(b) : block_end(b) - 1;
+    carry[b] = acc;
+    U total = output[last];
+    if (!inclusive) {
+      opcs.op(&total, &total, input + last);
+    }
+    opcs.op(&acc, &acc, &total);
+  }
+
+  int first = reverse ? n_blocks - 1 : 0;
+  parallel_for(n_blocks, n_blocks, [&](size_t b0, size_t b1) {
+    for (int b = b0; b < static_cast<int>(b1); b++) {
+      if (b == first) {
+        continue;
+      }
+      for (int i = block_start(b); i < block_end(b); i++) {
+        opcs.op(output + i, &carry[b], output + i);
+      }
+    }
+  });
+}
+
 template <typename T, typename U, typename OpCS, typename OpSS>
 void scan_op(
     OpCS opcs,
@@ -170,28 +195,72 @@ void scan_op(
     bool reverse,
     bool inclusive) {
   output.set_data(allocator::malloc_or_wait(output.nbytes()));
+  if (input.size() == 0) {
+    return;
+  }
+
+  if (!input.flags().row_contiguous) {
+    throw std::runtime_error("Scan op supports only contiguous inputs");
+  }
+
+  const T* in = input.data<T>();
+  U* out = output.data<U>();
+  int size = input.shape(axis);
+  size_t stride = input.strides()[axis];
+  size_t count = input.size() / size / stride;
+  size_t n_threads = num_threads(input.size());
 
-  if (input.flags().row_contiguous) {
-    if (input.strides()[axis] == 1) {
+  if (stride == 1) {
+    // Split the rows across threads unless there are too few of them in
+    // which case each row is split in blocks instead
+    if (n_threads > 1 && count < n_threads) {
+      for (size_t i = 0; i < count; i++) {
+        blocked_scan(
+            opcs,
+            in + i * size,
+            out + i * size,
+            size,
+            n_threads,
+            reverse,
+            inclusive);
+      }
+      return;
+    }
+    parallel_for(count, n_threads, [&](size_t start, size_t end) {
       opcs(
-          input.data<T>(),
-          output.data<U>(),
-          input.size() / input.shape(axis),
-          input.shape(axis),
+          in + start * size,
+          out + start * size,
+          end - start,
+          size,
           reverse,
           inclusive);
-    } else {
+    });
+  } else if (count >= n_threads) {
+    parallel_for(count, n_threads, [&](size_t start, size_t end) {
+      size_t offset = start * size * stride;
       opss(
-          input.data<T>(),
-          output.data<U>(),
-          input.size() / input.shape(axis) / input.strides()[axis],
-          input.shape(axis),
-          input.strides()[axis],
+          in + offset,
+          out + offset,
+          end - start,
+          size,
+          stride,
+          stride,
           reverse,
           inclusive);
-    }
+    });
   } else {
-    throw std::runtime_error("Scan op supports only contiguous inputs");
+    // Few blocks so split the columns within each block across threads
+    parallel_for(stride, n_threads, [&](size_t start, size_t end) {
+      opss(
+          in + start,
+          out + start,
+          count,
+          size,
+          stride,
+          end - start,
+          reverse,
+          inclusive);
+    });
   }
 }
 
@@ -205,7 +274,7 @@ void scan_dispatch(
     bool inclusive) {
   switch (rtype) {
     case Scan::Sum: {
-      auto op = [](U* o, const U* y, const T* x) { *o = *y + *x; };
+      auto op = [](U* o, const U* y, const auto* x) { *o = *y + *x; };
       auto init = static_cast<U>(0);
       auto opcs = DefaultContiguousScan<T, U, decltype(op)>(op, init);
       auto opss = DefaultStridedScan<T, U, decltype(op)>(op, init);
@@ -213,7 +282,7 @@ void scan_dispatch(
       break;
     }
     case Scan::Prod: {
-      auto op = [](U* o, const U* y, const T* x) { *o = *y * (*x); };
+      auto op = [](U* o, const U* y, const auto* x) { *o = *y * (*x); };
       auto init = static_cast<U>(1);
       auto opcs = DefaultContiguousScan<T, U, decltype(op)>(op, init);
       auto opss = DefaultStridedScan<T, U, decltype(op)>(op, init);
@@ -221,7 +290,9 @@ void scan_dispatch(
       break;
     }
     case Scan::Min: {
-      auto op = [](U* o, const U* y, const T* x) { *o = (*x < *y) ? *x : *y; };
+      auto op = [](U* o, const U* y, const auto* x) {
+        *o = (*x < *y) ? *x : *y;
+      };
       auto init = (is_floating_point(input.dtype()))
           ? static_cast<U>(std::numeric_limits<float>::infinity())
           : std::numeric_limits<U>::max();
@@ -231,10 +302,12 @@ void scan_dispatch(
       break;
     }
     case Scan::Max: {
-      auto op = [](U* o, const U* y, const T* x) { *o = (*x < *y) ? *y : *x; };
+      auto op = [](U* o, const U* y, const auto* x) {
+        *o = (*x < *y) ? *y : *x;
+      };
       auto init = (is_floating_point(input.dtype()))
           ? static_cast<U>(-std::numeric_limits<float>::infinity())
-          : std::numeric_limits<U>::max();
+          : std::numeric_limits<U>::lowest();
       auto opcs = DefaultContiguousScan<T, U, decltype(op)>(op, init);
       auto opss = DefaultStridedScan<T, U, decltype(op)>(op, init);
       scan_op<T, U>(opcs, opss, input, output, axis, reverse, inclusive);
@@ -312,6 +385,10 @@ void Scan::eval(const std::vector<array>& inputs, array& out) {
       scan_dispatch<float, float>(
           reduce_type_, in, out, axis_, reverse_, inclusive_);
       break;
+    case float64:
+      scan_dispatch<double, double>(
+          reduce_type_, in, out, axis_, reverse_, inclusive_);
+      break;
     case bfloat16:
       scan_dispatch<bfloat16_t, bfloat16_t>(
           reduce_type_, in, out, axis_, reverse_, inclusive_);
@@ -0,0 +1,488 @@
+// Copyright © 2023 Apple Inc.
+
+#pragma once
+
+#include <cmath>
+#include <cstdint>
+#include <cstring>
+
+#if defined(__AVX512F__) || (defined(__AVX2__) && defined(__FMA__))
+#include <immintrin.h>
+#elif defined(__ARM_NEON)
+#include <arm_neon.h>
+#endif
+
+// A minimal set of float32 vector types for writing CPU kernels once and
+// compiling them to the widest vector instructions the compiler targets:
+// AVX-512, AVX2 with FMA or NEON. Otherwise the portable implementation is
+// used which holds the lanes in arrays and relies on the compiler to
+// vectorize the loops over them.
+//
+// simd::Float holds simd::size floats, simd::Int as many int32s and
+// simd::Mask the result of a lane-wise comparison.
+
+namespace mlx::core::simd {
+
+#if defined(__AVX512F__)
+
+constexpr int size = 16;
+
+struct Float {
+  Float() = default;
+  Float(__m512 v) : v(v) {}
+  Float(float x) : v(_mm512_set1_ps(x)) {}
+  __m512 v;
+};
+
+struct Int {
+  Int() = default;
+  Int(__m512i v) : v(v) {}
+  Int(int32_t x) : v(_mm512_set1_epi32(x)) {}
+  __m512i v;
+};
+
+struct Mask {
+  Mask(__mmask16 v) : v(v) {}
+  __mmask16 v;
+};
+
+inline Float load(const float* x) {
+  return _mm512_loadu_ps(x);
+}
+inline void store(float* dst, Float x) {
+  _mm512_storeu_ps(dst, x.v);
+}
+
+inline Float operator+(Float a, Float b) {
+  return _mm512_add_ps(a.v, b.v);
+}
+inline Float operator-(Float a, Float b) {
+  return _mm512_sub_ps(a.v, b.v);
+}
+inline Float operator*(Float a, Float b) {
+  return _mm512_mul_ps(a.v, b.v);
+}
+inline Float operator/(Float a, Float b) {
+  return _mm512_div_ps(a.v, b.v);
+}
+inline Float fma(Float a, Float b, Float c) {
+  return _mm512_fmadd_ps(a.v, b.v, c.v);
+}
+inline Float minimum(Float a, Float b) {
+  return _mm512_min_ps(a.v, b.v);
+}
+inline Float maximum(Float a, Float b) {
+  return _mm512_max_ps(a.v, b.v);
+}
+
+inline Mask operator<(Float a, Float b) {
+  return _mm512_cmp_ps_mask(a.v, b.v, _CMP_LT_OQ);
+}
+inline Mask operator>(Float a, Float b) {
+  return _mm512_cmp_ps_mask(a.v, b.v, _CMP_GT_OQ);
+}
+inline Mask operator==(Float a, Float b) {
+  return _mm512_cmp_ps_mask(a.v, b.v, _CMP_EQ_OQ);
+}
+inline Mask operator!=(Float a, Float b) {
+  return _mm512_cmp_ps_mask(a.v, b.v, _CMP_NEQ_UQ);
+}
+inline Float select(Mask m, Float a, Float b) {
+  return _mm512_mask_blend_ps(m.v, b.v, a.v);
+}
+
+inline Int operator+(Int a, Int b) {
+  return _mm512_add_epi32(a.v, b.v);
+}
+inline Int operator-(Int a, Int b) {
+  return _mm512_sub_epi32(a.v, b.v);
+}
+inline Int operator&(Int a, Int b) {
+  return _mm512_and_si512(a.v, b.v);
+}
+inline Int operator|(Int a, Int b) {
+  return _mm512_or_si512(a.v, b.v);
+}
+inline Int operator^(Int a, Int b) {
+  return _mm512_xor_si512(a.v, b.v);
+}
+inline Int operator<<(Int a, int n) {
+  return _mm512_slli_epi32(a.v, n);
+}
+inline Int operator>>(Int a, int n) {
+  return _mm512_srai_epi32(a.v, n);
+}
+
+inline Int as_int(Float a) {
+  return _mm512_castps_si512(a.v);
+}
+inline Float as_float(Int a) {
+  return _mm512_castsi512_ps(a.v);
+}
+inline Int to_int(Float a) {
+  return _mm512_cvttps_epi32(a.v);
+}
+inline Float to_float(Int a) {
+  return _mm512_cvtepi32_ps(a.v);
+}
+
+#elif defined(__AVX2__) && defined(__FMA__)
+
+constexpr int size = 8;
+
+struct Float {
+  Float() = default;
+  Float(__m256 v) : v(v) {}
+  Float(float x) : v(_mm256_set1_ps(x)) {}
+  __m256 v;
+};
+
+struct Int {
+  Int() = default;
+  Int(__m256i v) : v(v) {}
+  Int(int32_t x) : v(_mm256_set1_epi32(x)) {}
+  __m256i v;
+};
+
+struct Mask {
+  Mask(__m256 v) : v(v) {}
+  __m256 v;
+};
+
+inline Float load(const float* x) {
+  return _mm256_loadu_ps(x);
+}
+inline void store(float* dst, Float x) {
+  _mm256_storeu_ps(dst, x.v);
+}
+
+inline Float operator+(Float a, Float b) {
+  return _mm256_add_ps(a.v, b.v);
+}
+inline Float operator-(Float a, Float b) {
+  return _mm256_sub_ps(a.v, b.v);
+}
+inline Float operator*(Float a, Float b) {
+  return _mm256_mul_ps(a.v, b.v);
+}
+inline Float operator/(Float a, Float b) {
+  return _mm256_div_ps(a.v, b.v);
+}
+inline Float fma(Float a, Float b, Float c) {
+  return _mm256_fmadd_ps(a.v, b.v, c.v);
+}
+inline Float minimum(Float a, Float b) {
+  return _mm256_min_ps(a.v, b.v);
+}
+inline Float maximum(Float a, Float b) {
+  return _mm256_max_ps(a.v, b.v);
+}
+
+inline Mask operator<(Float a, Float b) {
+  return _mm256_cmp_ps(a.v, b.v, _CMP_LT_OQ);
+}
+inline Mask operator>(Float a, Float b) {
+  return _mm256_cmp_ps(a.v, b.v, _CMP_GT_OQ);
+}
+inline Mask operator==(Float a, Float b) {
+  return _mm256_cmp_ps(a.v, b.v, _CMP_EQ_OQ);
+}
+inline Mask operator!=(Float a, Float b) {
+  return _mm256_cmp_ps(a.v, b.v, _CMP_NEQ_UQ);
+}
+inline Float select(Mask m, Float a, Float b) {
+  return _mm256_blendv_ps(b.v, a.v, m.v);
+}
+
+inline Int operator+(Int a, Int b) {
+  return _mm256_add_epi32(a.v, b.v);
+}
+inline Int operator-(Int a, Int b) {
+  return _mm256_sub_epi32(a.v, b.v);
+}
+inline Int operator&(Int a, Int b) {
+  return _mm256_and_si256(a.v, b.v);
+}
+inline Int operator|(Int a, Int b) {
+  return _mm256_or_si256(a.v, b.v);
+}
+inline Int operator^(Int a, Int b) {
+  return _mm256_xor_si256(a.v, b.v);
+}
+inline Int operator<<(Int a, int n) {
+  return _mm256_slli_epi32(a.v, n);
+}
+inline Int operator>>(Int a, int n) {
+  return _mm256_srai_epi32(a.v, n);
+}
+
+inline Int as_int(Float a) {
+  return _mm256_castps_si256(a.v);
+}
+inline Float as_float(Int a) {
+  return _mm256_castsi256_ps(a.v);
+}
+inline Int to_int(Float a) {
+  return _mm256_cvttps_epi32(a.v);
+}
+inline Float to_float(Int a) {
+  return _mm256_cvtepi32_ps(a.v);
+}
+
+#elif defined(__ARM_NEON)
+
+constexpr int size = 4;
+
+struct Float {
+  Float() = default;
+  Float(float32x4_t v) : v(v) {}
+  Float(float x) : v(vdupq_n_f32(x)) {}
+  float32x4_t v;
+};
+
+struct Int {
+  Int() = default;
+  Int(int32x4_t v) : v(v) {}
+  Int(int32_t x) : v(vdupq_n_s32(x)) {}
+  int32x4_t v;
+};
+
+struct Mask {
+  Mask(uint32x4_t v) : v(v) {}
+  uint32x4_t v;
+};
+
+inline Float load(const float* x) {
+  return vld1q_f32(x);
+}
+inline void store(float* dst, Float x) {
+  vst1q_f32(dst, x.v);
+}
+
+inline Float operator+(Float a, Float b) {
+  return vaddq_f32(a.v, b.v);
+}
+inline Float operator-(Float a, Float b) {
+  return vsubq_f32(a.v, b.v);
+}
+inline Float operator*(Float a, Float b) {
+  return vmulq_f32(a.v, b.v);
+}
+inline Float operator/(Float a, Float b) {
+  return vdivq_f32(a.v, b.v);
+}
+inline Float fma(Float a, Float b, Float c) {
+  return vfmaq_f32(c.v, a.v, b.v);
+}
+inline Float minimum(Float a, Float b) {
+  return vminq_f32(a.v, b.v);
+}
+inline Float maximum(Float a, Float b) {
+  return vmaxq_f32(a.v, b.v);
+}
+
+inline Mask operator<(Float a, Float b) {
+  return vcltq_f32(a.v, b.v);
+}
+inline Mask operator>(Float a, Float b) {
+  return vcgtq_f32(a.v, b.v);
+}
+inline Mask operator==(Float a, Float b) {
+  return vceqq_f32(a.v, b.v);
+}
+inline Mask operator!=(Float a, Float b) {
+  return vmvnq_u32(vceqq_f32(a.v, b.v));
+}
+inline Float select(Mask m, Float a, Float b) {
+  return vbslq_f32(m.v, a.v, b.v);
+}
+
+inline Int operator+(Int a, Int b) {
+  return vaddq_s32(a.v, b.v);
+}
+inline Int operator-(Int a, Int b) {
+  return vsubq_s32(a.v, b.v);
+}
+inline Int operator&(Int a, Int b) {
+  return vandq_s32(a.v, b.v);
+}
+inline Int operator|(Int a, Int b) {
+  return vorrq_s32(a.v, b.v);
+}
+inline Int operator^(Int a, Int b) {
+  return veorq_s32(a.v, b.v);
+}
+inline Int operator<<(Int a, int n) {
+  return vshlq_s32(a.v, vdupq_n_s32(n));
+}
+inline Int operator>>(Int a, int n) {
+  return vshlq_s32(a.v, vdupq_n_s32(-n));
+}
+
+inline Int as_int(Float a) {
+  return vreinterpretq_s32_f32(a.v);
+}
+inline Float as_float(Int a) {
+  return vreinterpretq_f32_s32(a.v);
+}
+inline Int to_int(Float a) {
+  return vcvtq_s32_f32(a.v);
+}
+inline Float to_float(Int a) {
+  return vcvtq_f32_s32(a.v);
+}
+
+#else
+
+constexpr int size = 8;
+
+struct Float {
+  Float() = default;
+  Float(float x) {
+    for (int i = 0; i < size; ++i) {
+      v[i] = x;
+    }
+  }
+  float v[size];
+};
+
+struct Int {
+  Int() = default;
+  Int(int32_t x) {
+    for (int i = 0; i < size; ++i) {
+      v[i] = x;
+    }
+  }
+  int32_t v[size];
+};
+
+struct Mask {
+  int32_t v[size];
+};
+
+#define MLX_SIMD_LANEWISE(R, expr) \
+  R r;                             \
+  for (int i = 0; i < size; ++i) { \
+    r.v[i] = expr;                 \
+  }                                \
+  return r;
+
+inline Float load(const float* x) {
+  Float r;
+  std::memcpy(r.v, x, sizeof(r.v));
+  return r;
+}
+inline void store(float* dst, Float x) {
+  std::memcpy(dst, x.v, sizeof(x.v));
+}
+
+inline Float operator+(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Float, a.v[i] + b.v[i]);
+}
+inline Float operator-(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Float, a.v[i] - b.v[i]);
+}
+inline Float operator*(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Float, a.v[i] * b.v[i]);
+}
+inline Float operator/(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Float, a.v[i] / b.v[i]);
+}
+inline Float fma(Float a, Float b, Float c) {
+  // Only fuse when the target has an instruction for it, a call to std::fma
+  // per lane would be far slower than the rounding it saves.
+#if defined(__FMA__) || defined(__ARM_FEATURE_FMA)
+  MLX_SIMD_LANEWISE(Float, std::fma(a.v[i], b.v[i], c.v[i]));
+#else
+  MLX_SIMD_LANEWISE(Float, a.v[i] * b.v[i] + c.v[i]);
+#endif
+}
+inline Float minimum(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Float, a.v[i] < b.v[i] ? a.v[i] : b.v[i]);
+}
+inline Float maximum(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Float, a.v[i] > b.v[i] ? a.v[i] : b.v[i]);
+}
+
+inline Mask operator<(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Mask, -static_cast<int32_t>(a.v[i] < b.v[i]));
+}
+inline Mask operator>(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Mask, -static_cast<int32_t>(a.v[i] > b.v[i]));
+}
+inline Mask operator==(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Mask, -static_cast<int32_t>(a.v[i] == b.v[i]));
+}
+inline Mask operator!=(Float a, Float b) {
+  MLX_SIMD_LANEWISE(Mask, -static_cast<int32_t>(a.v[i] != b.v[i]));
+}
+inline Float select(Mask m, Float a, Float b) {
+  // Blend the bits so that the compiler does not need branches
+  int32_t ai[size];
+  int32_t bi[size];
+  std::memcpy(ai, a.v, sizeof(ai));
+  std::memcpy(bi, b.v, sizeof(bi));
+  for (int i = 0; i < size; ++i) {
+    ai[i] = (ai[i] & m.v[i]) | (bi[i] & ~m.v[i]);
+  }
+  Float r;
+  std::memcpy(r.v, ai, sizeof(ai));
+  return r;
+}
+
+inline Int operator+(Int a, Int b) {
+  MLX_SIMD_LANEWISE(Int, a.v[i] + b.v[i]);
+}
+inline Int operator-(Int a, Int b) {
+  MLX_SIMD_LANEWISE(Int, a.v[i] - b.v[i]);
+}
+inline Int operator&(Int a, Int b) {
+  MLX_SIMD_LANEWISE(Int, a.v[i] & b.v[i]);
+}
+inline Int operator|(Int a, Int b) {
+  MLX_SIMD_LANEWISE(Int, a.v[i] | b.v[i]);
+}
+inline Int operator^(Int a, Int b) {
+  MLX_SIMD_LANEWISE(Int, a.v[i] ^ b.v[i]);
+}
+inline Int operator<<(Int a, int n) {
+  MLX_SIMD_LANEWISE(
+      Int, static_cast<int32_t>(static_cast<uint32_t>(a.v[i]) << n));
+}
+inline Int operator>>(Int a, int n) {
+  MLX_SIMD_LANEWISE(Int, a.v[i] >> n);
+}
+
+inline Int as_int(Float a) {
+  Int r;
+  std::memcpy(r.v, a.v, sizeof(r.v));
+  return r;
+}
+inline Float as_float(Int a) {
+  Float r;
+  std::memcpy(r.v, a.v, sizeof(r.v));
+  return r;
+}
+inline Int to_int(Float a) {
+  MLX_SIMD_LANEWISE(Int, static_cast<int32_t>(a.v[i]));
+}
+inline Float to_float(Int a) {
+  MLX_SIMD_LANEWISE(Float, static_cast<float>(a.v[i]));
+}
+
+#undef MLX_SIMD_LANEWISE
+
+#endif
+
+inline Float operator-(Float a) {
+  return as_float(as_int(a) ^ Int(INT32_MIN));
+}
+inline Float abs(Float a) {
+  return as_float(as_int(a) & Int(INT32_MAX));
+}
+// The magnitude of a with the sign of b
+inline Float copysign(Float a, Float b) {
+  return as_float((as_int(a) & Int(INT32_MAX)) | (as_int(b) & Int(INT32_MIN)));
+}
+
+} // namespace mlx::core::simd
@@ -84,6 +84,9 @@ void Softmax::eval(const std::vector<array>& inputs, array& out) {
     case float32:
       softmax<float>(in, out);
       break;
+    case float64:
+      softmax<double>(in, out);
+      break;
     case float16:
       softmax<float16_t>(in, out);
       break;
@@ -3,9 +3,13 @@
 #include <algorithm>
 #include <cassert>
 #include <cmath>
+#include <cstring>
 #include <numeric>
+#include <type_traits>
 
+#include "mlx/allocator.h"
 #include "mlx/backend/common/copy.h"
+#include "mlx/backend/common/threading.h"
 #include "mlx/backend/common/utils.h"
 
 #include "mlx/primitives.h"
@@ -14,245 +18,379 @@ namespace mlx::core {
 
 namespace {
 
-template <typename T, typename IdxT = int32_t>
-struct StridedIterator {
-  using iterator_category = std::random_access_iterator_tag;
-  using difference_type = IdxT;
-  using value_type = T;
-  using reference = value_type&;
-  using pointer = value_type*;
+// Rows at least this long are sorted with a radix sort when the type allows
+constexpr int radix_sort_threshold = 256;
 
-  // Constructors
-  StridedIterator() = default;
+// Booleans and complex numbers are only sorted by comparison
+template <typename T>
+constexpr bool has_radix_key =
+    !std::is_same_v<T, bool> && !std::is_same_v<T, complex64_t>;
 
-  explicit StridedIterator(T* ptr, size_t stride, difference_type offset = 0)
-      : ptr_(ptr + offset * stride), stride_(stride) {}
+// radix_key maps a value to an unsigned integer with the same order so that
+// it can be sorted one byte at a time. -0 sorts with 0 and NaNs sort last.
+inline uint8_t radix_key(uint8_t x) {
+  return x;
+}
 
-  explicit StridedIterator(array& arr, int axis, difference_type offset = 0)
-      : StridedIterator(arr.data<T>(), arr.strides()[axis], offset) {}
+inline uint16_t radix_key(uint16_t x) {
+  return x;
+}
 
-  // Accessors
-  reference operator*() const {
-    return ptr_[0];
-  }
+inline uint32_t radix_key(uint32_t x) {
+  return x;
+}
 
-  reference operator[](difference_type idx) const {
-    return ptr_[idx * stride_];
-  }
+inline uint64_t radix_key(uint64_t x) {
+  return x;
+}
 
-  // Comparisons
-  bool operator==(const StridedIterator& other) const {
-    return ptr_ == other.ptr_ && stride_ == other.stride_;
-  }
+// Flipping the sign bit orders two's complement integers as unsigned ones
+inline uint8_t radix_key(int8_t x) {
+  return static_cast<uint8_t>(x) ^ 0x80;
+}
 
-  bool operator!=(const StridedIterator& other) const {
-    return ptr_ != other.ptr_;
-  }
+inline uint16_t radix_key(int16_t x) {
+  return static_cast<uint16_t>(x) ^ 0x8000;
+}
 
-  bool operator<(const StridedIterator& other) const {
-    return ptr_ < other.ptr_;
-  }
+inline uint32_t radix_key(int32_t x) {
+  return static_cast<uint32_t>(x) ^ 0x80000000u;
+}
 
-  bool operator>(const StridedIterator& other) const {
-    return ptr_ > other.ptr_;
-  }
+inline uint64_t radix_key(int64_t x) {
+  return static_cast<uint64_t>(x) ^ 0x8000000000000000ull;
+}
 
-  bool operator<=(const StridedIterator& other) const {
-    return ptr_ <= other.ptr_;
+// Negative floats reverse their order when read as unsigned integers so
+// their bits are flipped while positive floats only set the sign bit
+template <typename U>
+U radix_float_key(U bits, U exponent) {
+  constexpr U sign = U(1) << (8 * sizeof(U) - 1);
+  U magnitude = bits & ~sign;
+  if (magnitude == 0) {
+    return sign;
   }
-
-  bool operator>=(const StridedIterator& other) const {
-    return ptr_ >= other.ptr_;
+  if (magnitude > exponent) {
+    return ~U(0);
   }
+  return (bits & sign) ? ~bits : (bits | sign);
+}
 
-  difference_type operator-(const StridedIterator& other) const {
-    return (ptr_ - other.ptr_) / stride_;
-  }
+inline uint32_t radix_key(float x) {
+  uint32_t bits;
+  std::memcpy(&bits, &x, sizeof(x));
+  return radix_float_key<uint32_t>(bits, 0x7f800000);
+}
 
-  // Moving
-  StridedIterator& operator++() {
-    ptr_ += stride_;
-    return *this;
-  }
+inline uint64_t radix_key(double x) {
+  uint64_t bits;
+  std::memcpy(&bits, &x, sizeof(x));
+  return radix_float_key<uint64_t>(bits, 0x7ff0000000000000ull);
+}
 
-  StridedIterator& operator--() {
-    ptr_ -= stride_;
-    return *this;
+inline uint16_t radix_key(float16_t x) {
+  uint16_t bits;
+  std::memcpy(&bits, &x, sizeof(x));
+  return radix_float_key<uint16_t>(bits, 0x7c00);
+}
+
+inline uint16_t radix_key(bfloat16_t x) {
+  uint16_t bits;
+  std::memcpy(&bits, &x, sizeof(x));
+  return radix_float_key<uint16_t>(bits, 0x7f80);
+}
+
+// Stable least significant digit radix sort of vals reordering idx along
+// with it when given. The tmp buffers hold n elements.
+template <typename T, typename IdxT>
+void radix_sort(T* vals, T* vals_tmp, IdxT* idx, IdxT* idx_tmp, size_t n) {
+  using K = decltype(radix_key(std::declval<T>()));
+  constexpr int passes = sizeof(K);
+
+  // Count the bytes of every pass in one read
+  size_t counts[passes][256] = {};
+  for (size_t i = 0; i < n; ++i) {
+    K k = radix_key(vals[i]);
+    for (int p = 0; p < passes; ++p) {
+      counts[p][(k >> (8 * p)) & 0xff]++;
+    }
   }
 
-  StridedIterator& operator+=(difference_type diff) {
-    ptr_ += diff * stride_;
-    return *this;
+  T* src = vals;
+  T* dst = vals_tmp;
+  IdxT* isrc = idx;
+  IdxT* idst = idx_tmp;
+  for (int p = 0; p < passes; ++p) {
+    int shift = 8 * p;
+
+    // Nothing to do when all the keys share this byte
+    if (counts[p][(radix_key(src[0]) >> shift) & 0xff] == n) {
+      continue;
+    }
+
+    size_t offsets[256];
+    size_t offset = 0;
+    for (int b = 0; b < 256; ++b) {
+      offsets[b] = offset;
+      offset += counts[p][b];
+    }
+    for (size_t i = 0; i < n; ++i) {
+      size_t pos = offsets[(radix_key(src[i]) >> shift) & 0xff]++;
+      dst[pos] = src[i];
+      if (idx != nullptr) {
+        idst[pos] = isrc[i];
+      }
+    }
+    std::swap(src, dst);
+    std::swap(isrc, idst);
   }
 
-  StridedIterator& operator-=(difference_type diff) {
-    ptr_ -= diff * stride_;
-    return *this;
+  if (src != vals) {
+    std::copy(src, src + n, vals);
+    if (idx != nullptr) {
+      std::copy(isrc, isrc + n, idx);
+    }
   }
+}
 
-  StridedIterator operator+(difference_type diff) {
-    return StridedIterator(ptr_, stride_, diff);
+// The order of the radix keys for comparison sorts
+template <typename T>
+bool less_nan_last(T a, T b) {
+  if constexpr (
+      std::is_floating_point_v<T> || std::is_same_v<T, float16_t> ||
+      std::is_same_v<T, bfloat16_t>) {
+    return a < b || (b != b && a == a);
+  } else {
+    return a < b;
   }
+}
 
-  StridedIterator operator-(difference_type diff) {
-    return StridedIterator(ptr_, stride_, -diff);
+template <typename T>
+struct SortRow {
+  std::vector<T> tmp;
+
+  void operator()(const T* in, T* out, int n) {
+    std::copy(in, in + n, out);
+    if constexpr (has_radix_key<T>) {
+      if (n >= radix_sort_threshold) {
+        tmp.resize(n);
+        radix_sort<T, uint32_t>(out, tmp.data(), nullptr, nullptr, n);
+        return;
+      }
+    }
+    std::stable_sort(out, out + n, less_nan_last<T>);
   }
+};
 
- private:
-  size_t stride_;
-  T* ptr_;
+template <typename T, typename IdxT>
+struct ArgSortRow {
+  std::vector<T> vals;
+  std::vector<T> vals_tmp;
+  std::vector<IdxT> idx_tmp;
+
+  void operator()(const T* in, IdxT* out, int n) {
+    std::iota(out, out + n, IdxT(0));
+    if constexpr (has_radix_key<T>) {
+      if (n >= radix_sort_threshold) {
+        vals.assign(in, in + n);
+        vals_tmp.resize(n);
+        idx_tmp.resize(n);
+        radix_sort(vals.data(), vals_tmp.data(), out, idx_tmp.data(), n);
+        return;
+      }
+    }
+    std::stable_sort(out, out + n, [in](IdxT a, IdxT b) {
+      return less_nan_last(in[a], in[b]) ||
+          (!less_nan_last(in[b], in[a]) && a < b);
+    });
+  }
 };
 
-template <typename T, typename IdxT = uint32_t>
-void sort(const array& in, array& out, int axis) {
-  // Copy input to output
-  CopyType ctype = in.flags().contiguous ? CopyType::Vector : CopyType::General;
-  copy(in, out, ctype);
+template <typename T>
+struct PartitionRow {
+  int kth;
 
-  // Get axis, shape and stride info
-  axis = axis < 0 ? axis + in.ndim() : axis;
-  size_t n_rows = in.size() / in.shape(axis);
+  void operator()(const T* in, T* out, int n) {
+    std::copy(in, in + n, out);
+    std::nth_element(out, out + kth, out + n, less_nan_last<T>);
+  }
+};
 
-  auto remaining_shape = in.shape();
-  remaining_shape.erase(remaining_shape.begin() + axis);
+template <typename T, typename IdxT>
+struct ArgPartitionRow {
+  int kth;
 
-  auto remaining_strides = in.strides();
-  remaining_strides.erase(remaining_strides.begin() + axis);
+  void operator()(const T* in, IdxT* out, int n) {
+    std::iota(out, out + n, IdxT(0));
+    std::nth_element(out, out + kth, out + n, [in](IdxT a, IdxT b) {
+      return less_nan_last(in[a], in[b]) ||
+          (!less_nan_last(in[b], in[a]) && a < b);
+    });
+  }
+};
 
-  size_t axis_stride = in.strides()[axis];
-  int axis_size = in.shape(axis);
+// Indices of the k largest elements of the row, largest first and ties in
+// the order of the row
+template <typename T, typename IdxT>
+struct ArgTopKRow {
+  int k;
+  std::vector<IdxT> idx;
+
+  void operator()(const T* in, IdxT* out, int n) {
+    auto before = [in](IdxT a, IdxT b) {
+      return less_nan_last(in[b], in[a]) ||
+          (!less_nan_last(in[a], in[b]) && a < b);
+    };
+
+    if (static_cast<int64_t>(k) * 8 > n) {
+      // Most of the row is kept so select with nth_element and sort
+      idx.resize(n);
+      std::iota(idx.begin(), idx.end(), IdxT(0));
+      std::nth_element(idx.begin(), idx.begin() + k - 1, idx.end(), before);
+      std::sort(idx.begin(), idx.begin() + k, before);
+      std::copy(idx.begin(), idx.begin() + k, out);
+      return;
+    }
+
+    // A heap of the k best elements so far with the worst on top. Later
+    // elements only enter if they are strictly larger than the worst one
+    // which most elements of a long row are not.
+    std::iota(out, out + k, IdxT(0));
+    std::make_heap(out, out + k, before);
+    T worst = in[out[0]];
+    for (int i = k; i < n; ++i) {
+      if (less_nan_last(worst, in[i])) {
+        std::pop_heap(out, out + k, before);
+        out[k - 1] = i;
+        std::push_heap(out, out + k, before);
+        worst = in[out[0]];
+      }
+    }
+    std::sort_heap(out, out + k, before);
+  }
+};
 
-  // Perform sorting in place
-  for (int i = 0; i < n_rows; i++) {
-    size_t loc = elem_to_loc(i, remaining_shape, remaining_strides);
-    T* data_ptr = out.data<T>() + loc;
+// Storage for a row of elements which need not be default constructible
+template <typename T>
+using RowBuffer = std::vector<std::aligned_storage_t<sizeof(T), alignof(T)>>;
+
+// Returns a view of x with the given axis moved to position to
+array move_axis_view(const array& x, int axis, int to) {
+  auto shape = x.shape();
+  auto strides = x.strides();
+  shape.erase(shape.begin() + axis);
+  strides.erase(strides.begin() + axis);
+  shape.insert(shape.begin() + to, x.shape(axis));
+  strides.insert(strides.begin() + to, x.strides()[axis]);
+
+  auto flags = x.flags();
+  flags.row_contiguous = false;
+  flags.col_contiguous = false;
+  array view(shape, x.dtype(), nullptr, {});
+  view.copy_shared_buffer(x, strides, flags, x.data_size());
+  return view;
+}
 
-    StridedIterator st(data_ptr, axis_stride, 0);
-    StridedIterator ed(data_ptr, axis_stride, axis_size);
+// Applies op(in_row, out_row, n) to every row of in along axis, writing
+// the corresponding row of out, with the rows split across threads. The op
+// is copied for every thread so it can keep scratch space. The rows of out
+// have out.shape(axis) elements which may differ from n.
+//
+// Strided rows are copied to and from contiguous buffers. Long strided rows
+// would touch a cache line per element so the whole array is copied with
+// the axis moved last instead.
+template <typename T, typename U, typename Op>
+void sort_rows(const array& in, array& out, int axis, const Op& op) {
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
 
-    std::stable_sort(st, ed);
+  int n = in.shape(axis);
+  int last = in.ndim() - 1;
+  if (axis != last && n >= radix_sort_threshold) {
+    array in_t = move_axis_view(in, axis, last);
+    array in_c(in_t.shape(), in.dtype(), nullptr, {});
+    copy(in_t, in_c, CopyType::General);
+    auto out_shape = in_t.shape();
+    out_shape[last] = out.shape(axis);
+    array out_c(out_shape, out.dtype(), nullptr, {});
+    sort_rows<T, U>(in_c, out_c, last, op);
+    copy_inplace(move_axis_view(out_c, last, axis), out, CopyType::General);
+    return;
   }
+
+  int m = out.shape(axis);
+  size_t n_rows = in.size() / n;
+  auto rows_shape = in.shape();
+  auto in_strides = in.strides();
+  auto out_strides = out.strides();
+  rows_shape.erase(rows_shape.begin() + axis);
+  in_strides.erase(in_strides.begin() + axis);
+  out_strides.erase(out_strides.begin() + axis);
+  size_t in_stride = in.strides()[axis];
+  size_t out_stride = out.strides()[axis];
+
+  // Sorting costs more than a single pass so fewer elements per thread
+  // are worth it
+  int n_threads = num_threads(in.size(), min_elements_per_thread / 8);
+  parallel_for(n_rows, n_threads, [&](size_t start, size_t end) {
+    Op row_op = op;
+    RowBuffer<T> in_storage(in_stride == 1 ? 0 : n);
+    RowBuffer<U> out_storage(out_stride == 1 ? 0 : m);
+    auto in_buf = reinterpret_cast<T*>(in_storage.data());
+    auto out_buf = reinterpret_cast<U*>(out_storage.data());
+    StridedIterator in_it(rows_shape, in_strides, start);
+    StridedIterator out_it(rows_shape, out_strides, start);
+    for (size_t r = start; r < end; ++r, in_it.step(), out_it.step()) {
+      const T* in_row = in.data<T>() + in_it.loc;
+      U* out_row = out.data<U>() + out_it.loc;
+      if (in_stride != 1) {
+        for (int i = 0; i < n; ++i) {
+          in_buf[i] = in_row[i * in_stride];
+        }
+        in_row = in_buf;
+      }
+      row_op(in_row, out_stride == 1 ? out_row : out_buf, n);
+      if (out_stride != 1) {
+        for (int i = 0; i < m; ++i) {
+          out_row[i * out_stride] = out_buf[i];
+        }
+      }
+    }
+  });
+}
+
+template <typename T>
+void sort(const array& in, array& out, int axis) {
+  axis = axis < 0 ? axis + in.ndim() : axis;
+  sort_rows<T, T>(in, out, axis, SortRow<T>{});
 }
 
 template <typename T, typename IdxT = uint32_t>
 void argsort(const array& in, array& out, int axis) {
-  // Allocate output
-  out.set_data(allocator::malloc_or_wait(out.nbytes()));
-
-  // Get axis, shape and stride info
   axis = axis < 0 ? axis + in.ndim() : axis;
-  size_t n_rows = in.size() / in.shape(axis);
-
-  auto remaining_shape = in.shape();
-  remaining_shape.erase(remaining_shape.begin() + axis);
-
-  auto remaining_strides = in.strides();
-  remaining_strides.erase(remaining_strides.begin() + axis);
-
-  size_t axis_stride = in.strides()[axis];
-  int axis_size = in.shape(axis);
-
-  // Perform sorting
-  for (int i = 0; i < n_rows; i++) {
-    size_t loc = elem_to_loc(i, remaining_shape, remaining_strides);
-    const T* data_ptr = in.data<T>() + loc;
-    IdxT* idx_ptr = out.data<IdxT>() + loc;
-
-    StridedIterator st_(idx_ptr, axis_stride, 0);
-    StridedIterator ed_(idx_ptr, axis_stride, axis_size);
-
-    // Initialize with iota
-    std::iota(st_, ed_, IdxT(0));
-
-    // Sort according to vals
-    StridedIterator st(idx_ptr, axis_stride, 0);
-    StridedIterator ed(idx_ptr, axis_stride, axis_size);
-
-    std::stable_sort(st, ed, [data_ptr, axis_stride](IdxT a, IdxT b) {
-      auto v1 = data_ptr[a * axis_stride];
-      auto v2 = data_ptr[b * axis_stride];
-      return v1 < v2 || (v1 == v2 && a < b);
-    });
-  }
+  sort_rows<T, IdxT>(in, out, axis, ArgSortRow<T, IdxT>{});
 }
 
-template <typename T, typename IdxT = uint32_t>
+template <typename T>
 void partition(const array& in, array& out, int axis, int kth) {
-  // Copy input to output
-  CopyType ctype = in.flags().contiguous ? CopyType::Vector : CopyType::General;
-  copy(in, out, ctype);
-
-  // Get axis, shape and stride info
   axis = axis < 0 ? axis + in.ndim() : axis;
-  size_t n_rows = in.size() / in.shape(axis);
-
-  auto remaining_shape = in.shape();
-  remaining_shape.erase(remaining_shape.begin() + axis);
-
-  auto remaining_strides = in.strides();
-  remaining_strides.erase(remaining_strides.begin() + axis);
-
-  size_t axis_stride = in.strides()[axis];
-  int axis_size = in.shape(axis);
-
-  kth = kth < 0 ? kth + axis_size : kth;
-
-  // Perform partition in place
-  for (int i = 0; i < n_rows; i++) {
-    size_t loc = elem_to_loc(i, remaining_shape, remaining_strides);
-    T* data_ptr = out.data<T>() + loc;
-
-    StridedIterator st(data_ptr, axis_stride, 0);
-    StridedIterator md(data_ptr, axis_stride, kth);
-    StridedIterator ed(data_ptr, axis_stride, axis_size);
-
-    std::nth_element(st, md, ed);
-  }
+  kth = kth < 0 ? kth + in.shape(axis) : kth;
+  sort_rows<T, T>(in, out, axis, PartitionRow<T>{kth});
 }
 
 template <typename T, typename IdxT = uint32_t>
 void argpartition(const array& in, array& out, int axis, int kth) {
-  // Allocate output
-  out.set_data(allocator::malloc_or_wait(out.nbytes()));
-
-  // Get axis, shape and stride info
   axis = axis < 0 ? axis + in.ndim() : axis;
-  size_t n_rows = in.size() / in.shape(axis);
-
-  auto remaining_shape = in.shape();
-  remaining_shape.erase(remaining_shape.begin() + axis);
-
-  auto remaining_strides = in.strides();
-  remaining_strides.erase(remaining_strides.begin() + axis);
-
-  size_t axis_stride = in.strides()[axis];
-  int axis_size = in.shape(axis);
-
-  kth = kth < 0 ? kth + axis_size : kth;
-
-  // Perform partition
-  for (int i = 0; i < n_rows; i++) {
-    size_t loc = elem_to_loc(i, remaining_shape, remaining_strides);
-    const T* data_ptr = in.data<T>() + loc;
-    IdxT* idx_ptr = out.data<IdxT>() + loc;
-
-    StridedIterator st_(idx_ptr, axis_stride, 0);
-    StridedIterator ed_(idx_ptr, axis_stride, axis_size);
-
-    // Initialize with iota
-    std::iota(st_, ed_, IdxT(0));
-
-    // Sort according to vals
-    StridedIterator st(idx_ptr, axis_stride, 0);
-    StridedIterator md(idx_ptr, axis_stride, kth);
-    StridedIterator ed(idx_ptr, axis_stride, axis_size);
+  kth = kth < 0 ? kth + in.shape(axis) : kth;
+  sort_rows<T, IdxT>(in, out, axis, ArgPartitionRow<T, IdxT>{kth});
+}
 
-    std::nth_element(st, md, ed, [data_ptr, axis_stride](IdxT a, IdxT b) {
-      auto v1 = data_ptr[a * axis_stride];
-      auto v2 = data_ptr[b * axis_stride];
-      return v1 < v2 || (v1 == v2 && a < b);
-    });
-  }
+template <typename T, typename IdxT = uint32_t>
+void argtopk(const array& in, array& out, int axis, int k) {
+  axis = axis < 0 ? axis + in.ndim() : axis;
+  sort_rows<T, IdxT>(in, out, axis, ArgTopKRow<T, IdxT>{k});
 }
 
 } // namespace
@@ -282,6 +420,8 @@ void ArgSort::eval(const std::vector<array>& inputs, array& out) {
       return argsort<int64_t>(in, out, axis_);
     case float32:
       return argsort<float>(in, out, axis_);
+    case float64:
+      return argsort<double>(in, out, axis_);
     case float16:
       return argsort<float16_t>(in, out, axis_);
     case bfloat16:
@@ -291,6 +431,42 @@ void ArgSort::eval(const std::vector<array>& inputs, array& out) {
   }
 }
 
+void ArgTopK::eval(const std::vector<array>& inputs, array& out) {
+  assert(inputs.size() == 1);
+  auto& in = inputs[0];
+
+  switch (in.dtype()) {
+    case bool_:
+      return argtopk<bool>(in, out, axis_, k_);
+    case uint8:
+      return argtopk<uint8_t>(in, out, axis_, k_);
+    case uint16:
+      return argtopk<uint16_t>(in, out, axis_, k_);
+    case uint32:
+      return argtopk<uint32_t>(in, out, axis_, k_);
+    case uint64:
+      return argtopk<uint64_t>(in, out, axis_, k_);
+    case int8:
+      return argtopk<int8_t>(in, out, axis_, k_);
+    case int16:
+      return argtopk<int16_t>(in, out, axis_, k_);
+    case int32:
+      return argtopk<int32_t>(in, out, axis_, k_);
+    case int64:
+      return argtopk<int64_t>(in, out, axis_, k_);
+    case float32:
+      return argtopk<float>(in, out, axis_, k_);
+    case float64:
+      return argtopk<double>(in, out, axis_, k_);
+    case float16:
+      return argtopk<float16_t>(in, out, axis_, k_);
+    case bfloat16:
+      return argtopk<bfloat16_t>(in, out, axis_, k_);
+    case complex64:
+      return argtopk<complex64_t>(in, out, axis_, k_);
+  }
+}
+
 void Sort::eval(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   auto& in = inputs[0];
@@ -316,6 +492,8 @@ void Sort::eval(const std::vector<array>& inputs, array& out) {
       return sort<int64_t>(in, out, axis_);
     case float32:
       return sort<float>(in, out, axis_);
+    case float64:
+      return sort<double>(in, out, axis_);
     case float16:
       return sort<float16_t>(in, out, axis_);
     case bfloat16:
@@ -350,6 +528,8 @@ void ArgPartition::eval(const std::vector<array>& inputs, array& out) {
       return argpartition<int64_t>(in, out, axis_, kth_);
     case float32:
       return argpartition<float>(in, out, axis_, kth_);
+    case float64:
+      return argpartition<double>(in, out, axis_, kth_);
     case float16:
       return argpartition<float16_t>(in, out, axis_, kth_);
     case bfloat16:
@@ -384,6 +564,8 @@ void Partition::eval(const std::vector<array>& inputs, array& out) {
       return partition<int64_t>(in, out, axis_, kth_);
     case float32:
       return partition<float>(in, out, axis_, kth_);
+    case float64:
+      return partition<double>(in, out, axis_, kth_);
     case float16:
       return partition<float16_t>(in, out, axis_, kth_);
     case bfloat16:
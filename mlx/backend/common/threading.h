@@ -0,0 +1,166 @@
+// Copyright © 2023 Apple Inc.
+
+#pragma once
+
+#include <algorithm>
+#include <condition_variable>
+#include <exception>
+#include <functional>
+#include <mutex>
+#include <queue>
+#include <thread>
+#include <vector>
+
+namespace mlx::core {
+
+// Below this many elements per thread the cost of handing a chunk to
+// another thread outweighs the work it would do.
+constexpr size_t min_elements_per_thread = 1 << 15;
+
+inline int max_threads() {
+  static int n_threads =
+      std::max(1, static_cast<int>(std::thread::hardware_concurrency()));
+  return n_threads;
+}
+
+// Number of threads to use for a kernel touching `work` elements.
+inline int num_threads(
+    size_t work,
+    size_t min_work_per_thread = min_elements_per_thread) {
+  size_t n = work / std::max<size_t>(min_work_per_thread, 1);
+  return static_cast<int>(
+      std::clamp<size_t>(n, 1, static_cast<size_t>(max_threads())));
+}
+
+// A fixed set of worker threads shared by all CPU kernels. The workers are
+// started on first use and live until the program exits so kernels do not
+// pay for thread creation on every call.
+class ThreadPool {
+ public:
+  explicit ThreadPool(int n_workers) {
+    workers_.reserve(n_workers);
+    for (int i = 0; i < n_workers; ++i) {
+      workers_.emplace_back([this]() { worker_loop(); });
+    }
+  }
+
+  ~ThreadPool() {
+    {
+      std::lock_guard<std::mutex> lock(mtx_);
+      stop_ = true;
+    }
+    cv_.notify_all();
+    for (auto& t : workers_) {
+      t.join();
+    }
+  }
+
+  ThreadPool(const ThreadPool&) = delete;
+  ThreadPool& operator=(const ThreadPool&) = delete;
+
+  void enqueue(std::function<void()> task) {
+    {
+      std::lock_guard<std::mutex> lock(mtx_);
+      tasks_.push(std::move(task));
+    }
+    cv_.notify_one();
+  }
+
+  // True when called from one of the pool's workers.
+  static bool in_worker() {
+    return is_worker();
+  }
+
+  static ThreadPool& instance() {
+    static ThreadPool pool(max_threads() - 1);
+    return pool;
+  }
+
+ private:
+  static bool& is_worker() {
+    static thread_local bool worker = false;
+    return worker;
+  }
+
+  void worker_loop() {
+    is_worker() = true;
+    while (true) {
+      std::function<void()> task;
+      {
+        std::unique_lock<std::mutex> lock(mtx_);
+        cv_.wait(lock, [this]() { return stop_ || !tasks_.empty(); });
+        if (stop_ && tasks_.empty()) {
+          return;
+        }
+        task = std::move(tasks_.front());
+        tasks_.pop();
+      }
+      task();
+    }
+  }
+
+  std::vector<std::thread> workers_;
+  std::queue<std::function<void()>> tasks_;
+  std::mutex mtx_;
+  std::condition_variable cv_;
+  bool stop_{false};
+};
+
+// Split [0, n) into at most n_threads contiguous chunks and call f(start,
+// end) for each chunk. The first chunk runs on the calling thread, the rest
+// on the shared pool, and the call returns once every chunk has finished.
+// Calls made from inside a pool worker run serially so nested kernels can
+// never wait on a worker that is waiting on them.
+template <typename F>
+void parallel_for(size_t n, int n_threads, F&& f) {
+  n_threads = std::min(n_threads, max_threads());
+  if (n_threads <= 1 || n <= 1 || ThreadPool::in_worker()) {
+    f(size_t(0), n);
+    return;
+  }
+  size_t n_chunks = std::min(static_cast<size_t>(n_threads), n);
+  size_t chunk = (n + n_chunks - 1) / n_chunks;
+
+  // Count the pool chunks before enqueuing any of them since the workers
+  // decrement the count under the lock as soon as they finish
+  std::mutex mtx;
+  std::condition_variable cv;
+  size_t remaining = (n + chunk - 1) / chunk - 1;
+  std::exception_ptr error;
+  auto& pool = ThreadPool::instance();
+  for (size_t start = chunk; start < n; start += chunk) {
+    size_t end = std::min(n, start + chunk);
+    pool.enqueue([&, start, end]() {
+      std::exception_ptr e;
+      try {
+        f(start, end);
+      } catch (...) {
+        e = std::current_exception();
+      }
+      std::lock_guard<std::mutex> lock(mtx);
+      if (e && !error) {
+        error = e;
+      }
+      if (--remaining == 0) {
+        cv.notify_one();
+      }
+    });
+  }
+
+  std::exception_ptr e;
+  try {
+    f(size_t(0), std::min(n, chunk));
+  } catch (...) {
+    e = std::current_exception();
+  }
+  std::unique_lock<std::mutex> lock(mtx);
+  cv.wait(lock, [&]() { return remaining == 0; });
+  if (e) {
+    std::rethrow_exception(e);
+  }
+  if (error) {
+    std::rethrow_exception(error);
+  }
+}
+
+} // namespace mlx::core
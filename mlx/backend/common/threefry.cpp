@@ -1,9 +1,50 @@
 // Copyright © 2023 Apple Inc.
 
+#include <algorithm>
+
 #include "mlx/backend/common/threefry.h"
 
 namespace mlx::core::random {
 
+namespace {
+
+constexpr int hash_block = 64;
+
+inline void mix(uint32_t& x0, uint32_t& x1, int r) {
+  x0 += x1;
+  x1 = (x1 << r) | (x1 >> (32 - r));
+  x1 ^= x0;
+}
+
+// The rounds of threefry2x32_hash written out for a block of counters so
+// that the whole hash is one loop the compiler vectorizes
+void hash_block_rounds(const uint32_t* key, uint32_t* x0, uint32_t* x1) {
+  const uint32_t ks[3] = {key[0], key[1], key[2]};
+  for (int j = 0; j < hash_block; ++j) {
+    uint32_t a = x0[j] + ks[0];
+    uint32_t b = x1[j] + ks[1];
+    for (int i = 0; i < 5; ++i) {
+      if (i % 2 == 0) {
+        mix(a, b, 13);
+        mix(a, b, 15);
+        mix(a, b, 26);
+        mix(a, b, 6);
+      } else {
+        mix(a, b, 17);
+        mix(a, b, 29);
+        mix(a, b, 16);
+        mix(a, b, 24);
+      }
+      a += ks[(i + 1) % 3];
+      b += ks[(i + 2) % 3] + i + 1;
+    }
+    x0[j] = a;
+    x1[j] = b;
+  }
+}
+
+} // namespace
+
 std::pair<uint32_t, uint32_t> threefry2x32_hash(
     const std::pair<uint32_t, uint32_t>& key,
     std::pair<uint32_t, uint32_t> count) {
@@ -28,4 +69,22 @@ std::pair<uint32_t, uint32_t> threefry2x32_hash(
   return count;
 }
 
+void threefry2x32_hash(
+    const std::pair<uint32_t, uint32_t>& key,
+    uint32_t* x0,
+    uint32_t* x1,
+    size_t n) {
+  uint32_t ks[3] = {key.first, key.second, key.first ^ key.second ^ 0x1BD11BDA};
+  uint32_t b0[hash_block] = {};
+  uint32_t b1[hash_block] = {};
+  for (size_t i = 0; i < n; i += hash_block) {
+    size_t m = std::min<size_t>(hash_block, n - i);
+    std::copy(x0 + i, x0 + i + m, b0);
+    std::copy(x1 + i, x1 + i + m, b1);
+    hash_block_rounds(ks, b0, b1);
+    std::copy(b0, b0 + m, x0 + i);
+    std::copy(b1, b1 + m, x1 + i);
+  }
+}
+
 } // namespace mlx::core::random
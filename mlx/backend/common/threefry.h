@@ -2,6 +2,7 @@
 
 #pragma once
 
+#include <cstddef>
 #include <cstdint>
 #include <utility>
 
@@ -18,4 +19,15 @@ std::pair<uint32_t, uint32_t> threefry2x32_hash(
     const std::pair<uint32_t, uint32_t>& key,
     std::pair<uint32_t, uint32_t> count);
 
+/** Applies the Threefry 2x32 hash function to the n counters (x0[i], x1[i])
+ * in place. The result is identical to calling threefry2x32_hash on each
+ * pair but the rounds are evaluated over many counters at once so that they
+ * compile to vector instructions.
+ */
+void threefry2x32_hash(
+    const std::pair<uint32_t, uint32_t>& key,
+    uint32_t* x0,
+    uint32_t* x1,
+    size_t n);
+
 } // namespace mlx::core::random
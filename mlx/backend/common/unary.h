@@ -4,6 +4,8 @@
 
 #include "mlx/allocator.h"
 #include "mlx/array.h"
+#include "mlx/backend/common/simd_math.h"
+#include "mlx/backend/common/threading.h"
 #include "mlx/backend/common/utils.h"
 #include "mlx/utils.h"
 
@@ -53,6 +55,55 @@ struct SignOp {
   }
 };
 
+// Ops that also take a simd::Float are vectorized for real floating point
+// types, see unary_fp_simd
+struct ExpOp {
+  template <typename T>
+  T operator()(T x) {
+    return std::exp(x);
+  }
+  simd::Float operator()(simd::Float x) {
+    return simd::exp(x);
+  }
+};
+
+struct LogOp {
+  template <typename T>
+  T operator()(T x) {
+    return std::log(x);
+  }
+  simd::Float operator()(simd::Float x) {
+    return simd::log(x);
+  }
+};
+
+struct SigmoidOp {
+  template <typename T>
+  T operator()(T x) {
+    auto one = static_cast<decltype(x)>(1.0);
+    return one / (one + std::exp(-x));
+  }
+  simd::Float operator()(simd::Float x) {
+    return simd::sigmoid(x);
+  }
+};
+
+struct TanhOp {
+  template <typename T>
+  T operator()(T x) {
+    return std::tanh(x);
+  }
+  simd::Float operator()(simd::Float x) {
+    return simd::tanh(x);
+  }
+};
+
+struct ErfOp {
+  simd::Float operator()(simd::Float x) {
+    return simd::erf(x);
+  }
+};
+
 template <typename T, typename Op>
 void unary_op(const array& a, array& out, Op op) {
   const T* a_ptr = a.data<T>();
@@ -113,6 +164,9 @@ void unary(const array& a, array& out, Op op) {
     case float32:
       unary_op<float>(a, out, op);
       break;
+    case float64:
+      unary_op<double>(a, out, op);
+      break;
     case bfloat16:
       unary_op<bfloat16_t>(a, out, op);
       break;
@@ -134,6 +188,9 @@ void unary_fp(const array& a, array& out, Op op) {
     case float32:
       unary_op<float>(a, out, op);
       break;
+    case float64:
+      unary_op<double>(a, out, op);
+      break;
     case complex64:
       unary_op<complex64_t>(a, out, op);
       break;
@@ -144,6 +201,79 @@ void unary_fp(const array& a, array& out, Op op) {
   }
 }
 
+// Apply op to simd::size elements at a time. Half precision types are
+// computed in float32 lanes.
+template <typename T, typename Op>
+void unary_op_simd(const array& a, array& out, Op op) {
+  const T* a_ptr = a.data<T>();
+  bool contiguous = a.flags().contiguous;
+  size_t size;
+  if (contiguous) {
+    out.set_data(
+        allocator::malloc_or_wait(a.data_size() * out.itemsize()),
+        a.data_size(),
+        a.strides(),
+        a.flags());
+    size = a.data_size();
+  } else {
+    out.set_data(allocator::malloc_or_wait(out.nbytes()));
+    size = out.size();
+  }
+  T* dst = out.data<T>();
+  auto [shape, strides] = collapse_contiguous_dims(a.shape(), a.strides());
+
+  constexpr int N = simd::size;
+  size_t n_blocks = (size + N - 1) / N;
+  parallel_for(n_blocks, num_threads(size), [&](size_t start, size_t end) {
+    start *= N;
+    end = std::min(end * N, size);
+    StridedIterator it(shape, strides, contiguous ? 0 : start);
+    float buf[N];
+    for (size_t i = start; i < end; i += N) {
+      int n = std::min<size_t>(N, end - i);
+      if constexpr (std::is_same_v<T, float>) {
+        if (contiguous && n == N) {
+          simd::store(dst + i, op(simd::load(a_ptr + i)));
+          continue;
+        }
+      }
+      // Partial blocks, non contiguous inputs and half precision types go
+      // through a float32 buffer
+      for (int j = 0; j < n; ++j) {
+        if (contiguous) {
+          buf[j] = static_cast<float>(a_ptr[i + j]);
+        } else {
+          buf[j] = static_cast<float>(a_ptr[it.loc]);
+          it.step();
+        }
+      }
+      std::fill(buf + n, buf + N, 0.0f);
+      simd::store(buf, op(simd::load(buf)));
+      for (int j = 0; j < n; ++j) {
+        dst[i + j] = static_cast<T>(buf[j]);
+      }
+    }
+  });
+}
+
+// Same as unary_fp but with the real floating point types vectorized
+template <typename Op>
+void unary_fp_simd(const array& a, array& out, Op op) {
+  switch (out.dtype()) {
+    case bfloat16:
+      unary_op_simd<bfloat16_t>(a, out, op);
+      break;
+    case float16:
+      unary_op_simd<float16_t>(a, out, op);
+      break;
+    case float32:
+      unary_op_simd<float>(a, out, op);
+      break;
+    default:
+      unary_fp(a, out, op);
+  }
+}
+
 } // namespace
 
 } // namespace mlx::core
@@ -28,4 +28,78 @@ inline size_t elem_to_loc(int elem, const array& a) {
   return elem_to_loc(elem, a.shape(), a.strides());
 }
 
+// Collapse the dimensions that can be merged for every one of the given
+// strides and drop singleton dimensions. Dimensions i and i + 1 can be merged
+// when strides[i] == strides[i + 1] * shape[i + 1] for all the strides.
+inline std::pair<std::vector<int>, std::vector<std::vector<size_t>>>
+collapse_contiguous_dims(
+    const std::vector<int>& shape,
+    const std::vector<std::vector<size_t>>& strides) {
+  std::vector<int> out_shape;
+  std::vector<std::vector<size_t>> out_strides(strides.size());
+  for (int i = 0; i < shape.size(); ++i) {
+    if (shape[i] == 1) {
+      continue;
+    }
+    bool merge = !out_shape.empty();
+    for (int j = 0; j < strides.size() && merge; ++j) {
+      merge = (out_strides[j].back() == strides[j][i] * shape[i]);
+    }
+    if (merge) {
+      out_shape.back() *= shape[i];
+      for (int j = 0; j < strides.size(); ++j) {
+        out_strides[j].back() = strides[j][i];
+      }
+    } else {
+      out_shape.push_back(shape[i]);
+      for (int j = 0; j < strides.size(); ++j) {
+        out_strides[j].push_back(strides[j][i]);
+      }
+    }
+  }
+  return {out_shape, out_strides};
+}
+
+inline std::pair<std::vector<int>, std::vector<size_t>>
+collapse_contiguous_dims(
+    const std::vector<int>& shape,
+    const std::vector<size_t>& strides) {
+  auto [out_shape, out_strides] = collapse_contiguous_dims(
+      shape, std::vector<std::vector<size_t>>{strides});
+  return {out_shape, out_strides[0]};
+}
+
+// Walks the elements of a strided array in row-major order keeping track of
+// their location in memory so each step costs O(1) amortized instead of a
+// full elem_to_loc.
+struct StridedIterator {
+  StridedIterator(
+      const std::vector<int>& shape,
+      const std::vector<size_t>& strides,
+      size_t start = 0)
+      : shape(shape), strides(strides), pos(shape.size(), 0), loc(0) {
+    for (int i = shape.size() - 1; i >= 0 && start > 0; --i) {
+      pos[i] = start % shape[i];
+      loc += pos[i] * strides[i];
+      start /= shape[i];
+    }
+  }
+
+  void step() {
+    for (int i = shape.size() - 1; i >= 0; --i) {
+      loc += strides[i];
+      if (++pos[i] < shape[i]) {
+        return;
+      }
+      loc -= shape[i] * strides[i];
+      pos[i] = 0;
+    }
+  }
+
+  std::vector<int> shape;
+  std::vector<size_t> strides;
+  std::vector<int> pos;
+  size_t loc;
+};
+
 } // namespace mlx::core
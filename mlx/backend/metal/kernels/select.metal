@@ -0,0 +1,60 @@
+// Copyright © 2023 Apple Inc.
+
+#include <metal_integer>
+
+#include "mlx/backend/metal/kernels/utils.h"
+
+template <typename T>
+[[kernel]] void select_op_v(
+    device const bool* condition,
+    device const T* x,
+    device const T* y,
+    device T* out,
+    uint index [[thread_position_in_grid]]) {
+  out[index] = condition[index] ? x[index] : y[index];
+}
+
+template <typename T>
+[[kernel]] void select_op_g(
+    device const bool* condition,
+    device const T* x,
+    device const T* y,
+    device T* out,
+    constant const int* shape,
+    constant const size_t* c_strides,
+    constant const size_t* x_strides,
+    constant const size_t* y_strides,
+    constant const int& ndim,
+    uint index [[thread_position_in_grid]]) {
+  auto c_idx = elem_to_loc(index, shape, c_strides, ndim);
+  auto x_idx = elem_to_loc(index, shape, x_strides, ndim);
+  auto y_idx = elem_to_loc(index, shape, y_strides, ndim);
+  out[index] = condition[c_idx] ? x[x_idx] : y[y_idx];
+}
+
+#define instantiate_select(size, type) \
+  template [[host_name("vselect" #size)]] \
+  [[kernel]] void select_op_v<type>( \
+      device const bool* condition, \
+      device const type* x, \
+      device const type* y, \
+      device type* out, \
+      uint index [[thread_position_in_grid]]); \
+  template [[host_name("gselect" #size)]] \
+  [[kernel]] void select_op_g<type>( \
+      device const bool* condition, \
+      device const type* x, \
+      device const type* y, \
+      device type* out, \
+      constant const int* shape, \
+      constant const size_t* c_strides, \
+      constant const size_t* x_strides, \
+      constant const size_t* y_strides, \
+      constant const int& ndim, \
+      uint index [[thread_position_in_grid]]);
+
+// The selected elements are only copied so one kernel per type size is enough
+instantiate_select(1, uint8_t)
+instantiate_select(2, uint16_t)
+instantiate_select(4, uint32_t)
+instantiate_select(8, uint64_t)
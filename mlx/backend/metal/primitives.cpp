@@ -6,6 +6,7 @@
 #include <sstream>
 
 #include "mlx/backend/common/binary.h"
+#include "mlx/backend/common/utils.h"
 #include "mlx/backend/metal/copy.h"
 #include "mlx/backend/metal/device.h"
 #include "mlx/backend/metal/kernels/defines.h"
@@ -157,6 +158,12 @@ void Abs::eval_gpu(const std::vector<array>& inputs, array& out) {
   unary_op(inputs, out, "abs");
 }
 
+void AdafactorStep::eval_gpu(const std::vector<array>& inputs, array& out) {
+  // The fast Adafactor step only uses AdafactorStep on the CPU and is
+  // composed from elementwise ops and reductions on the GPU
+  throw std::runtime_error("[AdafactorStep] Not supported on the GPU.");
+}
+
 void Add::eval_gpu(const std::vector<array>& inputs, array& out) {
   binary_op(inputs, out, "add");
 }
@@ -214,6 +221,8 @@ void Arange::eval_gpu(const std::vector<array>& inputs, array& out) {
     case float32:
       arange_set_scalars<float>(start_, start_ + step_, compute_encoder);
       break;
+    case float64:
+      throw std::runtime_error("[Arange::eval_gpu] Does not support float64");
     case bfloat16:
       throw std::runtime_error("[Arange::eval_gpu] Does not support bfloat16");
     case complex64:
@@ -323,6 +332,10 @@ void Broadcast::eval_gpu(const std::vector<array>& inputs, array& out) {
   eval(inputs, out);
 }
 
+void Checkpoint::eval_gpu(const std::vector<array>& inputs, array& out) {
+  eval(inputs, out);
+}
+
 void Concatenate::eval_gpu(const std::vector<array>& inputs, array& out) {
   std::vector<int> sizes;
   sizes.push_back(0);
@@ -359,6 +372,10 @@ void Cosh::eval_gpu(const std::vector<array>& inputs, array& out) {
   unary_op(inputs, out, "cosh");
 }
 
+void Depends::eval_gpu(const std::vector<array>& inputs, array& out) {
+  eval(inputs, out);
+}
+
 void Divide::eval_gpu(const std::vector<array>& inputs, array& out) {
   binary_op(inputs, out, "div");
 }
@@ -396,6 +413,12 @@ void Full::eval_gpu(const std::vector<array>& inputs, array& out) {
   copy_gpu(in, out, ctype);
 }
 
+void GlobalNorm::eval_gpu(const std::vector<array>& inputs, array& out) {
+  // The global norm only uses GlobalNorm on the CPU and is composed from
+  // reductions on the GPU
+  throw std::runtime_error("[GlobalNorm] Not supported on the GPU.");
+}
+
 void Greater::eval_gpu(const std::vector<array>& inputs, array& out) {
   binary_op(inputs, out, "ge");
 }
@@ -462,6 +485,12 @@ void NotEqual::eval_gpu(const std::vector<array>& inputs, array& out) {
   binary_op(inputs, out, "neq");
 }
 
+void OptimizerStep::eval_gpu(const std::vector<array>& inputs, array& out) {
+  // The fast optimizer steps only use OptimizerStep on the CPU and are
+  // composed from elementwise ops on the GPU
+  throw std::runtime_error("[OptimizerStep] Not supported on the GPU.");
+}
+
 void Pad::eval_gpu(const std::vector<array>& inputs, array& out) {
   // Inputs must be base input array and scalar val array
   assert(inputs.size() == 2);
@@ -497,6 +526,11 @@ void Power::eval_gpu(const std::vector<array>& inputs, array& out) {
   binary_op(inputs, out, "pow");
 }
 
+void QuantizedAdamStep::eval_gpu(const std::vector<array>& inputs, array& out) {
+  // The quantized Adam step only runs on the CPU
+  throw std::runtime_error("[QuantizedAdamStep] Not supported on the GPU.");
+}
+
 void RandomBits::eval_gpu(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
 
@@ -542,6 +576,12 @@ void RandomBits::eval_gpu(const std::vector<array>& inputs, array& out) {
   compute_encoder->dispatchThreads(grid_dims, group_dims);
 }
 
+void RandomSample::eval_gpu(const std::vector<array>& inputs, array& out) {
+  // random::uniform, normal and bernoulli only use RandomSample on the CPU
+  // and are composed from RandomBits on the GPU
+  throw std::runtime_error("[RandomSample] Not supported on the GPU.");
+}
+
 void Reshape::eval_gpu(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
   const auto& in = inputs[0];
@@ -555,6 +595,61 @@ void Reshape::eval_gpu(const std::vector<array>& inputs, array& out) {
   }
 }
 
+void Select::eval_gpu(const std::vector<array>& inputs, array& out) {
+  assert(inputs.size() == 3);
+  auto& condition = inputs[0];
+  auto& x = inputs[1];
+  auto& y = inputs[2];
+  out.set_data(allocator::malloc_or_wait(out.nbytes()));
+  if (out.size() == 0) {
+    return;
+  }
+
+  // The kernels only copy elements so they are specialized on the size of
+  // the type instead of the type itself
+  bool contiguous = condition.flags().row_contiguous &&
+      x.flags().row_contiguous && y.flags().row_contiguous;
+  std::ostringstream kname;
+  kname << (contiguous ? "v" : "g") << "select" << out.itemsize();
+
+  auto& s = stream();
+  auto& d = metal::device(s.device);
+  auto kernel = d.get_kernel(kname.str());
+  auto compute_encoder = d.get_command_encoder(s.index);
+  compute_encoder->setComputePipelineState(kernel);
+  set_array_buffer(compute_encoder, condition, 0);
+  set_array_buffer(compute_encoder, x, 1);
+  set_array_buffer(compute_encoder, y, 2);
+  set_array_buffer(compute_encoder, out, 3);
+  if (!contiguous) {
+    auto [shape, strides] = collapse_contiguous_dims(
+        out.shape(),
+        std::vector<std::vector<size_t>>{
+            condition.strides(), x.strides(), y.strides()});
+    if (shape.empty()) {
+      shape.push_back(1);
+      for (auto& st : strides) {
+        st.push_back(0);
+      }
+    }
+    int ndim = shape.size();
+    compute_encoder->setBytes(shape.data(), ndim * sizeof(int), 4);
+    compute_encoder->setBytes(strides[0].data(), ndim * sizeof(size_t), 5);
+    compute_encoder->setBytes(strides[1].data(), ndim * sizeof(size_t), 6);
+    compute_encoder->setBytes(strides[2].data(), ndim * sizeof(size_t), 7);
+    compute_encoder->setBytes(&ndim, sizeof(int), 8);
+  }
+
+  size_t nthreads = out.size();
+  MTL::Size grid_dims = MTL::Size(nthreads, 1, 1);
+  NS::UInteger thread_group_size = kernel->maxTotalThreadsPerThreadgroup();
+  if (thread_group_size > nthreads) {
+    thread_group_size = nthreads;
+  }
+  MTL::Size group_dims = MTL::Size(thread_group_size, 1, 1);
+  compute_encoder->dispatchThreads(grid_dims, group_dims);
+}
+
 void Sigmoid::eval_gpu(const std::vector<array>& inputs, array& out) {
   unary_op(inputs, out, "sigmoid");
 }
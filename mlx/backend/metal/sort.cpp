@@ -297,6 +297,12 @@ void ArgSort::eval_gpu(const std::vector<array>& inputs, array& out) {
   gpu_merge_sort<true>(s, d, in, out, axis_);
 }
 
+void ArgTopK::eval_gpu(const std::vector<array>& inputs, array& out) {
+  // topk and argtopk only use ArgTopK on the CPU and are composed from
+  // argpartition and argsort on the GPU
+  throw std::runtime_error("[ArgTopK] Not supported on the GPU.");
+}
+
 void Sort::eval_gpu(const std::vector<array>& inputs, array& out) {
   assert(inputs.size() == 1);
 
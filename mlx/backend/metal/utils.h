@@ -69,6 +69,8 @@ std::string type_to_name(const array& a) {
     case float32:
       tname = "float32";
       break;
+    case float64:
+      throw std::invalid_argument("float64 is not supported on the GPU.");
     case bfloat16:
       tname = "bfloat16";
       break;
@@ -10,6 +10,7 @@
 namespace mlx::core {
 
 NO_GPU(Abs)
+NO_GPU(AdafactorStep)
 NO_GPU(Add)
 NO_GPU(Arange)
 NO_GPU(ArcCos)
@@ -21,14 +22,17 @@ NO_GPU(ArcTanh)
 NO_GPU(ArgPartition)
 NO_GPU(ArgReduce)
 NO_GPU(ArgSort)
+NO_GPU(ArgTopK)
 NO_GPU(AsType)
 NO_GPU(AsStrided)
 NO_GPU(Broadcast)
+NO_GPU(Checkpoint)
 NO_GPU(Concatenate)
 NO_GPU(Convolution)
 NO_GPU(Copy)
 NO_GPU(Cos)
 NO_GPU(Cosh)
+NO_GPU(Depends)
 NO_GPU(Divide)
 NO_GPU(Remainder)
 NO_GPU(Equal)
@@ -38,6 +42,7 @@ NO_GPU(Exp)
 NO_GPU(FFT)
 NO_GPU(Full)
 NO_GPU(Gather)
+NO_GPU(GlobalNorm)
 NO_GPU(Greater)
 NO_GPU(GreaterEqual)
 NO_GPU(Less)
@@ -53,14 +58,18 @@ NO_GPU(Minimum)
 NO_GPU(Multiply)
 NO_GPU(Negative)
 NO_GPU(NotEqual)
+NO_GPU(OptimizerStep)
 NO_GPU(Pad)
 NO_GPU(Partition)
 NO_GPU(Power)
+NO_GPU(QuantizedAdamStep)
 NO_GPU(RandomBits)
+NO_GPU(RandomSample)
 NO_GPU(Reduce)
 NO_GPU(Reshape)
 NO_GPU(Scan)
 NO_GPU(Scatter)
+NO_GPU(Select)
 NO_GPU(Sigmoid)
 NO_GPU(Sign)
 NO_GPU(Sin)
@@ -25,6 +25,7 @@ struct Dtype {
     int64,
     float16,
     float32,
+    float64,
     bfloat16,
     complex64,
   };
@@ -64,6 +65,7 @@ static constexpr Dtype int64{Dtype::Val::int64, sizeof(int64_t)};
 
 static constexpr Dtype float16{Dtype::Val::float16, sizeof(uint16_t)};
 static constexpr Dtype float32{Dtype::Val::float32, sizeof(float)};
+static constexpr Dtype float64{Dtype::Val::float64, sizeof(double)};
 static constexpr Dtype bfloat16{Dtype::Val::bfloat16, sizeof(uint16_t)};
 static constexpr Dtype complex64{Dtype::Val::complex64, sizeof(complex64_t)};
 
@@ -0,0 +1,428 @@
+// Copyright © 2023 Apple Inc.
+
+#include <sstream>
+
+#include "mlx/fast.h"
+#include "mlx/ops.h"
+#include "mlx/primitives.h"
+#include "mlx/utils.h"
+
+namespace mlx::core::fast {
+
+namespace {
+
+// Checks that the parameter, gradient and state have the same shape and
+// casts them to their common floating point type
+std::vector<array> prepare_inputs(
+    const std::string& name,
+    std::vector<array> inputs,
+    StreamOrDevice s) {
+  for (auto& x : inputs) {
+    if (x.shape() != inputs[0].shape()) {
+      std::ostringstream msg;
+      msg << "[" << name << "] The parameter, gradient and state must have "
+          << "the same shape but received shapes " << inputs[0].shape()
+          << " and " << x.shape() << ".";
+      throw std::invalid_argument(msg.str());
+    }
+  }
+  auto in_type = result_type(inputs);
+  if (is_complex(in_type)) {
+    std::ostringstream msg;
+    msg << "[" << name << "] Complex arrays are not supported.";
+    throw std::invalid_argument(msg.str());
+  }
+  auto dtype = is_floating_point(in_type) ? in_type : float32;
+  for (auto& x : inputs) {
+    x = astype(x, dtype, s);
+  }
+  return inputs;
+}
+
+// Checks that a hyperparameter given as an array, such as the learning
+// rate, is a scalar and casts it to the type the update is computed in
+array prepare_scalar(
+    const std::string& name,
+    const std::string& what,
+    const array& x,
+    Dtype dtype,
+    StreamOrDevice s) {
+  if (x.size() != 1) {
+    std::ostringstream msg;
+    msg << "[" << name << "] The " << what << " must be a scalar but "
+        << "received an array of shape " << x.shape() << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  auto scalar_type = dtype == float64 ? float64 : float32;
+  return reshape(astype(x, scalar_type, s), {}, s);
+}
+
+array prepare_learning_rate(
+    const std::string& name,
+    const array& learning_rate,
+    Dtype dtype,
+    StreamOrDevice s) {
+  return prepare_scalar(name, "learning rate", learning_rate, dtype, s);
+}
+
+// Runs the fused update and splits the stacked result into the updated
+// parameter and state. The fallback computes the same update from the
+// inputs and the learning rate with composable ops. It runs the update on
+// the GPU and gives the fused update its gradients.
+std::vector<array> fused_step(
+    OptimizerStep::Optimizer optimizer,
+    const std::vector<float>& hyperparameters,
+    std::vector<array> inputs,
+    const array& learning_rate,
+    std::function<std::vector<array>(const std::vector<array>&)> fallback,
+    Stream stream) {
+  inputs.push_back(learning_rate);
+  if (stream.device != Device::cpu) {
+    return fallback(inputs);
+  }
+
+  auto shape = inputs[0].shape();
+  auto dtype = inputs[0].dtype();
+  int n_out = inputs.size() - 2;
+  std::vector<int> out_shape = shape;
+  out_shape.insert(out_shape.begin(), n_out);
+  auto out = array(
+      out_shape,
+      dtype,
+      std::make_unique<OptimizerStep>(
+          stream, optimizer, hyperparameters, std::move(fallback)),
+      std::move(inputs));
+
+  std::vector<array> outputs;
+  std::vector<int> starts(out_shape.size(), 0);
+  std::vector<int> ends = out_shape;
+  for (int i = 0; i < n_out; ++i) {
+    starts[0] = i;
+    ends[0] = i + 1;
+    outputs.push_back(reshape(slice(out, starts, ends, stream), shape, stream));
+  }
+  return outputs;
+}
+
+} // namespace
+
+std::vector<array> sgd_step(
+    const array& parameter,
+    const array& gradient,
+    const std::optional<array>& v,
+    const array& learning_rate,
+    float momentum /* = 0.0f */,
+    float weight_decay /* = 0.0f */,
+    float dampening /* = 0.0f */,
+    bool nesterov /* = false */,
+    StreamOrDevice s /* = {} */) {
+  std::vector<array> inputs = {parameter, gradient};
+  if (momentum > 0) {
+    inputs.push_back(v.has_value() ? v.value() : zeros_like(parameter, s));
+  }
+  inputs = prepare_inputs("sgd_step", inputs, s);
+  auto dtype = inputs[0].dtype();
+  auto lr = prepare_learning_rate("sgd_step", learning_rate, dtype, s);
+
+  auto stream = to_stream(s);
+  auto fallback = [=](const std::vector<array>& inputs) {
+    auto w = inputs[0];
+    auto g = inputs[1];
+    auto lr = astype(inputs.back(), dtype, stream);
+    if (weight_decay != 0) {
+      g = add(g, multiply(array(weight_decay, dtype), w, stream), stream);
+    }
+    if (momentum <= 0) {
+      return std::vector<array>{subtract(w, multiply(lr, g, stream), stream)};
+    }
+    auto mu = array(momentum, dtype);
+    auto v_new =
+        add(multiply(mu, inputs[2], stream),
+            multiply(array(1 - dampening, dtype), g, stream),
+            stream);
+    auto update =
+        nesterov ? add(g, multiply(mu, v_new, stream), stream) : v_new;
+    return std::vector<array>{
+        subtract(w, multiply(lr, update, stream), stream), v_new};
+  };
+  return fused_step(
+      OptimizerStep::SGD,
+      {momentum, weight_decay, dampening, static_cast<float>(nesterov)},
+      inputs,
+      lr,
+      fallback,
+      stream);
+}
+
+std::vector<array> adam_step(
+    const array& parameter,
+    const array& gradient,
+    const array& m,
+    const array& v,
+    const array& learning_rate,
+    float beta1,
+    float beta2,
+    float eps,
+    float weight_decay /* = 0.0f */,
+    StreamOrDevice s /* = {} */) {
+  auto inputs = prepare_inputs("adam_step", {parameter, gradient, m, v}, s);
+  auto dtype = inputs[0].dtype();
+  auto lr = prepare_learning_rate("adam_step", learning_rate, dtype, s);
+
+  auto stream = to_stream(s);
+  auto fallback = [=](const std::vector<array>& inputs) {
+    auto w = inputs[0];
+    auto g = inputs[1];
+    auto lr = astype(inputs.back(), dtype, stream);
+    if (weight_decay != 0) {
+      auto decay = multiply(lr, array(weight_decay, dtype), stream);
+      w = multiply(w, subtract(array(1, dtype), decay, stream), stream);
+    }
+    auto m_new =
+        add(multiply(array(beta1, dtype), inputs[2], stream),
+            multiply(array(1 - beta1, dtype), g, stream),
+            stream);
+    auto v_new =
+        add(multiply(array(beta2, dtype), inputs[3], stream),
+            multiply(array(1 - beta2, dtype), square(g, stream), stream),
+            stream);
+    auto update = divide(
+        multiply(lr, m_new, stream),
+        add(sqrt(v_new, stream), array(eps, dtype), stream),
+        stream);
+    return std::vector<array>{subtract(w, update, stream), m_new, v_new};
+  };
+  return fused_step(
+      OptimizerStep::Adam,
+      {beta1, beta2, eps, weight_decay},
+      inputs,
+      lr,
+      fallback,
+      stream);
+}
+
+std::vector<array> adagrad_step(
+    const array& parameter,
+    const array& gradient,
+    const array& v,
+    const array& learning_rate,
+    float eps,
+    StreamOrDevice s /* = {} */) {
+  auto inputs = prepare_inputs("adagrad_step", {parameter, gradient, v}, s);
+  auto dtype = inputs[0].dtype();
+  auto lr = prepare_learning_rate("adagrad_step", learning_rate, dtype, s);
+
+  auto stream = to_stream(s);
+  auto fallback = [=](const std::vector<array>& inputs) {
+    auto g = inputs[1];
+    auto lr = astype(inputs.back(), dtype, stream);
+    auto v_new = add(inputs[2], square(g, stream), stream);
+    auto update = divide(
+        multiply(lr, g, stream),
+        add(sqrt(v_new, stream), array(eps, dtype), stream),
+        stream);
+    return std::vector<array>{subtract(inputs[0], update, stream), v_new};
+  };
+  return fused_step(
+      OptimizerStep::Adagrad, {eps}, inputs, lr, fallback, stream);
+}
+
+std::vector<array> adam_step_8bit(
+    const array& parameter,
+    const array& gradient,
+    const std::optional<array>& state,
+    const array& learning_rate,
+    float beta1,
+    float beta2,
+    float eps,
+    float weight_decay /* = 0.0f */,
+    int block_size /* = 256 */,
+    StreamOrDevice s /* = {} */) {
+  if (block_size <= 0) {
+    std::ostringstream msg;
+    msg << "[adam_step_8bit] The block size must be positive but received "
+        << block_size << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  auto stream = to_stream(s);
+  if (stream.device != Device::cpu) {
+    throw std::invalid_argument("[adam_step_8bit] Only supported on the CPU.");
+  }
+
+  auto inputs = prepare_inputs("adam_step_8bit", {parameter, gradient}, s);
+  auto dtype = inputs[0].dtype();
+  auto lr = prepare_learning_rate("adam_step_8bit", learning_rate, dtype, s);
+
+  int n_blocks = (inputs[0].size() + block_size - 1) / block_size;
+  std::vector<int> state_shape = {
+      n_blocks, 2 * block_size + 2 * static_cast<int>(sizeof(float))};
+  std::vector<array> state_inputs = {inputs[1]};
+  if (state.has_value()) {
+    if (state->shape() != state_shape || state->dtype() != uint8) {
+      std::ostringstream msg;
+      msg << "[adam_step_8bit] Expected a uint8 state of shape " << state_shape
+          << " but received a " << state->dtype() << " array of shape "
+          << state->shape() << ".";
+      throw std::invalid_argument(msg.str());
+    }
+    state_inputs.push_back(state.value());
+  }
+
+  auto new_state = array(
+      state_shape,
+      uint8,
+      std::make_unique<QuantizedAdamStep>(
+          stream,
+          QuantizedAdamStep::State,
+          std::vector<float>{beta1, beta2},
+          block_size),
+      std::move(state_inputs));
+  auto w = array(
+      inputs[0].shape(),
+      dtype,
+      std::make_unique<QuantizedAdamStep>(
+          stream,
+          QuantizedAdamStep::Parameter,
+          std::vector<float>{eps, weight_decay},
+          block_size),
+      {inputs[0], new_state, lr});
+  return {w, new_state};
+}
+
+std::vector<array> adafactor_step(
+    const array& parameter,
+    const array& gradient,
+    const array& row,
+    const array& col,
+    const array& learning_rate,
+    const array& beta2,
+    float eps1 /* = 1e-30f */,
+    float eps2 /* = 1e-3f */,
+    float clip_threshold /* = 1.0f */,
+    float weight_decay /* = 0.0f */,
+    bool scale_parameter /* = true */,
+    StreamOrDevice s /* = {} */) {
+  auto inputs = prepare_inputs("adafactor_step", {parameter, gradient}, s);
+  auto dtype = inputs[0].dtype();
+  auto lr = prepare_learning_rate("adafactor_step", learning_rate, dtype, s);
+  auto decay = prepare_scalar("adafactor_step", "decay", beta2, float32, s);
+
+  // Parameters with less than two dimensions are a single row
+  auto shape = inputs[0].shape();
+  std::vector<int> matrix_shape = shape;
+  if (shape.size() < 2) {
+    matrix_shape = {1, static_cast<int>(inputs[0].size())};
+  }
+  int rows = matrix_shape[matrix_shape.size() - 2];
+  int cols = matrix_shape.back();
+  std::vector<int> row_shape(matrix_shape.begin(), matrix_shape.end() - 1);
+  std::vector<int> col_shape(matrix_shape.begin(), matrix_shape.end() - 2);
+  col_shape.push_back(cols);
+  if (row.shape() != row_shape || col.shape() != col_shape) {
+    std::ostringstream msg;
+    msg << "[adafactor_step] Expected the row and column means of shapes "
+        << row_shape << " and " << col_shape << " but received " << row.shape()
+        << " and " << col.shape() << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  if (inputs[0].size() == 0) {
+    return {inputs[0], row, col};
+  }
+
+  auto w = reshape(inputs[0], matrix_shape, s);
+  auto g = reshape(inputs[1], matrix_shape, s);
+  auto r = astype(row, float32, s);
+  auto c = astype(col, float32, s);
+
+  auto stream = to_stream(s);
+  if (stream.device == Device::cpu) {
+    std::vector<int> moments_shape = row_shape;
+    moments_shape.back() += cols;
+    auto moments = array(
+        moments_shape,
+        float32,
+        std::make_unique<AdafactorStep>(
+            stream, AdafactorStep::SecondMoment, std::vector<float>{eps1}),
+        {g, r, c, decay});
+    auto w_new = array(
+        matrix_shape,
+        dtype,
+        std::make_unique<AdafactorStep>(
+            stream,
+            AdafactorStep::Parameter,
+            std::vector<float>{
+                eps2,
+                clip_threshold,
+                weight_decay,
+                static_cast<float>(scale_parameter)}),
+        {w, g, moments, lr});
+
+    std::vector<int> starts(moments_shape.size(), 0);
+    std::vector<int> ends = moments_shape;
+    ends.back() = rows;
+    auto r_new = slice(moments, starts, ends, s);
+    starts.back() = rows;
+    ends.back() = rows + cols;
+    auto c_new = slice(moments, starts, ends, s);
+    return {reshape(w_new, shape, s), r_new, c_new};
+  }
+
+  auto g2 = add(square(astype(g, float32, s), s), array(eps1), s);
+  auto one_minus_decay = subtract(array(1.0f), decay, s);
+  auto r_new =
+      add(multiply(decay, r, s),
+          multiply(one_minus_decay, mean(g2, -1, false, s), s),
+          s);
+  auto c_new =
+      add(multiply(decay, c, s),
+          multiply(one_minus_decay, mean(g2, -2, false, s), s),
+          s);
+  auto v = divide(
+      multiply(expand_dims(r_new, -1, s), expand_dims(c_new, -2, s), s),
+      expand_dims(mean(r_new, -1, true, s), -1, s),
+      s);
+  auto u = multiply(g, astype(rsqrt(v, s), dtype, s), s);
+  auto rms_u = sqrt(mean(square(u, s), s), s);
+  auto clip = maximum(
+      array(1, dtype), divide(rms_u, array(clip_threshold, dtype), s), s);
+  lr = astype(lr, dtype, s);
+  if (scale_parameter) {
+    auto rms_w = sqrt(mean(square(w, s), s), s);
+    lr = multiply(lr, maximum(array(eps2, dtype), rms_w, s), s);
+  }
+  auto decay_w =
+      subtract(array(1, dtype), multiply(lr, array(weight_decay, dtype), s), s);
+  auto w_new =
+      subtract(multiply(decay_w, w, s), multiply(divide(lr, clip, s), u, s), s);
+  return {reshape(w_new, shape, s), r_new, c_new};
+}
+
+array global_norm(
+    const std::vector<array>& arrays,
+    StreamOrDevice s /* = {} */) {
+  bool has_float64 = false;
+  std::vector<array> inputs;
+  for (auto& x : arrays) {
+    if (is_complex(x.dtype())) {
+      throw std::invalid_argument(
+          "[global_norm] Complex arrays are not supported.");
+    }
+    has_float64 |= x.dtype() == float64;
+    inputs.push_back(is_floating_point(x.dtype()) ? x : astype(x, float32, s));
+  }
+  auto dtype = has_float64 ? float64 : float32;
+
+  auto stream = to_stream(s);
+  if (stream.device == Device::cpu) {
+    return array(
+        {}, dtype, std::make_unique<GlobalNorm>(stream), std::move(inputs));
+  }
+
+  auto sum = array(0, dtype);
+  for (auto& x : inputs) {
+    sum = add(sum, mlx::core::sum(square(astype(x, dtype, s), s), s), s);
+  }
+  return sqrt(sum, s);
+}
+
+} // namespace mlx::core::fast
@@ -0,0 +1,201 @@
+// Copyright © 2023 Apple Inc.
+
+#pragma once
+
+#include <optional>
+#include <variant>
+
+#include "array.h"
+#include "device.h"
+#include "stream.h"
+
+namespace mlx::core::fast {
+
+using StreamOrDevice = std::variant<std::monostate, Stream, Device>;
+
+/**
+ * Update a parameter with stochastic gradient descent.
+ *
+ * Returns the updated parameter and, if the momentum is positive, the
+ * updated momentum buffer. A missing buffer starts from zeros. The learning
+ * rate can be a scalar array, for instance the value of a schedule, in which
+ * case the same graph is built at every step.
+ */
+std::vector<array> sgd_step(
+    const array& parameter,
+    const array& gradient,
+    const std::optional<array>& v,
+    const array& learning_rate,
+    float momentum = 0.0f,
+    float weight_decay = 0.0f,
+    float dampening = 0.0f,
+    bool nesterov = false,
+    StreamOrDevice s = {});
+
+inline std::vector<array> sgd_step(
+    const array& parameter,
+    const array& gradient,
+    const std::optional<array>& v,
+    float learning_rate,
+    float momentum = 0.0f,
+    float weight_decay = 0.0f,
+    float dampening = 0.0f,
+    bool nesterov = false,
+    StreamOrDevice s = {}) {
+  return sgd_step(
+      parameter,
+      gradient,
+      v,
+      array(learning_rate),
+      momentum,
+      weight_decay,
+      dampening,
+      nesterov,
+      s);
+}
+
+/**
+ * Update a parameter with Adam without bias correction.
+ *
+ * The parameter is decayed by (1 - learning_rate * weight_decay) before the
+ * update as in AdamW. Returns the updated parameter, first moment m and
+ * second moment v.
+ */
+std::vector<array> adam_step(
+    const array& parameter,
+    const array& gradient,
+    const array& m,
+    const array& v,
+    const array& learning_rate,
+    float beta1,
+    float beta2,
+    float eps,
+    float weight_decay = 0.0f,
+    StreamOrDevice s = {});
+
+inline std::vector<array> adam_step(
+    const array& parameter,
+    const array& gradient,
+    const array& m,
+    const array& v,
+    float learning_rate,
+    float beta1,
+    float beta2,
+    float eps,
+    float weight_decay = 0.0f,
+    StreamOrDevice s = {}) {
+  return adam_step(
+      parameter,
+      gradient,
+      m,
+      v,
+      array(learning_rate),
+      beta1,
+      beta2,
+      eps,
+      weight_decay,
+      s);
+}
+
+/**
+ * Update a parameter with Adagrad.
+ *
+ * Returns the updated parameter and sum of squared gradients v.
+ */
+std::vector<array> adagrad_step(
+    const array& parameter,
+    const array& gradient,
+    const array& v,
+    const array& learning_rate,
+    float eps,
+    StreamOrDevice s = {});
+
+inline std::vector<array> adagrad_step(
+    const array& parameter,
+    const array& gradient,
+    const array& v,
+    float learning_rate,
+    float eps,
+    StreamOrDevice s = {}) {
+  return adagrad_step(parameter, gradient, v, array(learning_rate), eps, s);
+}
+
+/**
+ * Update a parameter with Adam keeping the moments in an 8-bit state.
+ *
+ * The first moment m and the square root of the second moment v are
+ * quantized in blocks of block_size elements with logarithmic codes relative
+ * to the maximum of each block. The state is a uint8 array of shape
+ * (n_blocks, 2 * block_size + 8) and a missing state starts from m = g and
+ * v = g^2 like adam_step given the gradient. Returns the updated parameter
+ * and state. Only supported on the CPU.
+ */
+std::vector<array> adam_step_8bit(
+    const array& parameter,
+    const array& gradient,
+    const std::optional<array>& state,
+    const array& learning_rate,
+    float beta1,
+    float beta2,
+    float eps,
+    float weight_decay = 0.0f,
+    int block_size = 256,
+    StreamOrDevice s = {});
+
+inline std::vector<array> adam_step_8bit(
+    const array& parameter,
+    const array& gradient,
+    const std::optional<array>& state,
+    float learning_rate,
+    float beta1,
+    float beta2,
+    float eps,
+    float weight_decay = 0.0f,
+    int block_size = 256,
+    StreamOrDevice s = {}) {
+  return adam_step_8bit(
+      parameter,
+      gradient,
+      state,
+      array(learning_rate),
+      beta1,
+      beta2,
+      eps,
+      weight_decay,
+      block_size,
+      s);
+}
+
+/**
+ * Update a parameter with Adafactor.
+ *
+ * The second moment of a parameter of shape (..., r, c) is factored into the
+ * running means of the squared gradient over its rows, of shape (..., r),
+ * and over its columns, of shape (..., c). Parameters with less than two
+ * dimensions are treated as a single row. The decay beta2 is a scalar array
+ * since it changes with the step. Returns the updated parameter, row means
+ * and column means.
+ */
+std::vector<array> adafactor_step(
+    const array& parameter,
+    const array& gradient,
+    const array& row,
+    const array& col,
+    const array& learning_rate,
+    const array& beta2,
+    float eps1 = 1e-30f,
+    float eps2 = 1e-3f,
+    float clip_threshold = 1.0f,
+    float weight_decay = 0.0f,
+    bool scale_parameter = true,
+    StreamOrDevice s = {});
+
+/**
+ * Compute the L2 norm of the elements of all the arrays together.
+ *
+ * The squares are summed in float32, or float64 if one of the arrays is
+ * float64, in a single pass over the arrays.
+ */
+array global_norm(const std::vector<array>& arrays, StreamOrDevice s = {});
+
+} // namespace mlx::core::fast
@@ -1,5 +1,6 @@
 // Copyright © 2023 Apple Inc.
 
+#include <atomic>
 #include <numeric>
 #include <set>
 
@@ -90,7 +91,9 @@ array fft_impl(
     out_shape[ax] = inverse ? n.back() : out_shape[ax] / 2 + 1;
   }
 
-  auto in_type = real && !inverse ? float32 : complex64;
+  // Real inputs in double precision are transformed in double precision
+  auto real_type = a.dtype() == float64 ? float64 : float32;
+  auto in_type = real && !inverse ? real_type : complex64;
   auto out_type = real && inverse ? float32 : complex64;
   return array(
       out_shape,
@@ -189,4 +192,187 @@ array irfftn(const array& a, StreamOrDevice s /* = {} */) {
   return fft_impl(a, true, true, s);
 }
 
+namespace {
+
+// Sums frames of shape (..., n_frames, n_fft) where frame i starts at
+// sample i * hop into signals of (n_frames - 1) * hop + n_fft samples
+array overlap_add(const array& frames, int hop, StreamOrDevice s) {
+  int ndim = frames.ndim();
+  int n_frames = frames.shape(-2);
+  int n_fft = frames.shape(-1);
+
+  // Chunk j of hop samples of frame i covers the same samples as chunk 0 of
+  // frame i + j so the chunks are summed after shifting them by j frames
+  int n_chunks = (n_fft + hop - 1) / hop;
+  auto chunks =
+      pad(frames, {ndim - 1}, {0}, {n_chunks * hop - n_fft}, array(0), s);
+  auto shape = frames.shape();
+  shape.back() = n_chunks;
+  shape.push_back(hop);
+  chunks = reshape(chunks, shape, s);
+
+  std::vector<int> start(ndim + 1, 0);
+  auto stop = shape;
+  std::optional<array> out;
+  for (int j = 0; j < n_chunks; j++) {
+    start[ndim - 1] = j;
+    stop[ndim - 1] = j + 1;
+    auto chunk = squeeze(slice(chunks, start, stop, s), ndim - 1, s);
+    chunk = pad(chunk, {ndim - 2}, {j}, {n_chunks - 1 - j}, array(0), s);
+    out = out ? add(*out, chunk, s) : chunk;
+  }
+
+  shape = frames.shape();
+  shape.pop_back();
+  shape.back() = (n_frames + n_chunks - 1) * hop;
+  auto signal = reshape(*out, shape, s);
+  start = std::vector<int>(ndim - 1, 0);
+  stop = shape;
+  stop.back() = (n_frames - 1) * hop + n_fft;
+  return slice(signal, start, stop, s);
+}
+
+void check_window(
+    const char* name,
+    const std::optional<array>& window,
+    int n_fft) {
+  if (window && (window->ndim() != 1 || window->shape(0) != n_fft)) {
+    std::ostringstream msg;
+    msg << "[" << name << "] Expected a window of shape (" << n_fft
+        << ",) but got " << window->shape() << ".";
+    throw std::invalid_argument(msg.str());
+  }
+}
+
+std::atomic<int> fft_threads{0};
+
+} // namespace
+
+array stft(
+    const array& a,
+    int n_fft,
+    int hop_length,
+    const std::optional<array>& window /* = std::nullopt */,
+    bool center /* = true */,
+    StreamOrDevice s /* = {} */) {
+  if (a.ndim() < 1) {
+    throw std::invalid_argument(
+        "[stft] Requires array with at least one dimension.");
+  }
+  if (a.dtype() == complex64) {
+    throw std::invalid_argument("[stft] Requires a real input.");
+  }
+  if (n_fft <= 0 || hop_length <= 0) {
+    std::ostringstream msg;
+    msg << "[stft] Invalid n_fft " << n_fft << " or hop_length " << hop_length
+        << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  check_window("stft", window, n_fft);
+
+  auto in = astype(a, float32, s);
+  if (center) {
+    int axis = in.ndim() - 1;
+    in = pad(in, {axis}, {n_fft / 2}, {n_fft / 2}, array(0), s);
+  }
+  int length = in.shape(-1);
+  if (length < n_fft) {
+    std::ostringstream msg;
+    msg << "[stft] The input of length " << length << " is shorter than n_fft "
+        << n_fft << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  int n_frames = 1 + (length - n_fft) / hop_length;
+
+  // A view of the overlapping frames of every signal which the transform
+  // reads in place
+  auto shape = in.shape();
+  shape.back() = n_frames;
+  shape.push_back(n_fft);
+  std::vector<size_t> strides(shape.size(), 1);
+  strides[shape.size() - 2] = hop_length;
+  size_t stride = length;
+  for (int i = in.ndim() - 2; i >= 0; i--) {
+    strides[i] = stride;
+    stride *= in.shape(i);
+  }
+  auto frames = as_strided(in, shape, strides, 0, s);
+  if (window) {
+    frames = multiply(frames, astype(*window, float32, s), s);
+  }
+  return rfft(frames, n_fft, -1, s);
+}
+
+array istft(
+    const array& a,
+    int n_fft,
+    int hop_length,
+    const std::optional<array>& window /* = std::nullopt */,
+    bool center /* = true */,
+    std::optional<int> length /* = std::nullopt */,
+    StreamOrDevice s /* = {} */) {
+  if (a.ndim() < 2) {
+    throw std::invalid_argument(
+        "[istft] Requires array with at least two dimensions.");
+  }
+  if (n_fft <= 0 || hop_length <= 0) {
+    std::ostringstream msg;
+    msg << "[istft] Invalid n_fft " << n_fft << " or hop_length " << hop_length
+        << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  if (a.shape(-1) != n_fft / 2 + 1) {
+    std::ostringstream msg;
+    msg << "[istft] Expected " << n_fft / 2 + 1 << " frequencies for n_fft "
+        << n_fft << " but got " << a.shape(-1) << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  check_window("istft", window, n_fft);
+  if (length && *length < 0) {
+    std::ostringstream msg;
+    msg << "[istft] Invalid length " << *length << ".";
+    throw std::invalid_argument(msg.str());
+  }
+
+  int n_frames = a.shape(-2);
+  auto frames = irfft(a, n_fft, -1, s);
+  auto w = window ? astype(*window, float32, s) : ones({n_fft}, float32, s);
+  if (window) {
+    frames = multiply(frames, w, s);
+  }
+  auto signal = overlap_add(frames, hop_length, s);
+
+  // Samples which no frame covers with a nonzero window are left as is
+  auto window_frames = broadcast_to(square(w, s), {n_frames, n_fft}, s);
+  auto envelope = overlap_add(window_frames, hop_length, s);
+  auto covered = greater(envelope, array(1e-11f), s);
+  signal = divide(signal, where(covered, envelope, array(1.0f), s), s);
+
+  int total = signal.shape(-1);
+  int start = center ? n_fft / 2 : 0;
+  int end = length ? start + *length : total - start;
+  if (end > total) {
+    int axis = signal.ndim() - 1;
+    signal = pad(signal, {axis}, {0}, {end - total}, array(0), s);
+  }
+  std::vector<int> starts(signal.ndim(), 0);
+  auto stops = signal.shape();
+  starts.back() = start;
+  stops.back() = end;
+  return slice(signal, starts, stops, s);
+}
+
+void set_num_threads(int n) {
+  if (n < 0) {
+    std::ostringstream msg;
+    msg << "[fft] Cannot use a negative number of threads " << n << ".";
+    throw std::invalid_argument(msg.str());
+  }
+  fft_threads = n;
+}
+
+int num_threads() {
+  return fft_threads;
+}
+
 } // namespace mlx::core::fft
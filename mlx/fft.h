@@ -2,6 +2,7 @@
 
 #pragma once
 
+#include <optional>
 #include <variant>
 
 #include "array.h"
@@ -148,4 +149,44 @@ inline array irfft2(
   return irfftn(a, axes, s);
 }
 
+/**
+ * Compute the short-time Fourier Transform of the signals along the last
+ * axis of `a`. Frames of `n_fft` samples start every `hop_length` samples
+ * and are multiplied by `window` if given. With `center` the signals are
+ * padded with `n_fft / 2` zeros on both sides so that frame `t` is centered
+ * on sample `t * hop_length`. The result has shape
+ * `(..., n_frames, n_fft / 2 + 1)`.
+ **/
+array stft(
+    const array& a,
+    int n_fft,
+    int hop_length,
+    const std::optional<array>& window = std::nullopt,
+    bool center = true,
+    StreamOrDevice s = {});
+
+/**
+ * Compute the inverse of `stft` by overlap-adding the inverse transforms of
+ * the frames and normalizing by the overlap-added squared window. The
+ * output is trimmed or padded with zeros to `length` samples if given.
+ **/
+array istft(
+    const array& a,
+    int n_fft,
+    int hop_length,
+    const std::optional<array>& window = std::nullopt,
+    bool center = true,
+    std::optional<int> length = std::nullopt,
+    StreamOrDevice s = {});
+
+/**
+ * Set the maximum number of threads a CPU FFT may use. The default of 0
+ * uses every hardware thread. The setting is read when a transform is
+ * evaluated, not when it is added to the graph.
+ **/
+void set_num_threads(int n);
+
+/** The maximum number of threads a CPU FFT may use, 0 for all of them. */
+int num_threads();
+
 } // namespace mlx::core::fft
@@ -5,6 +5,7 @@
 #include "mlx/array.h"
 #include "mlx/backend/metal/metal.h"
 #include "mlx/device.h"
+#include "mlx/fast.h"
 #include "mlx/fft.h"
 #include "mlx/ops.h"
 #include "mlx/random.h"
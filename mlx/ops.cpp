@@ -846,9 +846,12 @@ array where(
     const array& x,
     const array& y,
     StreamOrDevice s /* = {} */) {
-  // TODO, fix this to handle the NaN case when x has infs
-  auto mask = astype(condition, bool_, s);
-  return add(multiply(x, mask, s), multiply(y, logical_not(mask, s), s), s);
+  auto dtype = promote_types(x.dtype(), y.dtype());
+  auto inputs = broadcast_arrays(
+      {astype(condition, bool_, s), astype(x, dtype, s), astype(y, dtype, s)},
+      s);
+  auto shape = inputs[0].shape();
+  return array(shape, dtype, std::make_unique<Select>(to_stream(s)), inputs);
 }
 
 array allclose(
@@ -1318,27 +1321,54 @@ array topk(const array& a, int k, StreamOrDevice s /* = {}*/) {
 
 /** Returns topk elements of the array along a given axis. */
 array topk(const array& a, int k, int axis, StreamOrDevice s /* = {}*/) {
+  int axis_ = axis < 0 ? axis + a.ndim() : axis;
+  return take_along_axis(a, argtopk(a, k, axis, s), axis_, s);
+}
+
+/** Returns indices of the topk elements of the flattened array. */
+array argtopk(const array& a, int k, StreamOrDevice s /* = {}*/) {
+  int size = a.size();
+  return argtopk(reshape(a, {size}, s), k, 0, s);
+}
+
+/** Returns indices of the topk elements of the array along a given axis. */
+array argtopk(const array& a, int k, int axis, StreamOrDevice s /* = {}*/) {
   // Check for valid axis
   int axis_ = axis < 0 ? axis + a.ndim() : axis;
-  int kth_ = k < 0 ? k + a.shape(axis) : k;
   if (axis_ < 0 || axis_ >= static_cast<int>(a.ndim())) {
     std::ostringstream msg;
     msg << "[topk] Received invalid axis " << axis << " for array with "
         << a.ndim() << " dimensions.";
     throw std::invalid_argument(msg.str());
   }
-  if (kth_ < 0 || kth_ >= a.shape(axis_)) {
+  int n = a.shape(axis_);
+  if (k < 0 || k > n) {
     std::ostringstream msg;
-    msg << "[topk] Received invalid k " << k << "along axis " << axis
+    msg << "[topk] Received invalid k " << k << " along axis " << axis
         << " for array with shape: " << a.shape();
     throw std::invalid_argument(msg.str());
   }
 
-  array a_partitioned = partition(a, kth_, axis_, s);
+  auto out_shape = a.shape();
+  out_shape[axis_] = k;
+  auto stream = to_stream(s);
+  if (stream.device == Device::cpu) {
+    return array(
+        out_shape, uint32, std::make_unique<ArgTopK>(stream, k, axis_), {a});
+  }
+  if (k == 0) {
+    return zeros(out_shape, uint32, s);
+  }
+
+  // Select the k largest with a partition and sort only those
   std::vector<int> slice_starts(a.ndim(), 0);
   std::vector<int> slice_ends = a.shape();
-  slice_starts[axis_] = kth_;
-  return slice(a_partitioned, slice_starts, slice_ends, s);
+  slice_starts[axis_] = n - k;
+  auto indices =
+      slice(argpartition(a, n - k, axis_, s), slice_starts, slice_ends, s);
+  auto order = argsort(take_along_axis(a, indices, axis_, s), axis_, s);
+  order = take(order, arange(k - 1, -1, -1, s), axis_, s);
+  return take_along_axis(indices, order, axis_, s);
 }
 
 array logsumexp(const array& a, bool keepdims, StreamOrDevice s /* = {}*/) {
@@ -320,7 +320,10 @@ array_equal(const array& a, const array& b, StreamOrDevice s = {}) {
   return array_equal(a, b, false, s);
 }
 
-/** Select from x or y depending on condition. */
+/**
+ * Select from x or y depending on condition. The elements that are not
+ * selected do not affect the result, even if they are inf or NaN.
+ */
 array where(
     const array& condition,
     const array& x,
@@ -573,12 +576,30 @@ array argpartition(const array& a, int kth, StreamOrDevice s = {});
  **/
 array argpartition(const array& a, int kth, int axis, StreamOrDevice s = {});
 
-/** Returns topk elements of the flattened array. */
+/**
+ * Returns the k largest elements of the flattened array
+ * in descending order.
+ **/
 array topk(const array& a, int k, StreamOrDevice s = {});
 
-/** Returns topk elements of the array along a given axis. */
+/**
+ * Returns the k largest elements of the array along a given axis
+ * in descending order.
+ **/
 array topk(const array& a, int k, int axis, StreamOrDevice s = {});
 
+/**
+ * Returns indices of the k largest elements of the flattened array
+ * in descending order of the elements.
+ **/
+array argtopk(const array& a, int k, StreamOrDevice s = {});
+
+/**
+ * Returns indices of the k largest elements of the array along a given
+ * axis in descending order of the elements.
+ **/
+array argtopk(const array& a, int k, int axis, StreamOrDevice s = {});
+
 /** The logsumexp of all elements of the array. */
 array logsumexp(const array& a, bool keepdims, StreamOrDevice s = {});
 inline array logsumexp(const array& a, StreamOrDevice s = {}) {
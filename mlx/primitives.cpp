@@ -11,6 +11,7 @@
 #include "mlx/fft.h"
 #include "mlx/ops.h"
 #include "mlx/primitives.h"
+#include "mlx/transforms.h"
 #include "mlx/utils.h"
 
 namespace mlx::core {
@@ -49,6 +50,32 @@ std::tuple<array, array, int> vmap_binary_op(
   return {a, b, to_ax};
 }
 
+array move_axis(const array& a, int from, int to, const Stream& stream) {
+  std::vector<int> reorder(a.ndim());
+  std::iota(reorder.begin(), reorder.end(), 0);
+  reorder.erase(reorder.begin() + from);
+  reorder.insert(reorder.begin() + to, from);
+  return transpose(a, reorder, stream);
+}
+
+// The samples of uniform(0, 1) drawn by RandomSample for the given key
+// before they are scaled and shifted in the type out_type
+array unit_uniform(
+    const array& key,
+    const std::vector<int>& shape,
+    Dtype dtype,
+    Dtype out_type,
+    const Stream& stream) {
+  auto zero = broadcast_to(array(0.0f, out_type), shape, stream);
+  auto one = broadcast_to(array(1.0f, out_type), shape, stream);
+  return array(
+      shape,
+      out_type,
+      std::make_unique<RandomSample>(
+          stream, RandomSample::Uniform, shape, dtype),
+      {key, zero, one});
+}
+
 } // namespace
 
 array Primitive::jvp(
@@ -95,6 +122,12 @@ std::pair<array, int> Abs::vmap(
   return {abs(inputs[0], stream()), axes[0]};
 }
 
+bool AdafactorStep::is_equivalent(const Primitive& other) const {
+  const AdafactorStep& a_other = static_cast<const AdafactorStep&>(other);
+  return output_ == a_other.output_ &&
+      hyperparameters_ == a_other.hyperparameters_;
+}
+
 array Add::jvp(
     const std::vector<array>& primals,
     const std::vector<array>& tangents,
@@ -319,6 +352,21 @@ bool ArgSort::is_equivalent(const Primitive& other) const {
   return axis_ == r_other.axis_;
 }
 
+std::pair<array, int> ArgTopK::vmap(
+    const std::vector<array>& inputs,
+    const std::vector<int>& axes) {
+  assert(inputs.size() == 1);
+  assert(axes.size() == 1);
+
+  return {
+      argtopk(inputs[0], k_, axis_ + (axes[0] <= axis_), stream()), axes[0]};
+}
+
+bool ArgTopK::is_equivalent(const Primitive& other) const {
+  const ArgTopK& r_other = static_cast<const ArgTopK&>(other);
+  return axis_ == r_other.axis_ && k_ == r_other.k_;
+}
+
 std::vector<array> AsType::vjp(
     const std::vector<array>& primals,
     const array& cotan,
@@ -441,6 +489,65 @@ bool Broadcast::is_equivalent(const Primitive& other) const {
   return shape_ == b_other.shape_;
 }
 
+std::vector<array> Checkpoint::vjp(
+    const std::vector<array>& primals,
+    const array& cotan,
+    const std::vector<int>& argnums) {
+  // Recompute the function only once the cotangent is available, otherwise
+  // the recomputed intermediates could be evaluated long before they are
+  // needed and the memory would not be saved.
+  std::vector<array> inputs;
+  for (int i = 0; i < primals.size() - 1; ++i) {
+    auto& p = primals[i];
+    inputs.push_back(array(
+        p.shape(), p.dtype(), std::make_unique<Depends>(stream()), {p, cotan}));
+  }
+
+  auto fun = [this](const std::vector<array>& inputs) {
+    return std::vector<array>{fun_(inputs)[output_]};
+  };
+  auto vjps = mlx::core::vjp(fun, inputs, {cotan}).second;
+
+  std::vector<array> grads;
+  for (auto i : argnums) {
+    if (i < inputs.size()) {
+      grads.push_back(vjps[i]);
+    } else {
+      grads.push_back(zeros_like(primals[i], stream()));
+    }
+  }
+  return grads;
+}
+
+array Checkpoint::jvp(
+    const std::vector<array>& primals,
+    const std::vector<array>& tangents,
+    const std::vector<int>& argnums) {
+  std::vector<array> inputs(primals.begin(), primals.end() - 1);
+  std::vector<array> tans;
+  for (auto& in : inputs) {
+    tans.push_back(zeros_like(in, stream()));
+  }
+  for (int i = 0; i < argnums.size(); ++i) {
+    if (argnums[i] < inputs.size()) {
+      tans[argnums[i]] = tangents[i];
+    }
+  }
+
+  auto fun = [this](const std::vector<array>& inputs) {
+    return std::vector<array>{fun_(inputs)[output_]};
+  };
+  return mlx::core::jvp(fun, inputs, tans).second[0];
+}
+
+std::pair<array, int> Checkpoint::vmap(
+    const std::vector<array>& inputs,
+    const std::vector<int>& axes) {
+  // The output of the function is already vectorized, the vectorized
+  // function is not checkpointed
+  return {inputs.back(), axes.back()};
+}
+
 std::vector<array> Concatenate::vjp(
     const std::vector<array>& primals,
     const array& cotan,
@@ -687,6 +794,39 @@ std::pair<array, int> Cosh::vmap(
   return {cosh(inputs[0], stream()), axes[0]};
 }
 
+std::vector<array> Depends::vjp(
+    const std::vector<array>& primals,
+    const array& cotan,
+    const std::vector<int>& argnums) {
+  std::vector<array> vjps;
+  for (auto i : argnums) {
+    if (i == 0) {
+      vjps.push_back(cotan);
+    } else {
+      vjps.push_back(zeros_like(primals[i], stream()));
+    }
+  }
+  return vjps;
+}
+
+array Depends::jvp(
+    const std::vector<array>& primals,
+    const std::vector<array>& tangents,
+    const std::vector<int>& argnums) {
+  for (int i = 0; i < argnums.size(); ++i) {
+    if (argnums[i] == 0) {
+      return tangents[i];
+    }
+  }
+  return zeros_like(primals[0], stream());
+}
+
+std::pair<array, int> Depends::vmap(
+    const std::vector<array>& inputs,
+    const std::vector<int>& axes) {
+  return {inputs[0], axes[0]};
+}
+
 std::vector<array> Divide::vjp(
     const std::vector<array>& primals,
     const array& cotan,
@@ -933,17 +1073,22 @@ std::vector<array> FFT::vjp(
   auto& in = primals[0];
   std::vector<int> axes(axes_.begin(), axes_.end());
   if (real_ && inverse_) {
-    auto out = fft::fftn(cotan, axes, stream());
+    // The output is real so the conjugate of its transform is its inverse
+    // transform. The frequencies strictly between 0 and n / 2 also stand for
+    // their conjugates so their gradients count twice.
+    int n = cotan.shape(axes_.back());
+    auto out = fft::ifftn(cotan, axes, stream());
     auto start = std::vector<int>(out.ndim(), 0);
     auto stop = in.shape();
     out = slice(out, start, stop, stream());
     auto mask_shape = out.shape();
-    mask_shape[axes_.back()] -= 2;
+    mask_shape[axes_.back()] -= (n % 2 == 0) ? 2 : 1;
     auto mask = full(mask_shape, 2.0f, stream());
     auto pad_shape = out.shape();
     pad_shape[axes_.back()] = 1;
     auto pad = full(pad_shape, 1.0f, stream());
-    mask = concatenate({pad, mask, pad}, axes_.back(), stream());
+    mask = (n % 2 == 0) ? concatenate({pad, mask, pad}, axes_.back(), stream())
+                        : concatenate({pad, mask}, axes_.back(), stream());
     return {multiply(mask, out, stream())};
   } else if (real_) {
     std::vector<int> n;
@@ -1464,6 +1609,97 @@ array NotEqual::jvp(
   return zeros(shape, bool_, stream());
 }
 
+std::vector<array> OptimizerStep::stacked_fallback(
+    const std::vector<array>& inputs) {
+  std::vector<array> outputs;
+  for (auto& out : fallback_(inputs)) {
+    outputs.push_back(expand_dims(out, 0, stream()));
+  }
+  return {concatenate(outputs, 0, stream())};
+}
+
+std::vector<array> OptimizerStep::vjp(
+    const std::vector<array>& primals,
+    const array& cotan,
+    const std::vector<int>& argnums) {
+  auto fun = [this](const std::vector<array>& inputs) {
+    return stacked_fallback(inputs);
+  };
+  auto vjps = mlx::core::vjp(fun, primals, {cotan}).second;
+
+  std::vector<array> grads;
+  for (auto i : argnums) {
+    grads.push_back(vjps[i]);
+  }
+  return grads;
+}
+
+array OptimizerStep::jvp(
+    const std::vector<array>& primals,
+    const std::vector<array>& tangents,
+    const std::vector<int>& argnums) {
+  std::vector<array> tans;
+  for (auto& p : primals) {
+    tans.push_back(zeros_like(p, stream()));
+  }
+  for (int i = 0; i < argnums.size(); ++i) {
+    tans[argnums[i]] = tangents[i];
+  }
+
+  auto fun = [this](const std::vector<array>& inputs) {
+    return stacked_fallback(inputs);
+  };
+  return mlx::core::jvp(fun, primals, tans).second[0];
+}
+
+std::pair<array, int> OptimizerStep::vmap(
+    const std::vector<array>& inputs,
+    const std::vector<int>& axes) {
+  // The learning rate is shared by every update
+  if (axes.back() >= 0) {
+    throw std::invalid_argument(
+        "[OptimizerStep] Cannot vmap over the learning rate.");
+  }
+
+  // Move the vmapped axes to the front and broadcast the unbatched inputs
+  int batch = 0;
+  for (int i = 0; i < inputs.size() - 1; ++i) {
+    if (axes[i] >= 0) {
+      batch = inputs[i].shape(axes[i]);
+    }
+  }
+  std::vector<array> batched;
+  for (int i = 0; i < inputs.size() - 1; ++i) {
+    if (axes[i] >= 0) {
+      batched.push_back(move_axis(inputs[i], axes[i], 0, stream()));
+    } else {
+      auto shape = inputs[i].shape();
+      shape.insert(shape.begin(), batch);
+      batched.push_back(broadcast_to(inputs[i], shape, stream()));
+    }
+  }
+
+  batched.push_back(inputs.back());
+
+  // The output stacks the updates along the first axis so the batch is the
+  // second one
+  auto out_shape = batched[0].shape();
+  out_shape.insert(out_shape.begin(), inputs.size() - 2);
+  auto out = array(
+      out_shape,
+      batched[0].dtype(),
+      std::make_unique<OptimizerStep>(
+          stream(), optimizer_, hyperparameters_, fallback_),
+      batched);
+  return {out, 1};
+}
+
+bool OptimizerStep::is_equivalent(const Primitive& other) const {
+  const OptimizerStep& o_other = static_cast<const OptimizerStep&>(other);
+  return optimizer_ == o_other.optimizer_ &&
+      hyperparameters_ == o_other.hyperparameters_;
+}
+
 std::vector<array> Pad::vjp(
     const std::vector<array>& primals,
     const array& cotan,
@@ -1473,9 +1709,11 @@ std::vector<array> Pad::vjp(
   std::vector<int> start(cotan.ndim(), 0);
   std::vector<int> stop = cotan.shape();
 
-  for (auto i : axes_) {
-    start[i] = low_pad_size_[i];
-    stop[i] -= high_pad_size_[i];
+  // The pad sizes are given in the order of axes_
+  for (int i = 0; i < axes_.size(); ++i) {
+    int ax = axes_[i] < 0 ? cotan.ndim() + axes_[i] : axes_[i];
+    start[ax] = low_pad_size_[i];
+    stop[ax] -= high_pad_size_[i];
   }
 
   auto out = slice(cotan, start, stop, stream());
@@ -1586,6 +1824,14 @@ std::pair<array, int> Power::vmap(
   return {power(a, b, stream()), to_ax};
 }
 
+bool QuantizedAdamStep::is_equivalent(const Primitive& other) const {
+  const QuantizedAdamStep& q_other =
+      static_cast<const QuantizedAdamStep&>(other);
+  return output_ == q_other.output_ &&
+      hyperparameters_ == q_other.hyperparameters_ &&
+      block_size_ == q_other.block_size_;
+}
+
 std::pair<array, int> RandomBits::vmap(
     const std::vector<array>& inputs,
     const std::vector<int>& axes) {
@@ -1630,6 +1876,107 @@ bool RandomBits::is_equivalent(const Primitive& other) const {
   return shape_ == r_other.shape_;
 }
 
+std::vector<array> RandomSample::vjp(
+    const std::vector<array>& primals,
+    const array& cotan,
+    const std::vector<int>& argnums) {
+  // Only the bounds of the uniform distribution have a non-zero gradient
+  std::vector<array> vjps;
+  for (auto arg : argnums) {
+    if (distribution_ == Uniform && arg == 1) {
+      vjps.push_back(cotan);
+    } else if (distribution_ == Uniform && arg == 2) {
+      auto u = unit_uniform(
+          primals[0], shape_, dtype_, primals[2].dtype(), stream());
+      vjps.push_back(multiply(cotan, u, stream()));
+    } else {
+      vjps.push_back(zeros_like(primals[arg], stream()));
+    }
+  }
+  return vjps;
+}
+
+array RandomSample::jvp(
+    const std::vector<array>& primals,
+    const std::vector<array>& tangents,
+    const std::vector<int>& argnums) {
+  if (distribution_ != Uniform) {
+    auto out_type = distribution_ == Normal ? dtype_ : bool_;
+    return zeros(shape_, out_type, stream());
+  }
+  auto out_type = primals[1].dtype();
+  auto jvp = zeros(shape_, out_type, stream());
+  for (int i = 0; i < argnums.size(); ++i) {
+    if (argnums[i] == 1) {
+      jvp = add(jvp, tangents[i], stream());
+    } else if (argnums[i] == 2) {
+      auto u = unit_uniform(primals[0], shape_, dtype_, out_type, stream());
+      jvp = add(jvp, multiply(tangents[i], u, stream()), stream());
+    }
+  }
+  return jvp;
+}
+
+std::pair<array, int> RandomSample::vmap(
+    const std::vector<array>& inputs,
+    const std::vector<int>& axes) {
+  auto out_type = distribution_ == Uniform
+      ? inputs[1].dtype()
+      : (distribution_ == Normal ? dtype_ : bool_);
+
+  // With a single key every element of the batch uses the same samples so
+  // they are drawn once and combined with the batched parameters
+  if (axes[0] < 0) {
+    std::vector<array> params;
+    for (int i = 1; i < inputs.size(); ++i) {
+      auto x = inputs[i];
+      params.push_back(axes[i] < 0 ? x : move_axis(x, axes[i], 0, stream()));
+    }
+    auto u = unit_uniform(inputs[0], shape_, dtype_, dtype_, stream());
+    if (distribution_ == Bernoulli) {
+      return {less(u, params[0], stream()), 0};
+    }
+    u = astype(u, out_type, stream());
+    u = multiply(params[1], u, stream());
+    return {add(u, params[0], stream()), 0};
+  }
+
+  // The last dimension of the key is always a key pair
+  auto key = inputs[0];
+  auto kax = axes[0];
+  if (kax == key.ndim() - 1) {
+    std::vector<int> reorder(key.ndim());
+    std::iota(reorder.begin(), reorder.end(), 0);
+    std::swap(reorder[kax], reorder[kax - 1]);
+    key = transpose(key, reorder, stream());
+    kax--;
+  }
+
+  auto shape = shape_;
+  shape.insert(shape.begin() + kax, key.shape()[kax]);
+
+  // Give the parameters the batched output shape
+  std::vector<array> batched_inputs = {key};
+  for (int i = 1; i < inputs.size(); ++i) {
+    auto x = axes[i] < 0 ? expand_dims(inputs[i], kax, stream())
+                         : move_axis(inputs[i], axes[i], kax, stream());
+    batched_inputs.push_back(broadcast_to(x, shape, stream()));
+  }
+
+  auto out = array(
+      shape,
+      out_type,
+      std::make_unique<RandomSample>(stream(), distribution_, shape, dtype_),
+      batched_inputs);
+  return {out, kax};
+}
+
+bool RandomSample::is_equivalent(const Primitive& other) const {
+  const RandomSample& r_other = static_cast<const RandomSample&>(other);
+  return distribution_ == r_other.distribution_ && shape_ == r_other.shape_ &&
+      dtype_ == r_other.dtype_;
+}
+
 std::pair<array, int> Reshape::vmap(
     const std::vector<array>& inputs,
     const std::vector<int>& axes) {
@@ -1849,6 +2196,69 @@ bool Scatter::is_equivalent(const Primitive& other) const {
   return reduce_type_ == s_other.reduce_type_ && axes_ == s_other.axes_;
 }
 
+std::vector<array> Select::vjp(
+    const std::vector<array>& primals,
+    const array& cotan,
+    const std::vector<int>& argnums) {
+  auto& condition = primals[0];
+  std::vector<array> vjps;
+  for (auto arg : argnums) {
+    if (arg == 0) {
+      vjps.push_back(zeros_like(condition, stream()));
+    } else {
+      auto zeros = zeros_like(cotan, stream());
+      vjps.push_back(
+          (arg == 1) ? where(condition, cotan, zeros, stream())
+                     : where(condition, zeros, cotan, stream()));
+    }
+  }
+  return vjps;
+}
+
+array Select::jvp(
+    const std::vector<array>& primals,
+    const std::vector<array>& tangents,
+    const std::vector<int>& argnums) {
+  auto x = zeros_like(primals[1], stream());
+  auto y = zeros_like(primals[2], stream());
+  for (int i = 0; i < argnums.size(); ++i) {
+    if (argnums[i] == 1) {
+      x = tangents[i];
+    } else if (argnums[i] == 2) {
+      y = tangents[i];
+    }
+  }
+  return where(primals[0], x, y, stream());
+}
+
+std::pair<array, int> Select::vmap(
+    const std::vector<array>& inputs,
+    const std::vector<int>& axes) {
+  // The rank of the unbatched inputs once broadcasted together
+  int ndim = 0;
+  for (int i = 0; i < inputs.size(); ++i) {
+    ndim = std::max(ndim, static_cast<int>(inputs[i].ndim()) - (axes[i] >= 0));
+  }
+
+  // Move the batch axes to the front and align the rest of the dimensions
+  std::vector<array> batched;
+  for (int i = 0; i < inputs.size(); ++i) {
+    auto in = inputs[i];
+    int in_ndim = in.ndim();
+    if (axes[i] >= 0) {
+      in = move_axis(in, axes[i], 0, stream());
+    }
+    auto shape = in.shape();
+    if (axes[i] >= 0) {
+      shape.insert(shape.begin() + 1, ndim + 1 - in_ndim, 1);
+    } else {
+      shape.insert(shape.begin(), ndim + 1 - in_ndim, 1);
+    }
+    batched.push_back(reshape(in, shape, stream()));
+  }
+  return {where(batched[0], batched[1], batched[2], stream()), 0};
+}
+
 std::vector<array> Sigmoid::vjp(
     const std::vector<array>& primals,
     const array& cotan,
@@ -1951,8 +2361,18 @@ std::pair<array, int> Sinh::vmap(
 std::pair<array, int> Slice::vmap(
     const std::vector<array>& inputs,
     const std::vector<int>& axes) {
-  // TODO implement
-  return {array(1.0f), axes[0]};
+  // Take the whole vmapped axis and slice the others as before
+  auto& in = inputs[0];
+  auto ax = axes[0];
+  auto start = start_indices_;
+  auto stop = end_indices_;
+  auto strides = strides_;
+  if (ax >= 0) {
+    start.insert(start.begin() + ax, 0);
+    stop.insert(stop.begin() + ax, in.shape(ax));
+    strides.insert(strides.begin() + ax, 1);
+  }
+  return {slice(in, start, stop, strides, stream()), ax};
 }
 
 std::vector<array> Slice::vjp(
@@ -119,6 +119,42 @@ class Abs : public Primitive {
   void eval(const std::vector<array>& inputs, array& out);
 };
 
+class AdafactorStep : public Primitive {
+ public:
+  // Adafactor keeps for a parameter of shape (..., r, c) the running means
+  // R of the squared gradient over its rows and C over its columns. The
+  // output selects the stage of the update:
+  //   SecondMoment: the inputs are the gradient, R, C and the scalar decay
+  //                 beta2 and the output concatenates the updated R and C
+  //                 along the last axis. The hyperparameters are {eps1}.
+  //   Parameter:    the inputs are the parameter, the gradient, the output
+  //                 of the SecondMoment stage and the scalar learning rate.
+  //                 The hyperparameters are {eps2, clip_threshold,
+  //                 weight_decay, scale_parameter}.
+  enum Output { SecondMoment, Parameter };
+
+  explicit AdafactorStep(
+      Stream stream,
+      Output output,
+      const std::vector<float>& hyperparameters)
+      : Primitive(stream), output_(output), hyperparameters_(hyperparameters){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  void print(std::ostream& os) override {
+    os << "AdafactorStep"
+       << (output_ == SecondMoment ? "SecondMoment" : "Parameter");
+  }
+  bool is_equivalent(const Primitive& other) const override;
+
+ private:
+  Output output_;
+  std::vector<float> hyperparameters_;
+
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class Add : public Primitive {
  public:
   explicit Add(Stream stream) : Primitive(stream){};
@@ -336,6 +372,28 @@ class ArgSort : public Primitive {
   void eval(const std::vector<array>& inputs, array& out);
 };
 
+class ArgTopK : public Primitive {
+ public:
+  explicit ArgTopK(Stream stream, int k, int axis)
+      : Primitive(stream), k_(k), axis_(axis){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  std::pair<array, int> vmap(
+      const std::vector<array>& inputs,
+      const std::vector<int>& axes) override;
+
+  DEFINE_PRINT(ArgTopK)
+  bool is_equivalent(const Primitive& other) const override;
+
+ private:
+  int k_;
+  int axis_;
+
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class AsType : public Primitive {
  public:
   explicit AsType(Stream stream, Dtype dtype)
@@ -404,6 +462,35 @@ class Broadcast : public Primitive {
   void eval(const std::vector<array>& inputs, array& out);
 };
 
+class Checkpoint : public Primitive {
+ public:
+  // The inputs of the primitive are the inputs of the function followed by
+  // the output of the function computed in the forward pass. Its vjp
+  // recomputes the function from the inputs instead of reusing the
+  // intermediates of the forward pass.
+  explicit Checkpoint(
+      Stream stream,
+      std::function<std::vector<array>(const std::vector<array>&)> fun,
+      int output)
+      : Primitive(stream), fun_(std::move(fun)), output_(output){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  std::pair<array, int> vmap(
+      const std::vector<array>& inputs,
+      const std::vector<int>& axes) override;
+
+  DEFINE_GRADS()
+  DEFINE_PRINT(Checkpoint)
+
+ private:
+  std::function<std::vector<array>(const std::vector<array>&)> fun_;
+  int output_;
+
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class Concatenate : public Primitive {
  public:
   explicit Concatenate(Stream stream, int axis)
@@ -517,6 +604,26 @@ class Cosh : public Primitive {
   void eval(const std::vector<array>& inputs, array& out);
 };
 
+class Depends : public Primitive {
+ public:
+  // The output is the first input. The remaining inputs are only there to be
+  // evaluated before the output is used.
+  explicit Depends(Stream stream) : Primitive(stream){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  std::pair<array, int> vmap(
+      const std::vector<array>& inputs,
+      const std::vector<int>& axes) override;
+
+  DEFINE_GRADS()
+  DEFINE_PRINT(Depends)
+
+ private:
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class Divide : public Primitive {
  public:
   explicit Divide(Stream stream) : Primitive(stream){};
@@ -706,6 +813,21 @@ class Gather : public Primitive {
   std::vector<int> slice_sizes_;
 };
 
+class GlobalNorm : public Primitive {
+ public:
+  // The output is the L2 norm of the elements of all the inputs
+  explicit GlobalNorm(Stream stream) : Primitive(stream){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  DEFINE_PRINT(GlobalNorm)
+  DEFINE_DEFAULT_IS_EQUIVALENT()
+
+ private:
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class Greater : public Primitive {
  public:
   explicit Greater(Stream stream) : Primitive(stream){};
@@ -999,6 +1121,66 @@ class NotEqual : public Primitive {
   void eval(const std::vector<array>& inputs, array& out);
 };
 
+class OptimizerStep : public Primitive {
+ public:
+  // The hyperparameters of each optimizer are
+  //   SGD:     momentum, weight_decay, dampening, nesterov
+  //   Adam:    beta1, beta2, eps, weight_decay
+  //   Adagrad: eps
+  // and the inputs are the parameter, the gradient, the state and the
+  // scalar learning rate. The learning rate is an input so that schedules
+  // do not create a new primitive at every step. The output stacks the
+  // updated parameter and state along a new first axis. The fallback
+  // computes the updated parameter and state from the inputs with
+  // composable ops and is used for the gradients.
+  enum Optimizer { SGD, Adam, Adagrad };
+
+  explicit OptimizerStep(
+      Stream stream,
+      Optimizer optimizer,
+      const std::vector<float>& hyperparameters,
+      std::function<std::vector<array>(const std::vector<array>&)> fallback)
+      : Primitive(stream),
+        optimizer_(optimizer),
+        hyperparameters_(hyperparameters),
+        fallback_(std::move(fallback)){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  std::pair<array, int> vmap(
+      const std::vector<array>& inputs,
+      const std::vector<int>& axes) override;
+
+  DEFINE_GRADS()
+
+  void print(std::ostream& os) override {
+    switch (optimizer_) {
+      case SGD:
+        os << "SGD";
+        break;
+      case Adam:
+        os << "Adam";
+        break;
+      case Adagrad:
+        os << "Adagrad";
+        break;
+    }
+    os << "Step";
+  }
+  bool is_equivalent(const Primitive& other) const override;
+
+ private:
+  Optimizer optimizer_;
+  std::vector<float> hyperparameters_;
+  std::function<std::vector<array>(const std::vector<array>&)> fallback_;
+
+  // The fallback with its outputs stacked like the output of the primitive
+  std::vector<array> stacked_fallback(const std::vector<array>& inputs);
+
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class Pad : public Primitive {
  public:
   explicit Pad(
@@ -1072,6 +1254,46 @@ class Power : public Primitive {
   void eval(const std::vector<array>& inputs, array& out);
 };
 
+class QuantizedAdamStep : public Primitive {
+ public:
+  // Adam with the moments m and sqrt(v) quantized in blocks of block_size
+  // elements. The state is a uint8 array with one row per block holding the
+  // float32 absolute maxima of m and sqrt(v) in the block followed by their
+  // 8-bit codes. The output selects the stage of the update:
+  //   State:     the inputs are the gradient and, unless it is the first
+  //              step, the state and the output is the updated state. The
+  //              hyperparameters are {beta1, beta2}.
+  //   Parameter: the inputs are the parameter, the updated state and the
+  //              scalar learning rate. The hyperparameters are
+  //              {eps, weight_decay}.
+  enum Output { State, Parameter };
+
+  explicit QuantizedAdamStep(
+      Stream stream,
+      Output output,
+      const std::vector<float>& hyperparameters,
+      int block_size)
+      : Primitive(stream),
+        output_(output),
+        hyperparameters_(hyperparameters),
+        block_size_(block_size){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  void print(std::ostream& os) override {
+    os << "QuantizedAdamStep" << (output_ == State ? "State" : "Parameter");
+  }
+  bool is_equivalent(const Primitive& other) const override;
+
+ private:
+  Output output_;
+  std::vector<float> hyperparameters_;
+  int block_size_;
+
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class RandomBits : public Primitive {
  public:
   explicit RandomBits(Stream stream, const std::vector<int>& shape, int width)
@@ -1094,6 +1316,52 @@ class RandomBits : public Primitive {
   void eval(const std::vector<array>& inputs, array& out);
 };
 
+class RandomSample : public Primitive {
+ public:
+  enum Distribution { Uniform, Normal, Bernoulli };
+
+  explicit RandomSample(
+      Stream stream,
+      Distribution distribution,
+      const std::vector<int>& shape,
+      Dtype dtype)
+      : Primitive(stream),
+        distribution_(distribution),
+        shape_(shape),
+        dtype_(dtype){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  std::pair<array, int> vmap(
+      const std::vector<array>& inputs,
+      const std::vector<int>& axes) override;
+
+  DEFINE_GRADS()
+  void print(std::ostream& os) override {
+    os << "Random";
+    switch (distribution_) {
+      case Uniform:
+        os << "Uniform";
+        break;
+      case Normal:
+        os << "Normal";
+        break;
+      case Bernoulli:
+        os << "Bernoulli";
+        break;
+    }
+  }
+  bool is_equivalent(const Primitive& other) const override;
+
+ private:
+  Distribution distribution_;
+  std::vector<int> shape_;
+  Dtype dtype_;
+
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class Reshape : public Primitive {
  public:
   explicit Reshape(Stream stream, const std::vector<int>& shape)
@@ -1243,6 +1511,25 @@ class Scatter : public Primitive {
   std::vector<int> axes_;
 };
 
+class Select : public Primitive {
+ public:
+  explicit Select(Stream stream) : Primitive(stream){};
+
+  void eval_cpu(const std::vector<array>& inputs, array& out) override;
+  void eval_gpu(const std::vector<array>& inputs, array& out) override;
+
+  std::pair<array, int> vmap(
+      const std::vector<array>& inputs,
+      const std::vector<int>& axes) override;
+
+  DEFINE_GRADS()
+  DEFINE_PRINT(Select)
+  DEFINE_DEFAULT_IS_EQUIVALENT()
+
+ private:
+  void eval(const std::vector<array>& inputs, array& out);
+};
+
 class Sigmoid : public Primitive {
  public:
   explicit Sigmoid(Stream stream) : Primitive(stream){};
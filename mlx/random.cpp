@@ -32,11 +32,9 @@ array key(uint64_t seed) {
   return array({k1, k2});
 }
 
-array bits(
-    const std::vector<int>& shape,
-    int width /* 4 */,
-    const std::optional<array>& key_ /*= nullopt */,
-    StreamOrDevice s /* = {} */) {
+// Returns the given key or the next key of the global sequence after
+// checking its type and shape
+array get_key(const std::optional<array>& key_) {
   auto key = key_ ? *key_ : KeySequence::default_().next();
   if (key.dtype() != uint32) {
     std::ostringstream msg;
@@ -48,7 +46,22 @@ array bits(
     msg << "Expected key shape (2) but received " << key.shape() << ".";
     throw std::invalid_argument(msg.str());
   }
+  return key;
+}
+
+// On the CPU the distributions below are sampled by a single RandomSample
+// primitive instead of being composed from the random bits
+bool use_random_sample(const Stream& stream, Dtype dtype) {
+  return stream.device == Device::cpu &&
+      (dtype == float32 || dtype == float16 || dtype == bfloat16);
+}
 
+array bits(
+    const std::vector<int>& shape,
+    int width /* 4 */,
+    const std::optional<array>& key_ /*= nullopt */,
+    StreamOrDevice s /* = {} */) {
+  auto key = get_key(key_);
   auto get_dtype = [width]() {
     switch (width) {
       case 4:
@@ -133,6 +146,17 @@ array uniform(
   };
 
   auto [upper, maxval] = get_limits();
+  auto out_type = promote_types(range.dtype(), dtype);
+  if (use_random_sample(stream, out_type)) {
+    return array(
+        shape,
+        out_type,
+        std::make_unique<RandomSample>(
+            stream, RandomSample::Uniform, shape, dtype),
+        {get_key(key),
+         broadcast_to(astype(low, out_type, stream), shape, stream),
+         broadcast_to(astype(range, out_type, stream), shape, stream)});
+  }
   auto out = bits(shape, size_of(dtype), key, stream);
   out = astype(divide(out, maxval, stream), dtype, stream);
   out = minimum(out, upper, stream);
@@ -154,6 +178,14 @@ array normal(
     const std::optional<array>& key /*= nullopt */,
     StreamOrDevice s /* = {} */) {
   auto stream = to_stream(s);
+  if (use_random_sample(stream, dtype)) {
+    return array(
+        shape,
+        dtype,
+        std::make_unique<RandomSample>(
+            stream, RandomSample::Normal, shape, dtype),
+        {get_key(key)});
+  }
   auto low = array(std::nextafter(-1.0f, 0.0f), dtype);
   auto high = array(1.0f, dtype);
   auto samples = uniform(low, high, shape, dtype, key, stream);
@@ -185,8 +217,22 @@ array bernoulli(
     throw std::invalid_argument(
         "[bernoulli] bernoulli probability `p` must be a float type.");
   }
-  auto res = uniform(shape, p.dtype(), key, s);
-  res = less(res, p, s);
+  auto stream = to_stream(s);
+  if (use_random_sample(stream, p.dtype())) {
+    auto k = get_key(key);
+    if (broadcast_shapes(p.shape(), shape) != shape) {
+      throw std::invalid_argument(
+          "[bernoulli] shape of `p` is incompatible with argument `shape`.");
+    }
+    return array(
+        shape,
+        bool_,
+        std::make_unique<RandomSample>(
+            stream, RandomSample::Bernoulli, shape, p.dtype()),
+        {k, broadcast_to(p, shape, stream)});
+  }
+  auto res = uniform(shape, p.dtype(), key, stream);
+  res = less(res, p, stream);
   if (res.shape() != shape) {
     throw std::invalid_argument(
         "[bernoulli] shape of `p` is incompatible with argument `shape`.");
@@ -16,6 +16,15 @@ class KeySequence {
   void seed(uint64_t seed);
   array next();
 
+  // The key the next call to next() splits. Setting it back replays the
+  // keys returned since it was read.
+  array state() const {
+    return key_;
+  }
+  void set_state(const array& key) {
+    key_ = key;
+  }
+
   // static defualt
   static KeySequence& default_() {
     static KeySequence ks(0);
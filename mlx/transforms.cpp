@@ -12,6 +12,7 @@
 #include "mlx/backend/metal/metal.h"
 #include "mlx/ops.h"
 #include "mlx/primitives.h"
+#include "mlx/random.h"
 #include "mlx/scheduler.h"
 #include "mlx/transforms.h"
 #include "mlx/transforms_impl.h"
@@ -522,6 +523,47 @@ std::pair<array, array> jvp(
   return {outputs[0], jvps[0]};
 }
 
+std::function<std::vector<array>(const std::vector<array>&)> checkpoint(
+    const std::function<std::vector<array>(const std::vector<array>&)>& fun) {
+  return [fun](const std::vector<array>& inputs) {
+    // The recomputation draws the same random keys as the forward pass so
+    // that random ops such as dropout give the same results
+    auto key = random::KeySequence::default_().state();
+    auto replay = [fun, key](const std::vector<array>& inputs) {
+      auto& keys = random::KeySequence::default_();
+      auto current = keys.state();
+      keys.set_state(key);
+      try {
+        auto outputs = fun(inputs);
+        keys.set_state(current);
+        return outputs;
+      } catch (...) {
+        keys.set_state(current);
+        throw;
+      }
+    };
+    auto outputs = fun(inputs);
+
+    // The outputs of the function are only kept to be copied by the
+    // checkpointed outputs. The backward pass goes through the Checkpoint
+    // primitive which depends on the inputs alone.
+    std::vector<array> checkpointed;
+    for (int i = 0; i < outputs.size(); ++i) {
+      auto& out = outputs[i];
+      auto s = out.has_primitive() ? out.primitive().stream()
+                                   : default_stream(default_device());
+      std::vector<array> checkpoint_inputs(inputs);
+      checkpoint_inputs.push_back(stop_gradient(out, s));
+      checkpointed.push_back(array(
+          out.shape(),
+          out.dtype(),
+          std::make_unique<Checkpoint>(s, replay, i),
+          checkpoint_inputs));
+    }
+    return checkpointed;
+  };
+}
+
 ValueAndGradFn value_and_grad(
     const std::function<std::vector<array>(const std::vector<array>&)>& fun,
     const std::vector<int>& argnums) {
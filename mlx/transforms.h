@@ -153,6 +153,16 @@ std::function<array(const array&)> inline grad(
   return [fn](const array& input) { return fn(input).second; };
 }
 
+/**
+ *  Returns a function which computes the same outputs as the input function
+ *  without keeping its intermediate arrays for the backward pass. The
+ *  vector-Jacobian product recomputes them from the inputs instead, which
+ *  trades compute for memory. The recomputation replays the keys the
+ *  function drew from the global random key sequence.
+ **/
+std::function<std::vector<array>(const std::vector<array>&)> checkpoint(
+    const std::function<std::vector<array>(const std::vector<array>&)>& fun);
+
 /**
  * Automatically vectorize a unary function over the requested axes.
  */
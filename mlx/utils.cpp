@@ -162,6 +162,8 @@ std::ostream& operator<<(std::ostream& os, const Dtype& dtype) {
       return os << "float16";
     case float32:
       return os << "float32";
+    case float64:
+      return os << "float64";
     case bfloat16:
       return os << "bfloat16";
     case complex64:
@@ -229,6 +231,9 @@ std::ostream& operator<<(std::ostream& os, array a) {
     case float32:
       print_array<float>(os, a);
       break;
+    case float64:
+      print_array<double>(os, a);
+      break;
     case complex64:
       print_array<complex64_t>(os, a);
       break;
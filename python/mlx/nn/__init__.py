@@ -2,4 +2,4 @@
 
 from mlx.nn import losses
 from mlx.nn.layers import *
-from mlx.nn.utils import value_and_grad
+from mlx.nn.utils import GradientAccumulator, SparseGradient, checkpoint, value_and_grad
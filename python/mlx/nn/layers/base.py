@@ -1,10 +1,86 @@
 # Copyright © 2023 Apple Inc.
 
+import math
 import textwrap
 from typing import Any, Callable, List, Optional, Union
 
 import mlx.core as mx
-from mlx.utils import tree_flatten, tree_unflatten
+from mlx.utils import tree_flatten, tree_leaves, tree_structure, tree_unflatten
+
+
+class _Identity:
+    """Compares equal to the same object only. Arrays compare equal to any
+    array since replacing an array keeps the trainable parameters in place."""
+
+    __slots__ = ("value",)
+    _array = object()
+
+    def __init__(self, value):
+        self.value = _Identity._array if isinstance(value, mx.array) else value
+
+    def __eq__(self, other):
+        return self.value is other.value
+
+
+def _container_contents(container):
+    """Return the keys of a module, dict or list and the identities of the
+    values at those keys. Private module attributes are skipped."""
+    if isinstance(container, list):
+        items = enumerate(container)
+    elif isinstance(container, Module):
+        items = ((k, v) for k, v in container.items() if not k.startswith("_"))
+    else:
+        items = container.items()
+    return [(k, _Identity(v)) for k, v in items]
+
+
+class _FlatParameters:
+    """The flat buffers of the trainable parameters of a module.
+
+    The parameters are grouped by dtype and every group is stored as one
+    contiguous 1D buffer keyed by the name of the dtype. The parameters are
+    views into the buffers in the order of :func:`mlx.utils.tree_flatten`.
+    """
+
+    def __init__(self, parameters: dict):
+        flat = tree_flatten(parameters)
+        self.buffers = {}
+        self.structure = tree_structure(parameters)
+        self.keys = [k for k, _ in flat]
+        self.shapes = [v.shape for _, v in flat]
+        self.offsets = []
+        self.groups = {}
+        sizes = {}
+        for i, (_, v) in enumerate(flat):
+            name = str(v.dtype).rpartition(".")[2]
+            self.groups.setdefault(name, []).append(i)
+            self.offsets.append(sizes.get(name, 0))
+            sizes[name] = self.offsets[-1] + v.size
+
+    def flatten(self, tree: dict):
+        """Concatenate the leaves of a tree shaped like the parameters into
+        one buffer per dtype."""
+        leaves = tree_leaves(tree)
+        if len(leaves) != len(self.keys):
+            raise ValueError(
+                "The tree does not match the layout of the flat parameters."
+            )
+        return {
+            name: mx.concatenate([leaves[i].reshape(-1) for i in indices])
+            for name, indices in self.groups.items()
+        }
+
+    def unflatten(self, buffers: dict):
+        """Return the tree of views into the buffers."""
+        leaves = [None] * len(self.keys)
+        for name, indices in self.groups.items():
+            buffer = buffers[name]
+            for i in indices:
+                start = self.offsets[i]
+                size = math.prod(self.shapes[i])
+                leaves[i] = buffer[start : start + size].reshape(self.shapes[i])
+        self.views = leaves
+        return self.structure.unflatten(leaves)
 
 
 class Module(dict):
@@ -54,15 +130,26 @@ class Module(dict):
         mx.eval(model.parameters())
     """
 
+    # Incremented whenever a module changes in a way that may change which
+    # arrays are its trainable parameters, see _trainable_slots
+    _structure_version = 0
+
     def __init__(self):
         """Should be called by the subclasses of ``Module``."""
         self._no_grad = set()
         self._training = True
+        self._flat = None
 
     @property
     def training(self):
         return self._training
 
+    @property
+    def is_flat(self):
+        """Whether the trainable parameters are stored in flat buffers. See
+        :meth:`flatten_parameters`."""
+        return self.get("_flat") is not None
+
     def _extra_repr(self):
         return ""
 
@@ -85,6 +172,11 @@ class Module(dict):
             raise AttributeError(f"{type(self)!r} has no attribute {key!r}")
 
     def __setattr__(self, key: str, val: Any):
+        # Replacing an array with an array keeps the structure
+        if not key.startswith("_"):
+            current = self.get(key)
+            if not (isinstance(current, mx.array) and isinstance(val, mx.array)):
+                Module._structure_version += 1
         self[key] = val
 
     def load_weights(self, file: str):
@@ -183,6 +275,143 @@ class Module(dict):
         this Module as a dict of dicts and lists."""
         return self.filter_and_map(self.trainable_parameter_filter)
 
+    def _collect_slots(self, filter_fn, slots, contents):
+        """Append the container and key of every array selected by
+        ``filter_fn`` to ``slots`` in the order of :func:`mlx.utils.tree_flatten`
+        and return the tree of selected arrays with ``None`` leaves.
+
+        The contents of every traversed module, dict and list are appended to
+        ``contents``, see :func:`_container_contents`."""
+
+        def unwrap(vk, container, key):
+            v = container[key]
+            if isinstance(v, Module):
+                return v._collect_slots(filter_fn, slots, contents)
+
+            if isinstance(v, dict):
+                contents.append((v, _container_contents(v)))
+                nd = {}
+                for k, vi in v.items():
+                    tk = f"{vk}.{k}"
+                    nd[k] = unwrap(tk, v, k) if filter_fn(self, tk, vi) else {}
+                return nd
+
+            if isinstance(v, list):
+                contents.append((v, _container_contents(v)))
+                nl = []
+                for i, vi in enumerate(v):
+                    tk = f"{vk}.{i}"
+                    nl.append(unwrap(tk, v, i) if filter_fn(self, tk, vi) else {})
+                return nl
+
+            slots.append((container, key))
+            return None
+
+        contents.append((self, _container_contents(self)))
+        return {k: unwrap(k, self, k) for k, v in self.items() if filter_fn(self, k, v)}
+
+    def _trainable_slots(self):
+        """Return the containers and keys of the trainable parameters and the
+        structure of :meth:`trainable_parameters`.
+
+        The result is cached until an attribute of any module is set to a
+        value that is not an array replacing an array, a module is frozen or
+        unfrozen, or one of the traversed modules, lists and dicts no longer
+        holds the same objects at the same keys, for instance because a list
+        of layers was modified in place.
+        """
+        cache = self.get("_slots_cache")
+        if (
+            cache is None
+            or cache[0] != Module._structure_version
+            or any(_container_contents(c) != items for c, items in cache[3])
+        ):
+            slots = []
+            contents = []
+            structure = self._collect_slots(
+                self.trainable_parameter_filter, slots, contents
+            )
+            cache = (
+                Module._structure_version,
+                slots,
+                tree_structure(structure),
+                contents,
+            )
+            self._slots_cache = cache
+        return cache[1], cache[2]
+
+    def _get_trainable(self):
+        """Return the trainable parameters as a list in the order of
+        :func:`mlx.utils.tree_flatten`."""
+        slots, _ = self._trainable_slots()
+        return [container[key] for container, key in slots]
+
+    def _set_trainable(self, values: list):
+        """Replace the trainable parameters with a list of arrays in the order
+        of :meth:`_get_trainable`."""
+        slots, _ = self._trainable_slots()
+        for (container, key), value in zip(slots, values):
+            container[key] = value
+
+    def _unflatten_trainable(self, values: list):
+        """Arrange a list of arrays in the order of :meth:`_get_trainable` as
+        a tree like :meth:`trainable_parameters`."""
+        _, structure = self._trainable_slots()
+        return structure.unflatten(values)
+
+    def flatten_parameters(self):
+        """Store the trainable parameters in one contiguous buffer per dtype.
+
+        Every trainable parameter is replaced by a view into the buffer of its
+        dtype. Afterwards :func:`mlx.nn.value_and_grad` returns the gradients
+        as matching flat buffers, which the optimizers in
+        :mod:`mlx.optimizers` update with one operation per buffer.
+
+        The buffers are returned by :meth:`flat_parameters` and keyed by the
+        name of the dtype, for instance ``"float32"``. Updating the module
+        with :meth:`update`, :meth:`freeze` or :meth:`unfreeze` packs the
+        parameters into new buffers.
+        """
+        parameters = self.trainable_parameters()
+        self._flat = _FlatParameters(parameters)
+        self.update_flat(self._flat.flatten(parameters))
+
+    def flat_parameters(self):
+        """Return the flat buffers of the trainable parameters as a dict from
+        dtype names to 1D arrays. See :meth:`flatten_parameters`.
+
+        A parameter that was assigned directly, for instance with
+        ``model.linear.weight = w``, is packed into new buffers first."""
+        if not self.is_flat:
+            raise ValueError(
+                "The parameters are not flat. Call flatten_parameters() first."
+            )
+        current = self._get_trainable()
+        if len(current) != len(self._flat.views) or any(
+            a is not b for a, b in zip(current, self._flat.views)
+        ):
+            self.flatten_parameters()
+        return dict(self._flat.buffers)
+
+    def update_flat(self, buffers: dict):
+        """Replace the flat buffers of the trainable parameters and point the
+        parameters to views into them.
+
+        Args:
+            buffers (dict): The buffers keyed like :meth:`flat_parameters`.
+        """
+        if not self.is_flat:
+            raise ValueError(
+                "The parameters are not flat. Call flatten_parameters() first."
+            )
+        self._flat.buffers = dict(buffers)
+        self._update(self._flat.unflatten(buffers))
+
+    def _flatten_gradients(self, gradients: dict):
+        """Pack a tree of gradients of the trainable parameters into buffers
+        matching :meth:`flat_parameters`."""
+        return self._flat.flatten(gradients)
+
     def children(self):
         """Return the direct descendants of this Module instance."""
         return self.filter_and_map(
@@ -213,7 +442,11 @@ class Module(dict):
             parameters (dict): A complete or partial dictionary of the modules
                                parameters.
         """
+        self._update(parameters)
+        if self.is_flat:
+            self.flatten_parameters()
 
+    def _update(self, parameters: dict):
         def apply(dst, parameters):
             if isinstance(parameters, dict):
                 for k in parameters:
@@ -346,10 +579,13 @@ class Module(dict):
             local_keys = m._validate_keys(local_keys, strict)
             m._no_grad.update(local_keys)
 
+        Module._structure_version += 1
         if recurse:
             self.apply_to_modules(_freeze_impl)
         else:
             _freeze_impl("", self)
+        if self.is_flat:
+            self.flatten_parameters()
 
     def unfreeze(
         self,
@@ -388,10 +624,13 @@ class Module(dict):
                 local_keys = m._validate_keys(keys, strict)
                 m._no_grad.difference_update(local_keys)
 
+        Module._structure_version += 1
         if recurse:
             self.apply_to_modules(_unfreeze_impl)
         else:
             _unfreeze_impl("", self)
+        if self.is_flat:
+            self.flatten_parameters()
 
     def train(self, mode: bool = True):
         def _set_train(_, m):
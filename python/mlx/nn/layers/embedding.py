@@ -12,19 +12,42 @@ class Embedding(Module):
 
     Typically used to embed discrete tokens for processing by neural networks.
 
+    When ``sparse`` is set, :func:`mlx.nn.value_and_grad` returns the gradient
+    of the weight as a :class:`mlx.nn.SparseGradient` holding only the rows
+    that were looked up instead of a dense array the size of the table. If
+    the weight is also used outside of the calls to the layer, for instance
+    when it is tied to an output projection, the gradient is dense again.
+
     Args:
         num_embeddings (int): How many possible discrete tokens can we embed.
                               Usually called the vocabulary size.
         dims (int): The dimensionality of the embeddings.
+        sparse (bool, optional): Compute sparse gradients for the weight
+                                 (default: False).
     """
 
-    def __init__(self, num_embeddings: int, dims: int):
+    def __init__(self, num_embeddings: int, dims: int, sparse: bool = False):
         super().__init__()
         scale = math.sqrt(1 / dims)
         self.weight = mx.random.normal((num_embeddings, dims)) * scale
+        self._sparse = sparse
+        self._lookup_fn = None
+
+    @property
+    def sparse(self):
+        return self._sparse
 
     def _extra_repr(self):
-        return f"{self.weight.shape[0]}, {self.weight.shape[1]}"
+        sparse = ", sparse=True" if self._sparse else ""
+        return f"{self.weight.shape[0]}, {self.weight.shape[1]}{sparse}"
+
+    def __getattr__(self, key: str):
+        # Let value_and_grad know that the weight is used outside of a lookup
+        if key == "weight" and self.get("_lookup_fn") is not None:
+            self._lookup_fn.weight_read(self)
+        return super().__getattr__(key)
 
     def __call__(self, x):
+        if self._lookup_fn is not None:
+            return self._lookup_fn(self, x)
         return self.weight[x]
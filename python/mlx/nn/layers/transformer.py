@@ -7,6 +7,7 @@ import mlx.core as mx
 from mlx.nn.layers.base import Module
 from mlx.nn.layers.linear import Linear
 from mlx.nn.layers.normalization import LayerNorm
+from mlx.nn.utils import checkpoint
 
 
 class MultiHeadAttention(Module):
@@ -122,7 +123,12 @@ class TransformerEncoderLayer(Module):
 
 class TransformerEncoder(Module):
     def __init__(
-        self, num_layers: int, dims: int, num_heads: int, mlp_dims: Optional[int] = None
+        self,
+        num_layers: int,
+        dims: int,
+        num_heads: int,
+        mlp_dims: Optional[int] = None,
+        use_checkpoint: bool = False,
     ):
         super().__init__()
         self.layers = [
@@ -130,9 +136,13 @@ class TransformerEncoder(Module):
             for i in range(num_layers)
         ]
         self.ln = LayerNorm(dims)
+        self.use_checkpoint = use_checkpoint
+        self._layer_fns = (
+            [checkpoint(l) for l in self.layers] if use_checkpoint else self.layers
+        )
 
     def __call__(self, x, mask):
-        for l in self.layers:
+        for l in self._layer_fns:
             x = l(x, mask)
         x = self.ln(x)
 
@@ -1,8 +1,231 @@
 # Copyright © 2023 Apple Inc.
 
-from typing import Callable
+from functools import wraps
+from typing import Callable, Optional
 
 import mlx.core as mx
+from mlx.nn.layers.base import Module
+from mlx.nn.layers.embedding import Embedding
+from mlx.utils import tree_leaves, tree_map
+
+
+class SparseGradient:
+    """The gradient of a parameter that is non-zero only in a few of its rows.
+
+    :func:`value_and_grad` returns a ``SparseGradient`` for the weight of an
+    :class:`Embedding` created with ``sparse=True`` so that a lookup of a few
+    rows does not produce a gradient as large as the whole table. The
+    optimizers in :mod:`mlx.optimizers` update only the referenced rows of
+    the parameter when given a ``SparseGradient``.
+
+    Args:
+        indices (mx.array): The rows of the parameter that the gradient refers
+            to. Rows may be repeated in which case their values are summed.
+        values (mx.array): The gradient of each row in ``indices``.
+        shape (tuple): The shape of the corresponding dense gradient.
+    """
+
+    def __init__(self, indices: mx.array, values: mx.array, shape):
+        self.shape = tuple(shape)
+        self.indices = indices.reshape(-1)
+        self.values = values.reshape(self.indices.size, *self.shape[1:])
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    def __repr__(self):
+        return f"SparseGradient(rows={self.indices.size}, shape={self.shape})"
+
+    def to_dense(self):
+        """Return the gradient as a dense array of shape :attr:`shape`."""
+        # The vjp of a gather is the scatter-add of the cotangents
+        zeros = mx.zeros(self.shape, self.dtype)
+        _, (dense,) = mx.vjp(lambda x: x[self.indices], [zeros], [self.values])
+        return dense
+
+    def _summed_rows(self, unique: bool = False):
+        """Return ``(indices, values)`` with sorted indices where every
+        occurrence of a row holds the sum of the values of that row.
+
+        Since repeated rows carry identical values they can be written with
+        indexed assignment (``x[indices] = values``) in any order. If
+        ``unique`` is ``True`` only the first occurrence of a row holds the
+        sum and the others hold zeros so that reductions over the values,
+        such as the norm, count every row once.
+        """
+        n = self.indices.size
+        indices = self.indices
+        if n == 0:
+            return indices, self.values
+        indices = mx.where(indices < 0, indices + self.shape[0], indices)
+        order = mx.argsort(indices)
+        indices = indices[order]
+        values = self.values[order]
+
+        # The position of the first occurrence of each row
+        first = mx.concatenate([mx.array([True]), indices[1:] != indices[:-1]])
+        starts = mx.cummax(mx.where(first, mx.arange(n), 0))
+
+        # Sum each run of repeated rows into its first position
+        _, (sums,) = mx.vjp(
+            lambda x: x[starts], [mx.zeros(values.shape, values.dtype)], [values]
+        )
+        if unique:
+            return indices, sums
+        return indices, sums[starts]
+
+
+class GradientAccumulator:
+    """Accumulate gradients over several micro-batches.
+
+    The gradients of every micro-batch are added to the running sum which is
+    evaluated right away so that the graph does not grow with the number of
+    micro-batches. Since nothing else refers to the running sum its buffers
+    are reused for the new sum instead of allocating new ones.
+
+    .. code-block:: python
+
+        accumulator = nn.GradientAccumulator(steps=4)
+        for x, y in batches:
+            loss, grads = loss_and_grad_fn(model, x, y)
+            grads = accumulator.accumulate(grads)
+            if grads is not None:
+                optimizer.update(model, grads)
+
+    :class:`SparseGradient` leaves are accumulated by concatenating their rows.
+
+    Args:
+        steps (int): The number of micro-batches to accumulate.
+        average (bool, optional): If ``True`` the accumulated gradients are
+            divided by ``steps``. Default: ``True``.
+    """
+
+    def __init__(self, steps: int, average: bool = True):
+        if steps < 1:
+            raise ValueError(
+                "[GradientAccumulator] The number of steps must be positive "
+                f"but got {steps}."
+            )
+        self.steps = steps
+        self.average = average
+        self.reset()
+
+    def reset(self):
+        """Discard the accumulated gradients."""
+        self.count = 0
+        self._gradients = None
+
+    @staticmethod
+    def _add(a, b):
+        if isinstance(a, SparseGradient):
+            return SparseGradient(
+                mx.concatenate([a.indices, b.indices]),
+                mx.concatenate([a.values, b.values]),
+                a.shape,
+            )
+        return a + b
+
+    @staticmethod
+    def _scale(g, scale):
+        if isinstance(g, SparseGradient):
+            return SparseGradient(g.indices, g.values * scale, g.shape)
+        return g * scale
+
+    @staticmethod
+    def _arrays(tree):
+        arrays = []
+        for g in tree_leaves(tree):
+            if isinstance(g, SparseGradient):
+                arrays.extend((g.indices, g.values))
+            else:
+                arrays.append(g)
+        return arrays
+
+    def accumulate(self, gradients):
+        """Add the gradients of a micro-batch.
+
+        Args:
+            gradients: A tree of gradients, for instance as returned by
+                :func:`value_and_grad`.
+
+        Returns:
+            The accumulated gradients once ``steps`` micro-batches have been
+            added and ``None`` otherwise.
+        """
+        if self._gradients is None:
+            self._gradients = gradients
+        else:
+            # Replace the running sum so that its buffers can be donated
+            self._gradients = tree_map(self._add, self._gradients, gradients)
+        self.count += 1
+
+        if self.count < self.steps:
+            mx.eval(self._arrays(self._gradients))
+            return None
+
+        gradients = self._gradients
+        self.reset()
+        if self.average and self.steps > 1:
+            scale = 1 / self.steps
+            gradients = tree_map(lambda g: self._scale(g, scale), gradients)
+        return gradients
+
+
+class _SparseLookups:
+    """Replaces the lookups of sparse embeddings while tracing the gradient.
+
+    Each lookup returns ``stop_gradient(weight)[x] + probe`` where ``probe``
+    is a zero array passed to the transformed function, so the gradient with
+    respect to the probe is the gradient of the looked up rows. The probes
+    have to exist before tracing so their shapes are taken from the previous
+    call.
+
+    The modules whose weight is read outside of a lookup are recorded in
+    ``direct`` since the weight then also has a dense gradient.
+    """
+
+    def __init__(self):
+        self.modules = []
+        self.lookups = []
+        self.probes = []
+        self.recorded = []
+        self.direct = set()
+
+    def __enter__(self):
+        for m in self.modules:
+            m._lookup_fn = self
+        return self
+
+    def __exit__(self, *exc):
+        for m in self.modules:
+            m._lookup_fn = None
+
+    def make_probes(self):
+        # Reading the weight with m["weight"] does not count as a direct use
+        self.probes = [mx.zeros(s, m["weight"].dtype) for m, _, s in self.lookups]
+        self.recorded = []
+        self.direct = set()
+        return self.probes
+
+    def matches(self):
+        return len(self.lookups) == len(self.recorded) and all(
+            m1 is m2 and s1 == s2
+            for (m1, _, s1), (m2, _, s2) in zip(self.lookups, self.recorded)
+        )
+
+    def weight_read(self, module):
+        self.direct.add(id(module))
+
+    def __call__(self, module, x):
+        rows = mx.stop_gradient(module["weight"])[x]
+        n = len(self.recorded)
+        self.recorded.append((module, x, tuple(rows.shape)))
+        if n < len(self.lookups):
+            m, _, shape = self.lookups[n]
+            if m is module and shape == tuple(rows.shape):
+                return rows + self.probes[n]
+        return rows
 
 
 def value_and_grad(model: "mlx.nn.Module", fn: Callable):
@@ -10,6 +233,15 @@ def value_and_grad(model: "mlx.nn.Module", fn: Callable):
     gradients of ``fn`` wrt the model's trainable parameters and also its
     value.
 
+    The gradients of the weights of :class:`Embedding` layers created with
+    ``sparse=True`` are returned as :class:`SparseGradient` instances. If such
+    a weight is also used outside of the calls to its layer, for instance
+    when it is tied to an output projection, its gradient is returned dense.
+
+    If the parameters of ``model`` are flat (see
+    :meth:`Module.flatten_parameters`) the gradients are returned as flat
+    buffers keyed like :meth:`Module.flat_parameters`.
+
     Args:
         model (mlx.nn.Module): The model whose trainable parameters to compute
                                gradients for
@@ -24,10 +256,148 @@ def value_and_grad(model: "mlx.nn.Module", fn: Callable):
         model.update(params)
         return fn(*args, **kwargs)
 
-    value_grad_fn = mx.value_and_grad(inner_fn)
+    def fast_inner_fn(params, *args, **kwargs):
+        # The parameters are a list in the order of the cached slots of the
+        # model which are set directly rather than through a nested update.
+        # This also leaves the flat buffers of flat models untouched.
+        model._set_trainable(params)
+        return fn(*args, **kwargs)
+
+    fast_value_grad_fn = mx.value_and_grad(fast_inner_fn)
+
+    def sparse_inner_fn(params_and_probes, *args, **kwargs):
+        # The lookups have to add the traced probes and not the zero arrays
+        # they were made from or the probes get no gradient
+        sparse_lookups.probes = params_and_probes[1]
+        return inner_fn(params_and_probes[0], *args, **kwargs)
+
+    sparse_value_grad_fn = mx.value_and_grad(sparse_inner_fn)
+    sparse_lookups = _SparseLookups()
+
+    # The sparse embeddings only change with the trainable parameters of the
+    # model so they are cached until the cached slots of the model are rebuilt
+    embeddings_cache = [None, {}]
+
+    def sparse_embeddings():
+        model._trainable_slots()
+        if embeddings_cache[0] is model._slots_cache:
+            return embeddings_cache[1]
+        embeddings = {}
+        for name, m in model.named_modules():
+            if isinstance(m, Embedding) and m.sparse and "weight" not in m._no_grad:
+                embeddings[f"{name}.weight" if name else "weight"] = m
+        embeddings_cache[:] = [model._slots_cache, embeddings]
+        return embeddings
+
+    def subtree(tree, path):
+        for k in path:
+            tree = tree[int(k)] if isinstance(tree, list) else tree[k]
+        return tree
 
     def wrapped_value_grad_fn(*args, **kwargs):
-        value, grad = value_grad_fn(model.trainable_parameters(), *args, **kwargs)
+        embeddings = sparse_embeddings()
+        if model.is_flat:
+            if embeddings:
+                raise ValueError(
+                    "[value_and_grad] Sparse embeddings are not supported with "
+                    "flat parameters."
+                )
+            buffers = model.flat_parameters()
+            value, grad = fast_value_grad_fn(model._get_trainable(), *args, **kwargs)
+            model.update_flat(buffers)
+            return value, model._flatten_gradients(grad)
+
+        if not embeddings:
+            value, grad = fast_value_grad_fn(model._get_trainable(), *args, **kwargs)
+            return value, model._unflatten_trainable(grad)
+
+        params = model.trainable_parameters()
+
+        # Trace again if the lookups differ from the previous call
+        sparse_lookups.modules = list(embeddings.values())
+        with sparse_lookups:
+            for _ in range(2):
+                probes = sparse_lookups.make_probes()
+                value, (grad, probe_grads) = sparse_value_grad_fn(
+                    (params, probes), *args, **kwargs
+                )
+                if sparse_lookups.matches():
+                    break
+                sparse_lookups.lookups = sparse_lookups.recorded
+            else:
+                raise ValueError(
+                    "[value_and_grad] The lookups of sparse embeddings must be "
+                    "the same when the function is called with the same inputs."
+                )
+
+        for path, m in embeddings.items():
+            *parents, key = path.split(".")
+            shape = m.weight.shape
+            indices = [mx.zeros((0,), mx.uint32)]
+            values = [mx.zeros((0, *shape[1:]), m.weight.dtype)]
+            for (mi, x, _), g in zip(sparse_lookups.recorded, probe_grads):
+                if mi is m:
+                    indices.append(x.reshape(-1))
+                    values.append(g.reshape(-1, *shape[1:]))
+            if len(indices) > 2:
+                indices = [mx.concatenate(indices[1:])]
+                values = [mx.concatenate(values[1:])]
+            sparse = SparseGradient(indices[-1], values[-1], shape)
+
+            # The dense gradient only comes from uses outside of the lookups
+            if id(m) in sparse_lookups.direct:
+                parent = subtree(grad, parents)
+                parent[key] = parent[key] + sparse.to_dense()
+            else:
+                subtree(grad, parents)[key] = sparse
+
+        # Only the shapes of the lookups are needed for the next call
+        sparse_lookups.lookups = [(m, None, s) for m, _, s in sparse_lookups.recorded]
+        sparse_lookups.recorded = []
+
         return value, grad
 
     return wrapped_value_grad_fn
+
+
+def checkpoint(module: Module, fn: Optional[Callable] = None):
+    """Transform the passed callable to one that does not keep its
+    intermediate arrays for the backward pass.
+
+    The intermediates are recomputed from the inputs and the trainable
+    parameters of ``module`` when the gradient is computed, see
+    :func:`mlx.core.checkpoint`.
+
+    .. code-block:: python
+
+        layers = [nn.utils.checkpoint(l) for l in model.layers]
+
+    Args:
+        module (mlx.nn.Module): The module whose trainable parameters the
+            gradients are computed for.
+        fn (Callable, optional): The callable to checkpoint. Default: the
+            ``module`` itself.
+
+    Returns:
+        A callable with the same inputs and outputs as ``fn``.
+    """
+    if fn is None:
+        fn = module.__call__
+
+    def inner_fn(params, *args, **kwargs):
+        # The backward pass calls the function with new parameters so restore
+        # the current ones afterwards
+        current = module._get_trainable()
+        module._set_trainable(params)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            module._set_trainable(current)
+
+    checkpointed_fn = mx.checkpoint(inner_fn)
+
+    @wraps(fn)
+    def wrapped_checkpointed_fn(*args, **kwargs):
+        return checkpointed_fn(module._get_trainable(), *args, **kwargs)
+
+    return wrapped_checkpointed_fn
@@ -1,10 +1,20 @@
 # Copyright © 2023 Apple Inc.
 
 import math
-from typing import List
+from typing import Callable, List, Tuple, Union
 
 import mlx.core as mx
-from mlx.utils import tree_map
+from mlx.nn.utils import SparseGradient, value_and_grad
+from mlx.utils import tree_leaves, tree_map
+
+
+def _update_rows(a: mx.array, indices: mx.array, rows: mx.array):
+    """Return a copy of ``a`` with ``rows`` written at ``indices``."""
+    # mx.array(a) is a new handle to the same data so the assignment below
+    # leaves ``a`` untouched
+    out = mx.array(a)
+    out[indices] = rows
+    return out
 
 
 class OptimizerState(dict):
@@ -34,23 +44,69 @@ class Optimizer:
     """The base class for all optimizers. It allows us to implement an
     optimizer on a per-parameter basis and apply it to a parameter tree.
 
+    The learning rate is kept in the state as an array, next to the number of
+    updates ``"step"``, so that the update graph does not change when the
+    learning rate does. It can be a float or a schedule, namely a function of
+    the step returning the learning rate, see for instance
+    :func:`cosine_decay`. A schedule is evaluated before every update.
+
+    The state of each parameter is kept under ``state["parameters"]`` with
+    the structure of the parameter tree, so the names of the parameters
+    cannot clash with ``"step"`` or the hyperparameters.
+
     Attributes:
         state (OptimizerState): It holds the optimizer's state dictionary.
     """
 
     def __init__(self):
         self.state = OptimizerState()
+        self.state["parameters"] = OptimizerState()
+        self._schedules = {}
+
+    @property
+    def step(self):
+        """The number of updates applied by the optimizer."""
+        return self.state.get("step", mx.array(0, mx.uint64))
+
+    @property
+    def learning_rate(self):
+        """The learning rate of the next update as a scalar array.
+
+        Use ``learning_rate.item()`` to get it as a Python float, for
+        instance to format it in a log message.
+        """
+        return self.state["learning_rate"]
+
+    @learning_rate.setter
+    def learning_rate(self, learning_rate: Union[float, Callable]):
+        self._set_hyperparameter("learning_rate", learning_rate)
+
+    def _set_hyperparameter(self, name: str, value: Union[float, Callable]):
+        if callable(value):
+            self._schedules[name] = value
+            self.state[name] = value(self.step)
+        else:
+            self._schedules.pop(name, None)
+            self.state[name] = mx.array(value, mx.float32)
 
     def update(self, model: "mlx.nn.Module", gradients: dict):
         """Apply the gradients to the parameters of the model and update the
         model with the new parameters.
 
+        If the parameters of the model are flat (see
+        :meth:`mlx.nn.Module.flatten_parameters`) the gradients must be the
+        matching flat buffers and each buffer is updated at once.
+
         Args:
             model (mlx.nn.Module): An mlx module to be updated.
             gradients (dict): A Python tree of gradients, most likely computed
                               via :func:`mlx.nn.value_and_grad`.
         """
-        model.update(self.apply_gradients(gradients, model))
+        if model.is_flat:
+            parameters = model.flat_parameters()
+            model.update_flat(self.apply_gradients(gradients, parameters))
+        else:
+            model.update(self.apply_gradients(gradients, model))
 
     def apply_gradients(self, gradients: dict, model: dict):
         """Apply the gradients to the parameters and return the updated parameters.
@@ -65,7 +121,17 @@ class Optimizer:
                           the gradients. In that case the returned python tree
                           will be of the same structure as the gradients.
         """
-        return tree_map(self.apply_single, gradients, model, self.state)
+
+        def apply(gradient, parameter, state):
+            if isinstance(gradient, SparseGradient):
+                return self.apply_sparse(gradient, parameter, state)
+            return self.apply_single(gradient, parameter, state)
+
+        for name, schedule in self._schedules.items():
+            self.state[name] = schedule(self.step)
+        parameters = tree_map(apply, gradients, model, self.state["parameters"])
+        self.state["step"] = self.step + 1
+        return parameters
 
     def apply_single(
         self, gradient: mx.array, parameter: mx.array, state: OptimizerState
@@ -74,6 +140,16 @@ class Optimizer:
         update."""
         raise NotImplementedError()
 
+    def apply_sparse(
+        self, gradient: SparseGradient, parameter: mx.array, state: OptimizerState
+    ):
+        """Apply a :class:`mlx.nn.SparseGradient` to the parameter.
+
+        By default the gradient is made dense and passed to
+        :meth:`apply_single`. Children classes can extend it to update only
+        the rows referenced by the gradient."""
+        return self.apply_single(gradient.to_dense(), parameter, state)
+
 
 class SGD(Optimizer):
     r"""Stochastic gradient descent optimizer.
@@ -86,7 +162,8 @@ class SGD(Optimizer):
         w_{t+1} &= w_t - \lambda v_{t+1}
 
     Args:
-        learning_rate (float): The learning :math:`\lambda` for the update
+        learning_rate (float or callable): The learning :math:`\lambda` for
+            the update or a schedule
         momentum (float, optional): The momentum strength :math:`\mu` (default: 0)
         weight_decay (float, optional): The weight decay (L2 penalty) (default: 0)
         dampening (float, optional): Dampening for momentum :math:`\tau` (default: 0)
@@ -95,7 +172,7 @@ class SGD(Optimizer):
 
     def __init__(
         self,
-        learning_rate: float,
+        learning_rate: Union[float, Callable[[mx.array], mx.array]],
         momentum: float = 0.0,
         weight_decay: float = 0.0,
         dampening: float = 0.0,
@@ -119,25 +196,36 @@ class SGD(Optimizer):
         """Performs the SGD parameter update and stores :math:`v` in the
         optimizer state."""
         if self.momentum <= 0:
-            return parameter - self.learning_rate * gradient
+            parameter, _ = mx.fast.sgd_step(parameter, gradient, self.learning_rate)
+            return parameter
 
         v = state.get("v", mx.zeros_like(gradient))
+        parameter, state["v"] = mx.fast.sgd_step(
+            parameter,
+            gradient,
+            self.learning_rate,
+            v,
+            momentum=self.momentum,
+            weight_decay=self.weight_decay,
+            dampening=self.dampening,
+            nesterov=self.nesterov,
+        )
+        return parameter
 
-        if self.weight_decay != 0:
-            gradient += self.weight_decay * parameter
+    def apply_sparse(
+        self, gradient: SparseGradient, parameter: mx.array, state: OptimizerState
+    ):
+        """Performs the SGD update of the rows referenced by the gradient.
 
-        v = self.momentum * v
-        if self.dampening > 0:
-            v += (1 - self.dampening) * gradient
-        else:
-            v += gradient
+        With momentum every row of :math:`v` changes at each step so the
+        gradient is made dense instead."""
+        if self.momentum > 0:
+            return super().apply_sparse(gradient, parameter, state)
 
-        if self.nesterov:
-            update = gradient + self.momentum * v
-        else:
-            update = v
-        state["v"] = v
-        return parameter - self.learning_rate * update
+        indices, gradient = gradient._summed_rows()
+        lr = self.learning_rate.astype(gradient.dtype)
+        rows = parameter[indices] - lr * gradient
+        return _update_rows(parameter, indices, rows)
 
 
 class Adam(Optimizer):
@@ -152,36 +240,108 @@ class Adam(Optimizer):
         v_{t+1} &= \beta_2 v_t + (1 - \beta_2) g_t^2 \\
         w_{t+1} &= w_t - \lambda \frac{m_{t+1}}{\sqrt{v_{t+1} + \epsilon}}
 
+    With ``quantize_state=True`` the moments are stored in 8 bits per
+    element in blocks of ``block_size`` elements, see
+    :func:`mlx.core.fast.adam_step_8bit`, which takes about a quarter of the
+    memory of ``float32`` moments. The update then runs on the CPU.
+
     [1]: Kingma, D.P. and Ba, J., 2015. Adam: A method for stochastic
     optimization. ICLR 2015.
     """
 
     def __init__(
-        self, learning_rate: float, betas: List[float] = [0.9, 0.999], eps: float = 1e-8
+        self,
+        learning_rate: Union[float, Callable[[mx.array], mx.array]],
+        betas: List[float] = [0.9, 0.999],
+        eps: float = 1e-8,
+        quantize_state: bool = False,
+        block_size: int = 256,
     ):
         super().__init__()
 
         self.learning_rate = learning_rate
         self.betas = betas
         self.eps = eps
+        self.quantize_state = quantize_state
+        self.block_size = block_size
 
     def apply_single(
         self, gradient: mx.array, parameter: mx.array, state: OptimizerState
     ):
         """Performs the Adam parameter update and stores :math:`v` and
         :math:`m` in the optimizer state."""
-        lr = self.learning_rate
+        return self._adam_step(gradient, parameter, state, 0.0)
+
+    def _adam_step(
+        self,
+        gradient: mx.array,
+        parameter: mx.array,
+        state: OptimizerState,
+        weight_decay: float,
+    ):
         b1, b2 = self.betas
-        eps = self.eps
+        if self.quantize_state:
+            parameter, state["moments"] = mx.fast.adam_step_8bit(
+                parameter,
+                gradient,
+                state.get("moments", None),
+                self.learning_rate,
+                b1,
+                b2,
+                self.eps,
+                weight_decay,
+                self.block_size,
+                stream=mx.cpu,
+            )
+            return parameter
 
         m = state.get("m", gradient)
         v = state.get("v", mx.square(gradient))
-        m = b1 * m + (1 - b1) * gradient
-        v = b2 * v + (1 - b2) * mx.square(gradient)
-        state["m"] = m
-        state["v"] = v
+        parameter, state["m"], state["v"] = mx.fast.adam_step(
+            parameter,
+            gradient,
+            m,
+            v,
+            self.learning_rate,
+            b1,
+            b2,
+            self.eps,
+            weight_decay,
+        )
+        return parameter
+
+    def apply_sparse(
+        self, gradient: SparseGradient, parameter: mx.array, state: OptimizerState
+    ):
+        """Performs the Adam update of the rows referenced by the gradient.
+
+        Only the referenced rows of the parameter and of :math:`m` and
+        :math:`v` are updated. As in the dense update the moments of the
+        first step are the gradient and its square. The remaining rows are
+        left unchanged rather than decayed as in a dense update. The
+        quantized moments are updated by blocks so the gradient is made dense
+        instead."""
+        if self.quantize_state:
+            return super().apply_sparse(gradient, parameter, state)
+
+        b1, b2 = self.betas
+        eps = self.eps
+
+        indices, gradient = gradient._summed_rows()
+        lr = self.learning_rate.astype(gradient.dtype)
+        if "m" not in state:
+            m = v = mx.zeros_like(parameter)
+            m_rows = gradient
+            v_rows = mx.square(gradient)
+        else:
+            m, v = state["m"], state["v"]
+            m_rows = b1 * m[indices] + (1 - b1) * gradient
+            v_rows = b2 * v[indices] + (1 - b2) * mx.square(gradient)
+        state["m"] = _update_rows(m, indices, m_rows)
+        state["v"] = _update_rows(v, indices, v_rows)
 
-        return parameter - lr * m / (mx.sqrt(v) + eps)
+        rows = parameter[indices] - lr * m_rows / (mx.sqrt(v_rows) + eps)
+        return _update_rows(parameter, indices, rows)
 
 
 class AdamW(Adam):
@@ -203,24 +363,36 @@ class AdamW(Adam):
 
     def __init__(
         self,
-        learning_rate: float,
+        learning_rate: Union[float, Callable[[mx.array], mx.array]],
         betas: List[float] = [0.9, 0.999],
         eps: float = 1e-8,
         weight_decay: float = 0.01,
+        quantize_state: bool = False,
+        block_size: int = 256,
     ):
-        super().__init__(learning_rate=learning_rate, betas=betas, eps=eps)
+        super().__init__(
+            learning_rate=learning_rate,
+            betas=betas,
+            eps=eps,
+            quantize_state=quantize_state,
+            block_size=block_size,
+        )
         self.weight_decay = weight_decay
 
     def apply_single(
         self, gradient: mx.array, parameter: mx.array, state: OptimizerState
     ):
-        """Performs the AdamW parameter update by modifying the parameters
-        passed into Adam.
+        """Performs the AdamW parameter update which decays the parameter
+        before the Adam update.
         """
+        return self._adam_step(gradient, parameter, state, self.weight_decay)
 
-        return super().apply_single(
-            gradient, parameter * (1 - self.learning_rate * self.weight_decay), state
-        )
+    def apply_sparse(
+        self, gradient: SparseGradient, parameter: mx.array, state: OptimizerState
+    ):
+        """The weight decay changes every row of the parameter so the gradient
+        is made dense and passed to :meth:`apply_single`."""
+        return Optimizer.apply_sparse(self, gradient, parameter, state)
 
 
 class Adagrad(Optimizer):
@@ -237,15 +409,19 @@ class Adagrad(Optimizer):
     for online learning and stochastic optimization. JMLR 2011.
     """
 
-    def __init__(self, learning_rate: float, eps: float = 1e-8):
+    def __init__(
+        self,
+        learning_rate: Union[float, Callable[[mx.array], mx.array]],
+        eps: float = 1e-8,
+    ):
         super().__init__()
 
         self.learning_rate = learning_rate
         self.eps = eps
 
-        if self.learning_rate < 0.0:
+        if not callable(learning_rate) and learning_rate < 0.0:
             raise ValueError(
-                f"Adagrad learning rate should be >=0, {self.learning_rate} was provided instead"
+                f"Adagrad learning rate should be >=0, {learning_rate} was provided instead"
             )
         if self.eps < 0.0:
             raise ValueError(
@@ -257,11 +433,467 @@ class Adagrad(Optimizer):
     ):
         """Performs the Adagrad parameter update and stores :math:`v` in the
         optimizer state."""
-        lr = self.learning_rate
+        v = state.get("v", mx.zeros_like(gradient))
+        parameter, state["v"] = mx.fast.adagrad_step(
+            parameter, gradient, v, self.learning_rate, self.eps
+        )
+        return parameter
+
+    def apply_sparse(
+        self, gradient: SparseGradient, parameter: mx.array, state: OptimizerState
+    ):
+        """Performs the Adagrad update of the rows referenced by the gradient.
+
+        The rows that are not referenced have a zero gradient so the result
+        is the same as the dense update."""
         eps = self.eps
 
-        v = state.get("v", mx.zeros_like(gradient))
-        v = v + mx.square(gradient)
-        state["v"] = v
+        indices, gradient = gradient._summed_rows()
+        lr = self.learning_rate.astype(gradient.dtype)
+        v = state.get("v", mx.zeros_like(parameter))
+        v_rows = v[indices] + mx.square(gradient)
+        state["v"] = _update_rows(v, indices, v_rows)
+
+        rows = parameter[indices] - lr * gradient / (mx.sqrt(v_rows) + eps)
+        return _update_rows(parameter, indices, rows)
+
+
+class Adafactor(Optimizer):
+    r"""Implementation of the Adafactor optimizer [1].
+
+    Instead of the second moment of every element, Adafactor keeps the
+    running means of the squared gradient over the rows and over the columns
+    of the last two axes of each parameter, so its state grows with the sum
+    rather than the product of the dimensions. In detail, for a parameter
+    :math:`w` with rows :math:`i` and columns :math:`j`,
+
+    .. math::
+
+        \beta_{2,t} &= 1 - t^{c} \\
+        R_t &= \beta_{2,t} R_{t-1} + (1 - \beta_{2,t})
+            \mathrm{mean}_j(g_t^2 + \epsilon_1) \\
+        C_t &= \beta_{2,t} C_{t-1} + (1 - \beta_{2,t})
+            \mathrm{mean}_i(g_t^2 + \epsilon_1) \\
+        u_t &= g_t \Big/ \sqrt{R_t C_t / \mathrm{mean}(R_t)} \\
+        w_{t+1} &= w_t - \lambda \max(\epsilon_2, \mathrm{RMS}(w_t))
+            \frac{u_t}{\max(1, \mathrm{RMS}(u_t) / d)}
 
-        return parameter - lr * gradient / (mx.sqrt(v) + eps)
+    Parameters with less than two dimensions are treated as a single row
+    which amounts to keeping their full second moment. There is no first
+    moment and the relative step size of [1] can be obtained with a
+    schedule.
+
+    [1]: Shazeer, N. and Stern, M., 2018. Adafactor: Adaptive learning rates
+    with sublinear memory cost. ICML 2018.
+
+    Args:
+        learning_rate (float or callable): The learning rate :math:`\lambda`
+            or a schedule
+        eps (tuple(float, float), optional): The terms :math:`\epsilon_1`
+            and :math:`\epsilon_2` (default: (1e-30, 1e-3))
+        clip_threshold (float, optional): The threshold :math:`d` of the RMS
+            of the update (default: 1.0)
+        decay_rate (float, optional): The exponent :math:`c` of the decay
+            (default: -0.8)
+        weight_decay (float, optional): The weight decay (default: 0)
+        scale_parameter (bool, optional): Whether to scale the learning rate
+            by the RMS of the parameter (default: True)
+    """
+
+    def __init__(
+        self,
+        learning_rate: Union[float, Callable[[mx.array], mx.array]],
+        eps: Tuple[float, float] = (1e-30, 1e-3),
+        clip_threshold: float = 1.0,
+        decay_rate: float = -0.8,
+        weight_decay: float = 0.0,
+        scale_parameter: bool = True,
+    ):
+        super().__init__()
+
+        self.learning_rate = learning_rate
+        self.eps = eps
+        self.clip_threshold = clip_threshold
+        self.decay_rate = decay_rate
+        self.weight_decay = weight_decay
+        self.scale_parameter = scale_parameter
+
+    def apply_single(
+        self, gradient: mx.array, parameter: mx.array, state: OptimizerState
+    ):
+        """Performs the Adafactor parameter update and stores the row and
+        column means in the optimizer state."""
+        shape = parameter.shape
+        if len(shape) < 2:
+            shape = [1, parameter.size]
+        row = state.get("row", mx.zeros(shape[:-1]))
+        col = state.get("col", mx.zeros(shape[:-2] + shape[-1:]))
+
+        step = (self.step + 1).astype(mx.float32)
+        beta2 = 1 - step**self.decay_rate
+        parameter, state["row"], state["col"] = mx.fast.adafactor_step(
+            parameter,
+            gradient,
+            row,
+            col,
+            self.learning_rate,
+            beta2,
+            self.eps[0],
+            self.eps[1],
+            self.clip_threshold,
+            self.weight_decay,
+            self.scale_parameter,
+        )
+        return parameter
+
+
+def step_decay(init: float, decay_rate: float, step_size: int) -> Callable:
+    r"""Make a step decay schedule.
+
+    The learning rate is multiplied by ``decay_rate`` every ``step_size``
+    steps.
+
+    .. code-block:: python
+
+        lr_schedule = optim.step_decay(1e-1, 0.9, 100)
+        optimizer = optim.SGD(learning_rate=lr_schedule)
+
+    Args:
+        init (float): The initial value.
+        decay_rate (float): The multiplicative factor applied every
+            ``step_size`` steps.
+        step_size (int): The number of steps between two decays.
+    """
+    if step_size < 1:
+        raise ValueError(
+            f"[step_decay] The step size must be positive but got {step_size}."
+        )
+
+    def schedule(step):
+        exponent = (step // step_size).astype(mx.float32)
+        return init * mx.power(decay_rate, exponent)
+
+    return schedule
+
+
+def cosine_decay(init: float, decay_steps: int, end: float = 0.0) -> Callable:
+    r"""Make a cosine decay schedule.
+
+    The value decays from ``init`` to ``end`` along half a cosine period over
+    ``decay_steps`` steps and stays at ``end`` afterwards.
+
+    .. code-block:: python
+
+        lr_schedule = optim.cosine_decay(1e-1, 1000)
+        optimizer = optim.SGD(learning_rate=lr_schedule)
+
+    Args:
+        init (float): The initial value.
+        decay_steps (int): The number of steps to decay over.
+        end (float, optional): The final value. Default: ``0``.
+    """
+    if decay_steps < 1:
+        raise ValueError(
+            f"[cosine_decay] The number of decay steps must be positive but got {decay_steps}."
+        )
+
+    def schedule(step):
+        step = mx.minimum(step.astype(mx.float32), decay_steps)
+        decay = 0.5 * (1.0 + mx.cos((math.pi / decay_steps) * step))
+        return end + (init - end) * decay
+
+    return schedule
+
+
+def linear_warmup(steps: int, finish: float, init: float = 0.0) -> Callable:
+    r"""Make a linear warmup schedule.
+
+    The value increases linearly from ``init`` to ``finish`` over ``steps``
+    steps and stays at ``finish`` afterwards.
+
+    .. code-block:: python
+
+        warmup = optim.linear_warmup(100, 1e-1)
+        decay = optim.cosine_decay(1e-1, 900)
+        lr_schedule = optim.join_schedules([warmup, decay], [100])
+
+    Args:
+        steps (int): The number of steps of the warmup.
+        finish (float): The final value.
+        init (float, optional): The initial value. Default: ``0``.
+    """
+    if steps < 1:
+        raise ValueError(
+            f"[linear_warmup] The number of steps must be positive but got {steps}."
+        )
+
+    def schedule(step):
+        step = mx.minimum(step.astype(mx.float32), steps)
+        return init + (finish - init) / steps * step
+
+    return schedule
+
+
+def join_schedules(schedules: List[Callable], boundaries: List[int]) -> Callable:
+    r"""Join several schedules into one.
+
+    The ``i``-th schedule is used from ``boundaries[i - 1]`` until
+    ``boundaries[i]`` and it is evaluated at the number of steps since its
+    boundary.
+
+    Args:
+        schedules (list(callable)): The schedules to join.
+        boundaries (list(int)): The steps at which to switch to the next
+            schedule. There must be one boundary less than schedules.
+    """
+    if len(schedules) != len(boundaries) + 1:
+        raise ValueError(
+            "[join_schedules] Expected one boundary less than schedules but got "
+            f"{len(schedules)} schedules and {len(boundaries)} boundaries."
+        )
+
+    def schedule(step):
+        output = schedules[0](step)
+        for boundary, fn in zip(boundaries, schedules[1:]):
+            # Clip the step so that it does not wrap around before the boundary
+            value = fn(mx.maximum(step, boundary) - boundary)
+            output = mx.where(step < boundary, output, value)
+        return output
+
+    return schedule
+
+
+def clip_grad_norm(grads, max_norm: float):
+    """Clips the global norm of the gradients.
+
+    The norm of all the gradients together is computed with a single
+    :func:`mlx.core.fast.global_norm` and, if it exceeds ``max_norm``, every
+    gradient is scaled by ``max_norm / norm``.
+
+    .. code-block:: python
+
+        loss, grads = loss_and_grad_fn(model, x, y)
+        grads, total_norm = optim.clip_grad_norm(grads, max_norm=1.0)
+        optimizer.update(model, grads)
+
+    Args:
+        grads (dict): A Python tree of gradients. It can contain
+            :class:`mlx.nn.SparseGradient` leaves.
+        max_norm (float): The maximum norm of the gradients.
+
+    Returns:
+        (dict, mx.array): The clipped gradients and their norm before
+        clipping.
+    """
+    # The norm of a sparse gradient is the norm of its summed rows with every
+    # row counted once
+    arrays = [
+        g._summed_rows(unique=True)[1] if isinstance(g, SparseGradient) else g
+        for g in tree_leaves(grads)
+    ]
+    norm = mx.fast.global_norm(arrays)
+    scale = mx.minimum(max_norm / (norm + 1e-6), 1.0)
+
+    # Cast the scale once per type so that the gradients keep their type and
+    # buffers that are no longer needed are reused for the clipped gradients
+    scales = {}
+
+    def clip(g):
+        values = g.values if isinstance(g, SparseGradient) else g
+        if values.dtype not in scales:
+            scales[values.dtype] = scale.astype(values.dtype)
+        values = values * scales[values.dtype]
+        if isinstance(g, SparseGradient):
+            return SparseGradient(g.indices, values, g.shape)
+        return values
+
+    return tree_map(clip, grads), norm
+
+
+def _copy_state(state):
+    """Return a copy of the nested dictionaries of ``state`` which refers to
+    the same arrays."""
+    if isinstance(state, dict):
+        return {k: _copy_state(v) for k, v in state.items()}
+    return state
+
+
+def _select_state(condition: mx.array, state: dict, previous: dict):
+    """Replace in place every array ``x`` of ``state`` with
+    ``mx.where(condition, x, previous_x)``.
+
+    Entries without a previous value are kept if ``condition`` is true and
+    removed otherwise so that, for instance, a skipped first step leaves the
+    state uninitialized. Only then is ``condition`` evaluated."""
+    for k, v in list(state.items()):
+        if k not in previous:
+            if not condition.item():
+                del state[k]
+        elif isinstance(v, mx.array) and isinstance(previous[k], mx.array):
+            state[k] = mx.where(condition, v, previous[k])
+        elif isinstance(v, dict) and isinstance(previous[k], dict):
+            _select_state(condition, v, previous[k])
+
+
+class MixedPrecision:
+    """Train a model in half precision with float32 master weights and
+    dynamic loss scaling.
+
+    The floating point parameters of ``model`` are cast to ``dtype`` so that
+    the forward and backward passes run in half precision. The wrapped
+    optimizer updates float32 copies of the trainable parameters, the master
+    weights, which are then cast back into the model.
+
+    To keep small gradients from flushing to zero the loss is multiplied by
+    the loss scale before the backward pass and the gradients are divided by
+    it afterwards. If any gradient is not finite, which is checked with a
+    single :func:`mlx.core.fast.global_norm` reduction, the update is skipped
+    and the loss scale is multiplied by ``backoff_factor``. After
+    ``growth_interval`` consecutive finite steps it is multiplied by
+    ``growth_factor``. The decision is made on arrays so nothing is evaluated
+    before :func:`mlx.core.eval` is called on the state.
+
+    .. code-block:: python
+
+        amp = optim.MixedPrecision(model, optim.Adam(1e-3), mx.float16)
+        loss_and_grad_fn = amp.value_and_grad(loss_fn)
+
+        for X, y in batch_iterate(batch_size, train_images, train_labels):
+            loss, grads = loss_and_grad_fn(model, X, y)
+            amp.update(grads)
+            mx.eval(model.parameters(), amp.state)
+
+    Since ``bfloat16`` has the range of ``float32`` it rarely needs loss
+    scaling, in which case pass ``loss_scale=1.0`` and ``dynamic=False``.
+
+    Args:
+        model (mlx.nn.Module): The model to train. Its trainable parameters
+            should not change after the ``MixedPrecision`` is created.
+        optimizer (Optimizer): The optimizer updating the master weights.
+        dtype (Dtype, optional): The half precision type of the model.
+            Default: ``mx.float16``.
+        loss_scale (float, optional): The initial loss scale.
+            Default: ``2**15``.
+        dynamic (bool, optional): Whether to adjust the loss scale.
+            Default: ``True``.
+        growth_factor (float, optional): Default: ``2.0``.
+        backoff_factor (float, optional): Default: ``0.5``.
+        growth_interval (int, optional): Default: ``2000``.
+
+    Attributes:
+        state (OptimizerState): The master weights, the loss scaling state
+            and the state of the wrapped optimizer.
+    """
+
+    def __init__(
+        self,
+        model: "mlx.nn.Module",
+        optimizer: Optimizer,
+        dtype: mx.Dtype = mx.float16,
+        loss_scale: float = 2.0**15,
+        dynamic: bool = True,
+        growth_factor: float = 2.0,
+        backoff_factor: float = 0.5,
+        growth_interval: int = 2000,
+    ):
+        if dtype not in (mx.float16, mx.bfloat16):
+            raise ValueError(
+                f"[MixedPrecision] Expected float16 or bfloat16 but got {dtype}."
+            )
+        if model.is_flat:
+            raise ValueError("[MixedPrecision] Flat parameters are not supported.")
+
+        self.model = model
+        self.optimizer = optimizer
+        self.dtype = dtype
+        self.dynamic = dynamic
+        self.growth_factor = growth_factor
+        self.backoff_factor = backoff_factor
+        self.growth_interval = growth_interval
+
+        self.state = OptimizerState()
+        self.state["master"] = tree_map(
+            lambda p: p.astype(mx.float32), model.trainable_parameters()
+        )
+        self.state["loss_scale"] = mx.array(loss_scale, mx.float32)
+        self.state["growth_count"] = mx.array(0, mx.uint32)
+        self.state["optimizer"] = optimizer.state
+        model.apply(self._to_half)
+
+    def _to_half(self, x: mx.array):
+        return x.astype(self.dtype) if x.dtype == mx.float32 else x
+
+    @property
+    def loss_scale(self):
+        """The current loss scale as a scalar array."""
+        return self.state["loss_scale"]
+
+    def value_and_grad(self, fn: Callable):
+        """Return a function computing the value of ``fn`` and the float32
+        gradients wrt the trainable parameters of the model like
+        :func:`mlx.nn.value_and_grad`.
+
+        The float32 array arguments are cast to the half precision type and
+        ``fn`` may return a tuple whose first element is the loss in which
+        case the whole tuple is returned as the value.
+        """
+
+        def scaled_fn(*args, **kwargs):
+            out = fn(*args, **kwargs)
+            loss = out[0] if isinstance(out, tuple) else out
+            scaled = loss.astype(mx.float32) * self.loss_scale
+            return (scaled, out) if isinstance(out, tuple) else (scaled, loss)
+
+        value_and_grad_fn = value_and_grad(self.model, scaled_fn)
+
+        def cast(x):
+            return self._to_half(x) if isinstance(x, mx.array) else x
+
+        def wrapped_value_grad_fn(*args, **kwargs):
+            args = [cast(a) for a in args]
+            kwargs = {k: cast(v) for k, v in kwargs.items()}
+            (_, value), grads = value_and_grad_fn(*args, **kwargs)
+
+            # Unscale in float32 so the master weights get full precision
+            inv_scale = 1 / self.loss_scale
+
+            def unscale(g):
+                if isinstance(g, SparseGradient):
+                    values = g.values.astype(mx.float32) * inv_scale
+                    return SparseGradient(g.indices, values, g.shape)
+                return g.astype(mx.float32) * inv_scale
+
+            return value, tree_map(unscale, grads)
+
+        return wrapped_value_grad_fn
+
+    def update(self, gradients: dict):
+        """Update the master weights with float32 gradients, as returned by
+        :meth:`value_and_grad`, and cast them into the model.
+
+        The update, including the state of the wrapped optimizer, is skipped
+        if any of the gradients is not finite.
+        """
+        arrays = [
+            g.values if isinstance(g, SparseGradient) else g
+            for g in tree_leaves(gradients)
+        ]
+        # The norm is infinite or nan if any gradient is
+        finite = mx.fast.global_norm(arrays) < float("inf")
+
+        previous = _copy_state(self.optimizer.state)
+        master = self.state["master"]
+        updated = self.optimizer.apply_gradients(gradients, master)
+        _select_state(finite, self.optimizer.state, previous)
+        master = tree_map(lambda new, old: mx.where(finite, new, old), updated, master)
+        self.state["master"] = master
+        self.model.update(tree_map(self._to_half, master))
+
+        if self.dynamic:
+            scale = self.loss_scale
+            count = mx.where(finite, self.state["growth_count"] + 1, 0)
+            grow = count >= self.growth_interval
+            scale = mx.where(grow, scale * self.growth_factor, scale)
+            scale = mx.where(finite, scale, scale * self.backoff_factor)
+            self.state["loss_scale"] = scale
+            self.state["growth_count"] = mx.where(grow, 0, count)
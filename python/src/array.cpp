@@ -63,6 +63,8 @@ auto to_scalar(array& a) {
       return py::cast(static_cast<float>(a.item<float16_t>(retain_graph)));
     case float32:
       return py::cast(a.item<float>(retain_graph));
+    case float64:
+      return py::cast(a.item<double>(retain_graph));
     case bfloat16:
       return py::cast(static_cast<float>(a.item<float16_t>(retain_graph)));
     case complex64:
@@ -99,6 +101,8 @@ py::object tolist(array& a) {
       return to_list<float16_t>(a, 0, 0);
     case float32:
       return to_list<float>(a, 0, 0);
+    case float64:
+      return to_list<double>(a, 0, 0);
     case bfloat16:
       return to_list<float16_t>(a, 0, 0);
     case complex64:
@@ -199,7 +203,7 @@ array array_from_list(T pl, std::optional<Dtype> dtype) {
       return array(vals.begin(), shape, dtype.value_or(int32));
     }
     case pyfloat: {
-      std::vector<float> vals;
+      std::vector<double> vals;
       fill_vector(pl, vals);
       return array(vals.begin(), shape, dtype.value_or(float32));
     }
@@ -306,6 +310,8 @@ py::array mlx_array_to_np(const array& src) {
       return mlx_array_to_np_t<float16_t>(src, py::dtype("float16"));
     case float32:
       return mlx_array_to_np_t<float>(src);
+    case float64:
+      return mlx_array_to_np_t<double>(src);
     case bfloat16: {
       auto a = astype(src, float32);
       eval({a}, src.is_tracer());
@@ -455,6 +461,7 @@ void init_array(py::module_& m) {
   m.attr("int64") = py::cast(int64);
   m.attr("float16") = py::cast(float16);
   m.attr("float32") = py::cast(float32);
+  m.attr("float64") = py::cast(float64);
   m.attr("bfloat16") = py::cast(bfloat16);
   m.attr("complex64") = py::cast(complex64);
 
@@ -482,7 +489,7 @@ void init_array(py::module_& m) {
           } else if (auto pv = std::get_if<py::int_>(&v); pv) {
             return array(py::cast<int>(*pv), t.value_or(int32));
           } else if (auto pv = std::get_if<py::float_>(&v); pv) {
-            return array(py::cast<float>(*pv), t.value_or(float32));
+            return array(py::cast<double>(*pv), t.value_or(float32));
           } else if (auto pv = std::get_if<std::complex<float>>(&v); pv) {
             return array(static_cast<complex64_t>(*pv), t.value_or(complex64));
           } else if (auto pv = std::get_if<py::list>(&v); pv) {
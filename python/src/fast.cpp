@@ -0,0 +1,368 @@
+// Copyright © 2023 Apple Inc.
+
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include "python/src/utils.h"
+
+#include "mlx/fast.h"
+#include "mlx/ops.h"
+
+namespace py = pybind11;
+using namespace py::literals;
+
+using namespace mlx::core;
+
+void init_fast(py::module_& parent_module) {
+  auto m = parent_module.def_submodule(
+      "fast", "mlx.core.fast: Fused implementations of common operations.");
+  m.def(
+      "sgd_step",
+      [](const array& parameter,
+         const array& gradient,
+         const ScalarOrArray& learning_rate,
+         const std::optional<array>& v,
+         float momentum,
+         float weight_decay,
+         float dampening,
+         bool nesterov,
+         StreamOrDevice s) {
+        auto out = fast::sgd_step(
+            parameter,
+            gradient,
+            v,
+            to_array(learning_rate, float32),
+            momentum,
+            weight_decay,
+            dampening,
+            nesterov,
+            s);
+        if (out.size() == 1) {
+          return py::make_tuple(out[0], py::none());
+        }
+        return py::make_tuple(out[0], out[1]);
+      },
+      "parameter"_a,
+      "gradient"_a,
+      "learning_rate"_a,
+      "v"_a = none,
+      "momentum"_a = 0.0f,
+      "weight_decay"_a = 0.0f,
+      "dampening"_a = 0.0f,
+      "nesterov"_a = false,
+      py::kw_only(),
+      "stream"_a = none,
+      R"pbdoc(
+        Update a parameter with stochastic gradient descent in one pass.
+
+        .. math::
+
+            g_t &= g_t + \lambda_w w_t \\
+            v_{t+1} &= \mu v_t + (1 - \tau) g_t \\
+            w_{t+1} &= w_t - \lambda v_{t+1}
+
+        With Nesterov momentum the parameter is updated with
+        :math:`g_t + \mu v_{t+1}` instead and without momentum with
+        :math:`g_t`.
+
+        Args:
+            parameter (array): The parameter :math:`w`.
+            gradient (array): The gradient :math:`g` of the same shape.
+            learning_rate (float or array): The learning rate :math:`\lambda`.
+            v (array, optional): The momentum buffer :math:`v`. The default
+               is ``None`` in which case it starts from zeros.
+            momentum (float, optional): The momentum strength :math:`\mu`.
+               Default: ``0``.
+            weight_decay (float, optional): The weight decay
+               :math:`\lambda_w`. Default: ``0``.
+            dampening (float, optional): The dampening :math:`\tau`.
+               Default: ``0``.
+            nesterov (bool, optional): Whether to use Nesterov momentum.
+               Default: ``False``.
+
+        Returns:
+            tuple(array, array): The updated parameter and momentum buffer.
+            The buffer is ``None`` if ``momentum`` is not positive.
+      )pbdoc");
+  m.def(
+      "adam_step",
+      [](const array& parameter,
+         const array& gradient,
+         const array& m,
+         const array& v,
+         const ScalarOrArray& learning_rate,
+         float beta1,
+         float beta2,
+         float eps,
+         float weight_decay,
+         StreamOrDevice s) {
+        auto out = fast::adam_step(
+            parameter,
+            gradient,
+            m,
+            v,
+            to_array(learning_rate, float32),
+            beta1,
+            beta2,
+            eps,
+            weight_decay,
+            s);
+        return py::make_tuple(out[0], out[1], out[2]);
+      },
+      "parameter"_a,
+      "gradient"_a,
+      "m"_a,
+      "v"_a,
+      "learning_rate"_a,
+      "beta1"_a,
+      "beta2"_a,
+      "eps"_a,
+      "weight_decay"_a = 0.0f,
+      py::kw_only(),
+      "stream"_a = none,
+      R"pbdoc(
+        Update a parameter with Adam in one pass.
+
+        .. math::
+
+            m_{t+1} &= \beta_1 m_t + (1 - \beta_1) g_t \\
+            v_{t+1} &= \beta_2 v_t + (1 - \beta_2) g_t^2 \\
+            w_{t+1} &= (1 - \lambda \lambda_w) w_t -
+                \lambda \frac{m_{t+1}}{\sqrt{v_{t+1}} + \epsilon}
+
+        The moments are not bias corrected, as in
+        :class:`mlx.optimizers.Adam`.
+
+        Args:
+            parameter (array): The parameter :math:`w`.
+            gradient (array): The gradient :math:`g` of the same shape.
+            m (array): The first moment :math:`m`.
+            v (array): The second moment :math:`v`.
+            learning_rate (float or array): The learning rate :math:`\lambda`.
+            beta1 (float): The decay :math:`\beta_1` of the first moment.
+            beta2 (float): The decay :math:`\beta_2` of the second moment.
+            eps (float): The term :math:`\epsilon` added to the denominator.
+            weight_decay (float, optional): The decoupled weight decay
+               :math:`\lambda_w` of AdamW. Default: ``0``.
+
+        Returns:
+            tuple(array, array, array): The updated parameter, first moment
+            and second moment.
+      )pbdoc");
+  m.def(
+      "adagrad_step",
+      [](const array& parameter,
+         const array& gradient,
+         const array& v,
+         const ScalarOrArray& learning_rate,
+         float eps,
+         StreamOrDevice s) {
+        auto out = fast::adagrad_step(
+            parameter, gradient, v, to_array(learning_rate, float32), eps, s);
+        return py::make_tuple(out[0], out[1]);
+      },
+      "parameter"_a,
+      "gradient"_a,
+      "v"_a,
+      "learning_rate"_a,
+      "eps"_a,
+      py::kw_only(),
+      "stream"_a = none,
+      R"pbdoc(
+        Update a parameter with Adagrad in one pass.
+
+        .. math::
+
+            v_{t+1} &= v_t + g_t^2 \\
+            w_{t+1} &= w_t - \lambda \frac{g_t}{\sqrt{v_{t+1}} + \epsilon}
+
+        Args:
+            parameter (array): The parameter :math:`w`.
+            gradient (array): The gradient :math:`g` of the same shape.
+            v (array): The sum of squared gradients :math:`v`.
+            learning_rate (float or array): The learning rate :math:`\lambda`.
+            eps (float): The term :math:`\epsilon` added to the denominator.
+
+        Returns:
+            tuple(array, array): The updated parameter and sum of squared
+            gradients.
+      )pbdoc");
+  m.def(
+      "adam_step_8bit",
+      [](const array& parameter,
+         const array& gradient,
+         const std::optional<array>& state,
+         const ScalarOrArray& learning_rate,
+         float beta1,
+         float beta2,
+         float eps,
+         float weight_decay,
+         int block_size,
+         StreamOrDevice s) {
+        auto out = fast::adam_step_8bit(
+            parameter,
+            gradient,
+            state,
+            to_array(learning_rate, float32),
+            beta1,
+            beta2,
+            eps,
+            weight_decay,
+            block_size,
+            s);
+        return py::make_tuple(out[0], out[1]);
+      },
+      "parameter"_a,
+      "gradient"_a,
+      "state"_a,
+      "learning_rate"_a,
+      "beta1"_a,
+      "beta2"_a,
+      "eps"_a,
+      "weight_decay"_a = 0.0f,
+      "block_size"_a = 256,
+      py::kw_only(),
+      "stream"_a = none,
+      R"pbdoc(
+        Update a parameter with Adam keeping the moments in 8 bits.
+
+        The update is the one of :func:`adam_step` but the first moment
+        :math:`m` and the square root of the second moment :math:`v` are
+        stored with 8-bit logarithmic codes relative to the maximum of
+        each block of ``block_size`` elements. The state takes
+        ``2 * block_size + 8`` bytes per block, about a quarter of
+        ``float32`` moments. The new state is computed in one pass over the
+        gradient and the parameter is then updated in one pass from it.
+
+        Only supported on the CPU.
+
+        Args:
+            parameter (array): The parameter :math:`w`.
+            gradient (array): The gradient :math:`g` of the same shape.
+            state (array): The ``uint8`` state. If it is ``None`` the moments
+               start from :math:`m = g` and :math:`v = g^2`.
+            learning_rate (float or array): The learning rate :math:`\lambda`.
+            beta1 (float): The decay :math:`\beta_1` of the first moment.
+            beta2 (float): The decay :math:`\beta_2` of the second moment.
+            eps (float): The term :math:`\epsilon` added to the denominator.
+            weight_decay (float, optional): The decoupled weight decay
+               :math:`\lambda_w` of AdamW. Default: ``0``.
+            block_size (int, optional): The number of elements quantized
+               together. Default: ``256``.
+
+        Returns:
+            tuple(array, array): The updated parameter and state.
+      )pbdoc");
+  m.def(
+      "adafactor_step",
+      [](const array& parameter,
+         const array& gradient,
+         const array& row,
+         const array& col,
+         const ScalarOrArray& learning_rate,
+         const ScalarOrArray& beta2,
+         float eps1,
+         float eps2,
+         float clip_threshold,
+         float weight_decay,
+         bool scale_parameter,
+         StreamOrDevice s) {
+        auto out = fast::adafactor_step(
+            parameter,
+            gradient,
+            row,
+            col,
+            to_array(learning_rate, float32),
+            to_array(beta2, float32),
+            eps1,
+            eps2,
+            clip_threshold,
+            weight_decay,
+            scale_parameter,
+            s);
+        return py::make_tuple(out[0], out[1], out[2]);
+      },
+      "parameter"_a,
+      "gradient"_a,
+      "row"_a,
+      "col"_a,
+      "learning_rate"_a,
+      "beta2"_a,
+      "eps1"_a = 1e-30f,
+      "eps2"_a = 1e-3f,
+      "clip_threshold"_a = 1.0f,
+      "weight_decay"_a = 0.0f,
+      "scale_parameter"_a = true,
+      py::kw_only(),
+      "stream"_a = none,
+      R"pbdoc(
+        Update a parameter with Adafactor.
+
+        The second moment of a parameter of shape ``(..., r, c)`` is
+        factored into the running means :math:`R` of the squared gradient
+        over its rows, of shape ``(..., r)``, and :math:`C` over its
+        columns, of shape ``(..., c)``. Parameters with less than two
+        dimensions are a single row so ``row`` has shape ``(1,)`` and
+        ``col`` the size of the parameter.
+
+        .. math::
+
+            R_{t+1} &= \beta_2 R_t + (1 - \beta_2)
+                \mathrm{mean}_j(g_t^2 + \epsilon_1) \\
+            C_{t+1} &= \beta_2 C_t + (1 - \beta_2)
+                \mathrm{mean}_i(g_t^2 + \epsilon_1) \\
+            u_t &= g_t \Big/ \sqrt{R_{t+1} C_{t+1} / \mathrm{mean}(R_{t+1})} \\
+            \alpha_t &= \lambda \max(\epsilon_2, \mathrm{RMS}(w_t)) \\
+            w_{t+1} &= (1 - \alpha_t \lambda_w) w_t -
+                \alpha_t \frac{u_t}{\max(1, \mathrm{RMS}(u_t) / d)}
+
+        Without ``scale_parameter`` the step size :math:`\alpha_t` is the
+        learning rate :math:`\lambda`.
+
+        Args:
+            parameter (array): The parameter :math:`w`.
+            gradient (array): The gradient :math:`g` of the same shape.
+            row (array): The row means :math:`R`.
+            col (array): The column means :math:`C`.
+            learning_rate (float or array): The learning rate :math:`\lambda`.
+            beta2 (float or array): The decay :math:`\beta_2` of the means.
+            eps1 (float, optional): The term :math:`\epsilon_1` added to the
+               squared gradient. Default: ``1e-30``.
+            eps2 (float, optional): The smallest parameter scale
+               :math:`\epsilon_2`. Default: ``1e-3``.
+            clip_threshold (float, optional): The threshold :math:`d` of the
+               RMS of the update. Default: ``1.0``.
+            weight_decay (float, optional): The weight decay
+               :math:`\lambda_w`. Default: ``0``.
+            scale_parameter (bool, optional): Whether to scale the learning
+               rate by the RMS of the parameter. Default: ``True``.
+
+        Returns:
+            tuple(array, array, array): The updated parameter, row means and
+            column means.
+      )pbdoc");
+  m.def(
+      "global_norm",
+      [](const std::vector<array>& arrays, StreamOrDevice s) {
+        return fast::global_norm(arrays, s);
+      },
+      "arrays"_a,
+      py::kw_only(),
+      "stream"_a = none,
+      R"pbdoc(
+        Compute the L2 norm of the elements of all the arrays together.
+
+        .. math::
+
+            \|g\| = \sqrt{\sum_i \sum_j g_{ij}^2}
+
+        The squares are summed in a single pass over the arrays in
+        ``float32``, or ``float64`` if one of the arrays is ``float64``.
+
+        Args:
+            arrays (list(array)): The arrays whose norm to compute.
+
+        Returns:
+            array: The scalar norm.
+      )pbdoc");
+}
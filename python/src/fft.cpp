@@ -467,4 +467,118 @@ void init_fft(py::module_& parent_module) {
         Returns:
             array: The real array containing the inverse of :func:`rfftn`.
       )pbdoc");
+  m.def(
+      "stft",
+      [](const array& a,
+         int n_fft,
+         std::optional<int> hop_length,
+         const std::optional<array>& window,
+         bool center,
+         StreamOrDevice s) {
+        return fft::stft(
+            a, n_fft, hop_length.value_or(n_fft / 4), window, center, s);
+      },
+      "a"_a,
+      "n_fft"_a,
+      "hop_length"_a = none,
+      "window"_a = none,
+      "center"_a = true,
+      "stream"_a = none,
+      R"pbdoc(
+        Short-time Fourier transform.
+
+        The last axis of ``a`` is split into frames of ``n_fft`` samples
+        every ``hop_length`` samples and the real DFT of each frame is
+        computed. The frames are read in place without copying the input.
+
+        Args:
+            a (array): The real input signals.
+            n_fft (int): The size of each frame.
+            hop_length (int, optional): The number of samples between the
+               starts of consecutive frames. The default is ``n_fft // 4``.
+            window (array, optional): A window of size ``n_fft`` each frame
+               is multiplied with. The default is ``None`` in which case the
+               frames are not windowed.
+            center (bool, optional): If ``True`` the input is padded with
+               ``n_fft // 2`` zeros on both sides so that frame ``t`` is
+               centered on sample ``t * hop_length``. Default: ``True``.
+
+        Returns:
+            array: The complex array of shape
+            ``(..., n_frames, n_fft // 2 + 1)`` with the DFT of each frame.
+      )pbdoc");
+  m.def(
+      "istft",
+      [](const array& a,
+         int n_fft,
+         std::optional<int> hop_length,
+         const std::optional<array>& window,
+         bool center,
+         std::optional<int> length,
+         StreamOrDevice s) {
+        return fft::istft(
+            a,
+            n_fft,
+            hop_length.value_or(n_fft / 4),
+            window,
+            center,
+            length,
+            s);
+      },
+      "a"_a,
+      "n_fft"_a,
+      "hop_length"_a = none,
+      "window"_a = none,
+      "center"_a = true,
+      "length"_a = none,
+      "stream"_a = none,
+      R"pbdoc(
+        The inverse of :func:`stft`.
+
+        The inverse DFTs of the frames are overlap-added and divided by the
+        overlap-added squared window.
+
+        Args:
+            a (array): The complex input of shape
+               ``(..., n_frames, n_fft // 2 + 1)``.
+            n_fft (int): The size of each frame.
+            hop_length (int, optional): The number of samples between the
+               starts of consecutive frames. The default is ``n_fft // 4``.
+            window (array, optional): The window passed to :func:`stft`.
+            center (bool, optional): Whether the input of :func:`stft` was
+               centered. Default: ``True``.
+            length (int, optional): The number of samples of the output
+               which is trimmed or padded with zeros to this size. The
+               default is ``None`` in which case every sample the frames
+               cover is returned.
+
+        Returns:
+            array: The real signals.
+      )pbdoc");
+  m.def(
+      "set_num_threads",
+      &fft::set_num_threads,
+      "n"_a,
+      R"pbdoc(
+        Set the maximum number of threads an FFT on the CPU may use.
+
+        A batch of transforms is split across threads along each
+        transformed axis. Small batches use fewer threads. The setting is
+        read when a transform is evaluated, not when it is built, so it
+        applies to every transform evaluated afterwards.
+
+        Args:
+            n (int): The number of threads. ``0``, the default, uses every
+               hardware thread and ``1`` runs the transforms on the
+               calling thread.
+      )pbdoc");
+  m.def(
+      "num_threads",
+      &fft::num_threads,
+      R"pbdoc(
+        The maximum number of threads an FFT on the CPU may use.
+
+        Returns:
+            int: The value set with :func:`set_num_threads`.
+      )pbdoc");
 }
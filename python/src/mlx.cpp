@@ -15,6 +15,8 @@ void init_ops(py::module_&);
 void init_transforms(py::module_&);
 void init_random(py::module_&);
 void init_fft(py::module_&);
+void init_fast(py::module_&);
+void init_trees(py::module_&);
 
 PYBIND11_MODULE(core, m) {
   m.doc() = "mlx: A framework for machine learning on Apple Silicon.";
@@ -29,5 +31,7 @@ PYBIND11_MODULE(core, m) {
   init_transforms(m);
   init_random(m);
   init_fft(m);
+  init_fast(m);
+  init_trees(m);
   m.attr("__version__") = TOSTRING(_VERSION_);
 }
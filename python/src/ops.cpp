@@ -2055,7 +2055,8 @@ void init_ops(py::module_& m) {
 
         Returns the ``k`` largest elements from the input along a given axis.
 
-        The elements will not necessarily be in sorted order.
+        The elements are returned in descending order. NaNs are considered
+        larger than any other value.
 
         Args:
             a (array): Input array.
@@ -2067,6 +2068,41 @@ void init_ops(py::module_& m) {
         Returns:
             array: The top ``k`` elements from the input.
       )pbdoc");
+  m.def(
+      "argtopk",
+      [](const array& a, int k, std::optional<int> axis, StreamOrDevice s) {
+        if (axis) {
+          return argtopk(a, k, *axis, s);
+        } else {
+          return argtopk(a, k, s);
+        }
+      },
+      "a"_a,
+      py::pos_only(),
+      "k"_a,
+      "axis"_a = -1,
+      py::kw_only(),
+      "stream"_a = none,
+      R"pbdoc(
+        argtopk(a: array, /, k: int, axis: Union[None, int] = -1, *, stream: Union[None, Stream, Device] = None) -> array
+
+        Returns the indices of the ``k`` largest elements from the input
+        along a given axis.
+
+        The indices are ordered by descending value of the elements so that
+        ``take_along_axis(a, argtopk(a, k), axis=-1)`` equals
+        ``topk(a, k)``. Equal elements keep their order along the axis.
+
+        Args:
+            a (array): Input array.
+            k (int): ``k`` top elements to return the indices of.
+            axis (int or None, optional): Optional axis to select over.
+              If ``None``, this selects over the flattened array. If
+              unspecified, it defaults to ``-1``.
+
+        Returns:
+            array: The ``uint32`` indices of the top ``k`` elements.
+      )pbdoc");
   m.def(
       "broadcast_to",
       [](const ScalarOrArray& a,
@@ -5,6 +5,7 @@
 #include <pybind11/stl.h>
 #include <algorithm>
 #include <fstream>
+#include <mutex>
 #include <numeric>
 #include <sstream>
 
@@ -12,6 +13,7 @@
 #include "mlx/graph_utils.h"
 #include "mlx/transforms.h"
 #include "mlx/transforms_impl.h"
+#include "python/src/trees.h"
 
 namespace py = pybind11;
 using namespace py::literals;
@@ -31,138 +33,6 @@ std::vector<T> to_vector(const std::variant<T, std::vector<T>>& v) {
   return vals;
 }
 
-void tree_visit(py::object tree, std::function<void(py::handle)> visitor) {
-  std::function<void(py::handle)> recurse;
-  recurse = [&](py::handle subtree) {
-    if (py::isinstance<py::list>(subtree) ||
-        py::isinstance<py::tuple>(subtree)) {
-      for (auto item : subtree) {
-        recurse(item);
-      }
-    } else if (py::isinstance<py::dict>(subtree)) {
-      for (auto item : py::cast<py::dict>(subtree)) {
-        recurse(item.second);
-      }
-    } else {
-      visitor(subtree);
-    }
-  };
-
-  recurse(tree);
-}
-
-template <typename T, typename U, typename V>
-void validate_subtrees(const std::vector<py::object>& subtrees) {
-  int len = py::cast<T>(subtrees[0]).size();
-  for (auto& subtree : subtrees) {
-    if ((py::isinstance<T>(subtree) && py::cast<T>(subtree).size() != len) ||
-        py::isinstance<U>(subtree) || py::isinstance<V>(subtree)) {
-      throw std::invalid_argument(
-          "[tree_map] Additional input tree is not a valid prefix of the first tree.");
-    }
-  }
-}
-
-py::object tree_map(
-    const std::vector<py::object>& trees,
-    std::function<py::object(const std::vector<py::object>&)> transform) {
-  std::function<py::object(const std::vector<py::object>&)> recurse;
-
-  recurse = [&](const std::vector<py::object>& subtrees) {
-    if (py::isinstance<py::list>(subtrees[0])) {
-      py::list l;
-      std::vector<py::object> items(subtrees.size());
-      validate_subtrees<py::list, py::tuple, py::dict>(subtrees);
-      for (int i = 0; i < py::cast<py::list>(subtrees[0]).size(); ++i) {
-        for (int j = 0; j < subtrees.size(); ++j) {
-          if (py::isinstance<py::list>(subtrees[j])) {
-            items[j] = py::cast<py::list>(subtrees[j])[i];
-          } else {
-            items[j] = subtrees[j];
-          }
-        }
-        l.append(recurse(items));
-      }
-      return py::cast<py::object>(l);
-    } else if (py::isinstance<py::tuple>(subtrees[0])) {
-      //  Check the rest of the subtrees
-      std::vector<py::object> items(subtrees.size());
-      int len = py::cast<py::tuple>(subtrees[0]).size();
-      py::tuple l(len);
-      validate_subtrees<py::tuple, py::list, py::dict>(subtrees);
-      for (int i = 0; i < len; ++i) {
-        for (int j = 0; j < subtrees.size(); ++j) {
-          if (py::isinstance<py::tuple>(subtrees[j])) {
-            items[j] = py::cast<py::tuple>(subtrees[j])[i];
-          } else {
-            items[j] = subtrees[j];
-          }
-        }
-        l[i] = recurse(items);
-      }
-      return py::cast<py::object>(l);
-    } else if (py::isinstance<py::dict>(subtrees[0])) {
-      std::vector<py::object> items(subtrees.size());
-      validate_subtrees<py::dict, py::list, py::tuple>(subtrees);
-      py::dict d;
-      for (auto item : py::cast<py::dict>(subtrees[0])) {
-        for (int j = 0; j < subtrees.size(); ++j) {
-          if (py::isinstance<py::dict>(subtrees[j])) {
-            auto subdict = py::cast<py::dict>(subtrees[j]);
-            if (!subdict.contains(item.first)) {
-              throw std::invalid_argument(
-                  "[tree_map] Tree is not a valid prefix tree of the first tree.");
-            }
-            items[j] = subdict[item.first];
-          } else {
-            items[j] = subtrees[j];
-          }
-        }
-        d[item.first] = recurse(items);
-      }
-      return py::cast<py::object>(d);
-    } else {
-      return transform(subtrees);
-    }
-  };
-  return recurse(trees);
-}
-
-py::object tree_map(
-    py::object tree,
-    std::function<py::object(py::handle)> transform) {
-  return tree_map({tree}, [&](std::vector<py::object> inputs) {
-    return transform(inputs[0]);
-  });
-}
-
-std::vector<array> tree_flatten(py::object tree, bool strict = true) {
-  std::vector<array> flat_tree;
-
-  tree_visit(tree, [&](py::handle obj) {
-    if (py::isinstance<array>(obj)) {
-      flat_tree.push_back(py::cast<array>(obj));
-    } else if (strict) {
-      throw std::invalid_argument("Argument is not an array");
-    }
-  });
-
-  return flat_tree;
-}
-
-py::object tree_unflatten(
-    py::object tree,
-    const std::vector<array>& values,
-    int index = 0) {
-  return tree_map(tree, [&](py::handle obj) {
-    if (py::isinstance<array>(obj)) {
-      return py::cast(values[index++]);
-    } else {
-      return py::cast<py::object>(obj);
-    }
-  });
-}
-
 auto validate_argnums_argnames(
     const std::optional<IntOrVec>& argnums,
     const StrOrVec& argnames) {
@@ -437,6 +307,71 @@ auto py_vmap(
   };
 }
 
+// The functions passed to checkpoint are kept in the graph by the Checkpoint
+// primitive which may be destroyed by the threads evaluating the graph. These
+// do not hold the GIL, so the python objects are released later from a thread
+// that does.
+struct PyCheckpointedFun {
+  py::function fun;
+  py::object inputs;
+  py::object outputs;
+};
+
+std::mutex checkpoint_garbage_mutex;
+std::vector<PyCheckpointedFun*> checkpoint_garbage;
+
+int release_checkpointed_funs(void* /* arg */) {
+  std::vector<PyCheckpointedFun*> garbage;
+  {
+    std::lock_guard<std::mutex> lock(checkpoint_garbage_mutex);
+    garbage.swap(checkpoint_garbage);
+  }
+  for (auto f : garbage) {
+    delete f;
+  }
+  return 0;
+}
+
+void delete_checkpointed_fun(PyCheckpointedFun* f) {
+  if (PyGILState_Check()) {
+    delete f;
+    return;
+  }
+  bool schedule;
+  {
+    std::lock_guard<std::mutex> lock(checkpoint_garbage_mutex);
+    checkpoint_garbage.push_back(f);
+    schedule = checkpoint_garbage.size() == 1;
+  }
+  // If the call cannot be scheduled the next call to a checkpointed function
+  // releases the garbage
+  if (schedule) {
+    Py_AddPendingCall(release_checkpointed_funs, nullptr);
+  }
+}
+
+auto py_checkpoint(const py::function& fun) {
+  return [fun](const py::args& args, const py::kwargs& kwargs) {
+    release_checkpointed_funs(nullptr);
+
+    std::shared_ptr<PyCheckpointedFun> state(
+        new PyCheckpointedFun{fun, py::make_tuple(args, kwargs), py::none()},
+        delete_checkpointed_fun);
+
+    // The function is called once now and again for every output in the
+    // backward pass
+    auto inner_fun = [state](const std::vector<array>& a) {
+      auto inputs = py::cast<py::tuple>(tree_unflatten(state->inputs, a));
+      state->outputs = state->fun(
+          *inputs[0].cast<py::tuple>(), **inputs[1].cast<py::dict>());
+      return tree_flatten(state->outputs, false);
+    };
+
+    auto outputs = checkpoint(inner_fun)(tree_flatten(state->inputs, false));
+    return tree_unflatten(state->outputs, outputs);
+  };
+}
+
 void init_transforms(py::module_& m) {
   m.def(
       "eval",
@@ -667,6 +602,46 @@ void init_transforms(py::module_& m) {
         Returns:
             function: The vectorized function.
       )pbdoc");
+  m.def(
+      "checkpoint",
+      [](const py::function& fun) {
+        return py::cpp_function(py_checkpoint(fun));
+      },
+      "fun"_a,
+      R"pbdoc(
+        Returns a checkpointed version of ``fun``.
+
+        The checkpointed function computes the same outputs as ``fun`` but
+        does not keep the intermediate arrays of ``fun`` until the gradient is
+        computed. They are recomputed from the inputs in the backward pass
+        instead, which trades compute for memory. The recomputation reuses
+        the random keys the forward pass drew from the global key sequence
+        so random ops, such as dropout, give the same results.
+
+        .. code-block:: python
+
+            import mlx.core as mx
+
+            def block(x, w):
+                return mx.tanh(x @ w) @ w.T
+
+            checkpointed_block = mx.checkpoint(block)
+
+            def loss(x, w):
+                for _ in range(10):
+                    x = checkpointed_block(x, w)
+                return x.sum()
+
+            grad_fn = mx.grad(loss, argnums=1)
+
+        Args:
+            fun (function): A function which takes a variable number of
+              :class:`array` or trees of :class:`array` and returns
+              a variable number of :class:`array` or trees of :class:`array`.
+
+        Returns:
+            function: A function with the same inputs and outputs as ``fun``.
+      )pbdoc");
   m.def(
       "simplify",
       [](const py::args& args) {
@@ -0,0 +1,641 @@
+// Copyright © 2023 Apple Inc.
+
+#include <pybind11/functional.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+#include <algorithm>
+#include <functional>
+#include <optional>
+#include <sstream>
+#include <unordered_map>
+
+#include "python/src/trees.h"
+
+namespace py = pybind11;
+using namespace py::literals;
+using namespace mlx::core;
+
+void tree_visit(py::object tree, std::function<void(py::handle)> visitor) {
+  std::function<void(py::handle)> recurse;
+  recurse = [&](py::handle subtree) {
+    if (py::isinstance<py::list>(subtree) ||
+        py::isinstance<py::tuple>(subtree)) {
+      for (auto item : subtree) {
+        recurse(item);
+      }
+    } else if (py::isinstance<py::dict>(subtree)) {
+      for (auto item : py::cast<py::dict>(subtree)) {
+        recurse(item.second);
+      }
+    } else {
+      visitor(subtree);
+    }
+  };
+
+  recurse(tree);
+}
+
+template <typename T, typename U, typename V>
+void validate_subtrees(const std::vector<py::object>& subtrees) {
+  int len = py::cast<T>(subtrees[0]).size();
+  for (auto& subtree : subtrees) {
+    if ((py::isinstance<T>(subtree) && py::cast<T>(subtree).size() != len) ||
+        py::isinstance<U>(subtree) || py::isinstance<V>(subtree)) {
+      throw std::invalid_argument(
+          "[tree_map] Additional input tree is not a valid prefix of the first tree.");
+    }
+  }
+}
+
+py::object tree_map(
+    const std::vector<py::object>& trees,
+    std::function<py::object(const std::vector<py::object>&)> transform) {
+  std::function<py::object(const std::vector<py::object>&)> recurse;
+
+  recurse = [&](const std::vector<py::object>& subtrees) {
+    if (py::isinstance<py::list>(subtrees[0])) {
+      py::list l;
+      std::vector<py::object> items(subtrees.size());
+      validate_subtrees<py::list, py::tuple, py::dict>(subtrees);
+      for (int i = 0; i < py::cast<py::list>(subtrees[0]).size(); ++i) {
+        for (int j = 0; j < subtrees.size(); ++j) {
+          if (py::isinstance<py::list>(subtrees[j])) {
+            items[j] = py::cast<py::list>(subtrees[j])[i];
+          } else {
+            items[j] = subtrees[j];
+          }
+        }
+        l.append(recurse(items));
+      }
+      return py::cast<py::object>(l);
+    } else if (py::isinstance<py::tuple>(subtrees[0])) {
+      //  Check the rest of the subtrees
+      std::vector<py::object> items(subtrees.size());
+      int len = py::cast<py::tuple>(subtrees[0]).size();
+      py::tuple l(len);
+      validate_subtrees<py::tuple, py::list, py::dict>(subtrees);
+      for (int i = 0; i < len; ++i) {
+        for (int j = 0; j < subtrees.size(); ++j) {
+          if (py::isinstance<py::tuple>(subtrees[j])) {
+            items[j] = py::cast<py::tuple>(subtrees[j])[i];
+          } else {
+            items[j] = subtrees[j];
+          }
+        }
+        l[i] = recurse(items);
+      }
+      return py::cast<py::object>(l);
+    } else if (py::isinstance<py::dict>(subtrees[0])) {
+      std::vector<py::object> items(subtrees.size());
+      validate_subtrees<py::dict, py::list, py::tuple>(subtrees);
+      py::dict d;
+      for (auto item : py::cast<py::dict>(subtrees[0])) {
+        for (int j = 0; j < subtrees.size(); ++j) {
+          if (py::isinstance<py::dict>(subtrees[j])) {
+            auto subdict = py::cast<py::dict>(subtrees[j]);
+            if (!subdict.contains(item.first)) {
+              throw std::invalid_argument(
+                  "[tree_map] Tree is not a valid prefix tree of the first tree.");
+            }
+            items[j] = subdict[item.first];
+          } else {
+            items[j] = subtrees[j];
+          }
+        }
+        d[item.first] = recurse(items);
+      }
+      return py::cast<py::object>(d);
+    } else {
+      return transform(subtrees);
+    }
+  };
+  return recurse(trees);
+}
+
+py::object tree_map(
+    py::object tree,
+    std::function<py::object(py::handle)> transform) {
+  return tree_map({tree}, [&](std::vector<py::object> inputs) {
+    return transform(inputs[0]);
+  });
+}
+
+std::vector<array> tree_flatten(py::object tree, bool strict /* = true */) {
+  std::vector<array> flat_tree;
+
+  tree_visit(tree, [&](py::handle obj) {
+    if (py::isinstance<array>(obj)) {
+      flat_tree.push_back(py::cast<array>(obj));
+    } else if (strict) {
+      throw std::invalid_argument("Argument is not an array");
+    }
+  });
+
+  return flat_tree;
+}
+
+py::object tree_unflatten(
+    py::object tree,
+    const std::vector<array>& values,
+    int index /* = 0 */) {
+  return tree_map(tree, [&](py::handle obj) {
+    if (py::isinstance<array>(obj)) {
+      return py::cast(values[index++]);
+    } else {
+      return py::cast<py::object>(obj);
+    }
+  });
+}
+
+namespace {
+
+// The python tree utilities of mlx.utils. They follow the semantics of the
+// original pure python implementations, including the handling of prefixes
+// and of dictionaries keys.
+
+bool is_leaf(const py::object& is_leaf_fn, py::handle tree) {
+  if (is_leaf_fn.is_none()) {
+    return false;
+  }
+  int truth = PyObject_IsTrue(is_leaf_fn(tree).ptr());
+  if (truth < 0) {
+    throw py::error_already_set();
+  }
+  return truth;
+}
+
+// Drop the first character of a utf-8 string
+std::string drop_first(const std::string& s) {
+  size_t i = s.empty() ? 0 : 1;
+  while (i < s.size() && (static_cast<unsigned char>(s[i]) & 0xc0) == 0x80) {
+    i++;
+  }
+  return s.substr(i);
+}
+
+py::object map_tree(
+    const py::object& fn,
+    py::handle tree,
+    const std::vector<py::object>& rest) {
+  std::vector<py::object> children(rest.size());
+  if (py::isinstance<py::list>(tree) || py::isinstance<py::tuple>(tree)) {
+    py::list l;
+    int i = 0;
+    for (auto child : tree) {
+      for (int j = 0; j < rest.size(); ++j) {
+        children[j] = rest[j][py::int_(i)];
+      }
+      l.append(map_tree(fn, child, children));
+      i++;
+    }
+    if (py::isinstance<py::tuple>(tree)) {
+      return py::tuple(l);
+    }
+    return std::move(l);
+  } else if (py::isinstance<py::dict>(tree)) {
+    py::dict d;
+    for (auto [k, child] : py::reinterpret_borrow<py::dict>(tree)) {
+      for (int j = 0; j < rest.size(); ++j) {
+        children[j] = rest[j][k];
+      }
+      d[k] = map_tree(fn, child, children);
+    }
+    return std::move(d);
+  } else {
+    py::tuple args(rest.size() + 1);
+    args[0] = tree;
+    for (int j = 0; j < rest.size(); ++j) {
+      args[j + 1] = rest[j];
+    }
+    return fn(*args);
+  }
+}
+
+// Visits the leaves of the tree and their keys in the dot notation. The key
+// is only built if with_keys is true.
+void visit_leaves(
+    py::handle tree,
+    const py::object& is_leaf_fn,
+    std::string& prefix,
+    bool with_keys,
+    const std::function<void(const std::string&, py::handle)>& visitor) {
+  if (!is_leaf(is_leaf_fn, tree)) {
+    size_t n = prefix.size();
+    if (py::isinstance<py::list>(tree) || py::isinstance<py::tuple>(tree)) {
+      int i = 0;
+      for (auto child : tree) {
+        if (with_keys) {
+          prefix += ".";
+          prefix += std::to_string(i++);
+        }
+        visit_leaves(child, is_leaf_fn, prefix, with_keys, visitor);
+        prefix.resize(n);
+      }
+      return;
+    }
+    if (py::isinstance<py::dict>(tree)) {
+      for (auto [k, child] : py::reinterpret_borrow<py::dict>(tree)) {
+        if (with_keys) {
+          prefix += ".";
+          prefix += py::str(k).cast<std::string>();
+        }
+        visit_leaves(child, is_leaf_fn, prefix, with_keys, visitor);
+        prefix.resize(n);
+      }
+      return;
+    }
+  }
+  visitor(prefix, tree);
+}
+
+// The integer a key of a list refers to or nullopt if the key is not an
+// integer according to python's int()
+std::optional<long long> parse_index(const std::string& key) {
+  if (!key.empty() && key.size() < 19 &&
+      std::all_of(key.begin(), key.end(), [](char c) {
+        return c >= '0' && c <= '9';
+      })) {
+    return std::stoll(key);
+  }
+  try {
+    return py::int_(py::str(key)).cast<long long>();
+  } catch (py::error_already_set& e) {
+    if (e.matches(PyExc_ValueError)) {
+      return std::nullopt;
+    }
+    throw;
+  }
+}
+
+using FlatTree = std::vector<std::pair<std::string, py::object>>;
+
+py::object unflatten_tree(const FlatTree& tree) {
+  if (tree.size() == 1 && tree[0].first.empty()) {
+    return tree[0].second;
+  }
+  if (tree.empty()) {
+    throw py::index_error("list index out of range");
+  }
+
+  auto first = tree[0].first.substr(0, tree[0].first.find('.'));
+  bool is_list = parse_index(first).has_value();
+
+  // Collect the children in the order they first appear
+  std::vector<std::string> order;
+  std::unordered_map<std::string, FlatTree> children;
+  for (auto& [key, value] : tree) {
+    auto dot = key.find('.');
+    auto current = key.substr(0, dot);
+    auto next = (dot == std::string::npos) ? "" : key.substr(dot + 1);
+    auto it = children.find(current);
+    if (it == children.end()) {
+      order.push_back(current);
+      it = children.emplace(current, FlatTree{}).first;
+    }
+    it->second.emplace_back(std::move(next), value);
+  }
+
+  // Recursively map them to the original container
+  if (is_list) {
+    std::vector<std::pair<long long, std::string>> keys;
+    for (auto& k : order) {
+      auto i = parse_index(k);
+      if (!i.has_value()) {
+        // Raises the ValueError of int()
+        py::int_(py::str(k));
+      }
+      keys.emplace_back(i.value(), k);
+    }
+    std::sort(keys.begin(), keys.end());
+    py::list l;
+    for (auto& [i, k] : keys) {
+      while (i > static_cast<long long>(l.size())) {
+        l.append(py::dict());
+      }
+      l.append(unflatten_tree(children[k]));
+    }
+    return std::move(l);
+  }
+  py::dict d;
+  for (auto& k : order) {
+    d[py::str(k)] = unflatten_tree(children[k]);
+  }
+  return std::move(d);
+}
+
+// A tree with every leaf replaced by None
+py::object structure_of(
+    py::handle tree,
+    const py::object& is_leaf_fn,
+    size_t& num_leaves) {
+  if (!is_leaf(is_leaf_fn, tree)) {
+    if (py::isinstance<py::list>(tree) || py::isinstance<py::tuple>(tree)) {
+      py::list l;
+      for (auto child : tree) {
+        l.append(structure_of(child, is_leaf_fn, num_leaves));
+      }
+      if (py::isinstance<py::tuple>(tree)) {
+        return py::tuple(l);
+      }
+      return std::move(l);
+    }
+    if (py::isinstance<py::dict>(tree)) {
+      py::dict d;
+      for (auto [k, child] : py::reinterpret_borrow<py::dict>(tree)) {
+        d[k] = structure_of(child, is_leaf_fn, num_leaves);
+      }
+      return std::move(d);
+    }
+  }
+  num_leaves++;
+  return py::none();
+}
+
+class TreeStructure {
+ public:
+  TreeStructure(py::object tree, const py::object& is_leaf_fn)
+      : num_leaves_(0) {
+    structure_ = structure_of(tree, is_leaf_fn, num_leaves_);
+  }
+
+  size_t num_leaves() const {
+    return num_leaves_;
+  }
+
+  py::object unflatten(const py::iterable& leaves) const {
+    std::vector<py::object> values;
+    for (auto leaf : leaves) {
+      values.push_back(py::reinterpret_borrow<py::object>(leaf));
+    }
+    if (values.size() != num_leaves_) {
+      std::ostringstream msg;
+      msg << "[TreeStructure] Expected " << num_leaves_
+          << " leaves but received " << values.size() << ".";
+      throw std::invalid_argument(msg.str());
+    }
+    size_t index = 0;
+    std::function<py::object(py::handle)> recurse;
+    recurse = [&](py::handle node) -> py::object {
+      if (py::isinstance<py::list>(node) || py::isinstance<py::tuple>(node)) {
+        py::list l;
+        for (auto child : node) {
+          l.append(recurse(child));
+        }
+        if (py::isinstance<py::tuple>(node)) {
+          return py::tuple(l);
+        }
+        return std::move(l);
+      }
+      if (py::isinstance<py::dict>(node)) {
+        py::dict d;
+        for (auto [k, child] : py::reinterpret_borrow<py::dict>(node)) {
+          d[k] = recurse(child);
+        }
+        return std::move(d);
+      }
+      return values[index++];
+    };
+    return recurse(structure_);
+  }
+
+  const py::object& structure() const {
+    return structure_;
+  }
+
+ private:
+  py::object structure_;
+  size_t num_leaves_;
+};
+
+} // namespace
+
+void init_trees(py::module_& parent_module) {
+  auto m = parent_module.def_submodule(
+      "_tree_utils", "mlx.core._tree_utils: Python tree utilities.");
+
+  py::class_<TreeStructure>(
+      m,
+      "TreeStructure",
+      R"pbdoc(
+      The structure of a python tree without its leaves.
+
+      It is returned by :func:`tree_structure` and rebuilds trees of the same
+      structure from a list of leaves much faster than
+      :func:`tree_unflatten` since no keys need to be parsed.
+
+      .. code-block:: python
+
+          from mlx.utils import tree_leaves, tree_structure
+
+          tree = {"a": [1, 2], "b": 3}
+          structure = tree_structure(tree)
+          leaves = tree_leaves(tree)
+          print(structure.unflatten([2 * x for x in leaves]))
+          # {"a": [2, 4], "b": 6}
+      )pbdoc")
+      .def_property_readonly(
+          "num_leaves",
+          &TreeStructure::num_leaves,
+          R"pbdoc(The number of leaves of the tree.)pbdoc")
+      .def(
+          "unflatten",
+          &TreeStructure::unflatten,
+          "leaves"_a,
+          R"pbdoc(
+            Build a tree of this structure from a list of leaves.
+
+            Args:
+                leaves (List[Any]): The leaves in the order of
+                  :func:`tree_leaves`.
+
+            Returns:
+                A python tree.
+          )pbdoc")
+      .def(
+          "__eq__",
+          [](const TreeStructure& a, const TreeStructure& b) {
+            return a.structure().equal(b.structure());
+          },
+          py::is_operator())
+      .def("__repr__", [](const TreeStructure& t) {
+        return "TreeStructure(" + py::repr(t.structure()).cast<std::string>() +
+            ")";
+      });
+
+  m.def(
+      "tree_map",
+      [](const py::object& fn, const py::object& tree, const py::args& rest) {
+        std::vector<py::object> rest_trees;
+        for (auto r : rest) {
+          rest_trees.push_back(py::reinterpret_borrow<py::object>(r));
+        }
+        return map_tree(fn, tree, rest_trees);
+      },
+      "fn"_a,
+      "tree"_a,
+      R"pbdoc(
+        Applies ``fn`` to the leaves of the python tree ``tree`` and
+        returns a new collection with the results.
+
+        If ``rest`` is provided, every item is assumed to be a superset of ``tree``
+        and the corresponding leaves are provided as extra positional arguments to
+        ``fn``. In that respect, :meth:`tree_map` is closer to :func:`itertools.starmap`
+        than to :func:`map`.
+
+        .. code-block:: python
+
+            import mlx.nn as nn
+            from mlx.utils import tree_map
+
+            model = nn.Linear(10, 10)
+            print(model.parameters().keys())
+            # dict_keys(['weight', 'bias'])
+
+            # square the parameters
+            model.update(tree_map(lambda x: x*x, model.parameters()))
+
+        Args:
+            fn (Callable): The function that processes the leaves of the tree
+            tree (Any): The main python tree that will be iterated upon
+            rest (Tuple[Any]): Extra trees to be iterated together with tree
+
+        Returns:
+            A python tree with the new values returned by ``fn``.
+      )pbdoc");
+  m.def(
+      "tree_flatten",
+      [](const py::object& tree,
+         const std::string& prefix,
+         const py::object& is_leaf) {
+        py::list flat_tree;
+        std::string key = prefix;
+        visit_leaves(
+            tree, is_leaf, key, true, [&](const std::string& k, py::handle v) {
+              flat_tree.append(py::make_tuple(drop_first(k), v));
+            });
+        return flat_tree;
+      },
+      "tree"_a,
+      "prefix"_a = "",
+      "is_leaf"_a = py::none(),
+      R"pbdoc(
+        Flattens a python tree to a list of key, value tuples.
+
+        The keys are using the dot notation to define trees of arbitrary depth and
+        complexity.
+
+        .. code-block:: python
+
+            from mlx.utils import tree_flatten
+
+            print(tree_flatten([[[0]]]))
+            # [("0.0.0", 0)]
+
+            print(tree_flatten([[[0]]], ".hello"))
+            # [("hello.0.0.0", 0)]
+
+        .. note::
+           Dictionaries should have keys that are valid python identifiers.
+
+        Args:
+            tree (Any): The python tree to be flattened.
+            prefix (str): A prefix to use for the keys. The first character is
+                always discarded.
+            is_leaf (Callable): An optional callable that returns True if the
+                passed object is considered a leaf or False otherwise.
+
+        Returns:
+            List[Tuple[str, Any]]: The flat representation of the python tree.
+      )pbdoc");
+  m.def(
+      "tree_unflatten",
+      [](const py::object& tree) {
+        FlatTree flat_tree;
+        for (auto item : tree) {
+          auto pair = py::tuple(py::reinterpret_borrow<py::object>(item));
+          if (pair.size() != 2) {
+            std::ostringstream msg;
+            msg << "[tree_unflatten] Expected (key, value) pairs but received "
+                << pair.size() << " values.";
+            throw std::invalid_argument(msg.str());
+          }
+          flat_tree.emplace_back(pair[0].cast<std::string>(), pair[1]);
+        }
+        return unflatten_tree(flat_tree);
+      },
+      "tree"_a,
+      R"pbdoc(
+        Recreate a python tree from its flat representation.
+
+        .. code-block:: python
+
+            from mlx.utils import tree_unflatten
+
+            d = tree_unflatten([("hello.world", 42)])
+            print(d)
+            # {"hello": {"world": 42}}
+
+        Args:
+            tree (List[Tuple[str, Any]]): The flat representation of a python tree.
+                                          For instance as returned by :meth:`tree_flatten`.
+
+        Returns:
+            A python tree.
+      )pbdoc");
+  m.def(
+      "tree_leaves",
+      [](const py::object& tree, const py::object& is_leaf) {
+        py::list leaves;
+        std::string prefix;
+        visit_leaves(
+            tree,
+            is_leaf,
+            prefix,
+            false,
+            [&](const std::string&, py::handle v) { leaves.append(v); });
+        return leaves;
+      },
+      "tree"_a,
+      "is_leaf"_a = py::none(),
+      R"pbdoc(
+        The leaves of a python tree in the order of :func:`tree_flatten`.
+
+        It is equivalent to ``[v for _, v in tree_flatten(tree)]`` without
+        building the keys.
+
+        Args:
+            tree (Any): The python tree.
+            is_leaf (Callable): An optional callable that returns True if the
+                passed object is considered a leaf or False otherwise.
+
+        Returns:
+            List[Any]: The leaves of the tree.
+      )pbdoc");
+  m.def(
+      "tree_structure",
+      [](const py::object& tree, const py::object& is_leaf) {
+        return TreeStructure(tree, is_leaf);
+      },
+      "tree"_a,
+      "is_leaf"_a = py::none(),
+      R"pbdoc(
+        The structure of a python tree which can rebuild trees of the same
+        structure from their leaves.
+
+        .. code-block:: python
+
+            from mlx.utils import tree_leaves, tree_structure
+
+            structure = tree_structure({"a": [1, 2], "b": 3})
+            print(structure.unflatten([4, 5, 6]))
+            # {"a": [4, 5], "b": 6}
+
+        Args:
+            tree (Any): The python tree.
+            is_leaf (Callable): An optional callable that returns True if the
+                passed object is considered a leaf or False otherwise.
+
+        Returns:
+            TreeStructure: The structure of the tree.
+      )pbdoc");
+}
@@ -0,0 +1,31 @@
+// Copyright © 2023 Apple Inc.
+
+#pragma once
+
+#include <pybind11/pybind11.h>
+
+#include "mlx/array.h"
+
+namespace py = pybind11;
+
+using namespace mlx::core;
+
+// Helpers to walk python trees of arrays which are used by the transforms.
+// Lists, tuples and dicts are containers and everything else is a leaf.
+
+void tree_visit(py::object tree, std::function<void(py::handle)> visitor);
+
+py::object tree_map(
+    const std::vector<py::object>& trees,
+    std::function<py::object(const std::vector<py::object>&)> transform);
+
+py::object tree_map(
+    py::object tree,
+    std::function<py::object(py::handle)> transform);
+
+std::vector<array> tree_flatten(py::object tree, bool strict = true);
+
+py::object tree_unflatten(
+    py::object tree,
+    const std::vector<array>& values,
+    int index = 0);
@@ -31,6 +31,7 @@ class TestDtypes(mlx_tests.MLXTestCase):
         self.assertEqual(mx.int64.size, 8)
         self.assertEqual(mx.float16.size, 2)
         self.assertEqual(mx.float32.size, 4)
+        self.assertEqual(mx.float64.size, 8)
         self.assertEqual(mx.bfloat16.size, 2)
         self.assertEqual(mx.complex64.size, 8)
 
@@ -45,6 +46,7 @@ class TestDtypes(mlx_tests.MLXTestCase):
         self.assertEqual(str(mx.int64), "mlx.core.int64")
         self.assertEqual(str(mx.float16), "mlx.core.float16")
         self.assertEqual(str(mx.float32), "mlx.core.float32")
+        self.assertEqual(str(mx.float64), "mlx.core.float64")
         self.assertEqual(str(mx.bfloat16), "mlx.core.bfloat16")
         self.assertEqual(str(mx.complex64), "mlx.core.complex64")
 
@@ -486,6 +488,31 @@ class TestArray(mlx_tests.MLXTestCase):
 
         self.assertEqual(c_mlx.dtype, mx.float16)
 
+    def test_float64(self):
+        default = mx.default_device()
+        mx.set_default_device(mx.cpu)
+
+        # NumPy doubles keep their precision when asked to
+        a_npy = np.random.randn(4096)
+        a_mlx = mx.array(a_npy, dtype=mx.float64)
+        self.assertEqual(a_mlx.dtype, mx.float64)
+        self.assertEqual(np.array(a_mlx).dtype, np.float64)
+        self.assertTrue(np.array_equal(np.array(a_mlx), a_npy))
+        self.assertEqual(mx.array(a_npy).dtype, mx.float32)
+        self.assertEqual(a_mlx[0].item(), a_npy[0])
+
+        self.assertEqual((a_mlx + mx.ones(1)).dtype, mx.float64)
+        self.assertEqual((a_mlx + 1.0).dtype, mx.float64)
+        self.assertAlmostEqual(mx.sum(a_mlx).item(), np.sum(a_npy), places=10)
+        self.assertAlmostEqual(mx.var(a_mlx).item(), np.var(a_npy), places=12)
+
+        b_npy = np.random.randn(64, 32)
+        b_mlx = mx.array(b_npy, dtype=mx.float64)
+        self.assertTrue(np.allclose(b_mlx @ b_mlx.T, b_npy @ b_npy.T, rtol=1e-12))
+        self.assertTrue(np.allclose(mx.exp(b_mlx), np.exp(b_npy), rtol=1e-14))
+
+        mx.set_default_device(default)
+
     def test_dtype_python_scalar_promotion(self):
         tests = [
             (mx.bool_, operator.mul, False, mx.bool_),
@@ -259,6 +259,33 @@ class TestAutograd(mlx_tests.MLXTestCase):
 
         self.assertTrue(mx.allclose(vjps[0], mx.zeros(shape_in)))
 
+    def test_checkpoint(self):
+        calls = [0]
+
+        def fun(x, params):
+            calls[0] += 1
+            return {"y": mx.exp(x) * params["w"], "n": 2}
+
+        checkpointed = mx.checkpoint(fun)
+        x = mx.array([0.0, 1.0, 2.0])
+        params = {"w": mx.array([1.0, 2.0, 3.0])}
+        out = checkpointed(x, params=params)
+        self.assertEqual(out["n"], 2)
+        self.assertTrue(mx.allclose(out["y"], mx.exp(x) * params["w"]))
+
+        def loss(x, params):
+            return checkpointed(x, params=params)["y"].sum()
+
+        calls[0] = 0
+        dx, dparams = mx.grad(loss, argnums=(0, 1))(x, params)
+        self.assertEqual(calls[0], 2)
+        self.assertTrue(mx.allclose(dx, mx.exp(x) * params["w"]))
+        self.assertTrue(mx.allclose(dparams["w"], mx.exp(x)))
+
+        # Second order gradients go through the recomputation
+        d2x = mx.grad(lambda x: mx.grad(loss)(x, params).sum())(x)
+        self.assertTrue(mx.allclose(d2x, mx.exp(x) * params["w"]))
+
 
 if __name__ == "__main__":
     unittest.main()
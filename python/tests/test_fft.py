@@ -86,6 +86,97 @@ class TestFFT(mlx_tests.MLXTestCase):
 
         mx.set_default_device(default)
 
+    def test_fft_threads(self):
+        default = mx.default_device()
+        mx.set_default_device(mx.cpu)
+
+        r = np.random.randn(256, 512).astype(np.float32)
+        i = np.random.randn(256, 512).astype(np.float32)
+        a = r + 1j * i
+
+        self.assertEqual(mx.fft.num_threads(), 0)
+        try:
+            mx.fft.set_num_threads(1)
+            self.assertEqual(mx.fft.num_threads(), 1)
+            c1 = mx.fft.fft(mx.array(a))
+            r1 = mx.fft.rfft(mx.array(r), axis=0)
+            # The setting is read when the transforms are evaluated
+            mx.eval(c1, r1)
+            mx.fft.set_num_threads(4)
+            c4 = mx.fft.fft(mx.array(a))
+            r4 = mx.fft.rfft(mx.array(r), axis=0)
+            self.assertTrue(mx.array_equal(c1, c4))
+            self.assertTrue(mx.array_equal(r1, r4))
+            self.assertTrue(np.allclose(np.fft.fft(a), c4, atol=1e-3, rtol=1e-4))
+        finally:
+            mx.fft.set_num_threads(0)
+
+        with self.assertRaises(ValueError):
+            mx.fft.set_num_threads(-1)
+
+        mx.set_default_device(default)
+
+    def test_stft(self):
+        default = mx.default_device()
+        mx.set_default_device(mx.cpu)
+
+        x = np.random.randn(2, 1000).astype(np.float32)
+        window = np.hanning(64).astype(np.float32)
+
+        # Compare against framing with numpy
+        n_fft, hop = 64, 10
+        padded = np.pad(x, [(0, 0), (n_fft // 2, n_fft // 2)])
+        n_frames = 1 + (padded.shape[-1] - n_fft) // hop
+        frames = np.stack(
+            [padded[:, t * hop : t * hop + n_fft] for t in range(n_frames)], axis=1
+        )
+        expected = np.fft.rfft(frames * window)
+        out = mx.fft.stft(mx.array(x), n_fft, hop, window=mx.array(window))
+        self.assertEqual(out.shape, [2, n_frames, n_fft // 2 + 1])
+        self.assertTrue(np.allclose(out, expected, atol=1e-4, rtol=1e-4))
+
+        out = mx.fft.stft(mx.array(x), n_fft, hop, center=False)
+        n_frames = 1 + (x.shape[-1] - n_fft) // hop
+        frames = np.stack(
+            [x[:, t * hop : t * hop + n_fft] for t in range(n_frames)], axis=1
+        )
+        self.assertTrue(np.allclose(out, np.fft.rfft(frames), atol=1e-4, rtol=1e-4))
+
+        # Round trip with the periodic Hann window and the default hop
+        w = mx.array(np.hanning(n_fft + 1)[:-1].astype(np.float32))
+        y = mx.fft.istft(
+            mx.fft.stft(mx.array(x), n_fft, window=w),
+            n_fft,
+            window=w,
+            length=x.shape[-1],
+        )
+        self.assertTrue(np.allclose(y, x, atol=1e-4, rtol=1e-4))
+
+        # Gradients flow back through the strided frames. The inverse
+        # transform undoes the forward one so the gradient of each sample
+        # is the overlap-add of the windowed cotangents of its frames.
+        hop = 16
+        n_frames = 1 + x.shape[-1] // hop
+        cotan = np.random.randn(2, n_frames, n_fft).astype(np.float32)
+
+        def fun(x):
+            frames = mx.fft.irfft(mx.fft.stft(x, n_fft, hop, window=w), n_fft)
+            return (frames * mx.array(cotan)).sum()
+
+        grad = mx.grad(fun)(mx.array(x))
+        expected = np.zeros((2, x.shape[-1] + n_fft), np.float32)
+        for t in range(n_frames):
+            expected[:, t * hop : t * hop + n_fft] += cotan[:, t] * np.array(w)
+        expected = expected[:, n_fft // 2 : n_fft // 2 + x.shape[-1]]
+        self.assertTrue(np.allclose(grad, expected, atol=1e-4, rtol=1e-4))
+
+        with self.assertRaises(ValueError):
+            mx.fft.stft(mx.array(x), n_fft, 0)
+        with self.assertRaises(ValueError):
+            mx.fft.stft(mx.array(x), n_fft, window=mx.ones((32,)))
+
+        mx.set_default_device(default)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -6,6 +6,7 @@ import unittest
 
 import mlx.core as mx
 import mlx.nn as nn
+import mlx.optimizers as opt
 import mlx_tests
 import numpy as np
 from mlx.utils import tree_flatten, tree_map, tree_unflatten
@@ -359,6 +360,276 @@ class TestNN(mlx_tests.MLXTestCase):
             mx.abs(similarities[mx.arange(10), mx.arange(10)] - 1).max(), 1e-5
         )
 
+    def test_sparse_embedding(self):
+        class Model(nn.Module):
+            def __init__(self, sparse):
+                super().__init__()
+                self.embedding = nn.Embedding(20, 4, sparse=sparse)
+                self.linear = nn.Linear(4, 1)
+
+            def __call__(self, x):
+                return self.linear(self.embedding(x)).sum()
+
+        dense = Model(False)
+        sparse = Model(True)
+        sparse.update(dense.parameters())
+        x = mx.array([[1, 3, 3], [5, 1, 19]])
+
+        loss, grads = nn.value_and_grad(dense, dense)(x)
+        sparse_loss, sparse_grads = nn.value_and_grad(sparse, sparse)(x)
+        g = sparse_grads["embedding"]["weight"]
+        self.assertTrue(isinstance(g, nn.SparseGradient))
+        self.assertEqual(g.shape, (20, 4))
+        self.assertEqual(g.values.shape, [6, 4])
+        self.assertTrue(mx.allclose(loss, sparse_loss))
+        self.assertTrue(mx.allclose(g.to_dense(), grads["embedding"]["weight"]))
+        self.assertTrue(
+            mx.allclose(sparse_grads["linear"]["weight"], grads["linear"]["weight"])
+        )
+
+        # A second call with a different lookup shape
+        x = mx.array([2, 2, 7])
+        _, grads = nn.value_and_grad(dense, dense)(x)
+        loss_and_grad = nn.value_and_grad(sparse, sparse)
+        for _ in range(2):
+            _, sparse_grads = loss_and_grad(x)
+            g = sparse_grads["embedding"]["weight"]
+            self.assertTrue(mx.allclose(g.to_dense(), grads["embedding"]["weight"]))
+        self.assertTrue(sparse.embedding._lookup_fn is None)
+
+        # A weight tied to the output gets a dense gradient
+        class TiedModel(nn.Module):
+            def __init__(self, sparse):
+                super().__init__()
+                self.embedding = nn.Embedding(20, 4, sparse=sparse)
+
+            def __call__(self, x):
+                return (self.embedding(x) @ self.embedding.weight.T).sum()
+
+        dense = TiedModel(False)
+        sparse = TiedModel(True)
+        sparse.update(dense.parameters())
+        _, grads = nn.value_and_grad(dense, dense)(x)
+        _, sparse_grads = nn.value_and_grad(sparse, sparse)(x)
+        g = sparse_grads["embedding"]["weight"]
+        self.assertTrue(isinstance(g, mx.array))
+        self.assertTrue(mx.allclose(g, grads["embedding"]["weight"]))
+
+    def test_value_and_grad_structure_changes(self):
+        class Model(nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.first = nn.Linear(2, 2)
+                self.second = nn.Linear(2, 1)
+
+            def __call__(self, x):
+                return self.second(self.first(x)).sum()
+
+        model = Model()
+        x = mx.ones((3, 2))
+        loss_and_grad = nn.value_and_grad(model, model)
+
+        def check_grads():
+            params = model.trainable_parameters()
+            _, grads = loss_and_grad(x)
+            expected = mx.grad(lambda p: (model.update(p), model(x))[1])(params)
+            self.assertEqual(
+                [k for k, _ in tree_flatten(grads)],
+                [k for k, _ in tree_flatten(expected)],
+            )
+            eq_tree = tree_map(mx.allclose, grads, expected)
+            self.assertTrue(all(v for _, v in tree_flatten(eq_tree)))
+
+        check_grads()
+        check_grads()
+
+        # Replacing an array keeps the cached structure
+        model.first.weight = mx.zeros((2, 2))
+        check_grads()
+
+        # Freezing, unfreezing and new submodules change the structure
+        model.first.freeze(keys="bias")
+        check_grads()
+        model.unfreeze()
+        check_grads()
+        model.second = nn.Sequential(nn.Linear(2, 4), nn.Linear(4, 1))
+        check_grads()
+
+        # Lists and dicts modified in place change the structure as well
+        replacement = nn.Linear(2, 4)
+        model.second.layers[0] = replacement
+        check_grads()
+        self.assertTrue(
+            mx.array_equal(model.second.layers[0].weight, replacement.weight)
+        )
+        model.second.layers.append(nn.Linear(1, 1))
+        check_grads()
+        model.second.layers.pop()
+        model.first.extra = {"scale": mx.ones((2,))}
+        check_grads()
+        model.first.extra["scale"] = mx.zeros((2,))
+        check_grads()
+        model.first.extra["shift"] = mx.ones((2,))
+        check_grads()
+
+    def test_value_and_grad_replaced_layer(self):
+        a = nn.Linear(2, 1, bias=False)
+        b = nn.Linear(2, 1, bias=False)
+        model = nn.Sequential(a)
+        x = mx.array([[0.5, 1.44]])
+        loss_and_grad = nn.value_and_grad(model, lambda x: model(x).sum())
+        loss_and_grad(x)
+
+        # The gradient is the one of the new layer and the old layer is left
+        # untouched
+        weight = a.weight
+        model.layers[0] = b
+        _, grads = loss_and_grad(x)
+        self.assertTrue(mx.allclose(grads["layers"][0]["weight"], x))
+        self.assertTrue(a.weight is weight)
+
+        # The sparse embeddings are looked up again
+        model = nn.Sequential(nn.Embedding(4, 2))
+        loss_and_grad = nn.value_and_grad(model, lambda i: model(i).sum())
+        loss_and_grad(mx.array([1]))
+        model.layers[0] = nn.Embedding(4, 2, sparse=True)
+        _, grads = loss_and_grad(mx.array([1]))
+        self.assertTrue(isinstance(grads["layers"][0]["weight"], nn.SparseGradient))
+
+    def test_flat_parameters(self):
+        def make_model():
+            return nn.Sequential(nn.Linear(4, 3), nn.ReLU(), nn.Linear(3, 1))
+
+        model = make_model()
+        reference = make_model()
+        reference.update(model.parameters())
+        self.assertFalse(model.is_flat)
+        with self.assertRaises(ValueError):
+            model.flat_parameters()
+
+        model.flatten_parameters()
+        self.assertTrue(model.is_flat)
+        buffers = model.flat_parameters()
+        self.assertEqual(list(buffers.keys()), ["float32"])
+        self.assertEqual(buffers["float32"].shape, [4 * 3 + 3 + 3 + 1])
+        eq_tree = tree_map(mx.array_equal, model.parameters(), reference.parameters())
+        self.assertTrue(all(v for _, v in tree_flatten(eq_tree)))
+
+        # The gradients are flat and match the gradients of the tree
+        x = mx.random.normal((5, 4))
+        loss, grads = nn.value_and_grad(model, lambda x: model(x).sum())(x)
+        ref_loss, ref_grads = nn.value_and_grad(
+            reference, lambda x: reference(x).sum()
+        )(x)
+        self.assertTrue(mx.allclose(loss, ref_loss))
+        self.assertEqual(list(grads.keys()), ["float32"])
+        ref_flat = mx.concatenate([g.reshape(-1) for _, g in tree_flatten(ref_grads)])
+        self.assertTrue(mx.allclose(grads["float32"], ref_flat))
+
+        # The optimizers update the buffers
+        opt.Adam(0.1).update(model, grads)
+        opt.Adam(0.1).update(reference, ref_grads)
+        self.assertTrue(model.is_flat)
+        eq_tree = tree_map(mx.allclose, model.parameters(), reference.parameters())
+        self.assertTrue(all(v for _, v in tree_flatten(eq_tree)))
+
+        # Assigning a parameter directly repacks the buffers
+        model.layers[2].weight = mx.full((1, 3), 5.0)
+        loss, grads = nn.value_and_grad(model, lambda x: model(x).sum())(x)
+        self.assertTrue(mx.array_equal(model.layers[2].weight, mx.full((1, 3), 5.0)))
+        buffer = model.flat_parameters()["float32"]
+        self.assertTrue(mx.array_equal(buffer[-4:-1], mx.full((3,), 5.0)))
+        opt.SGD(0.0).update(model, grads)
+        self.assertTrue(mx.array_equal(model.layers[2].weight, mx.full((1, 3), 5.0)))
+
+        # Freezing and casting repack the buffers
+        model.freeze()
+        model.unfreeze(keys="bias")
+        self.assertEqual(model.flat_parameters()["float32"].shape, [3 + 1])
+        model.unfreeze()
+        model.apply(lambda x: x.astype(mx.float16))
+        self.assertEqual(list(model.flat_parameters().keys()), ["float16"])
+
+    def test_gradient_accumulator(self):
+        model = nn.Linear(4, 2)
+        loss_and_grad = nn.value_and_grad(model, lambda x: model(x).sum())
+        x = mx.random.normal((6, 4))
+
+        accumulator = nn.GradientAccumulator(steps=3)
+        for i in range(3):
+            _, grads = loss_and_grad(x[2 * i : 2 * i + 2])
+            grads = accumulator.accumulate(grads)
+            self.assertEqual(accumulator.count, (i + 1) % 3)
+            self.assertEqual(grads is None, i < 2)
+
+        # The average of the micro-batch gradients is the gradient of the mean
+        _, expected = nn.value_and_grad(model, lambda x: model(x).sum() / 3)(x)
+        eq_tree = tree_map(mx.allclose, grads, expected)
+        self.assertTrue(all(v for _, v in tree_flatten(eq_tree)))
+
+        # Sparse gradients concatenate their rows
+        accumulator = nn.GradientAccumulator(steps=2, average=False)
+        g = nn.SparseGradient(mx.array([1]), mx.ones((1, 3)), (4, 3))
+        self.assertIsNone(accumulator.accumulate({"w": g}))
+        g = accumulator.accumulate({"w": g})["w"]
+        self.assertEqual(g.indices.size, 2)
+        self.assertTrue(mx.array_equal(g.to_dense()[1], mx.full((3,), 2.0)))
+
+        with self.assertRaises(ValueError):
+            nn.GradientAccumulator(steps=0)
+
+    def test_checkpoint(self):
+        mx.random.seed(0)
+        model = nn.TransformerEncoder(2, 8, 2)
+        x = mx.random.normal((2, 3, 8))
+
+        def loss_fn(x):
+            return model(x, None).sum()
+
+        ckpt_model = nn.TransformerEncoder(2, 8, 2, use_checkpoint=True)
+        ckpt_model.update(model.parameters())
+
+        def ckpt_loss_fn(x):
+            return ckpt_model(x, None).sum()
+
+        loss, grads = nn.value_and_grad(model, loss_fn)(x)
+        ckpt_loss, ckpt_grads = nn.value_and_grad(ckpt_model, ckpt_loss_fn)(x)
+        self.assertTrue(mx.allclose(loss, ckpt_loss))
+        eq_tree = tree_map(lambda a, b: mx.allclose(a, b, atol=1e-5), grads, ckpt_grads)
+        self.assertTrue(all(v for _, v in tree_flatten(eq_tree)))
+
+        # The parameters of the model are left untouched by the recomputation
+        params = model.parameters()
+        checkpointed = nn.checkpoint(model.layers[0])
+        mx.grad(lambda x: checkpointed(x, None).sum())(x)
+        self.assertTrue(
+            all(
+                a is b
+                for (_, a), (_, b) in zip(
+                    tree_flatten(params), tree_flatten(model.parameters())
+                )
+            )
+        )
+
+        # Random ops are replayed with the keys of the forward pass
+        model = nn.Sequential(nn.Linear(8, 8), nn.Dropout(0.5), nn.Linear(8, 8))
+
+        def loss_fn(x):
+            return model(x).sum()
+
+        checkpointed = nn.checkpoint(model)
+
+        def ckpt_loss_fn(x):
+            return checkpointed(x).sum()
+
+        mx.random.seed(3)
+        loss, grads = nn.value_and_grad(model, loss_fn)(x)
+        mx.random.seed(3)
+        ckpt_loss, ckpt_grads = nn.value_and_grad(model, ckpt_loss_fn)(x)
+        self.assertTrue(mx.allclose(loss, ckpt_loss))
+        eq_tree = tree_map(lambda a, b: mx.allclose(a, b, atol=1e-5), grads, ckpt_grads)
+        self.assertTrue(all(v for _, v in tree_flatten(eq_tree)))
+
     def test_io(self):
         def make_model():
             return nn.Sequential(nn.Linear(2, 2), nn.ReLU(), nn.Linear(2, 2))
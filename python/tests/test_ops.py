@@ -454,6 +454,17 @@ class TestOps(mlx_tests.MLXTestCase):
             b = getattr(np, op)(data)
             self.assertEqual(a.item(), b)
 
+        # Long rows with ties and NaNs
+        data = np.random.randint(0, 10, size=(4, 10000)).astype(np.float32)
+        data[1, 5000] = np.nan
+        data[1, 7000] = np.nan
+        x = mx.array(data)
+        for op in ["argmin", "argmax"]:
+            for axis in range(2):
+                a = getattr(mx, op)(x, axis)
+                b = getattr(np, op)(data, axis)
+                self.assertEqual(a.tolist(), b.tolist())
+
     def test_broadcast(self):
         a_npy = np.reshape(np.arange(200), (10, 20))
         a_mlx = mx.array(a_npy)
@@ -1117,8 +1128,10 @@ class TestOps(mlx_tests.MLXTestCase):
                 ex = np.exp(x - np.max(x, axis=axis, keepdims=True))
                 return ex / np.sum(ex, axis=axis, keepdims=True)
 
+            # Half precision sums accumulate in float32 so the reference is
+            # computed in float32 too
             for axes in (None, 0, 1, 2, (0, 1), (1, 2), (0, 2), (0, 1, 2)):
-                b_npy = np_softmax(a_npy, axes)
+                b_npy = np_softmax(a_npy.astype(np.float32), axes)
                 b_mlx = mx.softmax(a_mlx, axes)
                 self.assertTrue(np.allclose(b_npy, b_mlx, atol=atol))
 
@@ -1255,6 +1268,31 @@ class TestOps(mlx_tests.MLXTestCase):
             c2 = mxop(a_mlx, axis=0, inclusive=False, reverse=True)[:-1, :, :]
             self.assertTrue(mx.array_equal(c1, c2))
 
+    def test_scans_large(self):
+        # Long scans are split in blocks or columns across threads
+        a_npy = np.random.randint(-3, 4, size=(2, 200000)).astype(np.int32)
+        for op in ["cumsum", "cummax", "cummin"]:
+            npop = {
+                "cumsum": np.cumsum,
+                "cummax": np.maximum.accumulate,
+                "cummin": np.minimum.accumulate,
+            }[op]
+            mxop = getattr(mx, op)
+            for axis in (0, 1):
+                with self.subTest(op=op, axis=axis):
+                    a = a_npy if axis == 1 else a_npy.T
+                    c_npy = npop(a, axis=axis)
+                    c_mlx = mxop(mx.array(a), axis=axis)
+                    self.assertTrue(np.array_equal(c_npy, c_mlx))
+
+                    c_npy = np.flip(npop(np.flip(a, axis), axis=axis), axis)
+                    c_mlx = mxop(mx.array(a), axis=axis, reverse=True)
+                    self.assertTrue(np.array_equal(c_npy, c_mlx))
+
+        a_npy = np.random.uniform(0, 1, size=(200000,)).astype(np.float32)
+        c_mlx = mx.cumsum(mx.array(a_npy))
+        self.assertTrue(np.allclose(np.cumsum(a_npy), c_mlx, rtol=1e-4))
+
     def test_squeeze_expand(self):
         a = mx.zeros((2, 1, 2, 1))
         self.assertEqual(mx.squeeze(a).shape, [2, 2])
@@ -1315,14 +1353,73 @@ class TestOps(mlx_tests.MLXTestCase):
                         self.assertTrue(np.array_equal(c_np, c_mx))
                         self.assertEqual(b_mx.dtype, a_mx.dtype)
 
-                        top_k_mx = mx.topk(a_mx, kth, axis=axis)
-                        self.assertTrue(np.all(c_np <= top_k_mx))
-                        self.assertEqual(top_k_mx.dtype, a_mx.dtype)
-
                         if kth >= 0:
                             d_np = np.take(b_mx, np.arange(kth), axis=axis)
                             self.assertTrue(np.all(d_np <= c_mx))
 
+    def test_topk(self):
+        np.random.seed(0)
+        for dtype in ("int32", "float32"):
+            for axis in (None, 0, 1, 2):
+                for k in (0, 1, 3):
+                    with self.subTest(dtype=dtype, axis=axis, k=k):
+                        np_dtype = getattr(np, dtype)
+                        a_np = np.random.uniform(0, 10, size=(3, 4, 5))
+                        a_np = a_np.astype(np_dtype)
+                        a_mx = mx.array(a_np)
+
+                        # Stable descending order, lower indices first on ties
+                        a_flat = a_np.reshape(-1) if axis is None else a_np
+                        ax = 0 if axis is None else axis
+                        order = np.argsort(-a_flat, axis=ax, kind="stable")
+                        idx_np = np.take(order, np.arange(k), axis=ax)
+                        vals_np = np.take_along_axis(a_flat, idx_np, axis=ax)
+
+                        idx_mx = mx.argtopk(a_mx, k, axis=axis)
+                        vals_mx = mx.topk(a_mx, k, axis=axis)
+                        self.assertEqual(idx_mx.dtype, mx.uint32)
+                        self.assertEqual(vals_mx.dtype, a_mx.dtype)
+                        self.assertTrue(np.array_equal(idx_np, idx_mx))
+                        self.assertTrue(np.array_equal(vals_np, vals_mx))
+
+        # Long rows go through the bounded heap
+        a_np = np.random.normal(size=(4, 5000)).astype(np.float32)
+        for k in (1, 10, 1000, 5000):
+            with self.subTest(k=k):
+                idx_np = np.argsort(-a_np, axis=1, kind="stable")[:, :k]
+                self.assertTrue(np.array_equal(idx_np, mx.argtopk(mx.array(a_np), k)))
+
+        a = mx.array([1.0, float("nan"), 3.0, 2.0])
+        self.assertEqual(mx.argtopk(a, 2).tolist(), [1, 2])
+
+        with self.assertRaises(ValueError):
+            mx.topk(mx.zeros((3, 4)), 5)
+
+    def test_sort_large(self):
+        # Long rows are radix sorted and split across threads
+        np.random.seed(0)
+        for dtype in ("uint8", "int16", "int32", "int64", "float16", "float32"):
+            np_dtype = getattr(np, dtype)
+            a_np = np.random.uniform(-100, 100, size=(8, 1000)).astype(np_dtype)
+            a_mx = mx.array(a_np)
+            for axis in (0, 1):
+                with self.subTest(dtype=dtype, axis=axis):
+                    b_np = np.sort(a_np, axis=axis)
+                    b_mx = mx.sort(a_mx, axis=axis)
+                    self.assertTrue(np.array_equal(b_np, b_mx))
+
+                    c_np = np.argsort(a_np, axis=axis, kind="stable")
+                    c_mx = mx.argsort(a_mx, axis=axis)
+                    self.assertTrue(np.array_equal(c_np, c_mx))
+
+        a_np = np.random.normal(size=(1000,)).astype(np.float32)
+        a_np[::7] = np.nan
+        a_np[::11] = -0.0
+        for n in (100, 1000):
+            with self.subTest(n=n):
+                b_mx = mx.sort(mx.array(a_np[:n]))
+                self.assertTrue(np.array_equal(np.sort(a_np[:n]), b_mx, equal_nan=True))
+
     def test_large_binary(self):
         a = mx.ones([1000, 2147484], mx.int8)
         b = mx.ones([2147484], mx.int8)
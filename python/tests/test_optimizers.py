@@ -1,9 +1,11 @@
 # Copyright © 2023 Apple Inc.
 
 import inspect
+import math
 import unittest
 
 import mlx.core as mx
+import mlx.nn as nn
 import mlx.optimizers as opt
 import mlx.utils
 import mlx_tests
@@ -12,8 +14,8 @@ import mlx_tests
 def get_all_optimizers():
     classes = dict()
     for name, obj in inspect.getmembers(opt):
-        if inspect.isclass(obj):
-            if obj.__name__ not in ["OptimizerState", "Optimizer"]:
+        if inspect.isclass(obj) and issubclass(obj, opt.Optimizer):
+            if obj is not opt.Optimizer:
                 classes[name] = obj
     return classes
 
@@ -39,6 +41,372 @@ class TestOptimizers(mlx_tests.MLXTestCase):
             all_equal = all(v for _, v in mlx.utils.tree_flatten(equal_shape))
             self.assertTrue(all_equal)
 
+    def test_sparse_updates(self):
+        params = {"weight": mx.random.normal((10, 3))}
+        indices = mx.array([7, 2, 7, 4])
+        values = mx.random.normal((4, 3))
+        sparse = nn.SparseGradient(indices, values, (10, 3))
+        dense = sparse.to_dense()
+        touched = mx.array([2, 4, 7])
+        untouched = mx.array([0, 1, 3, 5, 6, 8, 9])
+
+        expected = values[0] + values[2]
+        self.assertTrue(mx.allclose(dense[7], expected))
+        self.assertTrue(mx.array_equal(dense[untouched], mx.zeros((7, 3))))
+
+        for optim_class in optimizers_dict.values():
+            optim = optim_class(0.1)
+            update = optim.apply_gradients({"weight": sparse}, params)
+            mx.eval(update, optim.state)
+            self.assertEqual(update["weight"].shape, [10, 3])
+
+            # AdamW decays every row so it falls back to a dense update
+            if optim_class is not opt.AdamW:
+                w, w_new = params["weight"], update["weight"]
+                self.assertTrue(mx.array_equal(w_new[untouched], w[untouched]))
+
+        # SGD and Adagrad match their dense updates exactly
+        for optim_class in [opt.SGD, opt.Adagrad]:
+            sparse_update = optim_class(0.1).apply_gradients({"weight": sparse}, params)
+            dense_update = optim_class(0.1).apply_gradients({"weight": dense}, params)
+            w_sparse, w_dense = sparse_update["weight"], dense_update["weight"]
+            self.assertTrue(mx.allclose(w_sparse, w_dense))
+
+        # Adam matches the dense update while the same rows are referenced
+        # since the moments of the other rows stay zero
+        dense_optim, sparse_optim = opt.Adam(0.1), opt.Adam(0.1)
+        dense_params, sparse_params = params, params
+        for _ in range(3):
+            dense_params = dense_optim.apply_gradients({"weight": dense}, dense_params)
+            sparse_params = sparse_optim.apply_gradients(
+                {"weight": sparse}, sparse_params
+            )
+            w_sparse, w_dense = sparse_params["weight"], dense_params["weight"]
+            self.assertTrue(mx.allclose(w_sparse, w_dense))
+        m_sparse = sparse_optim.state["parameters"]["weight"]["m"][touched]
+        m_dense = dense_optim.state["parameters"]["weight"]["m"][touched]
+        self.assertTrue(mx.allclose(m_sparse, m_dense))
+
+    def test_fused_steps(self):
+        w = mx.random.normal((4, 5))
+        g = mx.random.normal((4, 5))
+        v = mx.random.normal((4, 5))
+        m = mx.random.normal((4, 5))
+
+        w_new, v_new = mx.fast.sgd_step(w, g, 0.1)
+        self.assertIsNone(v_new)
+        self.assertTrue(mx.allclose(w_new, w - 0.1 * g))
+
+        w_new, v_new = mx.fast.sgd_step(
+            w, g, 0.1, v, momentum=0.9, weight_decay=0.01, dampening=0.5
+        )
+        v_expected = 0.9 * v + 0.5 * (g + 0.01 * w)
+        self.assertTrue(mx.allclose(v_new, v_expected))
+        self.assertTrue(mx.allclose(w_new, w - 0.1 * v_expected))
+
+        v = mx.abs(v)
+        w_new, m_new, v_new = mx.fast.adam_step(w, g, m, v, 0.01, 0.9, 0.99, 1e-8)
+        m_expected = 0.9 * m + 0.1 * g
+        v_expected = 0.99 * v + 0.01 * mx.square(g)
+        w_expected = w - 0.01 * m_expected / (mx.sqrt(v_expected) + 1e-8)
+        self.assertTrue(mx.allclose(m_new, m_expected))
+        self.assertTrue(mx.allclose(v_new, v_expected))
+        self.assertTrue(mx.allclose(w_new, w_expected))
+
+        w_new, v_new = mx.fast.adagrad_step(w, g, v, 0.1, 1e-8)
+        v_expected = v + mx.square(g)
+        w_expected = w - 0.1 * g / (mx.sqrt(v_expected) + 1e-8)
+        self.assertTrue(mx.allclose(v_new, v_expected))
+        self.assertTrue(mx.allclose(w_new, w_expected))
+
+        with self.assertRaises(ValueError):
+            mx.fast.adagrad_step(w, g, mx.zeros((5,)), 0.1, 1e-8)
+
+    def test_fused_step_grads(self):
+        params = {"w": mx.random.normal((4, 5))}
+
+        # Differentiate through an update whose gradient depends on w
+        def fused_loss(params, optim):
+            grads = mlx.utils.tree_map(lambda w: mx.square(w), params)
+            return optim.apply_gradients(grads, params)["w"].sum()
+
+        def sgd_loss(params):
+            w = params["w"]
+            return (w - 0.1 * mx.square(w)).sum()
+
+        def adam_loss(params):
+            w = params["w"]
+            g = mx.square(w)
+            return (w - 0.1 * g / (mx.sqrt(mx.square(g)) + 1e-8)).sum()
+
+        for optim, loss in [(opt.SGD(0.1), sgd_loss), (opt.Adam(0.1), adam_loss)]:
+            grads = mx.grad(fused_loss)(params, optim)
+            expected = mx.grad(loss)(params)
+            self.assertTrue(mx.allclose(grads["w"], expected["w"], atol=1e-5))
+
+    def test_adamw_decay(self):
+        params = {"w": mx.random.normal((3, 3))}
+        grads = {"w": mx.random.normal((3, 3))}
+        adam = opt.Adam(0.1).apply_gradients(grads, params)["w"]
+        adamw = opt.AdamW(0.1, weight_decay=0.5).apply_gradients(grads, params)
+        expected = adam - 0.1 * 0.5 * params["w"]
+        self.assertTrue(mx.allclose(adamw["w"], expected, atol=1e-5))
+
+    def test_clip_grad_norm(self):
+        grads = {
+            "a": mx.array([3.0, 0.0]),
+            "b": [mx.array([[4.0]], dtype=mx.float16)],
+            "c": nn.SparseGradient(
+                mx.array([0, 0]), mx.array([[6.0, 0.0], [6.0, 0.0]]), (3, 2)
+            ),
+        }
+        norm = mx.fast.global_norm([grads["a"], grads["b"][0]])
+        self.assertAlmostEqual(norm.item(), 5.0, places=5)
+
+        # The summed rows of the sparse gradient have norm 12
+        clipped, norm = opt.clip_grad_norm(grads, max_norm=6.5)
+        self.assertAlmostEqual(norm.item(), 13.0, places=4)
+        dense = mx.fast.global_norm([grads["a"], grads["b"][0], grads["c"].to_dense()])
+        self.assertAlmostEqual(norm.item(), dense.item(), places=4)
+        self.assertEqual(clipped["b"][0].dtype, mx.float16)
+        self.assertTrue(mx.allclose(clipped["a"], mx.array([1.5, 0.0])))
+        self.assertTrue(mx.allclose(clipped["b"][0], mx.array([[2.0]])))
+        self.assertTrue(mx.allclose(clipped["c"].to_dense()[0], mx.array([6.0, 0.0])))
+
+        # Gradients below the maximum norm are unchanged
+        clipped, _ = opt.clip_grad_norm(grads, max_norm=20.0)
+        self.assertTrue(mx.array_equal(clipped["a"], grads["a"]))
+
+    def test_schedules(self):
+        steps = mx.array([0, 5, 10, 20], mx.uint64)
+
+        lr = opt.step_decay(1.0, 0.5, 10)(steps)
+        self.assertTrue(mx.allclose(lr, mx.array([1.0, 1.0, 0.5, 0.25])))
+
+        lr = opt.cosine_decay(1.0, 10, end=0.1)(steps)
+        expected = mx.array([1.0, 0.55, 0.1, 0.1])
+        self.assertTrue(mx.allclose(lr, expected))
+
+        lr = opt.linear_warmup(10, 1.0)(steps)
+        self.assertTrue(mx.allclose(lr, mx.array([0.0, 0.5, 1.0, 1.0])))
+
+        schedule = opt.join_schedules(
+            [opt.linear_warmup(10, 1.0), opt.step_decay(1.0, 0.5, 5)], [10]
+        )
+        lr = schedule(steps)
+        self.assertTrue(mx.allclose(lr, mx.array([0.0, 0.5, 1.0, 0.25])))
+
+        with self.assertRaises(ValueError):
+            opt.join_schedules([opt.linear_warmup(10, 1.0)], [10])
+
+    def test_scheduled_learning_rate(self):
+        params = {"w": mx.zeros((2,))}
+        grads = {"w": mx.ones((2,))}
+
+        optim = opt.SGD(learning_rate=opt.linear_warmup(2, 1.0))
+        self.assertEqual(optim.learning_rate.item(), 0.0)
+        for expected in [0.0, -0.5, -1.5, -2.5]:
+            params = optim.apply_gradients(grads, params)
+            mx.eval(params, optim.state)
+            self.assertTrue(mx.allclose(params["w"], mx.full((2,), expected)))
+        self.assertEqual(optim.step.item(), 4)
+
+        # A constant learning rate is stored as an array too
+        optim = opt.Adagrad(0.1)
+        self.assertEqual(optim.learning_rate.dtype, mx.float32)
+        optim.learning_rate = 0.2
+        self.assertAlmostEqual(optim.learning_rate.item(), 0.2, places=6)
+
+        # Parameters named like the hyperparameters have their own state
+        params = {"step": mx.zeros((2,)), "learning_rate": mx.zeros((2,))}
+        grads = {"step": mx.ones((2,)), "learning_rate": mx.ones((2,))}
+        optim = opt.Adam(0.1)
+        for _ in range(2):
+            params = optim.apply_gradients(grads, params)
+            mx.eval(params, optim.state)
+        self.assertEqual(optim.step.item(), 2)
+        self.assertAlmostEqual(optim.learning_rate.item(), 0.1, places=6)
+        self.assertTrue(mx.allclose(params["step"], params["learning_rate"]))
+
+        # The fused steps take the learning rate as an array
+        w, g = mx.ones((3,)), mx.ones((3,))
+        w_new, _ = mx.fast.sgd_step(w, g, mx.array(0.5))
+        self.assertTrue(mx.allclose(w_new, mx.full((3,), 0.5)))
+        with self.assertRaises(ValueError):
+            mx.fast.sgd_step(w, g, mx.array([0.5, 0.5]))
+
+    def test_mixed_precision(self):
+        # An elementwise model since half precision matmuls need the GPU
+        class Model(nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.weight = mx.ones((2,))
+                self.bias = mx.zeros((1,))
+
+            def __call__(self, x):
+                return (x * self.weight).sum(-1, keepdims=True) + self.bias
+
+        def loss_fn(model, x, y):
+            return ((model(x) - y) ** 2).mean()
+
+        model = Model()
+        amp = opt.MixedPrecision(model, opt.SGD(0.1), loss_scale=2.0**10)
+        self.assertEqual(model.weight.dtype, mx.float16)
+        self.assertEqual(amp.state["master"]["weight"].dtype, mx.float32)
+
+        x, y = mx.array([[1.0, 2.0]]), mx.array([[1.0]])
+        loss_and_grad_fn = amp.value_and_grad(loss_fn)
+        loss, grads = loss_and_grad_fn(model, x, y)
+        self.assertEqual(loss.dtype, mx.float16)
+        self.assertEqual(grads["weight"].dtype, mx.float32)
+        self.assertTrue(mx.allclose(grads["weight"], mx.array([4.0, 8.0])))
+
+        amp.update(grads)
+        mx.eval(model.parameters(), amp.state)
+        expected = mx.array([0.6, 0.2])
+        self.assertTrue(mx.allclose(amp.state["master"]["weight"], expected))
+        self.assertEqual(model.weight.dtype, mx.float16)
+        self.assertEqual(amp.state["growth_count"].item(), 1)
+
+        # An overflow skips the update and halves the loss scale
+        amp.state["loss_scale"] = mx.array(2.0**30)
+        _, grads = loss_and_grad_fn(model, x, y)
+        amp.update(grads)
+        mx.eval(model.parameters(), amp.state)
+        self.assertTrue(mx.allclose(amp.state["master"]["weight"], expected))
+        self.assertEqual(amp.loss_scale.item(), 2.0**29)
+        self.assertEqual(amp.state["growth_count"].item(), 0)
+        self.assertEqual(amp.optimizer.step.item(), 1)
+
+        # The skipped update leaves the optimizer state finite
+        amp = opt.MixedPrecision(Model(), opt.Adam(1e-3), loss_scale=4.0)
+        _, grads = amp.value_and_grad(loss_fn)(amp.model, x, y)
+        amp.update(grads)
+        mx.eval(amp.model.parameters(), amp.state)
+        before = mlx.utils.tree_flatten(amp.state)
+        amp.state["loss_scale"] = mx.array(2.0**30)
+        _, grads = amp.value_and_grad(loss_fn)(amp.model, x, y)
+        norm = mx.fast.global_norm(mlx.utils.tree_leaves(grads))
+        self.assertFalse(math.isfinite(norm.item()))
+        amp.update(grads)
+        mx.eval(amp.model.parameters(), amp.state)
+        after = mlx.utils.tree_flatten(amp.state)
+        for (_, old), (k, new) in zip(before, after):
+            if k in ("loss_scale", "growth_count"):
+                continue
+            self.assertTrue(mx.array_equal(old, new), k)
+
+        # A skipped first step leaves the state uninitialized so the next
+        # step matches the first step of a fresh optimizer
+        skipped = opt.MixedPrecision(Model(), opt.Adam(1e-2), loss_scale=2.0**30)
+        _, grads = skipped.value_and_grad(loss_fn)(skipped.model, x, y)
+        skipped.update(grads)
+        mx.eval(skipped.model.parameters(), skipped.state)
+        self.assertEqual(skipped.loss_scale.item(), 2.0**29)
+        self.assertEqual(len(skipped.optimizer.state["parameters"]), 0)
+        self.assertFalse("step" in skipped.optimizer.state)
+        fresh = opt.MixedPrecision(Model(), opt.Adam(1e-2), loss_scale=4.0)
+        for amp in (skipped, fresh):
+            amp.state["loss_scale"] = mx.array(4.0)
+            _, grads = amp.value_and_grad(loss_fn)(amp.model, x, y)
+            amp.update(grads)
+            mx.eval(amp.model.parameters(), amp.state)
+        self.assertTrue(
+            mx.array_equal(
+                skipped.state["master"]["weight"], fresh.state["master"]["weight"]
+            )
+        )
+        self.assertEqual(skipped.optimizer.step.item(), 1)
+
+        # The scale grows after enough finite steps
+        amp = opt.MixedPrecision(
+            Model(), opt.Adam(1e-3), growth_interval=2, loss_scale=4.0
+        )
+        for _ in range(2):
+            _, grads = amp.value_and_grad(loss_fn)(amp.model, x, y)
+            amp.update(grads)
+            mx.eval(amp.model.parameters(), amp.state)
+        self.assertEqual(amp.loss_scale.item(), 8.0)
+
+        with self.assertRaises(ValueError):
+            opt.MixedPrecision(nn.Linear(2, 1), opt.SGD(0.1), mx.float32)
+
+    def test_memory_efficient_state(self):
+        params = {"w": mx.random.normal((8, 100)), "b": mx.random.normal((100,))}
+        grads = mlx.utils.tree_map(lambda x: mx.random.normal(x.shape), params)
+
+        # The 8-bit moments give nearly the same update in a quarter of the
+        # memory
+        adam = opt.AdamW(0.01, quantize_state=True)
+        quantized = adam.apply_gradients(grads, params)
+        expected = opt.AdamW(0.01).apply_gradients(grads, params)
+        mx.eval(quantized, adam.state)
+        self.assertEqual(adam.state["parameters"]["w"]["moments"].dtype, mx.uint8)
+        self.assertEqual(adam.state["parameters"]["w"]["moments"].shape, [4, 520])
+        for k in params:
+            error = mx.abs(quantized[k] - expected[k]).mean()
+            self.assertLess(error.item(), 1e-3)
+
+        # A block mixing magnitudes can have a second moment below the first
+        # level of the block next to a first moment that is not. The update
+        # must not divide the latter by zero.
+        w = {"w": mx.zeros((256,))}
+        g = mx.concatenate([mx.array([1000.0]), mx.full((255,), 0.01)])
+        adam = opt.Adam(1e-3, quantize_state=True)
+        dense = opt.Adam(1e-3)
+        quantized = adam.apply_gradients({"w": g}, w)
+        expected = dense.apply_gradients({"w": g}, w)
+        g = mx.concatenate([mx.array([0.0]), mx.full((255,), 0.01)])
+        for _ in range(60):
+            quantized = adam.apply_gradients({"w": g}, quantized)
+            expected = dense.apply_gradients({"w": g}, expected)
+            mx.eval(quantized, expected, adam.state, dense.state)
+        # The dense update moves every element by about 0.06
+        error = mx.abs(quantized["w"] - expected["w"]).max()
+        self.assertLess(error.item(), 0.1)
+
+        # Adafactor keeps the means of the rows and columns of the matrices
+        # and the full second moment of the vectors
+        def adafactor_reference(w, g, row, col, step, lr=0.1):
+            shape = w.shape
+            w, g = w.reshape(-1, shape[-1]), g.reshape(-1, shape[-1])
+            beta2 = 1 - step**-0.8
+            g2 = mx.square(g) + 1e-30
+            row = beta2 * row.reshape(-1) + (1 - beta2) * g2.mean(-1)
+            col = beta2 * col + (1 - beta2) * g2.mean(-2)
+            u = g / mx.sqrt(row[:, None] * col[None] / row.mean())
+            u = u / mx.maximum(1.0, mx.sqrt(mx.square(u).mean()))
+            scale = mx.maximum(1e-3, mx.sqrt(mx.square(w).mean()))
+            return (w - lr * scale * u).reshape(shape), row, col
+
+        adafactor = opt.Adafactor(0.1)
+        expected = dict(params)
+        rows = {
+            k: mx.zeros((v.shape[0] if v.ndim > 1 else 1,)) for k, v in params.items()
+        }
+        cols = {k: mx.zeros((v.shape[-1],)) for k, v in params.items()}
+        for step in range(1, 3):
+            params = adafactor.apply_gradients(grads, params)
+            mx.eval(params, adafactor.state)
+            for k in params:
+                expected[k], rows[k], cols[k] = adafactor_reference(
+                    expected[k], grads[k], rows[k], cols[k], step
+                )
+                self.assertTrue(mx.allclose(params[k], expected[k], atol=1e-5))
+        self.assertEqual(adafactor.state["parameters"]["w"]["row"].shape, [8])
+        self.assertEqual(adafactor.state["parameters"]["w"]["col"].shape, [100])
+        self.assertEqual(adafactor.state["parameters"]["b"]["row"].shape, [1])
+        self.assertEqual(adafactor.state["parameters"]["b"]["col"].shape, [100])
+        self.assertEqual(params["w"].shape, [8, 100])
+
+        # The first step of a vector moves every element by the same amount
+        w, g = mx.ones((4,)), mx.array([1.0, -2.0, 3.0, -4.0])
+        w_new, row, col = mx.fast.adafactor_step(
+            w, g, mx.zeros((1,)), mx.zeros((4,)), 0.1, 0.0
+        )
+        self.assertTrue(mx.allclose(w_new, 1 - 0.1 * mx.sign(g)))
+        self.assertTrue(mx.allclose(col, mx.square(g)))
+
 
 if __name__ == "__main__":
     unittest.main()
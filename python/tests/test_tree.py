@@ -22,6 +22,48 @@ class TestTreeUtils(mlx_tests.MLXTestCase):
         self.assertEqual(list(zip(*flat_tree))[1], vals)
         self.assertEqual(mlx.utils.tree_unflatten(flat_tree), tree)
 
+    def test_tree_map_multiple_trees(self):
+        tree = {"a": [1, (2, 3)], "b": 4}
+        other = {"a": [10, (20, 30)], "b": 40, "c": 50}
+        out = mlx.utils.tree_map(lambda x, y: x + y, tree, other)
+        self.assertEqual(out, {"a": [11, (22, 33)], "b": 44})
+        self.assertIsInstance(out["a"][1], tuple)
+
+    def test_tree_flatten_options(self):
+        tree = {"a": [1, 2], "b": (3,)}
+        flat_tree = mlx.utils.tree_flatten(tree, ".model")
+        self.assertEqual(
+            flat_tree, [("model.a.0", 1), ("model.a.1", 2), ("model.b.0", 3)]
+        )
+
+        flat_tree = mlx.utils.tree_flatten(tree, is_leaf=lambda x: isinstance(x, list))
+        self.assertEqual(flat_tree, [("a", [1, 2]), ("b.0", 3)])
+        self.assertEqual(mlx.utils.tree_leaves(tree), [1, 2, 3])
+
+    def test_tree_unflatten(self):
+        self.assertEqual(mlx.utils.tree_unflatten([("", 1)]), 1)
+        self.assertEqual(
+            mlx.utils.tree_unflatten([("hello.world", 42)]), {"hello": {"world": 42}}
+        )
+        tree = mlx.utils.tree_unflatten([("2.a", 1), ("0", 2)])
+        self.assertEqual(tree, [2, {}, {"a": 1}])
+
+        with self.assertRaises(ValueError):
+            mlx.utils.tree_unflatten([("0", 1), ("a", 2)])
+
+    def test_tree_structure(self):
+        tree = {"w": mx.zeros((2,)), "layers": [{"b": mx.ones((3,))}, (1, 2)]}
+        structure = mlx.utils.tree_structure(tree)
+        self.assertEqual(structure.num_leaves, 4)
+        leaves = mlx.utils.tree_leaves(tree)
+        rebuilt = structure.unflatten(leaves)
+        self.assertEqual(mlx.utils.tree_flatten(rebuilt), mlx.utils.tree_flatten(tree))
+        self.assertIsInstance(rebuilt["layers"][1], tuple)
+        self.assertEqual(structure, mlx.utils.tree_structure(rebuilt))
+
+        with self.assertRaises(ValueError):
+            structure.unflatten(leaves[:-1])
+
 
 if __name__ == "__main__":
     unittest.main()
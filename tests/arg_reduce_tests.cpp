@@ -1,5 +1,6 @@
 // Copyright © 2023 Apple Inc.
 
+#include <cmath>
 #include <iostream>
 
 #include "doctest/doctest.h"
@@ -205,3 +206,33 @@ TEST_CASE("test arg reduce irregular strides") {
     return;
   }
 }
+
+TEST_CASE("test arg reduce long rows") {
+  // Long rows are reduced in lanes and split across threads, check that
+  // ties still resolve to the first index and that NaNs win
+  for (int n : {5000, 200000}) {
+    std::vector<float> data(3 * n, 0.0f);
+    data[4000] = 2.0f;
+    data[4500] = 2.0f;
+    data[17] = -1.0f;
+    data[n + 3000] = std::nanf("");
+    data[n + 4000] = std::nanf("");
+    data[2 * n + 1000] = -3.0f;
+    data[2 * n + n - 1] = -3.0f;
+    auto x = array(data.begin(), {3, n});
+
+    auto expected_max = array({4000, 3000, 0}, uint32);
+    auto expected_min = array({17, 3000, 1000}, uint32);
+    CHECK(array_equal(argmax(x, 1), expected_max).item<bool>());
+    CHECK(array_equal(argmin(x, 1), expected_min).item<bool>());
+
+    auto xt = transpose(x);
+    CHECK(array_equal(argmax(xt, 0), expected_max).item<bool>());
+    CHECK(array_equal(argmin(xt, 0), expected_min).item<bool>());
+    CHECK(array_equal(argmax(copy(xt), 0), expected_max).item<bool>());
+
+    auto xh = astype(x, float16);
+    CHECK(array_equal(argmax(xh, 1), expected_max).item<bool>());
+    CHECK(array_equal(argmin(xh, 1), expected_min).item<bool>());
+  }
+}
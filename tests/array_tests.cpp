@@ -220,6 +220,22 @@ TEST_CASE("test array types") {
     CHECK(array_equal(x, array({1.0f, 2.0f, 4.0f})).item<bool>());
   }
 
+  // float64
+  {
+    array x(1.25, float64);
+    CHECK_EQ(x.dtype(), float64);
+    CHECK_EQ(x.item<double>(), 1.25);
+
+    x = array({0.1, 0.2}, float64);
+    CHECK_EQ(x.dtype(), float64);
+    CHECK_EQ(x.data<double>()[0], 0.1);
+
+    std::vector<double> data{1.0, 2.0, 4.0};
+    x = array(data.data(), {static_cast<int>(data.size())}, float64);
+    CHECK_EQ(x.dtype(), float64);
+    CHECK(array_equal(x, array({1.0f, 2.0f, 4.0f})).item<bool>());
+  }
+
   // complex64
   {
     complex64_t v = {1.0f, 1.0f};
@@ -251,6 +267,7 @@ TEST_CASE("test array types") {
     basic_dtype_str_test("<i8", int64);
     basic_dtype_str_test("<f2", float16);
     basic_dtype_str_test("<f4", float32);
+    basic_dtype_str_test("<f8", float64);
     basic_dtype_str_test("<V2", bfloat16);
     basic_dtype_str_test("<c8", complex64);
   }
@@ -589,3 +606,28 @@ TEST_CASE("test array shared buffer") {
 
   eval(a + b);
 }
+
+TEST_CASE("test array buffer donation") {
+  auto x = ones({8});
+  eval(x);
+  auto ptr = x.data<float>();
+
+  // The input is still referenced so its buffer is not reused
+  auto y = x + 1.0f;
+  eval(y);
+  CHECK_NE(y.data<float>(), ptr);
+  CHECK(array_equal(x, ones({8})).item<bool>());
+
+  // The output reuses the buffer of an input that is no longer referenced
+  y = x + y;
+  x = array(0.0f);
+  eval(y);
+  CHECK_EQ(y.data<float>(), ptr);
+  CHECK(array_equal(y, full({8}, 3.0f)).item<bool>());
+
+  // Buffers are not donated to outputs of a different type
+  auto z = greater(astype(arange(8), float32), array(3.0f));
+  eval(z);
+  CHECK_EQ(z.dtype(), bool_);
+  CHECK_EQ(sum(astype(z, int32)).item<int>(), 4);
+}
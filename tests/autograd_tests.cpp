@@ -2,6 +2,7 @@
 
 #include <algorithm>
 #include <cmath>
+#include <functional>
 #include <numeric>
 #include <sstream>
 #include <vector>
@@ -1192,3 +1193,97 @@ TEST_CASE("test scan grads") {
     CHECK(array_equal(out, expected).item<bool>());
   }
 }
+
+TEST_CASE("test checkpoint grads") {
+  int calls = 0;
+  auto fun = [&calls](const std::vector<array>& inputs) {
+    calls++;
+    auto y = exp(inputs[0]) * inputs[1];
+    return std::vector<array>{sum(y), y};
+  };
+  auto cfun = checkpoint(fun);
+
+  auto x = array({0.0f, 1.0f, 2.0f});
+  auto w = array({1.0f, 2.0f, 3.0f});
+  auto out = cfun({x, w});
+  CHECK_EQ(calls, 1);
+  CHECK(allclose(out[0], sum(exp(x) * w)).item<bool>());
+  CHECK(allclose(out[1], exp(x) * w).item<bool>());
+
+  // The function is recomputed for the backward pass
+  auto loss = [&cfun](const std::vector<array>& inputs) {
+    return std::vector<array>{cfun(inputs)[0]};
+  };
+  calls = 0;
+  auto [outs, vjps] = vjp(loss, {x, w}, {array(1.0f)});
+  CHECK_EQ(calls, 2);
+  CHECK(allclose(outs[0], sum(exp(x) * w)).item<bool>());
+  CHECK(allclose(vjps[0], exp(x) * w).item<bool>());
+  CHECK(allclose(vjps[1], exp(x)).item<bool>());
+
+  // Same for the jvp, reductions have no jvp so use the elementwise output
+  auto elementwise = [&cfun](const std::vector<array>& inputs) {
+    return std::vector<array>{cfun(inputs)[1]};
+  };
+  auto [_, jvps] = jvp(elementwise, {x, w}, {ones({3}), zeros({3})});
+  CHECK(allclose(jvps[0], exp(x) * w).item<bool>());
+}
+
+TEST_CASE("test checkpoint releases intermediates") {
+  std::vector<std::uintptr_t> ids;
+  auto fun = [&ids](const std::vector<array>& inputs) {
+    auto h = exp(inputs[0]);
+    ids.push_back(h.id());
+    return std::vector<array>{sum(sin(h))};
+  };
+
+  // Whether the graph of a contains an array with the given id
+  std::function<bool(const array&, std::uintptr_t)> reaches;
+  reaches = [&reaches](const array& a, std::uintptr_t id) {
+    if (a.id() == id) {
+      return true;
+    }
+    for (auto& in : a.inputs()) {
+      if (reaches(in, id)) {
+        return true;
+      }
+    }
+    return false;
+  };
+
+  // The gradient of the plain function refers to the forward intermediate
+  auto x = array({0.0f, 1.0f, 2.0f});
+  auto grads = vjp(fun, {x}, {array(1.0f)}).second;
+  CHECK(reaches(grads[0], ids[0]));
+
+  // The gradient of the checkpointed function only refers to the
+  // recomputed one
+  ids.clear();
+  auto cgrads = vjp(checkpoint(fun), {x}, {array(1.0f)}).second;
+  CHECK_EQ(ids.size(), 2);
+  CHECK_FALSE(reaches(cgrads[0], ids[0]));
+  CHECK(reaches(cgrads[0], ids[1]));
+  CHECK(allclose(cgrads[0], grads[0]).item<bool>());
+}
+
+TEST_CASE("test checkpoint random") {
+  auto fun = [](const std::vector<array>& inputs) {
+    auto mask = random::bernoulli(array(0.5f), inputs[0].shape());
+    return std::vector<array>{sum(square(inputs[0]) * mask)};
+  };
+  auto x = random::normal({100});
+
+  random::seed(7);
+  auto [outs, grads] = vjp(fun, {x}, {array(1.0f)});
+  random::seed(7);
+  auto [couts, cgrads] = vjp(checkpoint(fun), {x}, {array(1.0f)});
+  CHECK(array_equal(outs[0], couts[0]).item<bool>());
+  CHECK(array_equal(grads[0], cgrads[0]).item<bool>());
+
+  // The recomputation leaves the global sequence where the forward pass
+  // left it
+  auto next = random::bits({4});
+  random::seed(7);
+  fun({x});
+  CHECK(array_equal(next, random::bits({4})).item<bool>());
+}
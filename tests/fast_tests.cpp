@@ -0,0 +1,265 @@
+// Copyright © 2023 Apple Inc.
+
+#include "doctest/doctest.h"
+
+#include "mlx/mlx.h"
+
+using namespace mlx::core;
+
+TEST_CASE("test sgd step") {
+  auto w = random::normal({4, 5});
+  auto g = random::normal({4, 5});
+  auto v = random::normal({4, 5});
+
+  // Without momentum
+  auto out = fast::sgd_step(w, g, std::nullopt, 0.1f);
+  CHECK_EQ(out.size(), 1);
+  CHECK(allclose(out[0], w - 0.1f * g).item<bool>());
+
+  // With momentum, weight decay and dampening
+  out = fast::sgd_step(w, g, v, 0.1f, 0.9f, 0.01f, 0.5f);
+  CHECK_EQ(out.size(), 2);
+  auto gd = g + 0.01f * w;
+  auto v_expected = 0.9f * v + 0.5f * gd;
+  CHECK(allclose(out[1], v_expected).item<bool>());
+  CHECK(allclose(out[0], w - 0.1f * v_expected).item<bool>());
+
+  // Nesterov momentum from a zero buffer
+  out = fast::sgd_step(w, g, std::nullopt, 0.1f, 0.9f, 0.0f, 0.0f, true);
+  CHECK(allclose(out[1], g).item<bool>());
+  CHECK(allclose(out[0], w - 0.1f * (g + 0.9f * g)).item<bool>());
+
+  // Mismatched shapes and complex arrays throw
+  CHECK_THROWS_AS(
+      fast::sgd_step(w, zeros({5}), std::nullopt, 0.1f), std::invalid_argument);
+  CHECK_THROWS_AS(
+      fast::sgd_step(astype(w, complex64), g, std::nullopt, 0.1f),
+      std::invalid_argument);
+}
+
+TEST_CASE("test adam step") {
+  auto w = random::normal({3, 7});
+  auto g = random::normal({3, 7});
+  auto m = random::normal({3, 7});
+  auto v = abs(random::normal({3, 7}));
+
+  auto out = fast::adam_step(w, g, m, v, 0.01f, 0.9f, 0.999f, 1e-8f, 0.1f);
+  CHECK_EQ(out.size(), 3);
+  auto m_expected = 0.9f * m + 0.1f * g;
+  auto v_expected = 0.999f * v + 0.001f * square(g);
+  auto w_expected = w * (1.0f - 0.01f * 0.1f) -
+      0.01f * m_expected / (sqrt(v_expected) + 1e-8f);
+  CHECK(allclose(out[1], m_expected).item<bool>());
+  CHECK(allclose(out[2], v_expected).item<bool>());
+  CHECK(allclose(out[0], w_expected).item<bool>());
+
+  // Transposed inputs and half precision
+  out = fast::adam_step(
+      transpose(w),
+      transpose(g),
+      transpose(m),
+      transpose(v),
+      0.01f,
+      0.9f,
+      0.999f,
+      1e-8f,
+      0.1f);
+  CHECK(allclose(out[0], transpose(w_expected)).item<bool>());
+
+  out =
+      fast::adam_step(astype(w, float16), g, m, v, 0.01f, 0.9f, 0.999f, 1e-8f);
+  CHECK_EQ(out[0].dtype(), float32);
+  out = fast::adam_step(
+      astype(w, float16),
+      astype(g, float16),
+      astype(m, float16),
+      astype(v, float16),
+      0.01f,
+      0.9f,
+      0.999f,
+      1e-8f,
+      0.1f);
+  CHECK_EQ(out[0].dtype(), float16);
+  CHECK(allclose(astype(out[0], float32), w_expected, 1e-2, 1e-2).item<bool>());
+}
+
+TEST_CASE("test adagrad step") {
+  auto w = random::normal({10});
+  auto g = random::normal({10});
+  auto v = abs(random::normal({10}));
+
+  auto out = fast::adagrad_step(w, g, v, 0.1f, 1e-8f);
+  auto v_expected = v + square(g);
+  CHECK(allclose(out[1], v_expected).item<bool>());
+  CHECK(
+      allclose(out[0], w - 0.1f * g / (sqrt(v_expected) + 1e-8f)).item<bool>());
+
+  // vmap with an unbatched state
+  auto fun = [&v](const std::vector<array>& inputs) {
+    return fast::adagrad_step(inputs[0], inputs[1], v, 0.1f, 1e-8f);
+  };
+  auto ws = random::normal({3, 10});
+  auto gs = random::normal({3, 10});
+  auto outs = vmap(fun, {0, 0})({ws, gs});
+  CHECK_EQ(outs[0].shape(), std::vector<int>{3, 10});
+  auto expected =
+      fast::adagrad_step(ws, gs, broadcast_to(v, {3, 10}), 0.1f, 1e-8f);
+  CHECK(array_equal(outs[0], expected[0]).item<bool>());
+  CHECK(array_equal(outs[1], expected[1]).item<bool>());
+}
+
+TEST_CASE("test optimizer step grads") {
+  auto w = random::normal({3, 4});
+  auto g = random::normal({3, 4});
+  auto m = random::normal({3, 4});
+  auto v = abs(random::normal({3, 4}));
+  auto t = random::normal({3, 4});
+
+  // The gradients match the ones of the composed update
+  auto fused = [&](const array& w) {
+    return fast::adam_step(
+        w, square(w), m, v, 0.1f, 0.9f, 0.99f, 1e-8f, 0.1f)[0];
+  };
+  auto composed = [&](const array& w) {
+    auto g = square(w);
+    auto m_new = 0.9f * m + 0.1f * g;
+    auto v_new = 0.99f * v + 0.01f * square(g);
+    return w * (1.0f - 0.1f * 0.1f) - 0.1f * m_new / (sqrt(v_new) + 1e-8f);
+  };
+  auto [out, vjp_fused] = vjp(fused, w, t);
+  auto vjp_composed = vjp(composed, w, t).second;
+  CHECK(allclose(vjp_fused, vjp_composed, 1e-4, 1e-4).item<bool>());
+  auto jvp_fused = jvp(fused, w, t).second;
+  auto jvp_composed = jvp(composed, w, t).second;
+  CHECK(allclose(jvp_fused, jvp_composed, 1e-4, 1e-4).item<bool>());
+
+  // Gradients with respect to the state and the learning rate
+  auto fun = [&](const std::vector<array>& inputs) {
+    auto out = fast::sgd_step(w, g, inputs[0], inputs[1], 0.9f, 0.0f, 0.5f);
+    return std::vector<array>{sum(out[0])};
+  };
+  auto grads = value_and_grad(fun, {0, 1})({v, array(0.1f)}).second;
+  CHECK(allclose(grads[0], full({3, 4}, -0.1f * 0.9f)).item<bool>());
+  CHECK(allclose(grads[1], -sum(0.9f * v + 0.5f * g)).item<bool>());
+}
+
+TEST_CASE("test global norm") {
+  auto a = random::normal({4, 5});
+  auto b = random::normal({100000});
+  auto c = astype(random::normal({3, 3}), float16);
+
+  auto expected = sqrt(sum(square(a)) + sum(square(b)) + sum(square(c)));
+  auto norm = fast::global_norm({a, b, transpose(c)});
+  CHECK_EQ(norm.ndim(), 0);
+  CHECK_EQ(norm.dtype(), float32);
+  CHECK(allclose(norm, expected).item<bool>());
+
+  // Broadcasted inputs count every element
+  norm = fast::global_norm({broadcast_to(array(2.0f), {4, 4})});
+  CHECK_EQ(norm.item<float>(), 8.0f);
+
+  // Integers are cast, no inputs give a zero norm
+  CHECK_EQ(fast::global_norm({array({3, 4})}).item<float>(), 5.0f);
+  CHECK_EQ(fast::global_norm({}).item<float>(), 0.0f);
+  CHECK_EQ(fast::global_norm({zeros({0})}).item<float>(), 0.0f);
+  CHECK_THROWS_AS(
+      fast::global_norm({astype(a, complex64)}), std::invalid_argument);
+}
+
+TEST_CASE("test optimizer step learning rate") {
+  auto w = random::normal({8});
+  auto g = random::normal({8});
+
+  // An array learning rate gives the same update as a float
+  auto lr = array(0.1f);
+  auto out = fast::sgd_step(w, g, std::nullopt, lr);
+  CHECK(allclose(out[0], fast::sgd_step(w, g, std::nullopt, 0.1f)[0])
+            .item<bool>());
+
+  // The learning rate is computed in float32 for half precision updates
+  out = fast::adagrad_step(
+      astype(w, float16), astype(g, float16), zeros({8}, float16), lr, 1e-8f);
+  CHECK_EQ(out[0].dtype(), float16);
+
+  CHECK_THROWS_AS(
+      fast::sgd_step(w, g, std::nullopt, array({0.1f, 0.2f})),
+      std::invalid_argument);
+}
+
+TEST_CASE("test adam step 8bit") {
+  auto w = random::normal({1000});
+  auto m = random::normal({1000});
+  auto v = square(m);
+
+  // Without a state the moments start from m = g and v = g^2. The state of
+  // each block is two floats followed by the codes of m and v.
+  auto g = m;
+  auto out =
+      fast::adam_step_8bit(w, g, std::nullopt, 0.01f, 0.9f, 0.99f, 1e-8f);
+  CHECK_EQ(out.size(), 2);
+  CHECK_EQ(out[1].dtype(), uint8);
+  CHECK_EQ(out[1].shape(), std::vector<int>{4, 2 * 256 + 8});
+
+  // The updates are within a few percent of the unquantized ones
+  auto state = out[1];
+  for (int i = 0; i < 5; ++i) {
+    g = random::normal({1000});
+    auto expected = fast::adam_step(w, g, m, v, 0.01f, 0.9f, 0.99f, 1e-8f);
+    out = fast::adam_step_8bit(w, g, state, 0.01f, 0.9f, 0.99f, 1e-8f);
+    CHECK(mean(abs(out[0] - expected[0])).item<float>() < 5e-4);
+    CHECK(allclose(out[0], expected[0], 0.0, 3e-3).item<bool>());
+    w = expected[0];
+    m = expected[1];
+    v = expected[2];
+    state = out[1];
+  }
+
+  // Half precision parameters and a wrong state throw
+  out = fast::adam_step_8bit(
+      astype(w, float16), astype(g, float16), state, 0.01f, 0.9f, 0.99f, 1e-8f);
+  CHECK_EQ(out[0].dtype(), float16);
+  CHECK_THROWS_AS(
+      fast::adam_step_8bit(
+          w, g, zeros({4, 520}, float32), 0.01f, 0.9f, 0.99f, 1e-8f),
+      std::invalid_argument);
+  CHECK_THROWS_AS(
+      fast::adam_step_8bit(
+          w, g, std::nullopt, 0.01f, 0.9f, 0.99f, 1e-8f, 0.0f, 0),
+      std::invalid_argument);
+}
+
+TEST_CASE("test adafactor step") {
+  auto w = random::normal({2, 4, 6});
+  auto g = random::normal({2, 4, 6});
+  auto row = abs(random::normal({2, 4}));
+  auto col = abs(random::normal({2, 6}));
+
+  auto out = fast::adafactor_step(
+      w, g, row, col, array(0.1f), array(0.5f), 1e-30f, 1e-3f, 1.0f, 0.1f);
+  CHECK_EQ(out.size(), 3);
+  auto r = 0.5f * row + 0.5f * mean(square(g), -1);
+  auto c = 0.5f * col + 0.5f * mean(square(g), -2);
+  CHECK(allclose(out[1], r).item<bool>());
+  CHECK(allclose(out[2], c).item<bool>());
+
+  // The update is clipped to an RMS of 1 and scaled by the RMS of w
+  auto v = expand_dims(r, -1) * expand_dims(c, -2) /
+      expand_dims(mean(r, -1, true), -1);
+  auto u = g / sqrt(v);
+  u = u / maximum(array(1.0f), sqrt(mean(square(u))));
+  auto lr = 0.1f * sqrt(mean(square(w)));
+  auto w_expected = (1.0f - lr * 0.1f) * w - lr * u;
+  CHECK(allclose(out[0], w_expected, 1e-4, 1e-5).item<bool>());
+
+  // Vectors are a single row so their second moment is not factored
+  auto b = random::normal({5});
+  auto gb = random::normal({5});
+  out = fast::adafactor_step(
+      b, gb, zeros({1}), zeros({5}), array(0.1f), array(0.0f));
+  CHECK_EQ(out[0].shape(), std::vector<int>{5});
+  CHECK(allclose(out[2], square(gb)).item<bool>());
+
+  CHECK_THROWS_AS(
+      fast::adafactor_step(w, g, zeros({4}), col, array(0.1f), array(0.0f)),
+      std::invalid_argument);
+}
@@ -256,6 +256,81 @@ TEST_CASE("test fft vmap") {
   set_default_device(device);
 }
 
+TEST_CASE("test stft") {
+  auto device = default_device();
+  set_default_device(Device::cpu);
+
+  // Frames match slicing the signal by hand
+  auto x = random::normal({2, 100});
+  auto window = random::uniform({16});
+  auto y = fft::stft(x, 16, 5, window, false);
+  CHECK_EQ(y.shape(), std::vector<int>{2, 17, 9});
+  for (int t : {0, 7, 16}) {
+    auto frame = slice(x, {0, 5 * t}, {2, 5 * t + 16}) * window;
+    auto expected = fft::rfft(frame);
+    auto frame_y = reshape(slice(y, {0, t, 0}, {2, t + 1, 9}), {2, 9});
+    CHECK(allclose(frame_y, expected, 1e-5, 1e-5).item<bool>());
+  }
+
+  // Centered frames are padded with zeros
+  y = fft::stft(x, 16, 4);
+  CHECK_EQ(y.shape(), std::vector<int>{2, 26, 9});
+  auto first = pad(slice(x, {0, 0}, {2, 8}), {1}, {8}, {0});
+  auto y0 = reshape(slice(y, {0, 0, 0}, {2, 1, 9}), {2, 9});
+  CHECK(allclose(y0, fft::rfft(first), 1e-5, 1e-5).item<bool>());
+
+  // The inverse recovers the signal with and without a window and when the
+  // hop does not divide the frame
+  auto n = arange(32.0f);
+  auto hann = 0.5f - 0.5f * cos(n * static_cast<float>(2 * M_PI / 32));
+  x = random::normal({3, 2, 257});
+  auto z = fft::istft(fft::stft(x, 32, 8, hann), 32, 8, hann, true, 257);
+  CHECK_EQ(z.shape(), x.shape());
+  CHECK(allclose(z, x, 1e-4, 1e-4).item<bool>());
+
+  z = fft::istft(
+      fft::stft(x, 10, 3, std::nullopt, false), 10, 3, std::nullopt, false);
+  CHECK_EQ(z.shape(), std::vector<int>{3, 2, 256});
+  CHECK(allclose(z, slice(x, {0, 0, 0}, {3, 2, 256}), 1e-4, 1e-4).item<bool>());
+
+  CHECK_THROWS_AS(fft::stft(x, 32, 0), std::invalid_argument);
+  CHECK_THROWS_AS(fft::stft(x, 32, 8, ones({31})), std::invalid_argument);
+  CHECK_THROWS_AS(
+      fft::stft(x, 300, 8, std::nullopt, false), std::invalid_argument);
+  CHECK_THROWS_AS(fft::istft(y, 32, 8), std::invalid_argument);
+
+  set_default_device(device);
+}
+
+TEST_CASE("test fft threads") {
+  auto device = default_device();
+  set_default_device(Device::cpu);
+
+  CHECK_EQ(fft::num_threads(), 0);
+  CHECK_THROWS_AS(fft::set_num_threads(-1), std::invalid_argument);
+
+  // Batches are split across threads along each axis with the same results
+  // and repeated sizes reuse their plans
+  auto x = random::normal({64, 300});
+  fft::set_num_threads(1);
+  auto y1 = fft::fftn(astype(x, complex64));
+  auto r1 = fft::irfft(fft::rfft(x, 0), 64, 0);
+  // The setting is read when the transforms are evaluated
+  eval(y1, r1);
+  fft::set_num_threads(4);
+  CHECK_EQ(fft::num_threads(), 4);
+  for (int i = 0; i < 3; i++) {
+    auto y4 = fft::fftn(astype(x, complex64));
+    auto r4 = fft::irfft(fft::rfft(x, 0), 64, 0);
+    CHECK(array_equal(y1, y4).item<bool>());
+    CHECK(array_equal(r1, r4).item<bool>());
+  }
+  CHECK(allclose(r1, x, 1e-5, 1e-5).item<bool>());
+  fft::set_num_threads(0);
+
+  set_default_device(device);
+}
+
 TEST_CASE("test fft grads") {
   auto device = default_device();
   set_default_device(Device::cpu);
@@ -293,7 +368,7 @@ TEST_CASE("test fft grads") {
   auto irfft_fn = [](array x) { return fft::irfft(x); };
   cotangent = astype(arange(10), float32);
   vjp_out = vjp(irfft_fn, astype(zeros({6}), complex64), cotangent).second;
-  expected = fft::fft(cotangent, 10, 0);
+  expected = fft::ifft(cotangent, 10, 0);
   auto o_splits = split(vjp_out, {1, 5});
   auto e_splits = split(expected, {1, 5, 6});
   CHECK_EQ(e_splits[0].item<complex64_t>(), o_splits[0].item<complex64_t>());
@@ -304,6 +379,16 @@ TEST_CASE("test fft grads") {
   jvp_out = jvp(irfft_fn, zeros_like(tangent), tangent).second;
   CHECK(array_equal(fft::irfft(tangent), jvp_out).item<bool>());
 
+  // The gradient of a round trip through the real transforms is the
+  // cotangent, for even and odd lengths
+  for (int n : {10, 11}) {
+    auto x = random::normal({n});
+    cotangent = random::normal({n});
+    auto round_trip = [n](array x) { return fft::irfft(fft::rfft(x), n, 0); };
+    vjp_out = vjp(round_trip, x, cotangent).second;
+    CHECK(allclose(vjp_out, cotangent, 1e-5, 1e-5).item<bool>());
+  }
+
   // Check ND vjps run properly
   vjp_out = vjp([](array x) { return fft::fftn(x); },
                 astype(zeros({5, 5}), complex64),
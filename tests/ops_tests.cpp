@@ -279,6 +279,23 @@ TEST_CASE("test transpose") {
   expected = array({0, 2, 4, 6, 1, 3, 5, 7}, {2, 2, 2});
   CHECK(array_equal(x, expected).item<bool>());
 
+  // Check copying large transposes spanning several tiles
+  x = reshape(arange(3 * 100 * 70), {3, 100, 70});
+  y = reshape(transpose(x, {0, 2, 1}), {-1});
+  expected =
+      add(add(reshape(multiply(arange(3), array(7000)), {3, 1, 1}),
+              reshape(multiply(arange(100), array(70)), {1, 1, 100})),
+          reshape(arange(70), {1, 70, 1}));
+  expected = reshape(expected, {-1});
+  CHECK(array_equal(y, expected).item<bool>());
+  y = reshape(transpose(x, {2, 1, 0}), {-1});
+  expected =
+      add(add(reshape(multiply(arange(3), array(7000)), {1, 1, 3}),
+              reshape(multiply(arange(100), array(70)), {1, 100, 1})),
+          reshape(arange(70), {70, 1, 1}));
+  expected = reshape(expected, {-1});
+  CHECK(array_equal(y, expected).item<bool>());
+
   // Check maintaining contiguous status
   x = array({0, 1, 2, 3, 4, 5, 6, 7}, {1, 4, 1, 2});
   CHECK(x.flags().row_contiguous);
@@ -676,6 +693,41 @@ TEST_CASE("test reduction ops") {
     CHECK(array_equal(y, softmax(x, std::vector<int>{-1})).item<bool>());
     CHECK(array_equal(y, softmax(x, std::vector<int>{0})).item<bool>());
   }
+
+  // Large reductions which are split across threads
+  {
+    auto x = ones({1 << 20});
+    CHECK_EQ(sum(x).item<float>(), 1 << 20);
+    x = astype(ones({4096}), float16);
+    CHECK_EQ(sum(x).item<float16_t>(), 4096.0f);
+    x = astype(ones({4096}), bfloat16);
+    CHECK_EQ(sum(x).item<bfloat16_t>(), 4096.0f);
+
+    // Few long rows, many short rows and strided reductions
+    x = ones({4, 100000});
+    CHECK(array_equal(sum(x, 1), full({4}, 100000.0f)).item<bool>());
+    CHECK(array_equal(sum(x, 0), full({100000}, 4.0f)).item<bool>());
+    x = ones({100000, 4});
+    CHECK(array_equal(sum(x, 0), full({4}, 100000.0f)).item<bool>());
+    CHECK(array_equal(sum(x, 1), full({100000}, 4.0f)).item<bool>());
+    x = reshape(arange(1 << 16), {1 << 8, 1 << 8});
+    CHECK(array_equal(max(x, 0), arange((1 << 16) - (1 << 8), 1 << 16))
+              .item<bool>());
+    CHECK(array_equal(min(x, 1), arange(0, 1 << 16, 1 << 8)).item<bool>());
+
+    // Transposed and broadcasted inputs against their contiguous copies
+    x = reshape(arange(64 * 32 * 48, float32), {64, 32, 48});
+    for (auto& axes : std::vector<std::vector<int>>{
+             {0}, {1}, {2}, {0, 1}, {0, 2}, {1, 2}, {0, 1, 2}}) {
+      auto xt = transpose(x, {2, 0, 1});
+      auto xc = copy(xt);
+      CHECK(allclose(sum(xt, axes), sum(xc, axes)).item<bool>());
+      CHECK(array_equal(max(xt, axes), max(xc, axes)).item<bool>());
+      auto xb =
+          broadcast_to(reshape(arange(48, float32), {48, 1, 1}), xt.shape());
+      CHECK(array_equal(sum(xb, axes), sum(copy(xb), axes)).item<bool>());
+    }
+  }
 }
 
 TEST_CASE("test irregular binary ops") {
@@ -697,6 +749,47 @@ TEST_CASE("test irregular binary ops") {
     CHECK(array_equal(add(x, y), full({32, 32}, 8.0f)).item<bool>());
     CHECK(array_equal(subtract(y, x), zeros({32, 32})).item<bool>());
   }
+
+  // High rank broadcasts compared against adding row contiguous copies
+  {
+    // copy shares the buffer of its input so materialize through a flat
+    // reshape which copies non row contiguous inputs
+    auto contiguous = [](const array& x) {
+      auto y = reshape(reshape(x, {-1}), x.shape());
+      eval(y);
+      CHECK(y.flags().row_contiguous);
+      CHECK_EQ(y.data_size(), y.size());
+      return y;
+    };
+    auto x = reshape(arange(2 * 3 * 4 * 5 * 6, float32), {2, 3, 4, 5, 6});
+    auto y = reshape(arange(3 * 6, float32), {1, 3, 1, 1, 6});
+    auto yb = broadcast_to(y, x.shape());
+    CHECK(array_equal(add(x, y), add(x, contiguous(yb))).item<bool>());
+    CHECK(array_equal(add(y, x), add(contiguous(yb), x)).item<bool>());
+
+    y = reshape(arange(2 * 4, float32), {2, 1, 4, 1, 1});
+    yb = broadcast_to(y, x.shape());
+    CHECK(
+        array_equal(multiply(x, y), multiply(x, contiguous(yb))).item<bool>());
+
+    // Transposed inputs
+    auto xt = transpose(x, {0, 2, 1, 4, 3});
+    y = reshape(arange(4 * 3, float32), {1, 4, 3, 1, 1});
+    yb = broadcast_to(y, xt.shape());
+    CHECK(array_equal(subtract(xt, y), subtract(contiguous(xt), contiguous(yb)))
+              .item<bool>());
+
+    // 6D and large enough to be split across threads
+    x = reshape(arange(4 * 8 * 16 * 2 * 32 * 4, float32), {4, 8, 16, 2, 32, 4});
+    y = reshape(arange(8 * 32, float32), {1, 8, 1, 1, 32, 1});
+    yb = broadcast_to(y, x.shape());
+    CHECK(array_equal(add(x, y), add(x, contiguous(yb))).item<bool>());
+    xt = transpose(x, {1, 0, 2, 3, 5, 4});
+    y = reshape(arange(4 * 4, float32), {1, 4, 1, 1, 4, 1});
+    yb = broadcast_to(y, xt.shape());
+    CHECK(array_equal(add(xt, y), add(contiguous(xt), contiguous(yb)))
+              .item<bool>());
+  }
 }
 
 TEST_CASE("test arithmetic unary ops") {
@@ -1064,6 +1157,77 @@ TEST_CASE("test error functions") {
   }
 }
 
+TEST_CASE("test vectorized unary ops") {
+  // An odd number of values so that the last block is partial
+  std::vector<float> vals;
+  for (int i = 0; i < 1003; ++i) {
+    vals.push_back(-20.0f + 40.0f * i / 1002);
+  }
+  auto x = array(vals.data(), {1003});
+
+  auto check_op = [&](auto op, auto ref, const array& in) {
+    std::vector<float> expected;
+    for (auto v : vals) {
+      expected.push_back(ref(v));
+    }
+    array y = op(in);
+    CHECK(
+        allclose(y, array(expected.data(), {1003}), 1e-6, 1e-30).item<bool>());
+
+    // Strided input
+    auto in2 = reshape(concatenate({in, in}), {2, 1003});
+    array y2 = op(transpose(in2));
+    CHECK(allclose(y2, transpose(reshape(concatenate({y, y}), {2, 1003})))
+              .item<bool>());
+
+    // Half precision is computed in float32
+    array y16 = op(astype(in, float16));
+    CHECK_EQ(y16.dtype(), float16);
+    array y32 = op(astype(astype(in, float16), float32));
+    CHECK(array_equal(y16, astype(y32, float16)).item<bool>());
+  };
+
+  check_op(
+      [](const array& a) { return exp(a); },
+      [](float v) { return std::exp(v); },
+      x);
+  check_op(
+      [](const array& a) { return sigmoid(a); },
+      [](float v) { return 1.0f / (1.0f + std::exp(-v)); },
+      x);
+  check_op(
+      [](const array& a) { return tanh(a); },
+      [](float v) { return std::tanh(v); },
+      x);
+  check_op(
+      [](const array& a) { return erf(a); },
+      [](float v) { return std::erf(v); },
+      x);
+  check_op(
+      [](const array& a) { return log(a); },
+      [](float v) { return std::log(std::abs(v) + 1e-3f); },
+      abs(x) + 1e-3f);
+
+  // Special values
+  constexpr float inf = std::numeric_limits<float>::infinity();
+  auto special = array({0.0f, -0.0f, inf, -inf, 1e-40f, 88.8f, -104.0f});
+  auto expected = array({1.0f, 1.0f, inf, 0.0f, 1.0f, inf, 0.0f});
+  CHECK(array_equal(exp(special), expected).item<bool>());
+  expected = array({-inf, -inf, inf, NAN});
+  CHECK(
+      array_equal(slice(log(special), {0}, {4}), expected, true).item<bool>());
+  CHECK_EQ(log(array(1e-40f)).item<float>(), doctest::Approx(std::log(1e-40f)));
+  expected = array({0.5f, 0.5f, 1.0f, 0.0f, 0.5f, 1.0f, 0.0f});
+  CHECK(array_equal(sigmoid(special), expected).item<bool>());
+  expected = array({0.0f, -0.0f, 1.0f, -1.0f, 1e-40f, 1.0f, -1.0f});
+  CHECK(array_equal(tanh(special), expected).item<bool>());
+  expected = array({0.0f, -0.0f, 1.0f, -1.0f, std::erf(1e-40f), 1.0f, -1.0f});
+  CHECK(allclose(erf(special), expected, 1e-6, 0.0).item<bool>());
+  CHECK(std::isnan(exp(array(NAN)).item<float>()));
+  CHECK(std::isnan(erf(array(NAN)).item<float>()));
+  CHECK(std::isnan(tanh(array(NAN)).item<float>()));
+}
+
 TEST_CASE("test arithmetic binary ops") {
   array x(1.0);
   array y(1.0);
@@ -1400,6 +1564,19 @@ TEST_CASE("test gather") {
   CHECK_EQ(out.item<int>(), 1);
   out = gather(x, {array({5}), array({1})}, {0, 1}, {1, 1});
   CHECK_EQ(out.item<int>(), 2);
+
+  // Many indices into contiguous and strided sources
+  x = reshape(arange(64 * 1000), {1000, 64});
+  y = remainder(arange(20000), array(1000));
+  out = gather(x, y, 0, {1, 64});
+  auto expected =
+      add(reshape(multiply(y, array(64)), {20000, 1, 1}),
+          reshape(arange(64), {1, 1, 64}));
+  CHECK(array_equal(out, expected).item<bool>());
+  auto xt = transpose(reshape(arange(64 * 1000), {64, 1000}));
+  out = gather(xt, y, 0, {1, 64});
+  expected = reshape(take(copy(xt), y, 0), {20000, 1, 64});
+  CHECK(array_equal(out, expected).item<bool>());
 }
 
 TEST_CASE("test take") {
@@ -1688,6 +1865,23 @@ TEST_CASE("test scatter") {
   inds = array({0, 1});
   out = scatter_add(in, inds, updates, 0);
   CHECK(array_equal(out, array({1, 0, 1, 0}, {2, 2})).item<bool>());
+
+  // Large scatter add with many collisions
+  in = zeros({1000, 16}, float32);
+  inds = remainder(arange(100000), array(1000));
+  updates = ones({100000, 1, 16}, float32);
+  out = scatter_add(in, inds, updates, 0);
+  CHECK(array_equal(out, full({1000, 16}, 100.0f)).item<bool>());
+
+  // Large scatter keeps the last update to each row
+  updates = reshape(
+      broadcast_to(reshape(arange(100000, float32), {100000, 1}), {100000, 16}),
+      {100000, 1, 16});
+  out = scatter(in, inds, updates, 0);
+  expected = broadcast_to(
+      reshape(add(arange(1000, float32), array(99000.0f)), {1000, 1}),
+      {1000, 16});
+  CHECK(array_equal(out, expected).item<bool>());
 }
 
 TEST_CASE("test complex ops") {
@@ -1855,6 +2049,56 @@ TEST_CASE("test scan op") {
   y = vmap(fun, 1, 1)(x);
   expected = array({1.0f, 2.0f, 4.0f, 6.0f, 9.0f, 12.0f, 16.0f, 20.0f}, {4, 2});
   CHECK(array_equal(y, expected).item<bool>());
+
+  // Long scans are split across threads in blocks or columns so compare
+  // them to a sequential scan of every row
+  auto scan_rows = [](const array& a, int op, bool reverse, bool inclusive) {
+    int n = a.shape(1);
+    std::vector<int> out(a.size());
+    const int* in = a.data<int>();
+    for (int r = 0; r < a.shape(0); r++) {
+      int acc = std::numeric_limits<int>::min();
+      if (op < 2) {
+        acc = op;
+      }
+      for (int j = 0; j < n; j++) {
+        int i = r * n + (reverse ? n - 1 - j : j);
+        int next = std::max(acc, in[i]);
+        if (op == 0) {
+          next = acc + in[i];
+        } else if (op == 1) {
+          next = acc * in[i];
+        }
+        out[i] = inclusive ? next : acc;
+        acc = next;
+      }
+    }
+    return array(out.begin(), a.shape());
+  };
+  auto scan = [](const array& a, int op, int axis, bool rev, bool inc) {
+    switch (op) {
+      case 0:
+        return cumsum(a, axis, rev, inc);
+      case 1:
+        return cumprod(a, axis, rev, inc);
+      default:
+        return cummax(a, axis, rev, inc);
+    }
+  };
+  x = random::randint(-1, 2, {3, 100001}, int32, random::key(0));
+  eval(x);
+  for (int op : {0, 1, 2}) {
+    for (bool reverse : {false, true}) {
+      for (bool inclusive : {false, true}) {
+        auto expected = scan_rows(x, op, reverse, inclusive);
+        CHECK(array_equal(scan(x, op, 1, reverse, inclusive), expected)
+                  .item<bool>());
+        auto xt = transpose(x);
+        auto yt = scan(xt, op, 0, reverse, inclusive);
+        CHECK(array_equal(yt, transpose(expected)).item<bool>());
+      }
+    }
+  }
 }
 
 TEST_CASE("test pad") {
@@ -1925,6 +2169,36 @@ TEST_CASE("test where") {
   out = where(condition, x, y);
   expected = array({1, 2, 2, 1}, {2, 2});
   CHECK(array_equal(where(condition, x, y), expected).item<bool>());
+
+  // The elements that are not selected can be inf or NaN
+  float inf = std::numeric_limits<float>::infinity();
+  float nan = std::numeric_limits<float>::quiet_NaN();
+  condition = array({true, false, true});
+  x = array({1.0f, inf, 3.0f});
+  y = array({nan, 2.0f, -inf});
+  out = where(condition, x, y);
+  CHECK(array_equal(out, array({1.0f, 2.0f, 3.0f})).item<bool>());
+
+  // Non contiguous inputs and mixed types
+  x = transpose(reshape(arange(6), {2, 3}));
+  y = array(0.5f);
+  condition = array({true, false}, {1, 2});
+  out = where(condition, x, y);
+  CHECK_EQ(out.dtype(), float32);
+  expected = array({0.0f, 0.5f, 1.0f, 0.5f, 2.0f, 0.5f}, {3, 2});
+  CHECK(array_equal(out, expected).item<bool>());
+
+  // Gradients only flow to the selected elements
+  condition = array({true, false, true});
+  auto fn = [&condition](const std::vector<array>& inputs) {
+    return std::vector<array>{where(condition, inputs[0], inputs[1])};
+  };
+  auto grads = vjp(fn,
+                   {array({inf, 1.0f, 2.0f}), array({3.0f, inf, 4.0f})},
+                   {array({1.0f, 2.0f, 3.0f})})
+                   .second;
+  CHECK(array_equal(grads[0], array({1.0f, 0.0f, 3.0f})).item<bool>());
+  CHECK(array_equal(grads[1], array({0.0f, 2.0f, 0.0f})).item<bool>());
 }
 
 TEST_CASE("test eye") {
@@ -1980,4 +2254,83 @@ TEST_CASE("test eye with negative k offset") {
       {0.0f, 0.0f, 0.0f, 1.0f, 0.0f, 0.0f, 0.0f, 1.0f, 0.0f, 0.0f, 0.0f, 1.0f},
       {4, 3});
   CHECK(array_equal(eye_4_k_minus1, expected_eye_4_k_minus1).item<bool>());
-}
\ No newline at end of file
+}
+
+TEST_CASE("test topk") {
+  auto x = array({3, 1, 4, 1, 5, 9, 2, 6}, {2, 4});
+  auto idx = argtopk(x, 2, 1);
+  CHECK_EQ(idx.dtype(), uint32);
+  CHECK(array_equal(idx, array({2, 0, 1, 3}, {2, 2})).item<bool>());
+  CHECK(array_equal(topk(x, 2, 1), array({4, 3, 9, 6}, {2, 2})).item<bool>());
+  CHECK(array_equal(topk(x, 1, 0), array({5, 9, 4, 6}, {1, 4})).item<bool>());
+  CHECK(array_equal(topk(x, 3), array({9, 6, 5})).item<bool>());
+  CHECK_EQ(topk(x, 0, 1).shape(), std::vector<int>{2, 0});
+  CHECK_THROWS_AS(topk(x, 5, 1), std::invalid_argument);
+  CHECK_THROWS_AS(topk(x, -1), std::invalid_argument);
+
+  // NaNs are the largest
+  auto nan = std::numeric_limits<float>::quiet_NaN();
+  x = array({1.0f, nan, 3.0f, 2.0f});
+  CHECK(array_equal(argtopk(x, 2), array({1, 2}, uint32)).item<bool>());
+
+  // Long rows with ties in both the heap and the selection, along the last
+  // axis and a strided one, match a stable sort of the negated values
+  auto key = random::key(0);
+  x = random::randint(0, 100, {8, 3000}, int32, key);
+  for (int k : {1, 16, 1000, 3000}) {
+    auto expected = slice(argsort(negative(x), 1), {0, 0}, {8, k});
+    CHECK(array_equal(argtopk(x, k, 1), expected).item<bool>());
+
+    auto xt = transpose(x);
+    CHECK(array_equal(argtopk(xt, k, 0), transpose(expected)).item<bool>());
+  }
+
+  // vmap over a batch of rows
+  auto fn = [](array a) { return argtopk(a, 4, 0); };
+  auto vfn = vmap(fn, 1, 1);
+  CHECK(array_equal(vfn(x), argtopk(x, 4, 0)).item<bool>());
+}
+
+TEST_CASE("test float64") {
+  auto device = default_device();
+  set_default_device(Device::cpu);
+
+  // Mixed precision inputs are promoted and reductions accumulate in double
+  auto x = full({1 << 20}, array(0.1, float64));
+  CHECK_EQ(x.dtype(), float64);
+  CHECK_EQ((x + array(1.0f)).dtype(), float64);
+  CHECK(std::abs(sum(x).item<double>() - 0.1 * (1 << 20)) < 1e-8);
+  CHECK(std::abs(mean(x).item<double>() - 0.1) < 1e-15);
+
+  auto y = array({0.5, 1.0, 2.0, 4.0}, float64);
+  CHECK(allclose(exp(log(y)), y, 1e-14, 0).item<bool>());
+  CHECK(allclose(erf(erfinv(y / 8)), y / 8, 1e-14, 0).item<bool>());
+  CHECK_EQ(argmax(y).item<uint32_t>(), 3);
+  CHECK(array_equal(
+            sort(array({2.0, -1.0, 3.0}, float64)),
+            array({-1.0, 2.0, 3.0}, float64))
+            .item<bool>());
+  CHECK(array_equal(cumsum(y, 0), array({0.5, 1.5, 3.5, 7.5}, float64))
+            .item<bool>());
+
+  // Matmul with transposed inputs
+  auto a = reshape(astype(arange(6), float64), {2, 3});
+  auto b = transpose(a);
+  auto c = matmul(a, b);
+  CHECK_EQ(c.dtype(), float64);
+  CHECK(array_equal(c, array({5.0, 14.0, 14.0, 50.0}, {2, 2}, float64))
+            .item<bool>());
+  c = matmul(b, a);
+  auto expected_c = array(
+      {9.0, 12.0, 15.0, 12.0, 17.0, 22.0, 15.0, 22.0, 29.0}, {3, 3}, float64);
+  CHECK(array_equal(c, expected_c).item<bool>());
+
+  // Real FFTs of double inputs are computed in double precision
+  auto signal = astype(random::normal({1000}), float64);
+  auto spectrum = fft::rfft(signal);
+  CHECK_EQ(spectrum.dtype(), complex64);
+  auto expected = fft::rfft(astype(signal, float32));
+  CHECK(allclose(spectrum, expected, 1e-4, 1e-4).item<bool>());
+
+  set_default_device(device);
+}
@@ -139,6 +139,20 @@ TEST_CASE("test random bits") {
     CHECK(array_equal(x, expected).item<bool>());
   }
 
+  // Outputs long enough to be generated in blocks and across threads
+  {
+    auto key = random::key(1);
+    auto x = random::bits({100001}, key);
+    auto idx = array({0, 50000, 50001, 100000});
+    auto expected = array({4019375526u, 2366884159u, 1808902067u, 3941093882u});
+    CHECK(array_equal(take(x, idx), expected).item<bool>());
+
+    x = random::bits({3, 4099}, 1, key);
+    idx = array({0, 4098, 8197, 12296});
+    expected = array({198, 39, 82, 242}, uint8);
+    CHECK(array_equal(take(reshape(x, {-1}), idx), expected).item<bool>());
+  }
+
   {
     auto key = array({0u, 0u, 1u, 1u}, {2, 2});
     auto shape = std::vector<int>{3};
@@ -365,6 +379,58 @@ TEST_CASE("test random uniform") {
     CHECK(!all(equal(out, array(0.0f))).item<bool>());
     CHECK(abs(float(mean(out).item<bfloat16_t>()) - 0.5f) < 0.02);
   }
+
+  // The samples match the same computation composed from the random bits
+  {
+    auto key = random::key(3);
+    auto bits = random::bits({1000}, key);
+    auto u = divide(bits, array(float(UINT32_MAX)));
+    u = minimum(u, array(std::nextafter(1.0f, 0.0f)));
+    auto low = array({-1.0f, 0.5f, 2.0f, 3.0f}, {4, 1});
+    auto high = array(4.0f);
+    u = reshape(u, {4, 250});
+    auto expected = add(multiply(subtract(high, low), u), low);
+    auto out = random::uniform(low, high, {4, 250}, float32, key);
+    CHECK(array_equal(out, expected).item<bool>());
+
+    bits = random::bits({1001}, 2, key);
+    auto u16 = astype(divide(bits, array(float(UINT16_MAX))), float16);
+    u16 = minimum(u16, array(float16_t(0.99951171875f)));
+    out = random::uniform({1001}, float16, key);
+    CHECK(array_equal(out, u16).item<bool>());
+
+    // Differentiate with respect to the bounds
+    auto fn = [&key](std::vector<array> x) {
+      auto out = random::uniform(x[0], x[1], {4}, float32, key);
+      return std::vector<array>{out};
+    };
+    u = random::uniform({4}, float32, key);
+    auto [outs, grads] = vjp(fn, {array(1.0f), array(3.0f)}, {ones({4})});
+    CHECK(allclose(grads[0], sum(subtract(array(1.0f), u))).item<bool>());
+    CHECK(allclose(grads[1], sum(u)).item<bool>());
+  }
+
+  // Vmap over the keys or the bounds
+  {
+    auto keys = random::split(random::key(5), 3);
+    auto low = array({0.0f, 1.0f, 2.0f});
+    auto fn = [](array k, array l) {
+      return random::uniform(l, array(5.0f), {7}, float32, k);
+    };
+    auto out = vmap(fn, 0, 0)(keys, low);
+    for (int i = 0; i < 3; ++i) {
+      auto k = take(keys, array(i), 0);
+      auto expected = fn(k, take(low, array(i), 0));
+      CHECK(array_equal(take(out, array(i), 0), expected).item<bool>());
+    }
+
+    auto key = random::key(5);
+    out = vmap(fn, -1, 0)(key, low);
+    for (int i = 0; i < 3; ++i) {
+      auto expected = fn(key, take(low, array(i), 0));
+      CHECK(array_equal(take(out, array(i), 0), expected).item<bool>());
+    }
+  }
 }
 
 TEST_CASE("test random normal") {
@@ -416,6 +482,19 @@ TEST_CASE("test random normal") {
     CHECK(all(less(abs(out), array(inf))).item<bool>());
     CHECK(abs(float(mean(out).item<bfloat16_t>())) < 0.1);
   }
+
+  // The samples match the same computation composed from the random bits
+  {
+    auto key = random::key(7);
+    auto bits = random::bits({1001}, key);
+    auto u = divide(bits, array(float(UINT32_MAX)));
+    u = minimum(u, array(std::nextafter(1.0f, 0.0f)));
+    auto low = array(std::nextafter(-1.0f, 0.0f));
+    u = add(multiply(subtract(array(1.0f), low), u), low);
+    auto expected = multiply(array(std::sqrt(2.0f)), erfinv(u));
+    auto out = random::normal({7, 11, 13}, float32, key);
+    CHECK(array_equal(out, reshape(expected, {7, 11, 13})).item<bool>());
+  }
 }
 
 TEST_CASE("test random randint") {
@@ -501,6 +580,17 @@ TEST_CASE("test random bernoulli") {
   // Check wrong key type or shape
   auto key = array({0, 0}, {1, 2});
   CHECK_THROWS_AS(random::bernoulli(array(0.5), key), std::invalid_argument);
+
+  // The samples match the comparison with uniform samples
+  key = random::key(11);
+  p = array({0.1f, 0.5f, 0.9f});
+  x = random::bernoulli(p, {1000, 3}, key);
+  auto expected = less(random::uniform({1000, 3}, float32, key), p);
+  CHECK(array_equal(x, expected).item<bool>());
+  p = astype(p, bfloat16);
+  x = random::bernoulli(p, {1000, 3}, key);
+  expected = less(random::uniform({1000, 3}, bfloat16, key), p);
+  CHECK(array_equal(x, expected).item<bool>());
 }
 
 TEST_CASE("Test truncated normal") {
@@ -24,4 +24,10 @@ TEST_CASE("test type promotion") {
     std::vector<array> arrs = {array(0, int32), array(false), array(0.0f)};
     CHECK_EQ(result_type(arrs), float32);
   }
+
+  for (auto t : {bool_, uint64, int64, float16, float32, bfloat16}) {
+    CHECK_EQ(promote_types(t, float64), float64);
+    CHECK_EQ(promote_types(float64, t), float64);
+  }
+  CHECK_EQ(promote_types(float64, complex64), complex64);
 }
@@ -27,6 +27,16 @@ TEST_CASE("test simple vmap") {
     CHECK(array_equal(vfun(x), expected).item<bool>());
   }
 
+  // vmap slice
+  {
+    auto x = array({0, 1, 2, 3, 4, 5, 6, 7}, {2, 4});
+    auto vfun = vmap([](array input) { return slice(input, {1}, {4}, {2}); });
+    CHECK(array_equal(vfun(x), array({1, 3, 5, 7}, {2, 2})).item<bool>());
+
+    vfun = vmap([](array input) { return slice(input, {1}, {2}); }, 1, 1);
+    CHECK(array_equal(vfun(x), array({4, 5, 6, 7}, {1, 4})).item<bool>());
+  }
+
   // vmap broadcast
   {
     auto fun = [](array input) { return broadcast_to(input, {4, 2}); };